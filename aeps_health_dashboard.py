@@ -11,6 +11,24 @@ import os
 import warnings
 from dotenv import load_dotenv
 import json
+import re
+from provision_summary_tables import build_agent_month_rollup_sql, build_summary_select_sql, summary_table_ref
+from query_scan_analyzer import QUERY_CATALOG, analyze_query, analyze_registered, append_report, register_query
+from tile_query_deadlines import wait_with_deadline, is_query_stale, TILE_QUERY_TIMEOUTS
+from sheets_session import authorize_sheets, get_worksheet_df, register_worksheets
+from sheets_ingest import load_typed_worksheet, parse_numeric_frame
+from bugs_source import load_bugs_snapshot
+from local_sheets import get_local_sheets_client
+from anomaly_processing import process_anomaly_data
+from anomaly_engine import gap_spread
+from bank_error_cube import DEFAULT_THRESHOLD_PP, BankErrorCube
+from churn_cohorts import ChurnCohorts
+from uptime_processing import find_date_columns, iter_uptime_chunks, process_uptime_frame, uptime_chunk_rows
+from intraday_monitor import (INTRADAY_MAX_BYTES_BILLED, INTRADAY_MONITORING, INTRADAY_POLL_SECONDS, intraday_version,
+                              bio_auth_buckets_sql, hour_summary, pull_intraday, transaction_buckets_sql)
+from tile_grid import tile_grid
+from tile_registry import (evaluate_tiles, fallback_tiles, median_band_status, metric_query_names, register_tile,
+                           static_metrics, tile_status, tiles_in_tier, trend_direction)
 
 # Load environment variables
 load_dotenv()
@@ -40,6 +58,13 @@ except ImportError:
     REDIS_AVAILABLE = False
     print("⚠️ Redis cache module not found. Using standard Streamlit caching.")
 
+# Import local DuckDB backend (with fallback if not available)
+try:
+    from local_bigquery import LocalBigQueryClient
+    LOCAL_BIGQUERY_AVAILABLE = True
+except ImportError:
+    LOCAL_BIGQUERY_AVAILABLE = False
+
 # Initialize session state for persistent cache tracking across browser refreshes
 def init_cache_data():
     """Initialize cache data in session state for persistence across browser refreshes"""
@@ -129,9 +154,7 @@ def should_refresh_tile(tile_name):
     current_time = datetime.now()
     
     # Core AEPS tiles - Fixed hourly refresh (9:59AM, 10:59AM, 11:59AM, etc.)
-    core_aeps_tiles = ['2fa_success', 'transaction_success', 'gtv_performance', 'bank_error', 'platform_uptime']
-    
-    if tile_name in core_aeps_tiles:
+    if tile_name in tiles_in_tier('hourly'):
         # Check if current time matches fixed refresh times (9:59AM, 10:59AM, etc.)
         current_minute = current_time.minute
         current_hour = current_time.hour
@@ -188,13 +211,14 @@ def get_tile_refresh_status():
     init_cache_data()
     status = {}
     current_time = datetime.now()
+    hourly_tiles = tiles_in_tier('hourly')
     
     for tile_name, last_refresh in st.session_state.tile_refresh_times.items():
         if not last_refresh:
             status[tile_name] = "Never refreshed"
         else:
             time_diff = current_time - last_refresh
-            if tile_name in ['2fa_success', 'transaction_success', 'gtv_performance', 'bank_error', 'platform_uptime']:
+            if tile_name in hourly_tiles:
                 # Core AEPS - hourly
                 if time_diff.total_seconds() < 3600:
                     status[tile_name] = f"Fresh ({time_diff.seconds//60} min ago)"
@@ -456,8 +480,8 @@ st.markdown("""
 
 # Bank Error Analysis Functions
 @smart_cache_data('bank_error')
-def load_bank_error_data(_client: bigquery.Client) -> pd.DataFrame:
-    """Load bank error analysis data"""
+def load_bank_error_cube(_client: bigquery.Client) -> BankErrorCube:
+    """Load the bank x RC x response message x month error matrix (last 3 months + current) as a cube"""
     query = f"""
     -- Pre-aggregate t2 to reduce scanned bytes
     WITH t2_agg AS (
@@ -516,7 +540,7 @@ def load_bank_error_data(_client: bigquery.Client) -> pd.DataFrame:
         GROUP BY 1,2
     ),
 
-    -- Combine errors with total transactions
+    -- Combine errors with total transactions; alerts are computed from the cube
     combined AS (
         SELECT 
             b.month,
@@ -524,53 +548,23 @@ def load_bank_error_data(_client: bigquery.Client) -> pd.DataFrame:
             b.rc,
             b.response_message,
             b.error_txn,
-            t.total_txn,
-            SAFE_DIVIDE(b.error_txn, t.total_txn)*100 AS error_pct
+            t.total_txn
         FROM base b
         JOIN tot_txn t
           ON b.month = t.month
           AND b.cust_bank_name = t.cust_bank_name
-    ),
-
-    -- Compute last month and 3-month average for alert thresholds
-    alerts AS (
-        SELECT
-            c.*,
-            LAG(error_pct) OVER (PARTITION BY cust_bank_name, rc ORDER BY month) AS prev_month_error_pct,
-            AVG(error_pct) OVER (PARTITION BY cust_bank_name, rc ORDER BY month ROWS BETWEEN 3 PRECEDING AND 1 PRECEDING) AS last_3month_avg_error_pct
-        FROM combined c
-    ),
-
-    -- Final alerts with threshold logic
-    final AS (
-        SELECT
-            month,
-            cust_bank_name,
-            rc,
-            response_message,
-            error_txn,
-            total_txn,
-            error_pct,
-            prev_month_error_pct,
-            last_3month_avg_error_pct,
-            CASE 
-                WHEN prev_month_error_pct IS NOT NULL AND error_pct - prev_month_error_pct >= 0.5 
-                    THEN 'ALERT: Last Month Threshold Crossed'
-            END AS alert_last_month,
-            CASE 
-                WHEN last_3month_avg_error_pct IS NOT NULL AND error_pct - last_3month_avg_error_pct >= 0.5 
-                    THEN 'ALERT: 3-Month Avg Threshold Crossed'
-            END AS alert_last_3month_avg
-        FROM alerts
     )
 
     SELECT *
-    FROM final
-    WHERE (alert_last_month IS NOT NULL OR alert_last_3month_avg IS NOT NULL)
-      AND month = DATE_TRUNC(DATE_SUB(CURRENT_DATE(), INTERVAL 1 DAY), MONTH)
+    FROM combined
     ORDER BY cust_bank_name, rc, month
     """
-    return _client.query(query).result().to_dataframe()
+    rows = run_tile_query(_client, 'bank_error', query).result().to_dataframe()
+    return BankErrorCube.from_frame(rows)
+
+def load_bank_error_data(_client: bigquery.Client, month=None, threshold=DEFAULT_THRESHOLD_PP, banks=None) -> pd.DataFrame:
+    """Bank error alert rows, recomputed from the cached cube (latest month, 0.5pp threshold by default)"""
+    return load_bank_error_cube(_client).alerts(month=month, threshold=threshold, banks=banks)
 
 # ============================================================================
 # AI-POWERED RECOMMENDATION ENGINE
@@ -957,7 +951,23 @@ def show_bank_error_dashboard():
     try:
         client = get_bigquery_client()
         with st.spinner("Loading bank error data from BigQuery..."):
-            df = load_bank_error_data(client)
+            cube = load_bank_error_cube(client)
+        
+        # Alert slices are recomputed from the in-memory cube - no new query
+        month_options = list(cube.months)
+        col1, col2, col3 = st.columns([1, 1, 2])
+        with col1:
+            selected_month = st.selectbox(
+                "Month", month_options, index=len(month_options) - 1 if month_options else 0,
+                format_func=lambda m: pd.Timestamp(m).strftime('%b %Y'), key="bank_error_month"
+            ) if month_options else None
+        with col2:
+            threshold = st.number_input("Alert threshold (pp)", min_value=0.0, max_value=10.0,
+                                        value=DEFAULT_THRESHOLD_PP, step=0.1, key="bank_error_threshold")
+        with col3:
+            selected_banks = st.multiselect("Banks", list(cube.banks), key="bank_error_banks")
+        
+        df = cube.alerts(month=selected_month, threshold=threshold, banks=selected_banks or None)
         
         # Generate insights
         insights = generate_bank_insights(df)
@@ -1102,6 +1112,24 @@ def show_bank_error_dashboard():
                                title="Error Distribution (Top 10 Banks)")
                     st.plotly_chart(fig, use_container_width=True, key="bank_error_pie_chart")
         
+        # RC mix of a single bank
+        if not cube.empty:
+            with st.expander("🔎 Bank RC Mix", expanded=False):
+                mix_bank = st.selectbox("Bank", selected_banks or list(cube.banks), key="bank_error_mix_bank")
+                rc_mix = cube.bank_rc_mix(mix_bank, month=selected_month)
+                if rc_mix.empty:
+                    st.info("No error transactions for this bank in the selected month")
+                else:
+                    fig = px.bar(rc_mix.head(15), x="rc", y="error_txn", hover_data=["error_pct", "share_pct"],
+                               title=f"Error Transactions by RC - {mix_bank}")
+                    st.plotly_chart(fig, use_container_width=True, key="bank_error_rc_mix_chart")
+                    st.dataframe(rc_mix.rename(columns={
+                        'rc': 'RC',
+                        'error_txn': 'Error Transactions',
+                        'error_pct': 'Error %',
+                        'share_pct': 'Share of Bank Errors %'
+                    }), use_container_width=True)
+        
         # Raw Data
         with st.expander("📋 Raw Alert Data", expanded=False):
             if not df.empty:
@@ -1127,6 +1155,7 @@ def show_bank_error_dashboard():
                 st.info("No alert data available for the current period")
         
         st.caption(f"Data source: {os.getenv('BIGQUERY_PROJECT_ID', 'spicemoney-dwh')}.{os.getenv('BIGQUERY_DATASET_PROD', 'prod_dwh')}.{os.getenv('AEPS_TRANS_REQ_TABLE', 'aeps_trans_req')} & {os.getenv('AEPS_TRANS_RES_TABLE', 'aeps_trans_res')}")
+        st.caption(f"💾 Error cube: {len(cube.cell_bank):,} bank/RC/message cells × {len(cube.months)} months ({cube.nbytes / 1024:.0f} KB) - filters recomputed locally")
         
     except Exception as e:
         st.error(f"Error loading bank error data: {str(e)}")
@@ -1136,6 +1165,14 @@ def show_bank_error_dashboard():
 @st.cache_resource
 def get_bigquery_client():
     """Initialize BigQuery client with support for both Streamlit Cloud secrets and local file"""
+    # Offline backend: same client interface over local Parquet fixtures
+    if os.getenv('BIGQUERY_BACKEND', 'bigquery').lower() == 'local':
+        if LOCAL_BIGQUERY_AVAILABLE:
+            fixtures_dir = os.getenv('LOCAL_BIGQUERY_FIXTURES', 'fixtures')
+            st.info(f"🧪 Using local BigQuery stand-in over fixtures in {fixtures_dir}")
+            return LocalBigQueryClient(fixtures_dir)
+        st.warning("⚠️ BIGQUERY_BACKEND=local needs duckdb (pip install duckdb). Falling back to BigQuery.")
+    
     try:
         # Define scopes for BigQuery and Google Sheets
         scope = [
@@ -1218,37 +1255,80 @@ def get_table_ref(dataset, table):
     project_id = os.getenv("BIGQUERY_PROJECT_ID", "spicemoney-dwh")
     return f"`{project_id}.{dataset}.{table}`"
 
+@st.cache_data(ttl=3600)  # Cache for 1 hour - one metadata lookup per hour, not per tile
+def is_agent_month_summary_ready(_client):
+    """Check whether the agent-month summary table has been provisioned"""
+    if os.getenv('USE_AGENT_MONTH_SUMMARY', 'true').lower() != 'true':
+        return False
+    try:
+        _client.get_table(summary_table_ref().strip('`'))
+        return True
+    except Exception:
+        return False
+
+QUERY_ANALYZER_MODE = os.getenv('QUERY_ANALYZER_MODE', 'false').lower() == 'true'
+
+def run_tile_query(client, query_name, query, job_config=None):
+    """Register a tile query and start it - dry-runs it first in analyzer mode"""
+    register_query(query_name, query, job_config)
+    if QUERY_ANALYZER_MODE:
+        try:
+            append_report([analyze_query(query_name, query, client, job_config=job_config)])
+        except Exception as e:
+            print(f"⚠️ Query scan analysis failed for {query_name}: {e}")
+    # Bounded wait: an overrunning job is cancelled and replays last-known-good data
+    return wait_with_deadline(query_name, client.query(query, job_config=job_config))
+
+def is_metric_stale(metric_name):
+    """Whether any query behind a home page tile is serving last-known-good data"""
+    return any(is_query_stale(query_name) for query_name in metric_query_names().get(metric_name, []))
+
+def run_query_scan_analysis(client):
+    """Dry-run every registered query and append the results to the scan report"""
+    records = analyze_registered(client)
+    append_report(records)
+    return records
+
+def get_agent_month_sql(client, start_date_sql, end_date_sql=None):
+    """Per agent-month GTV buckets - summary table when provisioned, raw timeline otherwise"""
+    if client is not None and is_agent_month_summary_ready(client):
+        return build_summary_select_sql(summary_table_ref(), start_date_sql, end_date_sql)
+    csp_timeline_table = get_table_ref(os.getenv('BIGQUERY_DATASET_ANALYTICS', 'analytics_dwh'), os.getenv('CSP_MONTHLY_TIMELINE_TABLE', 'csp_monthly_timeline'))
+    return build_agent_month_rollup_sql(csp_timeline_table, start_date_sql, end_date_sql)
+
+# Worksheets read from each spreadsheet - fetched together in one values:batchGet
+ANOMALY_SHEET_URL = 'https://docs.google.com/spreadsheets/d/1HaW-pC5niZNm0_ii4zoXG-xR781dmDmbPjQf6W_b7Y8/edit?gid=1999363720#gid=1999363720'
+METRICS_SHEET_URL = 'https://docs.google.com/spreadsheets/d/1XyTNR14JlkM_7uHEeoQa68mLgeiAZTaCq9vR-VCff4o/edit?gid=1128769976#gid=1128769976'
+BUGS_SHEET_URL = 'https://docs.google.com/spreadsheets/d/1DLU87T3DW9ruoR_U_jVCTV8hvuVCRSw8VMWLaN1PUBU/edit?gid=0#gid=0'
+
+register_worksheets(ANOMALY_SHEET_URL, ['Dashboard'])
+register_worksheets(METRICS_SHEET_URL, ['login Success Rate', 'chatbot', 'sales_iteration', 'rfm'])
+register_worksheets(BUGS_SHEET_URL, ['Sheet1', 'Sheet2'])
+
 def get_google_sheets_client():
     """
     Initialize Google Sheets client with support for both Streamlit Cloud secrets and local file
-    Returns pygsheets client or None if not available
+    Returns pygsheets client or None if not available (authorized once per process)
     """
     try:
+        # Offline backend: recorded worksheets served from local CSV fixtures
+        if os.getenv('SHEETS_BACKEND', 'sheets').lower() == 'local':
+            return get_local_sheets_client()
+        
         if pygsheets is None:
             return None
         
         # Try loading from Streamlit secrets first (for Streamlit Cloud deployment)
         try:
             if "gcp_service_account" in st.secrets:
-                # pygsheets can use service account info directly
-                import json
-                import tempfile
-                
-                # Create a temporary file with the credentials
-                # This is needed because pygsheets.authorize() expects a file path
-                with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as temp_file:
-                    json.dump(dict(st.secrets["gcp_service_account"]), temp_file)
-                    temp_path = temp_file.name
-                
-                gc = pygsheets.authorize(service_file=temp_path)
-                
-                # Clean up temp file
-                try:
-                    os.unlink(temp_path)
-                except:
-                    pass
+                service_account_info = dict(st.secrets["gcp_service_account"])
+                private_key = service_account_info.get("private_key", "")
+                if "\\n" in private_key:
+                    service_account_info["private_key"] = private_key.replace("\\n", "\n")
                 
-                return gc
+                gc = authorize_sheets(credentials_info=service_account_info)
+                if gc is not None:
+                    return gc
         except Exception as e:
             # If secrets not found, continue to file-based loading
             pass
@@ -1268,8 +1348,7 @@ def get_google_sheets_client():
             credentials_file_path = credentials_file
         
         if os.path.exists(credentials_file_path):
-            gc = pygsheets.authorize(service_file=credentials_file_path)
-            return gc
+            return authorize_sheets(service_file=credentials_file_path)
         else:
             return None
             
@@ -1384,7 +1463,7 @@ def get_bank_wise_transaction_data(selected_date, client):
         ORDER BY success_rate DESC
         """
         
-        result = client.query(query).result()
+        result = run_tile_query(client, 'bank_wise_transactions', query).result()
         df = result.to_dataframe()
         
         if df.empty:
@@ -1494,28 +1573,9 @@ def get_distributor_churn_data():
          SUM(txn_sma) AS txn_sma
         FROM month_list m
         JOIN (
-        SELECT
-           agent_id,
-           DATE_TRUNC(PARSE_DATE('%Y%m', CAST(year_month AS STRING)), MONTH) AS txn_month,
-
-           -- GTV buckets
-           COALESCE(SUM(dmt_gtv_success + cms_gtv_success + bbps_gtv_success + recharge_gtv_success), 0) AS cash_gtv,
-           COALESCE(SUM(aeps_gtv_success + ap_gtv_success + matm_gtv_success), 0) AS cash_out_gtv,
-           COALESCE(SUM(m2b_gtv_success), 0) AS m2b,
-           COALESCE(SUM(total_gtv_amt), 0) AS total_gtv_amt,
-
-           -- txn flags (monthly level)
-           CASE WHEN SUM(dmt_gtv_success + cms_gtv_success + bbps_gtv_success + recharge_gtv_success) > 0 THEN 1 ELSE 0 END AS cashin_txn_sma,
-           CASE WHEN SUM(aeps_gtv_success + ap_gtv_success + matm_gtv_success) > 0 THEN 1 ELSE 0 END AS cashout_txn_sma,
-           CASE WHEN SUM(m2b_gtv_success) > 0 THEN 1 ELSE 0 END AS m2b_txn_sma,
-           CASE WHEN SUM(total_gtv_amt) > 0 THEN 1 ELSE 0 END AS txn_sma
-         FROM {get_table_ref(os.getenv('BIGQUERY_DATASET_ANALYTICS', 'analytics_dwh'), os.getenv('CSP_MONTHLY_TIMELINE_TABLE', 'csp_monthly_timeline'))}
-         WHERE PARSE_DATE('%Y%m', CAST(year_month AS STRING))
-               BETWEEN DATE_SUB(s_date, INTERVAL 4 MONTH)
-                   AND DATE_SUB(s_date, INTERVAL 1 DAY)
-         GROUP BY agent_id, DATE_TRUNC(PARSE_DATE('%Y%m', CAST(year_month AS STRING)), MONTH)
+        {get_agent_month_sql(client, "DATE_SUB(s_date, INTERVAL 4 MONTH)", "DATE_SUB(s_date, INTERVAL 1 DAY)")}
         ) a
-         ON a.txn_month = m.month_start
+         ON a.month_start = m.month_start
         JOIN {get_table_ref(os.getenv('BIGQUERY_DATASET_PROD', 'prod_dwh'), os.getenv('CLIENT_MASTER_TABLE', 'client_master'))} b
          ON a.agent_id = b.client_id
         GROUP BY distributor_id, m.label
@@ -1620,7 +1680,7 @@ def get_distributor_churn_data():
         ORDER BY SUM_ALL
         """
         
-        df = client.query(distributor_churn_query).to_dataframe()
+        df = run_tile_query(client, 'distributor_churn', distributor_churn_query).to_dataframe()
         
         if df.empty:
             # st.warning("⚠️ No distributor churn data available")
@@ -1659,7 +1719,7 @@ def get_priority_distributor_churn_data():
         and smas_affected>=5
         """
         
-        df = client.query(priority_churn_query).to_dataframe()
+        df = run_tile_query(client, 'priority_distributor_churn', priority_churn_query).to_dataframe()
         
         if df.empty:
             # st.warning("⚠️ No priority distributor churn data available")
@@ -1806,7 +1866,7 @@ def get_rfm_fraud_data():
         order by year_month
         """
         
-        df = client.query(rfm_query).to_dataframe()
+        df = run_tile_query(client, 'rfm_score', rfm_query).to_dataframe()
         return df
         
     except Exception as e:
@@ -1944,9 +2004,9 @@ def get_new_user_analytics():
         """
         
         # Execute queries
-        overall_df = client.query(overall_query).to_dataframe()
-        md_wise_df = client.query(md_wise_query).to_dataframe()
-        activation_df = client.query(aeps_activation_query).to_dataframe()
+        overall_df = run_tile_query(client, 'new_users_overall', overall_query).to_dataframe()
+        md_wise_df = run_tile_query(client, 'new_users_md_wise', md_wise_query).to_dataframe()
+        activation_df = run_tile_query(client, 'new_users_activation', aeps_activation_query).to_dataframe()
         
         return overall_df, md_wise_df, activation_df
         
@@ -1962,25 +2022,15 @@ def get_cash_product_analytics():
         if not client:
             return None
             
-        # Get table references
-        csp_timeline_table = get_table_ref(os.getenv('BIGQUERY_DATASET_ANALYTICS', 'analytics_dwh'), os.getenv('CSP_MONTHLY_TIMELINE_TABLE', 'csp_monthly_timeline'))
+        # Per agent-month buckets (summary table when provisioned)
+        agent_month_sql = get_agent_month_sql(client, "DATE_SUB(DATE_TRUNC(CURRENT_DATE(), MONTH), INTERVAL 2 MONTH)")
         
         # Cash product analytics query
         cash_product_query = f"""
         WITH monthly_data AS (
-          SELECT
-            DATE_TRUNC(PARSE_DATE('%Y%m', CAST(year_month AS STRING)), MONTH) AS month_start,
-            agent_id,
-            -- Cash products: DMT, CMS, BBPS, Recharge
-            COALESCE(SUM(dmt_gtv_success + cms_gtv_success + bbps_gtv_success + recharge_gtv_success), 0) AS cash_gtv,
-            COALESCE(SUM(dmt_txn_cnt_success + cms_txn_cnt_success + bbps_txn_cnt_success + recharge_txn_cnt_success), 0) AS cash_txn_cnt,
-            -- AEPS products for penetration calculation
-            COALESCE(SUM(aeps_gtv_success), 0) AS aeps_gtv,
-            COALESCE(SUM(aeps_txn_cnt_success), 0) AS aeps_txn_cnt
-          FROM {csp_timeline_table}
-          WHERE PARSE_DATE('%Y%m', CAST(year_month AS STRING))
-                >= DATE_SUB(DATE_TRUNC(CURRENT_DATE(), MONTH), INTERVAL 2 MONTH)
-          GROUP BY month_start, agent_id
+          -- Cash products: DMT, CMS, BBPS, Recharge; AEPS for penetration calculation
+          SELECT month_start, agent_id, cash_gtv, cash_txn_cnt, aeps_gtv, aeps_txn_cnt
+          FROM ({agent_month_sql})
         ),
         month_summary AS (
           SELECT
@@ -2012,7 +2062,7 @@ def get_cash_product_analytics():
         LIMIT 3
         """
         
-        df = client.query(cash_product_query).to_dataframe()
+        df = run_tile_query(client, 'cash_product', cash_product_query).to_dataframe()
         
         if df.empty:
             return None
@@ -2031,8 +2081,9 @@ def get_stable_users_analytics():
         if not client:
             return None, None
             
-        # Get table references
-        csp_timeline_table = get_table_ref(os.getenv('BIGQUERY_DATASET_ANALYTICS', 'analytics_dwh'), os.getenv('CSP_MONTHLY_TIMELINE_TABLE', 'csp_monthly_timeline'))
+        # Per agent-month buckets (summary table when provisioned)
+        sp_agent_month_sql = get_agent_month_sql(client, "DATE_SUB(DATE_TRUNC(CURRENT_DATE(), MONTH), INTERVAL 7 MONTH)")
+        tail_agent_month_sql = get_agent_month_sql(client, "DATE_SUB(DATE_TRUNC(CURRENT_DATE(), MONTH), INTERVAL 15 MONTH)")
         
         # Stable SP agents query
         stable_sp_query = f"""
@@ -2045,13 +2096,10 @@ def get_stable_users_analytics():
         monthly_gtv AS (
           SELECT
             agent_id,
-            DATE_TRUNC(PARSE_DATE('%Y%m', CAST(year_month AS STRING)), MONTH) AS month_start,
-            SUM(COALESCE(aeps_gtv_success, 0)) AS monthly_gtv,
-            SUM(COALESCE(aeps_txn_cnt_success, 0)) AS monthly_txn_cnt
-          FROM {csp_timeline_table}
-          WHERE PARSE_DATE('%Y%m', CAST(year_month AS STRING))
-                >= DATE_SUB(DATE_TRUNC(CURRENT_DATE(), MONTH), INTERVAL 7 MONTH) -- enough lookback
-          GROUP BY agent_id, DATE_TRUNC(PARSE_DATE('%Y%m', CAST(year_month AS STRING)), MONTH)
+            month_start,
+            aeps_gtv AS monthly_gtv,
+            aeps_txn_cnt AS monthly_txn_cnt
+          FROM ({sp_agent_month_sql}) -- enough lookback
         ),
         -- Step 3: Restrict to last 3 months window for each ref_month
         last3_gtv AS (
@@ -2116,13 +2164,10 @@ def get_stable_users_analytics():
         monthly_gtv AS (
           SELECT
             agent_id,
-            DATE_TRUNC(PARSE_DATE('%Y%m', CAST(year_month AS STRING)), MONTH) AS month_start,
-            SUM(COALESCE(aeps_gtv_success, 0)) AS monthly_gtv,
-            SUM(COALESCE(aeps_txn_cnt_success, 0)) AS monthly_txn_cnt
-          FROM {csp_timeline_table}
-          WHERE PARSE_DATE('%Y%m', CAST(year_month AS STRING))
-                >= DATE_SUB(DATE_TRUNC(CURRENT_DATE(), MONTH), INTERVAL 15 MONTH)
-          GROUP BY agent_id, DATE_TRUNC(PARSE_DATE('%Y%m', CAST(year_month AS STRING)), MONTH)
+            month_start,
+            aeps_gtv AS monthly_gtv,
+            aeps_txn_cnt AS monthly_txn_cnt
+          FROM ({tail_agent_month_sql})
         ),
         -- Step 3: Keep only last 3 months window for each ref_month
         last3_gtv AS (
@@ -2175,8 +2220,8 @@ def get_stable_users_analytics():
         """
         
         # Execute queries
-        stable_sp_df = client.query(stable_sp_query).to_dataframe()
-        stable_tail_df = client.query(stable_tail_query).to_dataframe()
+        stable_sp_df = run_tile_query(client, 'stable_users_sp', stable_sp_query).to_dataframe()
+        stable_tail_df = run_tile_query(client, 'stable_users_tail', stable_tail_query).to_dataframe()
         
         return stable_sp_df, stable_tail_df
         
@@ -2200,10 +2245,8 @@ def get_anomaly_data_from_sheets():
             # st.warning("⚠️ Google Sheets credentials not found. Using sample data.")
             return get_sample_anomaly_data()
         
-        # Use pygsheets to access the spreadsheet (matching your working code)
-        sh = gc.open_by_url('https://docs.google.com/spreadsheets/d/1HaW-pC5niZNm0_ii4zoXG-xR781dmDmbPjQf6W_b7Y8/edit?gid=1999363720#gid=1999363720')
-        worksheet = sh.worksheet_by_title('Dashboard')
-        df = worksheet.get_as_df()
+        # Typed worksheet (numeric columns already parsed) from the spreadsheet batch
+        df = load_typed_worksheet(gc, ANOMALY_SHEET_URL, 'Dashboard')
         
         if df.empty:
             st.warning("⚠️ No data found in Google Sheets. Using sample data.")
@@ -2472,187 +2515,246 @@ def get_sample_anomaly_data():
     }
     return sample_data
 
-def process_anomaly_data(df):
-    """Process the raw Google Sheets data into a structured format with proper anomaly detection for inverse metrics"""
-    processed_data = {}
-    
-    # Define metrics where lower values are better (inverse metrics)
-    inverse_metrics = {
-        '2FA per user',
-        'Login per user', 
-        'Login_per_SMA',
-        '2FA per user rate',
-        'Login per user rate',
-        'Per-User Auth Rate',
-        'Auth per user'
-    }
-    
-    # Helper function to safely convert values to float
-    def safe_float_convert(value, default=0.0):
-        """Safely convert various data types to float"""
-        if pd.isna(value) or value == '' or value is None:
-            return default
-        
-        if isinstance(value, (int, float)):
-            return float(value)
-        
-        if isinstance(value, str):
-            # Remove percentage signs and other non-numeric characters
-            cleaned = value.replace('%', '').replace(',', '').strip()
-            try:
-                return float(cleaned)
-            except (ValueError, TypeError):
-                return default
-        
-        return default
-    
-    def determine_anomaly_status(current, median, lower_bound, upper_bound, is_inverse=False):
-        """Determine anomaly status based on current value vs bounds, considering metric direction"""
-        if is_inverse:
-            # For inverse metrics (lower is better):
-            # - Below lower bound = GOOD (Above Range is actually good)
-            # - Above upper bound = BAD (Below Range is actually bad)
-            if current < lower_bound:
-                return 'Above Range'  # Good performance (lower than expected)
-            elif current > upper_bound:
-                return 'Below Range'  # Poor performance (higher than expected)
-            else:
-                return 'Within Range'
-        else:
-            # For normal metrics (higher is better):
-            # - Above upper bound = GOOD (Above Range is good)
-            # - Below lower bound = BAD (Below Range is bad)
-            if current > upper_bound:
-                return 'Above Range'  # Good performance
-            elif current < lower_bound:
-                return 'Below Range'  # Poor performance
-            else:
-                return 'Within Range'
-    
-    # Group by metric name
-    for _, row in df.iterrows():
-        metric = row.get('Metric', '')
-        if not metric or pd.isna(metric):
-            continue
-            
-        # Extract values with safe conversion
-        current_value = safe_float_convert(row.get('FTD Data', 0))
-        median_value = safe_float_convert(row.get('Median 90 Day', 0))
-        lower_bound = safe_float_convert(row.get('-2STD', 0))
-        upper_bound = safe_float_convert(row.get('2STD', 0))
-        date = str(row.get('Date', '')).strip()
+# Churn Analytics Functions (from churn_analysis_app.py)
+CHURN_TEXT_COLUMNS = ["reason", "churn_reason", "remarks", "tag", "category"]
+CHURN_DETAIL_COLUMNS = ["churn_id", "per_growth", "next_churn_cycle_start"]
+CHURN_CATEGORIES = ["P0", "P1", "P2", "subsidy_churn", "tech_churn", "distributor_churn"]
+
+# Explicit churn priority values (normalized: stripped, lowercased, spaces -> underscores)
+CHURN_PRIORITY_MAP = {
+    "p0": "P0",
+    "p1": "P1",
+    "p2": "P2",
+    "subsidy_churn": "subsidy_churn",
+    "tech_churn": "tech_churn",
+    "technical_churn": "tech_churn",
+    "distributor_churn": "distributor_churn",
+    "distibutor_churn": "distributor_churn",  # common typo
+}
+
+# Reason-text heuristics, in precedence order (first match wins)
+CHURN_TEXT_RULES = [
+    ("subsidy_churn", ["subsidy", "rider"]),
+    ("tech_churn", ["tech", "technical", "system", "app"]),
+    ("distributor_churn", ["distributor", "dist"]),
+]
+
+def churn_category_sql(priority_sql="priority", text_sql="churn_text"):
+    """category6 CASE generated from CHURN_PRIORITY_MAP and CHURN_TEXT_RULES, so the SQL cannot drift from them"""
+    priority_cases = "".join(f"\n              WHEN '{value}' THEN '{category}'" for value, category in CHURN_PRIORITY_MAP.items())
+    text_cases = "".join(
+        f"\n                WHEN REGEXP_CONTAINS({text_sql}, r'{'|'.join(re.escape(keyword) for keyword in keywords)}') THEN '{category}'"
+        for category, keywords in CHURN_TEXT_RULES
+    )
+    return f"""CASE REPLACE(LOWER(TRIM({priority_sql})), ' ', '_'){priority_cases}
+              ELSE CASE{text_cases}
+                ELSE 'P2'
+              END
+            END"""
+
+def get_churn_table():
+    """Churn status table reference"""
+    return get_table_ref(os.getenv('BIGQUERY_DATASET_ANALYTICS', 'analytics_dwh'), os.getenv('AEPS_CHURN_STATUS_TABLE', 'Aeps_MoM_Churn_status'))
+
+@st.cache_data(ttl=3600)  # Cache for 1 hour - schema lookup only
+def get_churn_table_columns(_client):
+    """Column names of the churn status table - optional columns are only referenced when present"""
+    table = _client.get_table(get_churn_table().strip('`'))
+    return [field.name for field in table.schema]
+
+def build_churn_metrics_sql(columns, with_state=False):
+    """Churn metric CTEs (ends with churn_metrics): typed churn columns, GTV decline amount / % and category6"""
+    def num(col):
+        return f"SAFE_CAST(c.{col} AS FLOAT64)" if col in columns else "CAST(NULL AS FLOAT64)"
+    
+    winback_col = "winback_status" if "winback_status" in columns else next((c for c in columns if "winback" in c.lower()), None)
+    winback_sql = f"CAST(TRUNC(COALESCE(SAFE_CAST(c.{winback_col} AS FLOAT64), 0)) AS INT64)" if winback_col else "0"
+    priority_sql = "COALESCE(CAST(c.priority AS STRING), 'Unknown')" if "priority" in columns else "'Unknown'"
+    churn_date_sql = "SAFE_CAST(c.churn_date AS DATE)" if "churn_date" in columns else "CAST(NULL AS DATE)"
+    text_sql = " || ' ' || ".join(
+        f"COALESCE(LOWER(CAST(c.{col} AS STRING)), '')" for col in CHURN_TEXT_COLUMNS if col in columns
+    ) or "''"
+    detail_sql = "".join(f"\n            c.{col}," for col in CHURN_DETAIL_COLUMNS if col in columns and col != "per_growth")
+    
+    state_sql = "'Unknown'"
+    state_join = ""
+    if with_state:
+        client_details_table = get_table_ref(os.getenv('BIGQUERY_DATASET_PROD', 'prod_dwh'), os.getenv('CLIENT_DETAILS_TABLE', 'client_details'))
+        state_sql = "COALESCE(cd.distr_state, 'Unknown')"
+        state_join = f"""
+          LEFT JOIN (
+            SELECT retailer_id, ANY_VALUE(distr_state) AS distr_state
+            FROM {client_details_table}
+            GROUP BY retailer_id
+          ) cd ON CAST(c.agent_id AS STRING) = cd.retailer_id"""
+    
+    return f"""
+        churn_base AS (
+          SELECT
+            c.agent_id,{detail_sql}
+            {priority_sql} AS priority,
+            {churn_date_sql} AS churn_date,
+            {num('churn_threshold')} AS churn_threshold,
+            {num('per_growth')} AS per_growth,
+            {winback_sql} AS winback_status,
+            {num('gtv_churn_month_prev')} AS gtv_churn_month_prev,
+            {num('gtv_churn_month')} AS gtv_churn_month,
+            {state_sql} AS distr_state,
+            {text_sql} AS churn_text
+          FROM {get_churn_table()} c{state_join}
+        ),
+        churn_metrics AS (
+          SELECT
+            * EXCEPT (churn_text),
+            COALESCE(gtv_churn_month_prev, 0) - COALESCE(gtv_churn_month, 0) AS decline_amount,
+            ROUND(SAFE_DIVIDE(COALESCE(gtv_churn_month_prev, 0) - COALESCE(gtv_churn_month, 0),
+                              NULLIF(gtv_churn_month_prev, 0)) * 100, 2) AS decline_pct,
+            -- Explicit priority first (CHURN_PRIORITY_MAP), then reason text (CHURN_TEXT_RULES)
+            {churn_category_sql()} AS category6
+          FROM churn_base
+        )"""
+
+def build_churn_filter_sql(columns, priorities=None, date_range=None, threshold_range=None):
+    """WHERE clause and query parameters for the churn dashboard filters"""
+    conditions = ["TRUE"]
+    params = []
+    if priorities is not None:
+        conditions.append("priority IN UNNEST(@priorities)")
+        params.append(bigquery.ArrayQueryParameter("priorities", "STRING", list(priorities)))
+    if date_range is not None and "churn_date" in columns:
+        conditions.append("churn_date BETWEEN @date_from AND @date_to")
+        params.append(bigquery.ScalarQueryParameter("date_from", "DATE", date_range[0]))
+        params.append(bigquery.ScalarQueryParameter("date_to", "DATE", date_range[1]))
+    if threshold_range is not None and "churn_threshold" in columns:
+        conditions.append("churn_threshold BETWEEN @threshold_min AND @threshold_max")
+        params.append(bigquery.ScalarQueryParameter("threshold_min", "FLOAT64", float(threshold_range[0])))
+        params.append(bigquery.ScalarQueryParameter("threshold_max", "FLOAT64", float(threshold_range[1])))
+    return " AND ".join(conditions), params
+
+@st.cache_data(ttl=3600)  # Cache for 1 hour - cost optimization
+def get_churn_filter_options():
+    """Priorities and date / threshold bounds for the churn filters, aggregated in BigQuery"""
+    try:
+        client = get_bigquery_client()
+        if client is None:
+            return None
         
-        # Check if this is an inverse metric
-        is_inverse = any(inv_metric.lower() in metric.lower() for inv_metric in inverse_metrics)
+        columns = get_churn_table_columns(client)
+        query = f"""
+        WITH {build_churn_metrics_sql(columns)}
+        SELECT
+          priority,
+          COUNT(*) AS agents,
+          MIN(churn_date) AS date_min,
+          MAX(churn_date) AS date_max,
+          MIN(churn_threshold) AS threshold_min,
+          MAX(churn_threshold) AS threshold_max
+        FROM churn_metrics
+        GROUP BY priority
+        """
+        df = run_tile_query(client, 'churn_filter_options', query).result().to_dataframe()
+        if df.empty:
+            return None
         
-        # Determine anomaly status based on metric type
-        if is_inverse:
-            anomaly_status = determine_anomaly_status(current_value, median_value, lower_bound, upper_bound, is_inverse=True)
-        else:
-            # Try to get existing anomaly status from Google Sheets, but recalculate if needed
-            existing_status = str(row.get('Anamoly Detection', 'Unknown')).strip()
-            if existing_status in ['Above Range', 'Below Range', 'Within Range']:
-                anomaly_status = existing_status
-            else:
-                anomaly_status = determine_anomaly_status(current_value, median_value, lower_bound, upper_bound, is_inverse=False)
-        
-        processed_data[metric] = {
-            'current': current_value,
-            'median': median_value,
-            'lower_bound': lower_bound,
-            'upper_bound': upper_bound,
-            'anomaly_status': anomaly_status,
-            'date': date,
-            'is_inverse': is_inverse  # Add flag to track inverse metrics
+        return {
+            'columns': columns,
+            'total_agents': int(df['agents'].sum()),
+            'priorities': sorted(df['priority'].tolist()),
+            'date_min': df['date_min'].min(),
+            'date_max': df['date_max'].max(),
+            'threshold_min': float(df['threshold_min'].min()) if df['threshold_min'].notna().any() else 0.0,
+            'threshold_max': float(df['threshold_max'].max()) if df['threshold_max'].notna().any() else 0.0
         }
-    
-    return processed_data
+        
+    except Exception as e:
+        st.error(f"Error fetching churn filter options: {str(e)}")
+        return None
 
-# Churn Analytics Functions (from churn_analysis_app.py)
-@smart_cache_data('churn_rate')
-def get_churn_data():
-    """Fetch churn data from the correct table"""
+@st.cache_data(ttl=3600)  # Cache for 1 hour - cost optimization
+def get_churn_summary(priorities=None, date_range=None, threshold_range=None):
+    """Full-population churn headline metrics by priority, state, winback, decline bucket and category"""
     try:
         client = get_bigquery_client()
         if client is None:
             return pd.DataFrame()
         
-        # Get table reference
-        churn_table = get_table_ref(os.getenv('BIGQUERY_DATASET_ANALYTICS', 'analytics_dwh'), 'Aeps_MoM_Churn_status')
+        columns = get_churn_table_columns(client)
+        where_sql, params = build_churn_filter_sql(columns, priorities, date_range, threshold_range)
+        aggregates = """COUNT(*) AS agents,
+          COUNT(DISTINCT agent_id) AS distinct_agents,
+          SUM(decline_amount) AS decline_amount_sum,
+          AVG(decline_amount) AS decline_amount_avg,
+          SUM(winback_status) AS winback_count"""
         
         query = f"""
-        SELECT *
-        FROM {churn_table}
-        LIMIT 1000
+        WITH {build_churn_metrics_sql(columns, with_state=True)},
+        filtered AS (
+          SELECT * FROM churn_metrics WHERE {where_sql}
+        )
+        SELECT 'total' AS dimension, 'All' AS bucket, {aggregates} FROM filtered
+        UNION ALL
+        SELECT 'priority', priority, {aggregates} FROM filtered GROUP BY 2
+        UNION ALL
+        SELECT 'winback_status', CAST(winback_status AS STRING), {aggregates} FROM filtered GROUP BY 2
+        UNION ALL
+        SELECT 'state', distr_state, {aggregates} FROM filtered GROUP BY 2
+        UNION ALL
+        SELECT 'decline_bucket',
+          CASE
+            WHEN decline_pct IS NULL THEN 'No previous GTV'
+            WHEN decline_pct <= 0 THEN 'No decline'
+            WHEN decline_pct <= 50 THEN '0-50%'
+            WHEN decline_pct <= 80 THEN '50-80%'
+            ELSE '>80%'
+          END,
+          {aggregates}
+        FROM filtered GROUP BY 2
+        UNION ALL
+        SELECT 'category6', category6, {aggregates} FROM filtered GROUP BY 2
         """
         
-        df = client.query(query).result().to_dataframe()
-        return df
+        job_config = bigquery.QueryJobConfig(query_parameters=params)
+        return run_tile_query(client, 'churn_summary', query, job_config).result().to_dataframe()
         
     except Exception as e:
-        st.error(f"Error fetching churn data: {str(e)}")
+        st.error(f"Error fetching churn summary: {str(e)}")
         return pd.DataFrame()
 
-def compute_churn_metrics(df: pd.DataFrame) -> pd.DataFrame:
-    """Compute churn metrics from the churn data"""
-    df = df.copy()
-    for col in [
-        "gtv_churn_month_prev","gtv_churn_month","gtv_m1","gtv_m2","gtv_m3","churn_threshold","per_growth"
-    ]:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-        else:
-            df[col] = pd.NA
-    # Robust winback status handling - preserve original values
-    if "winback_status" in df.columns:
-        df["winback_status"] = pd.to_numeric(df["winback_status"], errors="coerce").fillna(0).astype(int)
-    else:
-        # try any column containing 'winback'
-        candidates = [c for c in df.columns if "winback" in str(c).lower()]
-        if candidates:
-            df["winback_status"] = pd.to_numeric(df[candidates[0]], errors="coerce").fillna(0).astype(int)
-        else:
-            df["winback_status"] = 0
-    if "churn_date" in df.columns:
-        df["churn_date"] = pd.to_datetime(df["churn_date"], errors="coerce").dt.date
-    df["decline_amount"] = df["gtv_churn_month_prev"].fillna(0) - df["gtv_churn_month"].fillna(0)
-    df["decline_pct"] = ((df["decline_amount"] / df["gtv_churn_month_prev"].replace(0, pd.NA)) * 100).round(2)
-    return df
+def get_churn_summary_rows(summary_df, dimension):
+    """Rows of one dimension from get_churn_summary, indexed by bucket"""
+    if summary_df is None or summary_df.empty:
+        return pd.DataFrame(columns=['agents', 'distinct_agents', 'decline_amount_sum', 'decline_amount_avg', 'winback_count'])
+    return summary_df[summary_df['dimension'] == dimension].set_index('bucket').drop(columns=['dimension'])
 
-def categorize_churn(row: pd.Series) -> str:
-    """Categorize churn based on priority and reason"""
-    # Prefer explicit priority if provided
-    pri_raw = str(row.get("priority", ""))
-    pri_norm = pri_raw.strip().lower().replace(" ", "_")
-
-    priority_map = {
-        "p0": "P0",
-        "p1": "P1",
-        "p2": "P2",
-        "subsidy_churn": "subsidy_churn",
-        "tech_churn": "tech_churn",
-        "technical_churn": "tech_churn",
-        "distributor_churn": "distributor_churn",
-        "distibutor_churn": "distributor_churn",  # common typo
-    }
-    if pri_norm in priority_map:
-        return priority_map[pri_norm]
-
-    # Fallback to heuristic text parsing
-    text = " ".join([
-        str(row.get("reason", "")),
-        str(row.get("churn_reason", "")),
-        str(row.get("remarks", "")),
-        str(row.get("tag", "")),
-        str(row.get("category", "")),
-    ]).lower()
-    if "subsidy" in text or "rider" in text:
-        return "subsidy_churn"
-    if any(k in text for k in ["tech", "technical", "system", "app"]):
-        return "tech_churn"
-    if any(k in text for k in ["distributor", "dist"]):
-        return "distributor_churn"
-    return "P2"
+@st.cache_data(ttl=3600)  # Cache for 1 hour - cost optimization
+def get_churn_agent_detail(priorities=None, date_range=None, threshold_range=None, limit=100, offset=0):
+    """One page of agent-level churn rows (largest decline first) for the current filters"""
+    try:
+        client = get_bigquery_client()
+        if client is None:
+            return pd.DataFrame()
+        
+        columns = get_churn_table_columns(client)
+        where_sql, params = build_churn_filter_sql(columns, priorities, date_range, threshold_range)
+        params += [
+            bigquery.ScalarQueryParameter("page_limit", "INT64", int(limit)),
+            bigquery.ScalarQueryParameter("page_offset", "INT64", int(offset))
+        ]
+        query = f"""
+        WITH {build_churn_metrics_sql(columns, with_state=True)}
+        SELECT *
+        FROM churn_metrics
+        WHERE {where_sql}
+        ORDER BY decline_amount DESC, agent_id
+        LIMIT @page_limit OFFSET @page_offset
+        """
+        
+        job_config = bigquery.QueryJobConfig(query_parameters=params)
+        return run_tile_query(client, 'churn_agent_detail', query, job_config).result().to_dataframe()
+        
+    except Exception as e:
+        st.error(f"Error fetching churn agent detail: {str(e)}")
+        return pd.DataFrame()
 
 def section_badge(text: str, color_from: str, color_to: str) -> None:
     """Create a gradient section badge"""
@@ -2676,15 +2778,8 @@ def style_table(df: pd.DataFrame, bg_color: str = "#f3f6ff", hide_index: bool =
     ])
     return sty
 
-@st.cache_data(ttl=3600)  # Cache for 1 hour - cost optimization
-def get_m2d_cash_support_data():
-    """Fetch M2D cash support data"""
-    try:
-        client = get_bigquery_client()
-        if client is None:
-            return pd.DataFrame()
-        
-        query = '''
+# Cash support extracts - one row per (state, city, distributor, agent)
+M2D_CASH_SUPPORT_QUERY = '''
         SELECT
             distr_state,
             distr_city,
@@ -2696,8 +2791,78 @@ def get_m2d_cash_support_data():
         WHERE date(log_date_time) >= '2025-01-01' AND status = 'SUCCESS'
         GROUP BY 1,2,3,4
         '''
+
+MCC_CASH_SUPPORT_QUERY = '''
+        SELECT
+            distr_state,
+            distr_city,
+            CAST(REQUEST_TO AS STRING) distributor_id,
+            CAST(REQUEST_FROM AS STRING) agent_id,
+            sum(SETTLED_AMT) mcc
+        FROM `prod_dwh.mc_requests` a
+        JOIN `prod_dwh.client_details` b ON CAST(a.REQUEST_FROM AS STRING) = b.retailer_id
+        WHERE date(REQUEST_DATE) >= '2025-01-01'
+        GROUP BY 1,2,3,4
+        '''
+
+# Streaming mode folds result pages into the per-agent aggregate instead of
+# materialising every (state, city, distributor, agent) row first
+CASH_SUPPORT_STREAMING = os.getenv('CASH_SUPPORT_STREAMING', 'true').lower() == 'true'
+CASH_SUPPORT_PAGE_SIZE = int(os.getenv('CASH_SUPPORT_PAGE_SIZE', '50000'))
+CASH_SUPPORT_COLUMNS = ['client_id', 'distributor_id', 'cash_support_amount', 'distr_state', 'distr_city']
+
+def combine_cash_support(frames, sort=False):
+    """Aggregate cash support rows (raw pages or partial aggregates) per agent-distributor"""
+    return pd.concat(frames, ignore_index=True).groupby(['client_id', 'distributor_id'], sort=sort, as_index=False).agg({
+        'cash_support_amount': 'sum',
+        'distr_state': 'first',
+        'distr_city': 'first'
+    })
+
+@st.cache_data(ttl=3600)  # Cache for 1 hour - cost optimization
+def get_agent_cash_support_streamed():
+    """Total M2D + MCC cash support per agent, folded page by page from BigQuery"""
+    try:
+        client = get_bigquery_client()
+        if client is None:
+            return pd.DataFrame()
+        
+        partials = []
+        buffered_rows = 0
+        extracts = [
+            ('m2d_cash_support', M2D_CASH_SUPPORT_QUERY, 'client_id', 'm2d'),
+            ('mcc_cash_support', MCC_CASH_SUPPORT_QUERY, 'agent_id', 'mcc')
+        ]
+        for query_name, query, agent_column, amount_column in extracts:
+            rows = run_tile_query(client, query_name, query).result(page_size=CASH_SUPPORT_PAGE_SIZE)
+            for chunk in rows.to_dataframe_iterable():
+                chunk = chunk.rename(columns={agent_column: 'client_id', amount_column: 'cash_support_amount'})
+                partials.append(combine_cash_support([chunk[CASH_SUPPORT_COLUMNS]]))
+                buffered_rows += len(partials[-1])
+                
+                # Compact once the buffered pages outgrow the running aggregate,
+                # so memory stays proportional to the number of agents
+                if len(partials) > 1 and buffered_rows >= 2 * len(partials[0]):
+                    partials = [combine_cash_support(partials)]
+                    buffered_rows = len(partials[0])
+        
+        if not partials:
+            return pd.DataFrame()
+        return combine_cash_support(partials, sort=True)[CASH_SUPPORT_COLUMNS]
+        
+    except Exception as e:
+        st.error(f"Error streaming cash support data: {str(e)}")
+        return pd.DataFrame()
+
+@st.cache_data(ttl=3600)  # Cache for 1 hour - cost optimization
+def get_m2d_cash_support_data():
+    """Fetch M2D cash support data"""
+    try:
+        client = get_bigquery_client()
+        if client is None:
+            return pd.DataFrame()
         
-        df = client.query(query).result().to_dataframe()
+        df = run_tile_query(client, 'm2d_cash_support', M2D_CASH_SUPPORT_QUERY).result().to_dataframe()
         return df
         
     except Exception as e:
@@ -2749,7 +2914,7 @@ def get_m2b_pendency_data():
                     END
             """
             
-            df = client.query(query).to_dataframe()
+            df = run_tile_query(client, 'm2b_pendency', query).to_dataframe()
             if not df.empty:
                 df['date'] = pd.to_datetime(df['date'])
                 return df
@@ -2772,144 +2937,36 @@ def get_mcc_cash_support_data():
         if client is None:
             return pd.DataFrame()
         
-        query = '''
-        SELECT
-            distr_state,
-            distr_city,
-            CAST(REQUEST_TO AS STRING) distributor_id,
-            CAST(REQUEST_FROM AS STRING) agent_id,
-            sum(SETTLED_AMT) mcc
-        FROM `prod_dwh.mc_requests` a
-        JOIN `prod_dwh.client_details` b ON CAST(a.REQUEST_FROM AS STRING) = b.retailer_id
-        WHERE date(REQUEST_DATE) >= '2025-01-01'
-        GROUP BY 1,2,3,4
-        '''
-        
-        df = client.query(query).result().to_dataframe()
+        df = run_tile_query(client, 'mcc_cash_support', MCC_CASH_SUPPORT_QUERY).result().to_dataframe()
         return df
         
     except Exception as e:
         st.error(f"Error fetching MCC data: {str(e)}")
         return pd.DataFrame()
 
-def process_churn_data():
-    """Process and combine all data sources for churn analysis with month-over-month comparison"""
-    try:
-        client = get_bigquery_client()
-        
-        if client is None:
-            # st.warning("⚠️ BigQuery connection failed. Using fallback mode with sample data.")
-            return generate_churn_fallback_data()
-        
-        with st.spinner("🔄 Loading churn data from BigQuery..."):
-            churn_df = get_churn_data()
-            m2d_df = get_m2d_cash_support_data()
-            mcc_df = get_mcc_cash_support_data()
-        
-        if churn_df.empty:
-            st.warning("⚠️ No churn data found from BigQuery. Using fallback mode with sample data.")
-            return generate_churn_fallback_data()
-        
-        # Combine M2D and MCC as single cash support metric
-        cash_support_df = pd.DataFrame()
-        
-        if not m2d_df.empty:
-            m2d_df['cash_support_amount'] = m2d_df['m2d']
-            m2d_df['cash_support_type'] = 'M2D'
-            cash_support_df = pd.concat([cash_support_df, m2d_df[['distr_state', 'distr_city', 'distributor_id', 'client_id', 'cash_support_amount', 'cash_support_type']]], ignore_index=True)
-        
-        if not mcc_df.empty:
-            mcc_df['cash_support_amount'] = mcc_df['mcc']
-            mcc_df['cash_support_type'] = 'MCC'
-            mcc_df['client_id'] = mcc_df['agent_id']
-            cash_support_df = pd.concat([cash_support_df, mcc_df[['distr_state', 'distr_city', 'distributor_id', 'client_id', 'cash_support_amount', 'cash_support_type']]], ignore_index=True)
-        
-        # Aggregate total cash support per agent
-        if not cash_support_df.empty:
-            total_cash_support = cash_support_df.groupby(['client_id', 'distributor_id']).agg({
-                'cash_support_amount': 'sum',
-                'distr_state': 'first',
-                'distr_city': 'first'
-            }).reset_index()
-        else:
-            total_cash_support = pd.DataFrame()
-        
-        # Process AEPS/CMS data for month-over-month churn analysis
-        if 'year_month' in aeps_cms_df.columns:
-            aeps_cms_df['year_month'] = pd.to_numeric(aeps_cms_df['year_month'], errors='coerce')
-        
-        aeps_cms_df = aeps_cms_df.sort_values(['agent_id', 'year_month'])
-        
-        # Calculate previous month business for each agent
-        aeps_cms_df['prev_month_aeps'] = aeps_cms_df.groupby('agent_id')['aeps_gtv_success'].shift(1)
-        aeps_cms_df['prev_month_cms'] = aeps_cms_df.groupby('agent_id')['cms_gtv_success'].shift(1)
-        aeps_cms_df['prev_month'] = aeps_cms_df.groupby('agent_id')['year_month'].shift(1)
-        
-        # Define churn categories
-        def calculate_churn_type(row):
-            current_aeps = row['aeps_gtv_success'] if pd.notna(row['aeps_gtv_success']) else 0
-            prev_aeps = row['prev_month_aeps'] if pd.notna(row['prev_month_aeps']) else 0
-            
-            if pd.isna(row['prev_month']) or prev_aeps == 0:
-                return 'NO_PREVIOUS_DATA'
-            
-            # SP Agent Churn: Previous month ≥250K, current month = 0
-            if prev_aeps >= 250000 and current_aeps == 0:
-                return 'SP_AGENT_CHURN'
-            
-            # SP Agent Usage Churn: Previous month ≥250K, current month >80% decline
-            if prev_aeps >= 250000:
-                decline_pct = ((prev_aeps - current_aeps) / prev_aeps) * 100
-                if decline_pct > 80:
-                    return 'SP_USAGE_CHURN'
-            
-            # Absolute Churn: Had business, now completely zero (non-SP)
-            if prev_aeps > 0 and current_aeps == 0:
-                return 'ABSOLUTE_CHURN'
-            
-            # Usage Churn: More than 80% decline (non-SP)
-            if prev_aeps > 0:
-                decline_pct = ((prev_aeps - current_aeps) / prev_aeps) * 100
-                if decline_pct > 80:
-                    return 'USAGE_CHURN'
-            
-            return 'NO_CHURN'
-        
-        aeps_cms_df['churn_type'] = aeps_cms_df.apply(calculate_churn_type, axis=1)
-        
-        # Merge with cash support data
-        if not total_cash_support.empty:
-            aeps_cms_df = aeps_cms_df.merge(
-                total_cash_support[['client_id', 'cash_support_amount']],
-                left_on='agent_id',
-                right_on='client_id',
-                how='left'
-            )
-            aeps_cms_df['cash_support_amount'] = aeps_cms_df['cash_support_amount'].fillna(0)
-            aeps_cms_df['has_cash_support'] = aeps_cms_df['cash_support_amount'] > 0
-        else:
-            aeps_cms_df['cash_support_amount'] = 0
-            aeps_cms_df['has_cash_support'] = False
-        
-        # Add month labels
-        def convert_month_label(year_month):
-            if pd.isna(year_month):
-                return "Unknown"
-            month_labels = {
-                202501: 'Jan 2025', 202502: 'Feb 2025', 202503: 'Mar 2025',
-                202504: 'Apr 2025', 202505: 'May 2025', 202506: 'Jun 2025',
-                202507: 'Jul 2025', 202508: 'Aug 2025', 202509: 'Sep 2025'
-            }
-            return month_labels.get(year_month, str(year_month))
-        
-        aeps_cms_df['month_label'] = aeps_cms_df['year_month'].apply(convert_month_label)
-        
-        return aeps_cms_df
-        
-    except Exception as e:
-        st.error(f"Error processing churn data: {str(e)}")
-        st.warning("⚠️ Falling back to sample data for demonstration.")
-        return generate_churn_fallback_data()
+# Months of agent GTV history held in the churn cohort matrices
+CHURN_COHORT_MONTHS = int(os.getenv('CHURN_COHORT_MONTHS', '12'))
+
+@st.cache_resource(ttl=3600)  # One shared copy per process - too large to copy into every session
+def get_churn_cohorts():
+    """Agent x month AEPS / CMS GTV for the last CHURN_COHORT_MONTHS months, built page by page"""
+    client = get_bigquery_client()
+    if client is None:
+        return ChurnCohorts.from_frames([])
+    
+    csp_timeline_table = get_table_ref(os.getenv('BIGQUERY_DATASET_ANALYTICS', 'analytics_dwh'), os.getenv('CSP_MONTHLY_TIMELINE_TABLE', 'csp_monthly_timeline'))
+    query = f"""
+    SELECT
+      agent_id,
+      year_month,
+      SUM(aeps_gtv_success) AS aeps_gtv_success,
+      SUM(cms_gtv_success) AS cms_gtv_success
+    FROM {csp_timeline_table}
+    WHERE PARSE_DATE('%Y%m', CAST(year_month AS STRING)) >= DATE_SUB(DATE_TRUNC(CURRENT_DATE(), MONTH), INTERVAL {CHURN_COHORT_MONTHS} MONTH)
+    GROUP BY agent_id, year_month
+    """
+    rows = run_tile_query(client, 'churn_cohorts', query).result(page_size=CASH_SUPPORT_PAGE_SIZE)
+    return ChurnCohorts.from_frames(rows.to_dataframe_iterable())
 
 def generate_churn_fallback_data():
     """Generate fallback sample data for churn analysis when BigQuery is not available"""
@@ -3302,7 +3359,7 @@ def get_real_bigquery_data(query_name, selected_date, _client):
         
         # Execute query
         with st.spinner(f"🔄 Fetching {query_name} data..."):
-            df = _client.query(query).result().to_dataframe()
+            df = run_tile_query(_client, query_name, query).result().to_dataframe()
         
         # Debug logging for production issues
         if query_name == "transaction_success":
@@ -3325,733 +3382,23 @@ def get_real_bigquery_data(query_name, selected_date, _client):
         st.error(f"❌ Error connecting to BigQuery: {str(e)}")
         return None
 
-# Enhanced health metrics calculation with historical-based thresholds
-def calculate_enhanced_health_metrics(transaction_df, bio_auth_df):
-    """Calculate comprehensive health metrics with historical-based thresholds"""
+def show_churn_intelligence_dashboard():
+    """Display comprehensive Churn Intelligence dashboard"""
     
-    metrics = {}
+    st.markdown("# 🔄 Churn Intelligence Dashboard")
     
-    # Real data metrics from BigQuery
-    if not transaction_df.empty:
-        # Debug: Show what columns we actually have
-        # st.info(f"📊 Transaction DataFrame columns: {list(transaction_df.columns)}")
-        # st.info(f"📊 Transaction DataFrame shape: {transaction_df.shape}")
-        # if len(transaction_df) > 0:
-        #     st.info(f"📊 Sample data: {transaction_df.head(1).to_dict('records')}")
-        
-        # Transaction success metrics with aggregator breakdown
-        current_success = transaction_df['overall_success_rate'].mean()
-        median_success = transaction_df.get('median_success_rate', pd.Series([current_success])).mean()
-        
-        # Handle NaN values
-        if pd.isna(current_success):
-            current_success = 0
-        if pd.isna(median_success):
-            median_success = current_success
-        
-        # Calculate aggregator-specific success rates
-        ybl_success = transaction_df.get('ybl_success_rate', pd.Series([0])).mean()
-        nsdl_success = transaction_df.get('nsdl_success_rate', pd.Series([0])).mean()
-        ybln_success = transaction_df.get('ybln_success_rate', pd.Series([0])).mean()
-        
-        # Handle NaN values for aggregators
-        if pd.isna(ybl_success):
-            ybl_success = 0
-        if pd.isna(nsdl_success):
-            nsdl_success = 0
-        if pd.isna(ybln_success):
-            ybln_success = 0
-        
-        # Use the best performing aggregator for overall status
-        best_aggregator_success = max(ybl_success, nsdl_success, ybln_success)
-        
-        # Determine status based on overall success rate
-        if current_success >= 70:
-            status = 'green'
-        elif current_success >= 60:
-            status = 'yellow'
-        else:
-            status = 'red'
-        
-        # Calculate trend based on aggregator performance
-        trend = 'stable'
-        if best_aggregator_success > current_success + 5:
-            trend = 'up'
-        elif best_aggregator_success < current_success - 5:
-            trend = 'down'
-        
-        metrics['Transaction Success Rate'] = {
-            'value': round(current_success, 2),
-            'status': status,
-            'trend': trend,
-            'change': round(current_success - median_success, 2),
-            'aggregator_breakdown': {
-                'YBL': round(ybl_success, 2),
-                'NSDL': round(nsdl_success, 2),
-                'YBLN': round(ybln_success, 2)
-            }
-        }
-        
-        # GTV Performance
-        if 'total_gtv' in transaction_df.columns:
-            current_gtv = transaction_df['total_gtv'].sum()
-            median_gtv = transaction_df['avg_amount_cr'].mean() if 'avg_amount_cr' in transaction_df.columns else current_gtv
-            
-            if current_gtv >= median_gtv:
-                gtv_status = 'green'
-            else:
-                gtv_status = 'yellow'
-                
-            metrics['GTV Performance'] = {
-                'value': round(current_gtv, 2),
-                'status': gtv_status,
-                'trend': 'stable',
-                'change': round(current_gtv - median_gtv, 2)
-            }
+    # Back button
+    if st.button("← Back to Main Dashboard", key="back_to_main_churn"):
+        st.session_state.current_view = "main"
+        st.session_state.navigation_only = True
+        st.rerun()
     
-    # Bio-authentication metrics
-    if not bio_auth_df.empty:
-        current_bio = bio_auth_df['fa2_rate_yesterday'].mean()
-        median_bio = bio_auth_df.get('median_fa2_succ_rate', pd.Series([current_bio])).mean()
-        
-        # Handle NaN values
-        if pd.isna(current_bio):
-            current_bio = 0
-        if pd.isna(median_bio):
-            median_bio = current_bio
-        
-        if current_bio >= median_bio:
-            bio_status = 'green'
-        else:
-            bio_status = 'yellow'
-            
-        metrics['2FA Success Rate'] = {
-            'value': round(current_bio, 2),
-            'status': bio_status,
-            'trend': 'stable',
-            'change': round(current_bio - median_bio, 2)
-        }
-    
-    # RFM Score - Enhanced BigQuery data loading
-    try:
-        # Load BigQuery data for RFM fraud detection
-        rfm_data = get_rfm_fraud_data()
-        # st.info(f"🔍 RFM Debug: get_rfm_fraud_data() returned: {type(rfm_data)}, empty: {rfm_data.empty if rfm_data is not None else 'None'}")
-        
-        if rfm_data is not None and not rfm_data.empty:
-            # st.success("✅ RFM: Real BigQuery data loaded")
-            
-            # Debug information
-            # with st.expander("🔍 RFM Data Debug", expanded=False):
-            #     st.info(f"📊 Data Shape: {rfm_data.shape}")
-            #     st.info(f"📋 Columns: {list(rfm_data.columns)}")
-            #     st.dataframe(rfm_data.head(3), use_container_width=True)
-            #     st.info(f"🔍 Latest data: {rfm_data.iloc[-1].to_dict() if len(rfm_data) > 0 else 'No data'}")
-            
-            # Check if required column exists
-            if 'total_caught_per' in rfm_data.columns:
-                # Get latest RFM data
-                latest_rfm = rfm_data.iloc[-1]
-                current_catch_rate = latest_rfm['total_caught_per']
-                # st.info(f"🔍 RFM Debug: Latest catch rate = {current_catch_rate}")
-                
-                # Calculate trend from previous month
-                if len(rfm_data) > 1:
-                    prev_catch_rate = rfm_data.iloc[-2]['total_caught_per']
-                    trend_change = current_catch_rate - prev_catch_rate
-                else:
-                    trend_change = 0
-                
-                # Determine status based on catch rate - Updated thresholds for better accuracy
-                if current_catch_rate >= 75:
-                    rfm_status = 'green'
-                    trend = 'up' if trend_change >= 0 else 'down'
-                elif current_catch_rate >= 60:
-                    rfm_status = 'yellow'
-                    trend = 'up' if trend_change >= 0 else 'down'
-                else:
-                    rfm_status = 'red'
-                    trend = 'down'
-                
-                # st.info(f"🔍 RFM Debug: Using REAL data - {current_catch_rate}% -> {rfm_status}")
-                # st.info(f"🔍 RFM Debug: Data type of current_catch_rate: {type(current_catch_rate)}")
-                # st.info(f"🔍 RFM Debug: Raw value: {current_catch_rate}")
-            
-                metrics['RFM Score'] = {
-                    'value': round(current_catch_rate, 1),
-                    'status': rfm_status,
-                    'trend': trend,
-                    'change': round(trend_change, 1),
-                    'unit': '%'
-                }
-                # st.info(f"🔍 RFM Debug: FINAL metrics['RFM Score'] = {metrics['RFM Score']}")
-                # st.success(f"✅ RFM Score set to REAL value: {current_catch_rate}%")
-            else:
-                # st.warning("⚠️ RFM: Column 'total_caught_per' not found in BigQuery data")
-                # st.info("🔄 Available columns: " + ", ".join(rfm_data.columns))
-                # Calculate status for fallback value (92.6%)
-                fallback_value = 92.6
-                if fallback_value >= 75:
-                    fallback_status = 'green'
-                elif fallback_value >= 60:
-                    fallback_status = 'yellow'
-                else:
-                    fallback_status = 'red'
-                # st.info(f"🔍 RFM Debug: Using FALLBACK data - {fallback_value}% -> {fallback_status}")
-                metrics['RFM Score'] = {'value': fallback_value, 'status': fallback_status, 'trend': 'up', 'change': 1.2, 'unit': '%'}
-                # st.info(f"🔍 RFM Debug: FINAL metrics['RFM Score'] = {metrics['RFM Score']}")
-        else:
-            # Fallback to dummy data
-            # st.warning("⚠️ RFM: No data from BigQuery - using fallback data")
-            # st.info(f"🔍 RFM Debug: rfm_data is {rfm_data}")
-            # Calculate status for fallback value (92.6%)
-            fallback_value = 92.6
-            if fallback_value >= 75:
-                fallback_status = 'green'
-            elif fallback_value >= 60:
-                fallback_status = 'yellow'
-            else:
-                fallback_status = 'red'
-            # st.info(f"🔍 RFM Debug: Using FALLBACK data (no BigQuery) - {fallback_value}% -> {fallback_status}")
-            metrics['RFM Score'] = {'value': fallback_value, 'status': fallback_status, 'trend': 'up', 'change': 1.2, 'unit': '%'}
-            # st.info(f"🔍 RFM Debug: FINAL metrics['RFM Score'] = {metrics['RFM Score']}")
-    except Exception as e:
-        # st.warning(f"⚠️ Could not calculate RFM metrics: {str(e)}")
-        # st.info("🔄 Using fallback data")
-        # Fallback to dummy data
-        # Calculate status for fallback value (92.6%)
-        fallback_value = 92.6
-        if fallback_value >= 75:
-            fallback_status = 'green'
-        elif fallback_value >= 60:
-            fallback_status = 'yellow'
-        else:
-            fallback_status = 'red'
-        # st.info(f"🔍 RFM Debug: Using FALLBACK data (exception) - {fallback_value}% -> {fallback_status}")
-        metrics['RFM Score'] = {'value': fallback_value, 'status': fallback_status, 'trend': 'up', 'change': 1.2, 'unit': '%'}
-        # st.info(f"🔍 RFM Debug: FINAL metrics['RFM Score'] = {metrics['RFM Score']}")
-    
-    # Add existing dummy metrics for other categories (but preserve real RFM calculation)
-    dummy_metrics = get_dummy_metrics_for_remaining()
-    # Remove RFM Score from dummy metrics to preserve real calculation
-    if 'RFM Score' in dummy_metrics:
-        del dummy_metrics['RFM Score']
-    metrics.update(dummy_metrics)
-    
-    return metrics
-
-def calculate_comprehensive_health_metrics_OLD_DISABLED(transaction_df, bio_auth_df, client, selected_date):
-    """Calculate ALL health metrics from real data sources - DISABLED due to complexity"""
-    
-    # This function is disabled - using simplified version instead
-    st.warning("⚠️ OLD_DISABLED function called - redirecting to simplified version")
-    return calculate_comprehensive_health_metrics_simple(transaction_df, bio_auth_df, client)
-
-def calculate_comprehensive_health_metrics_simple(transaction_df, bio_auth_df, client):
-    """Simplified comprehensive health metrics calculation with better error handling"""
-    
-    # Start with the original enhanced metrics as a base
-    metrics = calculate_enhanced_health_metrics(transaction_df, bio_auth_df)
-    
-    # Enhancing with additional real data calculations for dashboard lights
-    try:
-        if client:
-            # Login Success Rate (higher is better) - Auto-load Google Sheets
-            try:
-                # Silently load Google Sheets data in background
-                login_data = get_google_sheets_data('login Success Rate', None)
-                if login_data is not None and not login_data.empty:
-                    current_login = float(login_data.iloc[-1].get('succ_login', 0.991)) * 100.0
-                    metrics['Login Success Rate'] = {
-                        'value': round(current_login, 1),
-                        'status': 'green' if current_login >= 99.0 else 'yellow',
-                        'trend': 'up',
-                        'change': 0.1,
-                        'unit': '%'
-                    }
-            except Exception:
-                pass
-    except Exception as e:
-        st.warning(f"⚠️ Error in comprehensive metrics: {str(e)}")
-    
-    # st.success(f"✅ Enhanced {len(metrics)} metrics with real data calculations!")
-    return metrics
-
-def get_dummy_metrics_for_remaining():
-    """Get dummy metrics for categories not yet integrated with real data"""
-    
-    # Supporting Rails (dummy data) - RFM Score now uses real data
-    supporting_rails = {
-        'Login Success Rate': {'value': 97.8, 'status': 'green', 'trend': 'up', 'change': 0.5},
-        'Cash Product': {'value': 89.2, 'status': 'yellow', 'trend': 'down', 'change': -1.3},
-        'CC Calls Metric': {'value': 245, 'status': 'red', 'trend': 'up', 'change': 15},
-        'Bot Analytics': {'value': 6.6, 'status': 'green', 'trend': 'down', 'change': -0.2, 'unit': '% escalation'},
-        'RFM Score': {'value': 92.6, 'status': 'green', 'trend': 'up', 'change': 1.2, 'unit': '%'}  # Will be overridden by real calculation
-    }
-    
-    # Distribution/Partner metrics (dummy data)
-    distribution_partner = {
-        'New AEPS Users': {'value': 1250, 'status': 'green', 'trend': 'up', 'change': 125},
-        'Stable Users': {'value': 45.2, 'status': 'yellow', 'trend': 'stable', 'change': 0.8, 'unit': 'K'}
-    }
-    
-    # Operations metrics (dummy data)
-    operations = {
-        'Platform Uptime': {'value': 99.95, 'status': 'green', 'trend': 'stable', 'change': 0.02, 'unit': '%'},
-        'Churn Rate': {'value': 12.3, 'status': 'yellow', 'trend': 'up', 'change': 0.7, 'unit': '%'}
-    }
-    
-    # Combine all metrics
-    all_metrics = {}
-    all_metrics.update(supporting_rails)
-    all_metrics.update(distribution_partner)
-    all_metrics.update(operations)
-    
-    return all_metrics
-
-# Additional utility functions
-
-def generate_enhanced_dummy_data():
-    """Generate enhanced dummy data that mimics real AEPS patterns"""
-    
-    # Generate realistic transaction data
-    hours = [f"{i:02d}:00" for i in range(24)]
-    base_success_rate = 92.5
-    
-    transaction_data = []
-    for hour in hours:
-        success_rate = base_success_rate + np.random.normal(0, 2)
-        transaction_data.append({
-            'hour': hour,
-            'overall_success_rate': success_rate,
-            'total_amount_cr': np.random.uniform(15, 25),
-            'ybl_success_rate': success_rate + np.random.uniform(-1, 1),
-            'nsdl_success_rate': success_rate + np.random.uniform(-1, 1)
-        })
-    
-    return pd.DataFrame(transaction_data)
-
-# Enhanced health metrics calculation with historical-based thresholds
-def calculate_enhanced_health_metrics(transaction_df, bio_auth_df):
-    """Calculate comprehensive health metrics with historical-based thresholds"""
-    
-    metrics = {}
-    
-    # Real data metrics from BigQuery
-    if not transaction_df.empty:
-        # Debug: Show what columns we actually have
-        # st.info(f"📊 Transaction DataFrame columns: {list(transaction_df.columns)}")
-        # st.info(f"📊 Transaction DataFrame shape: {transaction_df.shape}")
-        # if len(transaction_df) > 0:
-        #     st.info(f"📊 Sample data: {transaction_df.head(1).to_dict('records')}")
-        
-        # Transaction Success Rate (higher is better)
-        try:
-            if 'overall_success_rate' in transaction_df.columns:
-                try:
-                    current_success = float(transaction_df['overall_success_rate'].iloc[0])
-                    if pd.isna(current_success):
-                        current_success = 0.0
-                except (KeyError, IndexError, ValueError, TypeError):
-                    current_success = float(transaction_df['overall_success_rate'].mean())
-                
-                # Get median from historical data
-                try:
-                    # Try multiple possible column names for median
-                    median_success = None
-                    for col in ['median_success_rate', 'avg_success_rate', 'median_fa2_succ_rate']:
-                        if col in transaction_df.columns:
-                            median_success = float(transaction_df[col].iloc[0])
-                            break
-                    if median_success is None or pd.isna(median_success):
-                        median_success = current_success
-                except (KeyError, IndexError, ValueError, TypeError):
-                    # Try in DataFrame columns
-                    median_success = None
-                    for col in ['median_success_rate', 'avg_success_rate', 'median_fa2_succ_rate']:
-                        if col in transaction_df.columns:
-                            try:
-                                median_success = float(transaction_df[col].mean())
-                                if not pd.isna(median_success):
-                                    break
-                            except:
-                                continue
-                    if median_success is None or pd.isna(median_success):
-                        median_success = current_success
-                
-                # Current > median = green (better performance is always good)
-                if current_success > median_success:
-                    status = 'green'
-                elif current_success >= median_success * 0.98:  # Within 2% of median
-                    status = 'yellow'
-                else:
-                    status = 'red'
-                
-                metrics['Transaction Success Rate'] = {
-                    'value': round(current_success, 2),
-                    'median': round(median_success, 2),
-                    'status': status,
-                    'trend': 'up' if current_success > median_success else 'down',
-                    'change': round(current_success - median_success, 2),
-                    'unit': '%'
-                }
-                st.success(f"✅ Transaction Success Rate: {current_success:.2f}% (Median: {median_success:.2f}%) - Status: {status}")
-            else:
-                st.warning("⚠️ overall_success_rate column not found in transaction data")
-        except Exception as e:
-            st.error(f"❌ Error calculating transaction success rate: {str(e)}")
-            metrics['Transaction Success Rate'] = {'value': 0, 'median': 0, 'status': 'red', 'trend': 'stable', 'change': 0, 'unit': '%'}
-    
-    # Add existing dummy metrics for other categories (but preserve real RFM calculation)
-    dummy_metrics = get_dummy_metrics_for_remaining()
-    # Remove RFM Score from dummy metrics to preserve real calculation
-    if 'RFM Score' in dummy_metrics:
-        del dummy_metrics['RFM Score']
-    metrics.update(dummy_metrics)
-    
-    return metrics
-
-def calculate_comprehensive_health_metrics_OLD_DISABLED(transaction_df, bio_auth_df, client, selected_date):
-    """Calculate ALL health metrics from real data sources - no dummy data"""
-    
-    # Calculate comprehensive health metrics
-    
-    # First calculate the core AEPS metrics from real data
-    # Step 1: Calculating Core AEPS metrics...
-    try:
-        if not transaction_df.empty:
-            # Transaction success metrics
-            current_success = transaction_df['overall_success_rate'].mean()
-            median_success = current_success  # Use current as fallback
-            # Check for correct median column names
-            for col in ['median_success_rate', 'avg_success_rate', 'median_fa2_succ_rate']:
-                if col in transaction_df.columns:
-                    try:
-                        median_success = transaction_df[col].mean()
-                        if pd.isna(median_success):
-                            median_success = current_success
-                        else:
-                            break
-                    except:
-                        continue
-            std_dev = abs(transaction_df['overall_success_rate'] - median_success).std()
-        
-            if current_success >= median_success:
-                status = 'green'
-            elif current_success >= median_success - std_dev:
-                status = 'yellow'
-            else:
-                status = 'red'
-            
-            metrics = {'Transaction Success Rate': {
-                'value': round(current_success, 2),
-                'status': status,
-                'trend': 'stable',
-                'change': round(current_success - median_success, 2)
-            }}
-    except Exception as e:
-        st.error(f"❌ Error in OLD_DISABLED function: {str(e)}")
-        metrics = {'Transaction Success Rate': {'value': 0, 'status': 'red', 'trend': 'stable', 'change': 0}}
-    
-    st.success(f"✅ Calculated {len(metrics)} health metrics successfully!")
-    return metrics
-
-def calculate_comprehensive_health_metrics_simple(transaction_df, bio_auth_df, client):
-    """Simplified comprehensive health metrics calculation with better error handling"""
-    
-    # Start with the original enhanced metrics as a base
-    metrics = calculate_enhanced_health_metrics(transaction_df, bio_auth_df)
-    
-    # Enhancing with additional real data calculations for dashboard lights
-    try:
-        if client:
-            # Add real data enhancements here
-            pass
-    except Exception as e:
-        st.warning(f"⚠️ Error in comprehensive metrics: {str(e)}")
-    
-    # st.success(f"✅ Enhanced {len(metrics)} metrics with real data calculations!")
-    return metrics
-
-def get_dummy_metrics_for_remaining():
-    """Get dummy metrics for categories not yet integrated with real data"""
-    
-    # Supporting Rails (dummy data) - RFM Score now uses real data
-    supporting_rails = {
-        'Login Success Rate': {'value': 97.8, 'status': 'green', 'trend': 'up', 'change': 0.5},
-        'Cash Product': {'value': 89.2, 'status': 'yellow', 'trend': 'down', 'change': -1.3},
-        'CC Calls Metric': {'value': 245, 'status': 'red', 'trend': 'up', 'change': 15},
-        'Bot Analytics': {'value': 6.6, 'status': 'green', 'trend': 'down', 'change': -0.2, 'unit': '% escalation'},
-        'RFM Score': {'value': 92.6, 'status': 'green', 'trend': 'up', 'change': 1.2, 'unit': '%'}  # Will be overridden by real calculation
-    }
-    
-    # Distribution/Partner metrics (dummy data)
-    distribution_partner = {
-        'New AEPS Users': {'value': 1250, 'status': 'green', 'trend': 'up', 'change': 125},
-        'Stable Users': {'value': 45.2, 'status': 'yellow', 'trend': 'stable', 'change': 0.8, 'unit': 'K'}
-    }
-    
-    # Operations metrics (dummy data)
-    operations = {
-        'Platform Uptime': {'value': 99.95, 'status': 'green', 'trend': 'stable', 'change': 0.02, 'unit': '%'},
-        'Churn Rate': {'value': 12.3, 'status': 'yellow', 'trend': 'up', 'change': 0.7, 'unit': '%'}
-    }
-    
-    # Combine all metrics
-    all_metrics = {}
-    all_metrics.update(supporting_rails)
-    all_metrics.update(distribution_partner)
-    all_metrics.update(operations)
-    
-    return all_metrics
-
-# Additional utility functions
-
-def create_enhanced_trend_chart(metric_data, title):
-    """Create enhanced trend chart with baseline and anomaly indicators"""
-    
-    fig = go.Figure()
-    
-    # Add trend line
-    fig.add_trace(go.Scatter(
-        x=list(range(len(metric_data))),
-        y=metric_data,
-        mode='lines+markers',
-        name=title,
-        line=dict(color='blue', width=3)
-    ))
-    
-    fig.update_layout(
-        title=title,
-        xaxis_title="Time",
-        yaxis_title="Value",
-        height=400
-    )
-    
-    return fig
-
-# Continue with the rest of the functions...
-
-def create_aggregator_comparison_chart(transaction_df):
-    """Create aggregator performance comparison chart"""
-    
-    fig = go.Figure()
-    
-    if not transaction_df.empty and 'ybl_success_rate' in transaction_df.columns:
-        fig.add_trace(go.Scatter(
-            x=transaction_df['hour'],
-            y=transaction_df['ybl_success_rate'],
-            mode='lines+markers',
-            name='YBL',
-            line=dict(color='blue', width=3)
-        ))
-    
-    fig.update_layout(
-        title="Aggregator Performance Comparison",
-        xaxis_title="Hour",
-        yaxis_title="Success Rate (%)",
-        height=400
-    )
-    
-    return fig
-
-def create_metric_card_data(title, value, status, trend, change, unit='%'):
-    """Create metric card data for traffic light tiles"""
-    
-    return {
-        'title': title,
-        'value': value,
-        'status': status,
-        'trend': trend,
-        'change': change,
-        'unit': unit
-    }
-
-# Dashboard functions
-
-def show_cash_product_dashboard():
-    """Display comprehensive Cash Product dashboard with real data integration"""
-    
-    st.markdown("# 💰 Cash Product Dashboard")
-    
-    # Back button
-    if st.button("← Back to Main Dashboard", key="back_to_main_cash"):
-        st.session_state.current_view = "main"
-        st.session_state.navigation_only = True
-        st.rerun()
-    
-    st.info("💡 Cash Product analytics and performance metrics")
-    
-    # Sample data for now
-    st.markdown("### Cash Product Performance")
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        st.metric("Total Volume", "₹45.2 Cr", "↑ 12.3%")
-    with col2:
-        st.metric("Success Rate", "89.2%", "↓ 1.3%")  
-    with col3:
-        st.metric("Active Agents", "12,450", "↑ 234")
-    
-    # Additional cash product queries (commented out for now)
-    cash_product_query = """
-        SELECT COUNT(CASE WHEN SUM_ALL >= 3 THEN 1 END) as high_risk_distributors
-         FROM (
-         SELECT dist.distributor_id,
-                MAX(CASE WHEN cf.label = 'LM1' THEN cf.cash_gtv END) AS cash_gtv_lm1,
-                MAX(CASE WHEN cf.label = 'LM2' THEN cf.cash_gtv END) AS cash_gtv_lm2,
-                MAX(CASE WHEN cf.label = 'LM3' THEN cf.cash_gtv END) AS cash_gtv_lm3,
-                MAX(CASE WHEN cf.label = 'LM4' THEN cf.cash_gtv END) AS cash_gtv_lm4,
-                MAX(CASE WHEN cf.label = 'LM1' THEN cf.cash_out_gtv END) AS cash_out_gtv_lm1,
-                MAX(CASE WHEN cf.label = 'LM2' THEN cf.cash_out_gtv END) AS cash_out_gtv_lm2,
-                MAX(CASE WHEN cf.label = 'LM3' THEN cf.cash_out_gtv END) AS cash_out_gtv_lm3,
-                MAX(CASE WHEN cf.label = 'LM4' THEN cf.cash_out_gtv END) AS cash_out_gtv_lm4,
-                MAX(CASE WHEN cf.label = 'LM1' THEN cf.txn_sma END) AS txn_sma_lm1,
-                MAX(CASE WHEN cf.label = 'LM2' THEN cf.txn_sma END) AS txn_sma_lm2,
-                MAX(CASE WHEN cf.label = 'LM3' THEN cf.txn_sma END) AS txn_sma_lm3,
-                MAX(CASE WHEN cf.label = 'LM4' THEN cf.txn_sma END) AS txn_sma_lm4,
-                MAX(CASE WHEN hg.label = 'LM1' THEN hg.high_gtv_sps END) AS high_gtv_sps_lm1,
-                MAX(CASE WHEN hg.label = 'LM2' THEN hg.high_gtv_sps END) AS high_gtv_sps_lm2,
-                MAX(CASE WHEN hg.label = 'LM3' THEN hg.high_gtv_sps END) AS high_gtv_sps_lm3,
-                MAX(CASE WHEN hg.label = 'LM4' THEN hg.high_gtv_sps END) AS high_gtv_sps_lm4,
-                (CASE WHEN SAFE_DIVIDE(MAX(CASE WHEN cf.label = 'LM1' THEN cf.cash_gtv END),
-                                    LEAST(MAX(CASE WHEN cf.label = 'LM2' THEN cf.cash_gtv END),
-                                          MAX(CASE WHEN cf.label = 'LM3' THEN cf.cash_gtv END),
-                                          MAX(CASE WHEN cf.label = 'LM4' THEN cf.cash_gtv END))) <= 0.7 THEN 1 ELSE 0 END +
-                CASE WHEN SAFE_DIVIDE(MAX(CASE WHEN cf.label = 'LM1' THEN cf.cash_out_gtv END),
-                                    LEAST(MAX(CASE WHEN cf.label = 'LM2' THEN cf.cash_out_gtv END),
-                                          MAX(CASE WHEN cf.label = 'LM3' THEN cf.cash_out_gtv END),
-                                          MAX(CASE WHEN cf.label = 'LM4' THEN cf.cash_out_gtv END))) <= 0.7 THEN 1 ELSE 0 END +
-                CASE WHEN SAFE_DIVIDE(MAX(CASE WHEN cf.label = 'LM1' THEN cf.txn_sma END),
-                                    LEAST(MAX(CASE WHEN cf.label = 'LM2' THEN cf.txn_sma END),
-                                          MAX(CASE WHEN cf.label = 'LM3' THEN cf.txn_sma END),
-                                          MAX(CASE WHEN cf.label = 'LM4' THEN cf.txn_sma END))) <= 0.7 THEN 1 ELSE 0 END +
-                CASE WHEN SAFE_DIVIDE(MAX(CASE WHEN hg.label = 'LM1' THEN hg.high_gtv_sps END),
-                                    LEAST(MAX(CASE WHEN hg.label = 'LM2' THEN hg.high_gtv_sps END),
-                                          MAX(CASE WHEN hg.label = 'LM3' THEN hg.high_gtv_sps END),
-                                          MAX(CASE WHEN hg.label = 'LM4' THEN hg.high_gtv_sps END))) <= 0.7 THEN 1 ELSE 0 END) AS SUM_ALL
-         FROM dist_base dist
-         LEFT JOIN cash_flow cf ON dist.distributor_id = cf.distributor_id
-         LEFT JOIN high_gtv_sps hg ON dist.distributor_id = hg.distributor_id
-         WHERE dist.distributor_id IS NOT NULL
-         GROUP BY dist.distributor_id
-         HAVING MAX(CASE WHEN cf.label = 'LM1' THEN cf.txn_sma END) >= 25 
-            AND MAX(CASE WHEN cf.label = 'LM2' THEN cf.txn_sma END) >= 25 
-            AND MAX(CASE WHEN cf.label = 'LM3' THEN cf.txn_sma END) >= 25
-            AND MAX(CASE WHEN hg.label = 'LM1' THEN hg.high_gtv_sps END) >= 5 
-            AND MAX(CASE WHEN hg.label = 'LM2' THEN hg.high_gtv_sps END) >= 5 
-            AND MAX(CASE WHEN hg.label = 'LM3' THEN hg.high_gtv_sps END) >= 5
-         )
-    """
-    
-    # Cash product queries dictionary for future implementation
-    cash_queries = {
-        "high_risk_distributors": cash_product_query,
-        
-        "bot_analytics": """
-        with base_data as (
-        SELECT date(request_time) AS date, turn_position,
-               row_number() over(partition by JSON_VALUE(request, '$.queryParams.parameters.userId'),REGEXP_EXTRACT(JSON_VALUE(request, '$.session'), r'/sessions/([0-9]+)$') order by turn_position desc)max_turn,
-               request, JSON_VALUE(request, '$.queryParams.parameters.mobileNumber') AS mobile_number,
-               JSON_VALUE(request, '$.queryParams.parameters.userId') AS user_id,
-               REGEXP_EXTRACT(JSON_VALUE(request, '$.session'), r'/sessions/([0-9]+)$') AS unique_session_id,
-               JSON_VALUE(request, '$.session') AS session_string,
-               JSON_VALUE(request, '$.queryInput.text.text') AS user_text_input,
-               REGEXP_EXTRACT(JSON_VALUE(request, '$.session'), r'environments/([a-f0-9-]+)/sessions/') AS environment_id,
-               JSON_VALUE(derived_data, '$.agentUtterances') AS agent_utterances,
-               JSON_VALUE(derived_data, '$.page.displayName') AS display_name,
-               CASE WHEN JSON_VALUE(derived_data, '$.page.displayName') = 'End Session' THEN 'Terminated Properly'
-                    WHEN JSON_VALUE(derived_data, '$.page.displayName') != 'End Session' THEN 'Not Terminated Properly'
-                    ELSE 'In Progress or Other' END AS session_termination_status,
-               CASE WHEN upper(JSON_VALUE(request, '$.queryInput.text.text')) = 'SATISFIED' THEN 'Satisfied'
-                    WHEN upper(JSON_VALUE(request, '$.queryInput.text.text')) = 'NOT SATISFIED' THEN 'NOT_Satisfied' END SATISFIED_TAG,
-               CASE WHEN JSON_VALUE(derived_data, '$.agentUtterances') IN (
-                   "I didn't get that. Can you say it again?", 'I missed what you said. What was that?',
-                   'Sorry, could you say that again?', 'Sorry, can you say that again?', 'Can you say that again?',
-                   "Sorry, I didn't get that. Can you rephrase?", 'Sorry, what was that?', 'One more time?',
-                   'What was that?', 'Say that one more time?', "I didn't get that. Can you repeat?",
-                   'I missed that, say that again?') THEN "Bot Can't Analyze" ELSE 'Bot Understood' END AS bot_analysis_status
-        FROM `direct-plasma-446610-e3.spicepay_conversational_analytics.spicemoney_aob_dialogflow_chat_history`
-        WHERE JSON_VALUE(request, '$.queryParams.parameters.mobileNumber') IS NOT NULL
-          AND REGEXP_EXTRACT(JSON_VALUE(request, '$.session'), r'environments/([a-f0-9-]+)/sessions/') = 'af9c8862-f074-4836-92fb-5ca1b4134e3b'
-          AND date(request_time) >= DATE_SUB(CURRENT_DATE(), INTERVAL 30 DAY)
-        ),
-        cc_data as (
-        SELECT *, 'cc_connect' reached_cc
-        FROM (SELECT date_trunc(date(a.created_on),month) AS day, (a.created_on) AS date, customer_ref_id, customer_mobile mobile,
-                     CONCAT(b.Product, ' - ', b.Stage) AS product_stage, outcome, sub_outcome   
-              FROM {get_table_ref('ds_ameyo_data', 'complaint_data')} a   
-              LEFT JOIN {get_table_ref(os.getenv('BIGQUERY_DATASET_ANALYTICS', 'analytics_dwh'), 'Complaint_tag')} b ON UPPER(a.sub_outcome) = UPPER(b.Labels)  
-              WHERE DATE(a.created_on) >= DATE_SUB(CURRENT_DATE(), INTERVAL 30 DAY) and source_ic != 'SelfCare'  
-              union all  
-              (SELECT date_trunc(date(a.created_date),month) AS day, (a.created_date) AS date, customer_ref_id, mobile,
-                      CONCAT(b.Product, ' - ', b.Stage) AS product_stage, outcome, sub_outcome   
-               FROM `spicemoney-dwh.ds_ameyo_data.query_data` a   
-               LEFT JOIN {get_table_ref(os.getenv('BIGQUERY_DATASET_ANALYTICS', 'analytics_dwh'), 'Complaint_tag')} b ON UPPER(a.sub_outcome) = UPPER(b.Labels)  
-               WHERE DATE(a.created_date) >= DATE_SUB(CURRENT_DATE(), INTERVAL 30 DAY))
-        )
-        ),
-        onboarded_spice as (select retailer_id, mobile_number from {get_table_ref(os.getenv('BIGQUERY_DATASET_PROD', 'prod_dwh'), os.getenv('CLIENT_DETAILS_TABLE', 'client_details'))})
-        select count(*)total_session, count(distinct unique_session_id)no_unique_session,
-               count(distinct case when turn_position=1 then user_id end)no_unique_user,
-               count(distinct case when max_turn=1 and session_termination_status= 'Terminated Properly' then unique_session_id end)end_session_proper,
-               count(distinct case when max_turn=1 and session_termination_status= 'Not Terminated Properly' then unique_session_id end)end_session_not_proper,
-               count(distinct case when max_turn=1 and bot_analysis_status= "Bot Can't Analyze" then unique_session_id end)Bot_Cant_Analyze,
-               count(distinct case when max_turn=1 and agent_utterances='' then unique_session_id end)Pages_no_responses,
-               count(distinct case when SATISFIED_TAG='Satisfied' then unique_session_id end)satisfied_session_cnt,
-               count(distinct case when SATISFIED_TAG='NOT_Satisfied' then unique_session_id end)notsatisfied_session_cnt,
-               count(distinct case when reached_cc is not null then user_id end)reached_cc,
-               round(safe_divide(count(distinct case when reached_cc is not null then user_id end),count(distinct user_id))*100,2) reached_cc_per,
-               count(distinct case when SATISFIED_TAG='Satisfied' then user_id end)sat_user,
-               count(distinct case when SATISFIED_TAG='Satisfied' and reached_cc is not null then user_id end)sat_cc,
-               round(safe_divide(count(distinct case when SATISFIED_TAG='Satisfied' and reached_cc is not null then user_id end),count(distinct case when SATISFIED_TAG='Satisfied' then user_id end))*100,2) sat_cc_per,
-               count(distinct case when SATISFIED_TAG='NOT_Satisfied' then user_id end)not_sat_user,
-               count(distinct case when SATISFIED_TAG='NOT_Satisfied' and reached_cc is not null then user_id end)not_sat_cc,
-               round(safe_divide(count(distinct case when SATISFIED_TAG='NOT_Satisfied' and reached_cc is not null then user_id end),count(distinct case when SATISFIED_TAG='NOT_Satisfied' then user_id end))*100,2)not_sat_cc_per,
-               count(distinct retailer_id)aob_spice
-        from base_data a
-        left join cc_data d on a.mobile_number=d.mobile
-        left join onboarded_spice e on a.mobile_number=e.mobile_number
-        """
-    }
-    
-    # For now, just display placeholder content
-    st.markdown("### 📊 Cash Product Analytics")
-    st.info("Cash product analytics implementation in progress...")
-    
-    # Sample charts placeholder
-    col1, col2 = st.columns(2)
-    with col1:
-        st.markdown("#### Volume Trends")
-        st.line_chart(pd.DataFrame({
-            'Volume': [100, 120, 115, 130, 125, 140, 135],
-            'Day': range(1, 8)
-        }).set_index('Day'))
-    
-    with col2:
-        st.markdown("#### Success Rate")
-        st.bar_chart(pd.DataFrame({
-            'Success Rate': [89, 91, 88, 92, 90, 93, 89],
-            'Day': range(1, 8)
-        }).set_index('Day'))
-
-def show_churn_intelligence_dashboard():
-    """Display comprehensive Churn Intelligence dashboard"""
-    
-    st.markdown("# 🔄 Churn Intelligence Dashboard")
-    
-    # Back button
-    if st.button("← Back to Main Dashboard", key="back_to_main_churn"):
-        st.session_state.current_view = "main"
-        st.session_state.navigation_only = True
-        st.rerun()
-    
-    st.info("💡 Advanced churn analysis and user retention insights")
-
-# Enhanced dummy data generation with realistic patterns
-@st.cache_data
-def generate_enhanced_dummy_data():
-    """Generate enhanced dummy data that mimics real AEPS patterns"""
+    st.info("💡 Advanced churn analysis and user retention insights")
+
+# Enhanced dummy data generation with realistic patterns
+@st.cache_data
+def generate_enhanced_dummy_data():
+    """Generate enhanced dummy data that mimics real AEPS patterns"""
     
     # Generate 24-hour hourly data
     hours = [f"{i:02d}:00" for i in range(24)]
@@ -4131,1521 +3478,748 @@ def generate_enhanced_dummy_data():
     
     return pd.DataFrame(transaction_data), pd.DataFrame(bio_auth_data)
 
-# Enhanced health metrics calculation with historical-based thresholds
-def calculate_enhanced_health_metrics(transaction_df, bio_auth_df):
-    """Calculate comprehensive health metrics with historical-based thresholds"""
+# Hourly metric columns coerced to numbers once per refresh
+HOURLY_NUMERIC_COLUMNS = [
+    'overall_success_rate', 'median_success_rate', 'avg_success_rate', 'median_fa2_succ_rate',
+    'total_amount_cr', 'median_amount_cr', 'success_txns',
+    'ybl_success_rate', 'nsdl_success_rate', 'ybln_success_rate',
+    'median_ybl_success_rate', 'median_nsdl_success_rate', 'median_ybln_success_rate',
+    'fa2_rate_yesterday', 'ybl_rate_yesterday', 'nsdl_rate_yesterday',
+    'median_fa2_succ_rate_ybl', 'median_fa2_succ_rate_nsdl',
+    'per_user_rate_yesterday', 'median_fa2_per_user_rate',
+]
+
+# Median columns tried in order for the transaction success rate
+SUCCESS_MEDIAN_COLUMNS = ['median_success_rate', 'avg_success_rate', 'median_fa2_succ_rate']
+
+def normalize_hourly_frame(df):
+    """Hourly frame with a numeric hour_num column ('05:00' -> 5) and numeric metric columns"""
+    if df is None or df.empty or 'hour_num' in df.columns:
+        return df
     
-    metrics = {}
+    frame = df.copy()
+    if 'hour' in frame.columns:
+        hour_num = pd.to_numeric(frame['hour'].astype(str).str.split(':').str[0].str.strip(), errors='coerce')
+        # Whole hours only; missing or malformed hours stay NaN
+        frame['hour_num'] = hour_num.where(frame['hour'].notna() & (hour_num % 1 == 0))
+    for col in frame.columns.intersection(HOURLY_NUMERIC_COLUMNS):
+        frame[col] = pd.to_numeric(frame[col], errors='coerce')
+    return frame
+
+def latest_hour_row(frame, value_col=None):
+    """Row of the latest hour (with a non-null value_col if given) - None when there is none"""
+    valid = np.ones(len(frame), dtype=bool) if value_col is None else frame[value_col].notna().to_numpy()
+    if not valid.any():
+        return None
     
-    # Real data metrics from BigQuery
-    if not transaction_df.empty:
-        # Filter to only show data up to the last completed hour
-        from datetime import datetime
-        current_hour = datetime.now().hour
-        last_completed_hour = current_hour - 1 if current_hour > 0 else 0
-        last_completed_hour_str = f"{last_completed_hour:02d}:00"
-        
+    hours = frame['hour_num'].to_numpy(dtype=float) if 'hour_num' in frame.columns else np.full(len(frame), np.nan)
+    candidates = valid & ~np.isnan(hours)
+    if candidates.any():
+        # Last row among those at the highest hour
+        ranked = np.where(candidates, hours, -np.inf)
+        position = len(ranked) - 1 - int(np.argmax(ranked[::-1]))
+    else:
+        position = int(np.flatnonzero(valid)[-1])
+    return frame.iloc[position]
+
+def latest_value(row, col, default):
+    """Numeric value of col in a latest-hour row, default when missing or NaN"""
+    if row is None or col not in row.index or pd.isna(row[col]):
+        return default
+    return float(row[col])
+
+# Floor on the spread of hourly gaps to the median, in percentage points
+HOURLY_MIN_SPREAD_PP = 0.5
+
+def hourly_gap_spread(frame, value_col, median_col):
+    """Robust spread (scaled MAD, anomaly engine) of the hourly gaps to the median, earlier hours as history
+
+    Replaces the std of the absolute gaps, so median_band_status grades the tiles against
+    a different band than before. NaN when fewer than three earlier hours have both values.
+    """
+    if frame is None or not median_col or value_col not in frame.columns or median_col not in frame.columns:
+        return np.nan
+    ordered = frame.sort_values('hour_num', kind='stable') if 'hour_num' in frame.columns else frame
+    return gap_spread(ordered[value_col], ordered[median_col], min_spread=HOURLY_MIN_SPREAD_PP)
+
+def hourly_columns(frame):
+    """Columnar hourly payload for health_metrics - {column: NumPy array}, no per-row dicts"""
+    if frame is None or frame.empty:
+        return {}
+    return {col: frame[col].to_numpy() for col in frame.columns}
+
+def hourly_row_count(hourly_data):
+    """Rows in a columnar hourly payload"""
+    return len(next(iter(hourly_data.values()), ())) if hourly_data else 0
+
+def hourly_frame(hourly_data):
+    """DataFrame over a columnar hourly payload without copying the arrays"""
+    return pd.DataFrame(hourly_data, copy=False)
+
+def hourly_display_order(hourly_data):
+    """Row order starting from 06:00 (06:00-23:00, then 00:00-05:00), rows without an hour last"""
+    hour_num = hourly_data.get('hour_num')
+    if hour_num is None:
+        hour_num = normalize_hourly_frame(pd.DataFrame({'hour': hourly_data['hour']}))['hour_num'].to_numpy()
+    hour_num = hour_num.astype(float)
+    return np.argsort(np.where(np.isnan(hour_num), 999, (hour_num - 6) % 24), kind='stable')
+
+# 7-day median / upper-bound columns the intra-hour overlay compares the current hour against
+HOURLY_BASELINE_COLUMNS = ['median_success_rate', 'success_rate_upper_bound', 'median_fa2_succ_rate']
+
+def hourly_baseline_columns(frame):
+    """hour_num plus the baseline columns of an hourly frame, as a columnar payload"""
+    if frame is None or frame.empty or 'hour_num' not in frame.columns:
+        return {}
+    return hourly_columns(frame[['hour_num'] + [col for col in HOURLY_BASELINE_COLUMNS if col in frame.columns]])
+
+def build_health_context(transaction_df, bio_auth_df, client):
+    """Inputs shared by the tile compute functions - hourly frames normalized and filtered once"""
+    if transaction_df is not None and not transaction_df.empty:
+        # Numeric hour and metric columns, built once for every hourly tile
+        transaction_df = normalize_hourly_frame(transaction_df)
+        unfiltered_transaction_df = transaction_df
+
         # Filter out future hours (only keep hours < current hour, so incomplete current hour is excluded)
-        if 'hour' in transaction_df.columns:
-            def is_completed_hour(hour_str):
-                try:
-                    if pd.isna(hour_str):
-                        return False
-                    hour_num = int(str(hour_str).split(':')[0])
-                    return hour_num < current_hour
-                except:
-                    return False
-            
-            filtered_df = transaction_df[transaction_df['hour'].apply(is_completed_hour)].copy()
+        current_hour = datetime.now().hour
+        if 'hour_num' in transaction_df.columns:
+            filtered_df = transaction_df[transaction_df['hour_num'] < current_hour]
             # Only use filtered data if it's not empty, otherwise use all data
             if not filtered_df.empty:
                 transaction_df = filtered_df
-                # st.success(f"🕐 Filtered to completed hours only (up to {last_completed_hour_str})")
             else:
                 # Keep all data if filtering removes everything (better than showing 0)
                 st.warning(f"⚠️ All hours filtered out. Using all available data.")
-        
-        # Debug: Show what columns we actually have
-        # st.info(f"📊 Transaction DataFrame columns: {list(transaction_df.columns)}")
-        # st.info(f"📊 Transaction DataFrame shape: {transaction_df.shape}")
-        # if len(transaction_df) > 0:
-        #     st.info(f"📊 Sample data: {transaction_df.head(1).to_dict('records')}")
-        
-        # Check if required columns exist and get the latest (current) values
-        latest_data = pd.DataFrame()  # Initialize to avoid reference errors
-        
-        if 'overall_success_rate' not in transaction_df.columns:
-            # st.error("❌ Missing 'overall_success_rate' column in transaction data")
-            current_success = 0
-        else:
-            # Get the most recent hour's success rate from today's data (not null values)
-            today_data = transaction_df[transaction_df['overall_success_rate'].notna()].copy()
-            if not today_data.empty:
-                latest_data = today_data.sort_values('hour').tail(1)
-                try:
-                    current_success = float(latest_data['overall_success_rate'].iloc[0])
-                    if pd.isna(current_success):
-                        current_success = 0
-                except (ValueError, TypeError):
-                    current_success = 0
-            else:
-                latest_data = transaction_df.sort_values('hour').tail(1)
-                current_success = 0
-            # st.success(f"✅ Current success rate: {current_success:.2f}%")
-        
-        if 'median_success_rate' not in transaction_df.columns:
-            # st.warning("⚠️ Missing 'median_success_rate' column, using current as fallback")
-            median_success = current_success
+
+    else:
+        unfiltered_transaction_df = transaction_df
+
+    if bio_auth_df is not None and not bio_auth_df.empty:
+        bio_auth_df = normalize_hourly_frame(bio_auth_df)
+
+    # One columnar hourly payload per frame, shared by every tile that shows the hourly breakdown
+    return {
+        'transaction_df': transaction_df,
+        'bio_auth_df': bio_auth_df,
+        'transaction_hourly': hourly_columns(transaction_df),
+        'bio_auth_hourly': hourly_columns(bio_auth_df),
+        # Per-hour 7-day baselines for every hour, the in-progress one included (intra-hour overlay)
+        'transaction_baselines': hourly_baseline_columns(unfiltered_transaction_df),
+        'client': client
+    }
+
+def compute_transaction_success(context, tile):
+    """Transaction Success Rate plus YBL / NSDL / YBLN success rates from the latest completed hour"""
+    transaction_df = context['transaction_df']
+    if transaction_df is None or transaction_df.empty:
+        return {}
+
+    metrics = {}
+
+    # Latest hour with a success rate (today's actual data); any latest row otherwise
+    if 'overall_success_rate' not in transaction_df.columns:
+        latest_data = None
+        current_success = 0
+    else:
+        latest_data = latest_hour_row(transaction_df, 'overall_success_rate')
+        if latest_data is not None:
+            current_success = latest_value(latest_data, 'overall_success_rate', 0)
         else:
-            # Get median from the latest hour
-            if not latest_data.empty:
-                try:
-                    # Try multiple possible column names for median
-                    median_success = None
-                    for col in ['median_success_rate', 'avg_success_rate', 'median_fa2_succ_rate']:
-                        if col in latest_data.columns:
-                            median_success = float(latest_data[col].iloc[0])
-                            break
-                    if median_success is None:
-                        median_success = current_success
-                    if pd.isna(median_success):
-                        median_success = current_success
-                except (ValueError, TypeError):
-                    median_success = current_success
-            else:
-                median_success = current_success
-            # st.success(f"✅ Median success rate: {median_success:.2f}%")
-        
-        # Calculate standard deviation for dynamic thresholds
-        try:
-            # Try to find median column for std dev calculation
-            median_col = None
-            for col in ['median_success_rate', 'avg_success_rate', 'median_fa2_succ_rate']:
-                if col in transaction_df.columns:
-                    median_col = col
-                    break
-            
-            if median_col and 'overall_success_rate' in transaction_df.columns:
-                std_dev = abs(transaction_df['overall_success_rate'] - transaction_df[median_col]).std()
-                if pd.isna(std_dev) or std_dev == 0:
-                    std_dev = transaction_df['overall_success_rate'].std() if 'overall_success_rate' in transaction_df.columns else 5.0
-            else:
-                # Fallback: use standard deviation of the current success rate
-                std_dev = transaction_df['overall_success_rate'].std() if 'overall_success_rate' in transaction_df.columns else 5.0
-        except:
-            std_dev = 5.0  # Safe fallback
-        
-        # Business-focused threshold logic: Better performance = always good, only downside thresholds
-        if current_success >= median_success:
-            status = 'green'  # Better than median = always good for business
-        elif current_success >= median_success - std_dev:
-            status = 'yellow'  # Acceptable performance (within 1 std dev below)
+            latest_data = latest_hour_row(transaction_df)
+            current_success = 0
+
+    # Median from the latest hour
+    median_col = next((col for col in SUCCESS_MEDIAN_COLUMNS if col in transaction_df.columns), None)
+    if 'median_success_rate' not in transaction_df.columns:
+        median_success = current_success
+    else:
+        median_success = latest_value(latest_data, median_col, current_success)
+
+    # Spread for dynamic thresholds: the anomaly engine's band of hourly gaps to the median
+    try:
+        if 'overall_success_rate' not in transaction_df.columns:
+            std_dev = 5.0
         else:
-            status = 'red'  # Below acceptable threshold (needs attention)
-        
-        # Count anomalies if column exists
-        anomaly_count = 0
-        if 'success_rate_anomaly' in transaction_df.columns:
-            try:
-                anomaly_count = len(transaction_df[transaction_df['success_rate_anomaly'] != 'normal'])
-            except:
-                anomaly_count = 0
-        
-        # Get aggregator breakdown from latest data
-        aggregator_breakdown = {}
-        if not latest_data.empty:
-            for agg_name in ['ybl', 'nsdl', 'ybln']:
-                col_name = f'{agg_name}_success_rate'
-                if col_name in latest_data.columns:
-                    try:
-                        val = float(latest_data[col_name].iloc[0])
-                        aggregator_breakdown[agg_name.upper()] = round(val, 2) if not pd.isna(val) else 0.0
-                    except:
-                        aggregator_breakdown[agg_name.upper()] = 0.0
-        
-        metrics['Transaction Success Rate'] = {
-            'value': round(current_success, 1),
-            'median': round(median_success, 1),
-            'status': status,
-            'trend': 'up' if current_success > median_success else 'down' if current_success < median_success else 'stable',
-            'change': round(current_success - median_success, 1),
-            'hourly_data': transaction_df.to_dict('records'),
-            'std_dev': round(std_dev, 2),
-            'anomaly_count': anomaly_count,
-            'aggregator_breakdown': aggregator_breakdown
+            std_dev = hourly_gap_spread(transaction_df, 'overall_success_rate', median_col)
+            if pd.isna(std_dev):
+                std_dev = transaction_df['overall_success_rate'].std()
+            if pd.isna(std_dev):
+                std_dev = 5.0
+    except Exception:
+        std_dev = 5.0  # Safe fallback
+
+    # Count anomalies if column exists
+    anomaly_count = 0
+    if 'success_rate_anomaly' in transaction_df.columns:
+        anomaly_count = int((transaction_df['success_rate_anomaly'] != 'normal').sum())
+
+    # Get aggregator breakdown from latest data
+    aggregator_breakdown = {}
+    if latest_data is not None:
+        for agg_name in ['ybl', 'nsdl', 'ybln']:
+            col_name = f'{agg_name}_success_rate'
+            if col_name in transaction_df.columns:
+                aggregator_breakdown[agg_name.upper()] = round(latest_value(latest_data, col_name, 0.0), 2)
+
+    metrics['Transaction Success Rate'] = {
+        'value': round(current_success, 1),
+        'median': round(median_success, 1),
+        'status': median_band_status(current_success, median_success, std_dev),
+        'trend': trend_direction(current_success, median_success),
+        'change': round(current_success - median_success, 1),
+        'hourly_data': context['transaction_hourly'],
+        'hour_baselines': context['transaction_baselines'],
+        'std_dev': round(std_dev, 2),
+        'anomaly_count': anomaly_count,
+        'aggregator_breakdown': aggregator_breakdown
+    }
+
+    # Aggregator performance with statistical thresholds
+    if 'pipe_metrics_txn' not in st.session_state:
+        st.session_state.pipe_metrics_txn = {}
+
+    for agg in ['YBL', 'NSDL', 'YBLN']:
+        agg_lower = agg.lower()
+
+        # Current and median from the latest hour with a value for this aggregator (today's actual data only)
+        latest_agg_data = None
+        if f'{agg_lower}_success_rate' in transaction_df.columns:
+            latest_agg_data = latest_hour_row(transaction_df, f'{agg_lower}_success_rate')
+        current_agg = latest_value(latest_agg_data, f'{agg_lower}_success_rate', 0)
+        median_agg = latest_value(latest_agg_data, f'median_{agg_lower}_success_rate', current_agg)
+
+        agg_std = abs(current_agg - median_agg) if median_agg > 0 else 5.0
+
+        metrics[f'{agg} Success Rate'] = {
+            'value': round(current_agg, 1),
+            'median': round(median_agg, 1),
+            'status': median_band_status(current_agg, median_agg, agg_std),
+            'trend': trend_direction(current_agg, median_agg),
+            'change': round(current_agg - median_agg, 1),
+            'std_dev': round(agg_std, 2)
         }
-        
-        # GTV Performance with statistical thresholds
-        # Handle GTV calculation with proper column names from new query structure
-        if 'total_amount_cr' in transaction_df.columns:
-            try:
-                # Sum only non-null values (today's actual hourly GTVs)
-                current_gtv = float(pd.to_numeric(transaction_df['total_amount_cr'].dropna(), errors='coerce').sum())
-                # st.success(f"✅ Total GTV Today: {current_gtv:.2f} Cr")
-            except (ValueError, TypeError) as e:
-                # st.error(f"❌ Error converting GTV: {e}")
-                current_gtv = 100.0
-        else:
-            # st.warning("⚠️ No total_amount_cr column found, using fallback")
-            current_gtv = 100.0
-        
-        # Get historical median GTV (sum of hourly medians for completed hours only)
-        if 'median_amount_cr' in transaction_df.columns:
-            try:
-                # Sum the hourly medians for completed hours (fair comparison with actual)
-                median_gtv = float(pd.to_numeric(transaction_df['median_amount_cr'].dropna(), errors='coerce').sum())
-                # st.success(f"✅ Expected GTV So Far (7-day median for completed hours): {median_gtv:.2f} Cr")
-            except (ValueError, TypeError) as e:
-                # st.error(f"❌ Error converting median GTV: {e}")
-                median_gtv = current_gtv * 0.9
-        else:
-            # st.warning("⚠️ No median_amount_cr column found, using 90% of current")
-            median_gtv = current_gtv * 0.9
-        
-        gtv_std = abs(current_gtv - median_gtv) if median_gtv > 0 else current_gtv * 0.1
-        
-        # GTV: Higher is always better for business, only downside thresholds
-        if current_gtv >= median_gtv:
-            gtv_status = 'green'  # Higher GTV = always good
-        elif current_gtv >= median_gtv - gtv_std:
-            gtv_status = 'yellow'  # Acceptable GTV level
-        else:
-            gtv_status = 'red'  # Low GTV needs attention
-        
-        metrics['GTV Performance'] = {
+
+        # Also store in session state for pipe-wise display
+        st.session_state.pipe_metrics_txn[f'{agg} Success Rate'] = dict(metrics[f'{agg} Success Rate'])
+
+    return metrics
+
+def compute_gtv_performance(context, tile):
+    """GTV so far today against the sum of hourly medians for the same completed hours"""
+    transaction_df = context['transaction_df']
+    if transaction_df is None or transaction_df.empty:
+        return {}
+
+    if 'total_amount_cr' in transaction_df.columns:
+        # Sum only non-null values (today's actual hourly GTVs)
+        current_gtv = float(transaction_df['total_amount_cr'].sum())
+    else:
+        current_gtv = 100.0
+
+    # Sum the hourly medians for completed hours (fair comparison with actual)
+    if 'median_amount_cr' in transaction_df.columns:
+        median_gtv = float(transaction_df['median_amount_cr'].sum())
+    else:
+        median_gtv = current_gtv * 0.9
+
+    gtv_std = abs(current_gtv - median_gtv) if median_gtv > 0 else current_gtv * 0.1
+
+    return {
+        'GTV Performance': {
             'value': round(current_gtv, 1),
             'median': round(median_gtv, 1),
-            'status': gtv_status,
-            'trend': 'up' if current_gtv > median_gtv else 'down' if current_gtv < median_gtv else 'stable',
+            'status': median_band_status(current_gtv, median_gtv, gtv_std),
+            'trend': trend_direction(current_gtv, median_gtv),
             'change': round(((current_gtv - median_gtv) / median_gtv) * 100, 1) if median_gtv > 0 else 0,
             'unit': 'Cr',
             'std_dev': round(gtv_std, 2),
-            'hourly_data': transaction_df.to_dict('records'),  # Include hourly breakdown for visualization
-            'total_txns': int(transaction_df[transaction_df['success_txns'].notna()]['success_txns'].sum()) if 'success_txns' in transaction_df.columns else 0
-        }
-        
-        # Aggregator performance with statistical thresholds
-        for agg in ['YBL', 'NSDL', 'YBLN']:
-            agg_lower = agg.lower()
-            
-            # Initialize variables
-            current_agg = 0
-            agg_data = pd.DataFrame()
-            latest_agg_data = pd.DataFrame()
-            
-            # Get current value from latest data (today's actual data only)
-            if f'{agg_lower}_success_rate' in transaction_df.columns:
-                try:
-                    # Get the latest hour's value from non-null data
-                    agg_data = transaction_df[transaction_df[f'{agg_lower}_success_rate'].notna()].copy()
-                    if not agg_data.empty:
-                        latest_agg_data = agg_data.sort_values('hour').tail(1)
-                        current_agg = float(latest_agg_data[f'{agg_lower}_success_rate'].iloc[0])
-                        if pd.isna(current_agg):
-                            current_agg = 0
-                except (ValueError, TypeError, IndexError):
-                    current_agg = 0
-            
-            # Get median value from the actual median columns
-            median_col = f'median_{agg_lower}_success_rate'
-            median_agg = current_agg
-            if median_col in transaction_df.columns and not latest_agg_data.empty:
-                try:
-                    # Get the latest hour's median value
-                    if median_col in latest_agg_data.columns:
-                        median_agg = float(latest_agg_data[median_col].iloc[0])
-                        if pd.isna(median_agg):
-                            median_agg = current_agg
-                except (ValueError, TypeError, IndexError):
-                    median_agg = current_agg
-            
-            agg_std = abs(current_agg - median_agg) if median_agg > 0 else 5.0
-            
-            # Aggregator success rates: Higher is always better, only downside thresholds
-            if current_agg >= median_agg:
-                agg_status = 'green'  # Better performance = always good
-            elif current_agg >= median_agg - agg_std:
-                agg_status = 'yellow'  # Acceptable performance
-            else:
-                agg_status = 'red'  # Below threshold, needs attention
-            
-            # Store both in main metrics and separate session state for pipe-wise display
-            metrics[f'{agg} Success Rate'] = {
-                'value': round(current_agg, 1),
-                'median': round(median_agg, 1),
-                'status': agg_status,
-                'trend': 'up' if current_agg > median_agg else 'down' if current_agg < median_agg else 'stable',
-                'change': round(current_agg - median_agg, 1),
-                'std_dev': round(agg_std, 2)
-            }
-            
-            # Also store in session state for pipe-wise display
-            if 'pipe_metrics_txn' not in st.session_state:
-                st.session_state.pipe_metrics_txn = {}
-            
-            st.session_state.pipe_metrics_txn[f'{agg} Success Rate'] = {
-                'value': round(current_agg, 1),
-                'median': round(median_agg, 1),
-                'status': agg_status,
-                'trend': 'up' if current_agg > median_agg else 'down' if current_agg < median_agg else 'stable',
-                'change': round(current_agg - median_agg, 1),
-                'std_dev': round(agg_std, 2)
-            }
-    
-    if not bio_auth_df.empty:
-        # Debug: Show what columns we actually have for bio auth
-        # st.info(f"📊 Bio Auth DataFrame columns: {list(bio_auth_df.columns)}")
-        # st.info(f"📊 Bio Auth DataFrame shape: {bio_auth_df.shape}")
-        # if len(bio_auth_df) > 0:
-        #     st.info(f"📊 Bio Auth sample: {bio_auth_df.head(1).to_dict('records')}")
-        
-        # 2FA Success Rate with statistical thresholds
-        if 'fa2_rate_yesterday' not in bio_auth_df.columns:
-            # st.error("❌ Missing 'fa2_rate_yesterday' column in bio auth data")
-            current_fa2 = 0
-        else:
-            current_fa2 = bio_auth_df['fa2_rate_yesterday'].mean()
-            # Handle NaN values
-            if pd.isna(current_fa2):
-                # st.error("❌ Current 2FA rate is NaN")
-                current_fa2 = 0
-            else:
-                pass  # st.success(f"✅ Current 2FA rate: {current_fa2}")
-        
-        if 'median_fa2_succ_rate' not in bio_auth_df.columns:
-            # st.warning("⚠️ Missing 'median_fa2_succ_rate' column, using current as fallback")
-            median_fa2 = current_fa2
-        else:
-            median_fa2 = bio_auth_df['median_fa2_succ_rate'].mean()
-            # Handle NaN values
-            if pd.isna(median_fa2):
-                # st.error("❌ Median 2FA rate is NaN")
-                median_fa2 = current_fa2
-            else:
-                pass  # st.success(f"✅ Median 2FA rate: {median_fa2}")
-        
-        if 'fa2_rate_yesterday' in bio_auth_df.columns and 'median_fa2_succ_rate' in bio_auth_df.columns:
-            fa2_std = abs(bio_auth_df['fa2_rate_yesterday'] - bio_auth_df['median_fa2_succ_rate']).std()
-        else:
-            fa2_std = bio_auth_df['fa2_rate_yesterday'].std() if 'fa2_rate_yesterday' in bio_auth_df.columns else 5.0
-        
-        # 2FA Success Rate: Higher is always better for business, only downside thresholds
-        if current_fa2 >= median_fa2:
-            fa2_status = 'green'  # Better 2FA performance = always good
-        elif current_fa2 >= median_fa2 - fa2_std:
-            fa2_status = 'yellow'  # Acceptable 2FA performance
-        else:
-            fa2_status = 'red'  # Low 2FA success needs attention
-        
-        metrics['2FA Success Rate'] = {
-            'value': round(current_fa2, 1),
-            'median': round(median_fa2, 1),
-            'status': fa2_status,
-            'trend': 'up' if current_fa2 > median_fa2 else 'down' if current_fa2 < median_fa2 else 'stable',
-            'change': round(current_fa2 - median_fa2, 1),
-            'hourly_data': bio_auth_df.to_dict('records'),
-            'std_dev': round(fa2_std, 2),
-            'anomaly_count': len(bio_auth_df[bio_auth_df['fa2_succ_flag'] != 'normal'])
+            'hourly_data': context['transaction_hourly'],  # Include hourly breakdown for visualization
+            'total_txns': int(transaction_df['success_txns'].sum()) if 'success_txns' in transaction_df.columns else 0
         }
-        
-        # 2FA Pipe-wise performance with statistical thresholds
-        for agg in ['YBL', 'NSDL']:
-            # Map aggregator names to column names in bio auth data
-            if agg == 'YBL':
-                current_col = 'ybl_rate_yesterday'
-                median_col = 'median_fa2_succ_rate_ybl'
-            else:  # NSDL
-                current_col = 'nsdl_rate_yesterday'
-                median_col = 'median_fa2_succ_rate_nsdl'
-            
-            # Get current value from latest data
-            if current_col in bio_auth_df.columns:
-                try:
-                    # Get the latest hour's value, not the average
-                    latest_bio_data = bio_auth_df.sort_values('hour').tail(1)
-                    current_agg_2fa = float(latest_bio_data[current_col].iloc[0])
-                except (ValueError, TypeError, IndexError):
-                    current_agg_2fa = 0
-            else:
-                current_agg_2fa = 0
-            
-            # Get median value from the actual median columns
-            if median_col in bio_auth_df.columns:
-                try:
-                    # Get the latest hour's median value
-                    median_agg_2fa = float(latest_bio_data[median_col].iloc[0])
-                except (ValueError, TypeError, IndexError):
-                    median_agg_2fa = current_agg_2fa
-            else:
-                median_agg_2fa = current_agg_2fa
-            
-            agg_2fa_std = abs(current_agg_2fa - median_agg_2fa) if median_agg_2fa > 0 else 5.0
-            
-            # 2FA Aggregator success rates: Higher is always better, only downside thresholds
-            if current_agg_2fa >= median_agg_2fa:
-                agg_2fa_status = 'green'  # Better performance = always good
-            elif current_agg_2fa >= median_agg_2fa - agg_2fa_std:
-                agg_2fa_status = 'yellow'  # Acceptable performance
-            else:
-                agg_2fa_status = 'red'  # Below threshold, needs attention
-            
-            # Store in session state for pipe-wise display - use a different key to avoid conflicts
-            if 'pipe_metrics_2fa' not in st.session_state:
-                st.session_state.pipe_metrics_2fa = {}
-            
-            st.session_state.pipe_metrics_2fa[f'{agg} Success Rate'] = {
-                'value': round(current_agg_2fa, 1),
-                'median': round(median_agg_2fa, 1),
-                'status': agg_2fa_status,
-                'trend': 'up' if current_agg_2fa > median_agg_2fa else 'down' if current_agg_2fa < median_agg_2fa else 'stable',
-                'change': round(current_agg_2fa - median_agg_2fa, 1),
-                'std_dev': round(agg_2fa_std, 2)
-            }
-        
-        # Per-user authentication rate
-        current_per_user = bio_auth_df.get('per_user_rate_yesterday', pd.Series([0])).mean()
-        median_per_user = bio_auth_df.get('median_fa2_per_user_rate', pd.Series([0])).mean()
-        
-        metrics['Per-User Auth Rate'] = {
-            'value': round(current_per_user, 1),
-            'median': round(median_per_user, 1),
-            'status': 'green' if current_per_user <= median_per_user + 0.5 else 'yellow' if current_per_user <= median_per_user + 1.0 else 'red',
-            'trend': 'down' if current_per_user > median_per_user else 'up' if current_per_user < median_per_user else 'stable',
-            'change': round(current_per_user - median_per_user, 1)
+    }
+
+def compute_2fa_success(context, tile):
+    """2FA Success Rate, YBL / NSDL 2FA rates (pipe-wise view) and Per-User Auth Rate"""
+    bio_auth_df = context['bio_auth_df']
+    if bio_auth_df is None or bio_auth_df.empty:
+        return {}
+
+    metrics = {}
+
+    current_fa2 = bio_auth_df['fa2_rate_yesterday'].mean() if 'fa2_rate_yesterday' in bio_auth_df.columns else 0
+    if pd.isna(current_fa2):
+        current_fa2 = 0
+
+    median_fa2 = bio_auth_df['median_fa2_succ_rate'].mean() if 'median_fa2_succ_rate' in bio_auth_df.columns else current_fa2
+    if pd.isna(median_fa2):
+        median_fa2 = current_fa2
+
+    # Anomaly engine's band of hourly gaps to the median, the hourly rates' spread when there are too few hours
+    fa2_std = hourly_gap_spread(bio_auth_df, 'fa2_rate_yesterday', 'median_fa2_succ_rate')
+    if pd.isna(fa2_std):
+        fa2_std = bio_auth_df['fa2_rate_yesterday'].std() if 'fa2_rate_yesterday' in bio_auth_df.columns else 5.0
+
+    metrics['2FA Success Rate'] = {
+        'value': round(current_fa2, 1),
+        'median': round(median_fa2, 1),
+        'status': median_band_status(current_fa2, median_fa2, fa2_std),
+        'trend': trend_direction(current_fa2, median_fa2),
+        'change': round(current_fa2 - median_fa2, 1),
+        'hourly_data': context['bio_auth_hourly'],
+        'std_dev': round(fa2_std, 2),
+        'anomaly_count': len(bio_auth_df[bio_auth_df['fa2_succ_flag'] != 'normal'])
+    }
+
+    # 2FA Pipe-wise performance with statistical thresholds (latest hour)
+    # Stored under a separate session key to avoid conflicts with the transaction pipes
+    if 'pipe_metrics_2fa' not in st.session_state:
+        st.session_state.pipe_metrics_2fa = {}
+
+    latest_bio_data = latest_hour_row(bio_auth_df)
+    for agg, current_col, median_col in [('YBL', 'ybl_rate_yesterday', 'median_fa2_succ_rate_ybl'),
+                                         ('NSDL', 'nsdl_rate_yesterday', 'median_fa2_succ_rate_nsdl')]:
+        # Latest hour's values, not the average
+        current_agg_2fa = float(latest_bio_data[current_col]) if current_col in bio_auth_df.columns else 0
+        median_agg_2fa = float(latest_bio_data[median_col]) if median_col in bio_auth_df.columns else current_agg_2fa
+
+        agg_2fa_std = abs(current_agg_2fa - median_agg_2fa) if median_agg_2fa > 0 else 5.0
+
+        st.session_state.pipe_metrics_2fa[f'{agg} Success Rate'] = {
+            'value': round(current_agg_2fa, 1),
+            'median': round(median_agg_2fa, 1),
+            'status': median_band_status(current_agg_2fa, median_agg_2fa, agg_2fa_std),
+            'trend': trend_direction(current_agg_2fa, median_agg_2fa),
+            'change': round(current_agg_2fa - median_agg_2fa, 1),
+            'std_dev': round(agg_2fa_std, 2)
         }
-    
-    # RFM Score is already calculated in calculate_enhanced_health_metrics using Google Sheets
-    # No need to override it here - the Google Sheets data is already loaded
-    
-    # Add existing dummy metrics for other categories (but preserve real RFM calculation)
-    dummy_metrics = get_dummy_metrics_for_remaining()
-    # Remove RFM Score from dummy metrics to preserve real calculation
-    if 'RFM Score' in dummy_metrics:
-        del dummy_metrics['RFM Score']
-    metrics.update(dummy_metrics)
-    
+
+    # Per-user authentication rate (lower is better)
+    current_per_user = bio_auth_df.get('per_user_rate_yesterday', pd.Series([0])).mean()
+    median_per_user = bio_auth_df.get('median_fa2_per_user_rate', pd.Series([0])).mean()
+
+    metrics['Per-User Auth Rate'] = {
+        'value': round(current_per_user, 1),
+        'median': round(median_per_user, 1),
+        'status': 'green' if current_per_user <= median_per_user + 0.5 else 'yellow' if current_per_user <= median_per_user + 1.0 else 'red',
+        'trend': trend_direction(median_per_user, current_per_user),
+        'change': round(current_per_user - median_per_user, 1)
+    }
+
     return metrics
 
-def calculate_comprehensive_health_metrics_OLD_DISABLED(transaction_df, bio_auth_df, client, selected_date):
-    """Calculate ALL health metrics from real data sources - no dummy data"""
-    
-    metrics = {}
-    
-    # Calculate comprehensive metrics
-    
-    # First calculate the core AEPS metrics from real data
-# Step 1: Calculating Core AEPS metrics...
-    try:
-        if not transaction_df.empty:
-            # Transaction success metrics with better error handling
-            try:
-                current_success = transaction_df['overall_success_rate'].mean()
-                # Handle NaN or zero values
-                if pd.isna(current_success) or current_success == 0:
-                    # Try to get non-zero values
-                    non_zero_success = transaction_df[transaction_df['overall_success_rate'] > 0]['overall_success_rate']
-                    if not non_zero_success.empty:
-                        current_success = non_zero_success.mean()
-                        st.info(f"📊 Using non-zero success rate mean: {current_success:.2f}%")
-                    else:
-                        # Fallback to a reasonable default based on typical AEPS performance
-                        current_success = 85.0  # Typical AEPS success rate
-                        st.warning(f"⚠️ No valid success rate data, using fallback: {current_success}%")
-            except Exception as e:
-                st.error(f"❌ Error calculating current success rate: {e}")
-                current_success = 85.0
-                
-            median_success = current_success  # Use current as fallback
-            # Check for correct median column names
-            for col in ['median_success_rate', 'avg_success_rate', 'median_fa2_succ_rate']:
-                if col in transaction_df.columns:
-                    try:
-                        median_success = transaction_df[col].mean()
-                        if pd.isna(median_success) or median_success == 0:
-                            median_success = current_success
-                        else:
-                            break
-                    except:
-                        continue
-            std_dev = abs(transaction_df['overall_success_rate'] - median_success).std()
-        
-            if current_success >= median_success:
-                status = 'green'
-            elif current_success >= median_success - std_dev:
-                status = 'yellow'
-            else:
-                status = 'red'
-                
-            metrics['Transaction Success Rate'] = {
-                'value': round(current_success, 2),
-                'status': status,
-                'trend': 'stable',
-                'change': round(current_success - median_success, 2)
+def compute_login_success(context, tile):
+    """Latest login success rate from Google Sheets against its historical average"""
+    login_data = get_google_sheets_data('login Success Rate', None)
+    if login_data is None or login_data.empty or 'succ_login' not in login_data.columns:
+        return None
+
+    current_login = float(login_data.iloc[-1].get('succ_login', 0.991)) * 100.0
+    median_login = login_data['succ_login'].mean() * 100.0 if len(login_data) > 1 else current_login
+
+    return {
+        'Login Success Rate': {
+            'value': round(current_login, 1),
+            'status': tile_status(current_login, tile['thresholds']),
+            'trend': trend_direction(current_login, median_login),
+            'change': round(current_login - median_login, 1)
+        }
+    }
+
+def compute_cash_product(context, tile):
+    """Cash product penetration this month against last month"""
+    cash_product_data = get_cash_product_analytics()
+    if cash_product_data is None or cash_product_data.empty:
+        return None
+
+    # Most recent month first
+    current_penetration = float(cash_product_data.iloc[0]['penetration_rate'])
+    current_users = int(cash_product_data.iloc[0]['active_cash_users'])
+    change = 0
+    if len(cash_product_data) > 1:
+        change = round(current_penetration - float(cash_product_data.iloc[1]['penetration_rate']), 1)
+
+    return {
+        'Cash Product': {
+            'value': current_penetration,
+            'status': tile_status(current_penetration, tile['thresholds']),
+            'trend': trend_direction(change, 0),
+            'change': change,
+            'unit': '%',
+            'active_users': current_users,
+            'tooltip': f'{current_users:,} active cash product users'
+        }
+    }
+
+def compute_new_users(context, tile):
+    """New AEPS users this month and their month-over-month growth"""
+    overall_data, md_wise_data, pincode_data = get_new_user_analytics()
+    if overall_data is None or overall_data.empty:
+        return None
+
+    current_gross_add = int(overall_data.iloc[0]['current_gross_add'])
+    growth_rate = float(overall_data.iloc[0]['growth_rate'])
+
+    return {
+        'New AEPS Users': {
+            'value': current_gross_add,
+            'status': tile_status(growth_rate, tile['thresholds']),
+            'trend': 'up' if growth_rate > 0 else 'down',
+            'change': round(growth_rate, 1),
+            'unit': ''
+        }
+    }
+
+def compute_stable_users(context, tile):
+    """Stable agents this month (in thousands) and their month-over-month change"""
+    stable_sp_data, tail_user_data = get_stable_users_analytics()
+    if stable_sp_data is None or stable_sp_data.empty:
+        return None
+
+    # Most recent month first
+    current_stable = int(stable_sp_data.iloc[0]['stable_agent_count'])
+    change_pct = 0
+    if len(stable_sp_data) > 1:
+        last_stable = int(stable_sp_data.iloc[1]['stable_agent_count'])
+        change_pct = round(((current_stable - last_stable) / last_stable) * 100, 1) if last_stable > 0 else 0
+
+    return {
+        'Stable Users': {
+            'value': round(current_stable / 1000, 1),  # Show in thousands
+            'status': tile_status(change_pct, tile['thresholds']),
+            'trend': trend_direction(change_pct, 0),
+            'change': change_pct,
+            'unit': 'K'
+        }
+    }
+
+def compute_churn_rate(context, tile):
+    """Share of distributors with a high churn score (SUM_ALL >= 3)"""
+    churn_data = get_distributor_churn_data()
+    if churn_data is None or churn_data.empty:
+        return None
+
+    total_distributors = len(churn_data)
+    high_churn_count = int((churn_data['SUM_ALL'] >= 3).sum())
+    churn_rate = round((high_churn_count / total_distributors) * 100, 1) if total_distributors > 0 else 0
+
+    return {
+        'Churn Rate': {
+            'value': churn_rate,
+            'status': tile_status(churn_rate, tile['thresholds']),
+            'trend': 'stable',  # Would need historical data for trend
+            'change': 0,  # Would need historical data for change
+            'unit': '%'
+        }
+    }
+
+def compute_system_anomalies(context, tile):
+    """Metrics below their expected range in the anomaly detection sheet"""
+    anomaly_data = get_anomaly_data_from_sheets()
+    statuses = [data.get('anomaly_status', '') for data in anomaly_data.values()]
+
+    # Only "Below Range" counts as an anomaly: "Above Range" is better than expected for
+    # normal (higher values) and inverse (lower values) metrics alike, tracked for display only
+    below_range = statuses.count('Below Range')
+
+    return {
+        'System Anomalies': {
+            'value': below_range,
+            'status': tile_status(below_range, tile['thresholds']),
+            'trend': 'up' if below_range else 'stable',
+            'change': below_range,
+            'unit': '',
+            'details': {
+                'above_range': statuses.count('Above Range'),
+                'below_range': below_range,
+                'total_metrics': len(anomaly_data)
             }
-            
-            # GTV Performance
-            if 'total_gtv' in transaction_df.columns:
-                current_gtv = transaction_df['total_gtv'].sum()
-                metrics['GTV Performance'] = {
-                    'value': round(current_gtv / 1000000, 2),  # In millions
-                    'status': 'green' if current_gtv > 0 else 'red',
-                    'trend': 'up',
-                    'change': 5.2,
-                    'unit': 'M'
-                }
-            else:
-                metrics['GTV Performance'] = {
-                    'value': 2847.3,
-                    'status': 'green',
-                    'trend': 'up', 
-                    'change': 5.2,
-                    'unit': 'M'
-                }
-        else:
-            # Fallback for transaction metrics
-            metrics['Transaction Success Rate'] = {'value': 94.2, 'status': 'green', 'trend': 'stable', 'change': 0.3}
-            metrics['GTV Performance'] = {'value': 2847.3, 'status': 'green', 'trend': 'up', 'change': 5.2, 'unit': 'M'}
-    except Exception as e:
-        st.error(f"❌ Error in Core AEPS calculation: {str(e)}")
-        metrics['Transaction Success Rate'] = {'value': 94.2, 'status': 'green', 'trend': 'stable', 'change': 0.3}
-        metrics['GTV Performance'] = {'value': 2847.3, 'status': 'green', 'trend': 'up', 'change': 5.2, 'unit': 'M'}
-    
-    # 2FA Success Rate from real data
-    if not bio_auth_df.empty:
-        current_2fa = bio_auth_df['fa2_rate_yesterday'].mean() if 'fa2_rate_yesterday' in bio_auth_df.columns else 89.5
-        median_2fa = bio_auth_df['median_fa2_succ_rate'].mean() if 'median_fa2_succ_rate' in bio_auth_df.columns else current_2fa
-        
-        if current_2fa >= median_2fa:
-            status_2fa = 'green'
-        elif current_2fa >= median_2fa - 5:
-            status_2fa = 'yellow'
-        else:
-            status_2fa = 'red'
-            
-        metrics['2FA Success Rate'] = {
-            'value': round(current_2fa, 1),
-            'status': status_2fa,
+        }
+    }
+
+def compute_active_bugs(context, tile):
+    """Open / pending / WIP bugs from the shared bugs source (Google Sheets, then bugs_data.csv)"""
+    bugs_data = get_bugs_data(use_sample=False)
+    if bugs_data is None:
+        return None
+
+    active_bugs = bugs_data['active_bugs']
+    return {
+        'Active Bugs': {
+            'value': active_bugs,
+            'status': tile_status(active_bugs, tile['thresholds']),
             'trend': 'stable',
-            'change': round(current_2fa - median_2fa, 1)
+            'change': 0,
+            'unit': ''
         }
+    }
+
+# M2B time buckets: "0 min" and "1-4 min" are no pendency (immediate processing), 5+ minutes is pendency
+M2B_NO_PENDENCY_BUCKETS = ['0 min', '1-4 min']
+M2B_PENDENCY_BUCKETS = ['5-10 min', '10-60 min', '1-24 hour', 'Next Day']
+
+def compute_m2b_pendency(context, tile):
+    """Share of M2B clients processed immediately on the latest day, against the 30-day daily median"""
+    if not context['client']:
+        return {}
+
+    m2b_df = get_m2b_pendency_data()
+    if m2b_df is None or m2b_df.empty or 'client_count' not in m2b_df.columns:
+        return None
+
+    days = m2b_df['date'].dt.date
+    no_pendency = m2b_df['time_bucket'].isin(M2B_NO_PENDENCY_BUCKETS)
+    with_pendency = m2b_df['time_bucket'].isin(M2B_PENDENCY_BUCKETS)
+
+    # Most recent available day (T-1 or latest available)
+    latest = (days == days.max()).to_numpy()
+    immediate_processing = m2b_df.loc[latest & no_pendency, 'client_count'].sum()
+    total_clients = immediate_processing + m2b_df.loc[latest & with_pendency, 'client_count'].sum()
+    efficiency_pct = (immediate_processing / total_clients) * 100 if total_clients > 0 else 0
+
+    # Daily efficiency over the whole window (including the latest day) for median and std deviation
+    daily = pd.DataFrame({
+        'day': days,
+        'no_pendency': m2b_df['client_count'].where(no_pendency, 0),
+        'total': m2b_df['client_count']
+    }).groupby('day').sum()
+    daily = daily[daily['total'] > 0]
+    daily_efficiency = (daily['no_pendency'] / daily['total'] * 100).to_numpy()
+
+    if len(daily_efficiency) > 1:
+        median_efficiency = float(np.median(daily_efficiency))
+        std_efficiency = float(np.std(daily_efficiency))
     else:
-        metrics['2FA Success Rate'] = {'value': 89.5, 'status': 'yellow', 'trend': 'down', 'change': -1.2}
-    
-    # Now calculate Distribution/Partner metrics from REAL data sources
-    try:
-# Calculating Distribution/Partner metrics...
-        # New User Onboarding - get real data
-        if client:
-            overall_df, md_wise_df, activation_df = get_new_user_analytics()
-            if overall_df is not None and not overall_df.empty and 'new_added_agents' in overall_df.columns:
-                # Calculate actual metrics from real data - now using like-to-like comparison
-                current_month_adds = overall_df.iloc[0]['new_added_agents'] if len(overall_df) > 0 else 0
-                prev_month_adds = overall_df.iloc[1]['new_added_agents'] if len(overall_df) > 1 else current_month_adds
-                growth_rate = ((current_month_adds - prev_month_adds) / prev_month_adds * 100) if prev_month_adds > 0 else 0
-                
-                # Determine status based on growth - if negative, it should be red/yellow
-                if growth_rate > 5:
-                    status_onboarding = 'green'
-                elif growth_rate > -5:
-                    status_onboarding = 'yellow'
-                else:
-                    status_onboarding = 'red'
-                
-                metrics['New AEPS Users'] = {
-                    'value': current_month_adds,
-                    'status': status_onboarding,
-                    'trend': 'up' if growth_rate > 0 else 'down',
-                    'change': round(growth_rate, 1),
-                    'unit': ''
-                }
-            else:
-                # Fallback if no data
-                metrics['New AEPS Users'] = {'value': 1247, 'status': 'green', 'trend': 'up', 'change': 8.3, 'unit': ''}
-        else:
-            metrics['New AEPS Users'] = {'value': 1247, 'status': 'green', 'trend': 'up', 'change': 8.3, 'unit': ''}
-        
-        # Churn Rate - get real data
-        churn_df = process_churn_data()
-        if not churn_df.empty:
-            total_agents = len(churn_df)
-            churned_agents = len(churn_df[churn_df['churn_type'].isin(['SP_AGENT_CHURN', 'SP_USAGE_CHURN', 'ABSOLUTE_CHURN', 'USAGE_CHURN'])])
-            churn_rate = (churned_agents / total_agents * 100) if total_agents > 0 else 0
-            
-            # Determine status based on churn rate
-            if churn_rate < 3:
-                status_churn = 'green'
-            elif churn_rate < 8:
-                status_churn = 'yellow'
-            else:
-                status_churn = 'red'
-                
-            metrics['Churn Rate'] = {
-                'value': round(churn_rate, 1),
-                'status': status_churn,
-                'trend': 'down' if churn_rate < 5 else 'up',
-                'change': round(churn_rate - 3.2, 1)  # Assuming 3.2% was previous
-            }
-        else:
-            metrics['Churn Rate'] = {'value': 3.2, 'status': 'yellow', 'trend': 'up', 'change': 0.8}
-        
-        # Stable Users - get real data
-        stable_sp_df, stable_tail_df = get_stable_users_analytics()
-        if stable_sp_df is not None and not stable_sp_df.empty:
-            current_stable = stable_sp_df.iloc[0]['stable_agent_count'] if len(stable_sp_df) > 0 else 0
-            prev_stable = stable_sp_df.iloc[1]['stable_agent_count'] if len(stable_sp_df) > 1 else current_stable
-            stable_growth = ((current_stable - prev_stable) / prev_stable * 100) if prev_stable > 0 else 0
-            
-            # Stable users - higher is better
-            if stable_growth > 0:
-                status_stable = 'green'
-            elif stable_growth > -5:
-                status_stable = 'yellow'
-            else:
-                status_stable = 'red'
-                
-            metrics['Stable Users'] = {
-                'value': round(current_stable / 1000, 1),  # In thousands
-                'status': status_stable,
-                'trend': 'up' if stable_growth > 0 else 'down',
-                'change': round(stable_growth, 1),
-                'unit': 'K'
-            }
-        else:
-            metrics['Stable Users'] = {'value': 89.1, 'status': 'green', 'trend': 'stable', 'change': 0.2}
-        
-    except Exception as e:
-        # Fallback for Distribution metrics if real data fails
-        st.error(f"Error calculating real metrics: {str(e)}")
-        st.info("🔄 Using fallback metrics for Distribution/Partner section")
-        metrics['New AEPS Users'] = {'value': 1247, 'status': 'green', 'trend': 'up', 'change': 8.3, 'unit': ''}
-        metrics['Churn Rate'] = {'value': 3.2, 'status': 'yellow', 'trend': 'up', 'change': 0.8}
-        metrics['Stable Users'] = {'value': 89.1, 'status': 'green', 'trend': 'stable', 'change': 0.2}
-    
-    # Add other metrics with smart defaults or real data where available
-    metrics.update({
-        # Core AEPS
-        'Platform Uptime': {'value': 99.8, 'status': 'green', 'trend': 'stable', 'change': 0.1},
-        'YBL Success Rate': {'value': 96.2, 'status': 'green', 'trend': 'up', 'change': 1.1},
-        'NSDL Success Rate': {'value': 94.8, 'status': 'green', 'trend': 'stable', 'change': 0.3},
-        'YBLN Success Rate': {'value': 91.5, 'status': 'yellow', 'trend': 'down', 'change': -1.8},
-        'Per-User Auth Rate': {'value': 87.3, 'status': 'yellow', 'trend': 'stable', 'change': 0.5},
-        
-        # Supporting Rails
-        'Cash Product': {'value': 234.7, 'status': 'green', 'trend': 'up', 'change': 12.3, 'unit': 'K'},
-        'Login Success Rate': {'value': 98.2, 'status': 'green', 'trend': 'stable', 'change': 0.4},
-        # 'M2B Pendency': {'value': 23, 'status': 'yellow', 'trend': 'up', 'change': 3, 'unit': ''},  # Removed - using calculated values
-        'CC Calls Metric': {'value': 1847, 'status': 'red', 'trend': 'up', 'change': 12.4, 'unit': ''},
-        'Bot Detection': {'value': 94.1, 'status': 'green', 'trend': 'stable', 'change': 0.7},
-        'RFM Score': {'value': 78.9, 'status': 'yellow', 'trend': 'down', 'change': -2.1},
-        
-        # Distribution / Partner (additional)
-        'Winback Rate': {'value': 23.4, 'status': 'red', 'trend': 'down', 'change': -5.2},
-        'Winback Conversion': {'value': 18.7, 'status': 'red', 'trend': 'down', 'change': -3.1},
-        'Onboarding Conversion': {'value': 76.3, 'status': 'green', 'trend': 'up', 'change': 2.4},
-        
-        # Operations
-        'System Anomalies': {'value': 0, 'status': 'green', 'trend': 'stable', 'change': 0, 'unit': ''},
-        'Active Bugs': {'value': 2, 'status': 'green', 'trend': 'down', 'change': -1, 'unit': ''},
-        'Active RCAs': {'value': 1, 'status': 'green', 'trend': 'stable', 'change': 0, 'unit': ''},
-        
-        # Missing Supporting Rails metrics
-        'Cash Product': {'value': 95.1, 'status': 'green', 'trend': 'stable', 'change': 0.1, 'unit': '%'},
-        'Login Success Rate': {'value': 98.2, 'status': 'green', 'trend': 'stable', 'change': 0.4, 'unit': '%'},
-        'RFM Score': {'value': 78.9, 'status': 'yellow', 'trend': 'down', 'change': -2.1, 'unit': '%'},
-        
-        # Missing Partner metrics
-        'Winback Conversion': {'value': 23.4, 'status': 'yellow', 'trend': 'up', 'change': 1.2, 'unit': '%'},
-        'Sales Iteration': {'value': 87.6, 'status': 'green', 'trend': 'up', 'change': 3.4, 'unit': '%'}
-    })
-    
-    st.success(f"✅ Calculated {len(metrics)} health metrics successfully!")
-    return metrics
+        median_efficiency = efficiency_pct
+        std_efficiency = 0.0
 
-def calculate_comprehensive_health_metrics_simple(transaction_df, bio_auth_df, client):
-    """Simplified comprehensive health metrics calculation with better error handling"""
-    
-    # Start with the original enhanced metrics as a base
-    metrics = calculate_enhanced_health_metrics(transaction_df, bio_auth_df)
-    
-    # Enhancing with additional real data calculations for dashboard lights
-    try:
-        if client:
-            # Login Success Rate (higher is better) - Auto-load Google Sheets
-            try:
-                # Silently load Google Sheets data in background
-                login_data = get_google_sheets_data('login Success Rate', None)
-                if login_data is not None and not login_data.empty:
-                    if 'date' in login_data.columns:
-                        latest_data = login_data.iloc[-1]
-                    else:
-                        latest_data = login_data.iloc[0]  # Single row data
-                    
-                    # Use login success rate (higher is better)
-                    current_login = float(latest_data.get('succ_login', 0.991)) * 100.0
-                    
-                    # Smart thresholds based on login success patterns
-                    # Green: >= 99%, Yellow: 98-99%, Red: < 98%
-                    if current_login >= 99.0:
-                        status = 'green'
-                    elif current_login >= 98.0:
-                        status = 'yellow'
-                    else:
-                        status = 'red'
-                    
-                    # Calculate change from baseline (99.0% is good baseline)
-                    baseline = 99.0
-                    change = current_login - baseline
-                    
-                    metrics['Login Success Rate'] = {
-                        'value': round(current_login, 1),
-                        'median': baseline,
-                        'status': status,
-                        'trend': 'up' if change >= 0 else 'down',
-                        'change': round(change, 1),
-                        'unit': '%',
-                    }
-                else:
-                    # Fallback when Google Sheets not available
-                    metrics['Login Success Rate'] = {
-                        'value': 99.1,
-                        'median': 99.0,
-                        'status': 'green',
-                        'trend': 'up',
-                        'change': 0.1,
-                        'unit': '%',
-                    }
-            except Exception as e:
-                # Handle any errors gracefully
-                metrics['Login Success Rate'] = {
-                    'value': 99.1,
-                    'median': 99.0,
-                    'status': 'green',
-                    'trend': 'up',
-                    'change': 0.1,
-                    'unit': '%',
-                }
-            
-            # Active Bugs - Load from CSV file (fallback to Google Sheets)
-            try:
-                # First try to load from CSV file
-                bugs_data = get_bugs_data_from_csv()
-                if bugs_data and 'open_bugs' in bugs_data:
-                    open_bugs = bugs_data['open_bugs']
-                    total_bugs = bugs_data['total_bugs']
-                    trend_change = bugs_data['trend_change']
-                    
-                    # Determine status based on open bugs count
-                    if open_bugs == 0:
-                        status = 'green'
-                        trend = 'stable'
-                    elif open_bugs <= 5:
-                        status = 'yellow'
-                        trend = 'down' if trend_change < 0 else 'up'
-                    else:
-                        status = 'red'
-                        trend = 'up' if trend_change > 0 else 'down'
-                    
-                    metrics['Active Bugs'] = {
-                        'value': open_bugs,
-                        'status': status,
-                        'trend': trend,
-                        'change': trend_change,
-                        'unit': '',
-                        'total_bugs': total_bugs,
-                        'product_breakdown': bugs_data.get('product_breakdown', {}),
-                        'status_breakdown': bugs_data.get('status_breakdown', {})
-                    }
-                else:
-                    # Try Google Sheets as fallback
-                    bugs_data = get_bugs_data_from_sheets()
-                    if bugs_data and 'open_bugs' in bugs_data:
-                        open_bugs = bugs_data['open_bugs']
-                        total_bugs = bugs_data['total_bugs']
-                        trend_change = bugs_data['trend_change']
-                        
-                        # Determine status based on open bugs count
-                        if open_bugs == 0:
-                            status = 'green'
-                            trend = 'stable'
-                        elif open_bugs <= 5:
-                            status = 'yellow'
-                            trend = 'down' if trend_change < 0 else 'up'
-                        else:
-                            status = 'red'
-                            trend = 'up' if trend_change > 0 else 'down'
-                        
-                        metrics['Active Bugs'] = {
-                            'value': open_bugs,
-                            'status': status,
-                            'trend': trend,
-                            'change': trend_change,
-                            'unit': '',
-                            'total_bugs': total_bugs,
-                            'product_breakdown': bugs_data.get('product_breakdown', {}),
-                            'status_breakdown': bugs_data.get('status_breakdown', {})
-                        }
-                    else:
-                        # Final fallback
-                        metrics['Active Bugs'] = {
-                            'value': 2,
-                            'status': 'green',
-                            'trend': 'down',
-                            'change': -1,
-                            'unit': ''
-                        }
-            except Exception as e:
-                # Handle any errors gracefully
-                metrics['Active Bugs'] = {
-                    'value': 2,
-                    'status': 'green',
-                    'trend': 'down',
-                    'change': -1,
-                    'unit': ''
-                }
-            
-            # M2B Pendency (lower is better) – use new time bucket data
-            m2b_df = get_m2b_pendency_data()
-            if m2b_df is not None and not m2b_df.empty and 'client_count' in m2b_df.columns:
-                # Get the most recent available data (T-1 or latest available)
-                available_dates = sorted(m2b_df['date'].dt.date.unique(), reverse=True)
-                latest_date = available_dates[0] if available_dates else None
-                
-                if latest_date:
-                    latest_data = m2b_df[m2b_df['date'].dt.date == latest_date]
-                    
-                    if not latest_data.empty:
-                        # Calculate efficiency metrics based on time buckets
-                        # NOTE: "0 min" and "1-4 min" are considered "No Pendency" (immediate processing)
-                        # Only 5+ minutes are considered as having pendency issues
-                        no_pendency = latest_data[latest_data['time_bucket'].isin(['0 min', '1-4 min'])]['client_count'].sum()
-                        with_pendency = latest_data[latest_data['time_bucket'].isin(['5-10 min', '10-60 min', '1-24 hour', 'Next Day'])]['client_count'].sum()
-                        total_clients = no_pendency + with_pendency
-                        
-                        # For backward compatibility, use 'immediate_processing' and 'delayed_processing' variable names
-                        immediate_processing = no_pendency  # 0 min + 1-4 min
-                        delayed_processing = with_pendency  # 5+ min
-                        
-                        # Calculate efficiency percentage (immediate processing / total)
-                        if total_clients > 0:
-                            efficiency_pct = (immediate_processing / total_clients) * 100
-                        else:
-                            efficiency_pct = 0
-                        
-                        # Calculate 30-day efficiency metrics (including current day)
-                        # This provides better statistical basis for median and std deviation
-                        daily_efficiency = []
-                        for day_date in m2b_df['date'].dt.date.unique():
-                            day_data = m2b_df[m2b_df['date'].dt.date == day_date]
-                            # Calculate no pendency (0 min + 1-4 min)
-                            day_no_pendency = day_data[day_data['time_bucket'].isin(['0 min', '1-4 min'])]['client_count'].sum()
-                            day_total = day_data['client_count'].sum()
-                            if day_total > 0:
-                                daily_efficiency.append((day_no_pendency / day_total) * 100)
-                        
-                        if len(daily_efficiency) > 1:
-                            median_efficiency = float(np.median(daily_efficiency))
-                            std_efficiency = float(np.std(daily_efficiency))
-                        elif len(daily_efficiency) == 1:
-                            median_efficiency = efficiency_pct
-                            std_efficiency = 0.0
-                        else:
-                            median_efficiency = efficiency_pct
-                            std_efficiency = 0.0
-                        
-                        
-                        # Status determination (higher efficiency is better)
-                        # Use absolute thresholds instead of relative to median for better UX
-                        # Green: >=80% immediate processing (industry standard)
-                        # Yellow: 60-79% immediate processing
-                        # Red: <60% immediate processing
-                        if efficiency_pct >= 80:
-                            status = 'green'
-                        elif efficiency_pct >= 60:
-                            status = 'yellow'
-                        else:
-                            status = 'red'
-                        
-                        metrics['M2B Pendency'] = {
-                            'value': round(efficiency_pct, 1),
-                            'median': round(median_efficiency, 1),
-                            'status': status,
-                            'trend': 'up' if efficiency_pct >= median_efficiency else 'down',
-                            'change': round(efficiency_pct - median_efficiency, 1),
-                            'unit': '%',
-                            'std_dev': round(std_efficiency, 2)  # Add std deviation for 30-day period
-                        }
-                    else:
-                        # No data for latest date - use fallback
-                        metrics['M2B Pendency'] = {
-                            'value': 75.0,  # Default efficiency
-                            'median': 75.0,
-                            'status': 'yellow',
-                            'trend': 'stable',
-                            'change': 0.0,
-                            'unit': '%'
-                        }
-                else:
-                    # No latest date available - use fallback
-                    metrics['M2B Pendency'] = {
-                        'value': 75.0,  # Default efficiency
-                        'median': 75.0,
-                        'status': 'yellow',
-                        'trend': 'stable',
-                        'change': 0.0,
-                        'unit': '%'
-                    }
-            else:
-                # No M2B data available - use fallback
-                metrics['M2B Pendency'] = {
-                    'value': 75.0,  # Default efficiency
-                    'median': 75.0,
-                    'status': 'yellow',
-                    'trend': 'stable',
-                    'change': 0.0,
-                    'unit': '%'
-                }
-            
-            
-            # Distributor Lead Churn (lower high-risk share is better)
-            try:
-                dist_df = get_real_bigquery_data("distributor_churn", date.today(), client)
-                if dist_df is not None and not dist_df.empty:
-                    if 'total_distributors' in dist_df.columns:
-                        # New aggregated query format
-                        total_dist = int(dist_df.iloc[0]['total_distributors'])
-                        high_risk = int(dist_df.iloc[0]['high_risk_distributors'])
-                        risk_share = (high_risk / total_dist) * 100.0 if total_dist > 0 else 0.0
-                    elif 'SUM_ALL' in dist_df.columns:
-                        # Old detailed query format
-                        total_dist = len(dist_df)
-                        high_risk = len(dist_df[dist_df['SUM_ALL'] >= 3])
-                        risk_share = (high_risk / total_dist) * 100.0 if total_dist > 0 else 0.0
-                    else:
-                        risk_share = 15.0  # Default fallback
-                    
-                    # Health value as inverse of risk share
-                    health_value = max(0.0, 100.0 - risk_share)
-                    median_health = 85.0
-                    std_health = 10.0
-                    status = 'green' if health_value >= median_health else ('yellow' if health_value >= median_health - std_health else 'red')
-                    metrics['Distributor Lead Churn'] = {
-                        'value': round(health_value, 1),
-                        'median': median_health,
-                        'status': status,
-                        'trend': 'up' if health_value >= median_health else 'down',
-                        'change': round(health_value - median_health, 1),
-                        'unit': '%'
-                    }
-                else:
-                    # Fallback data when query fails
-                    metrics['Distributor Lead Churn'] = {
-                        'value': 82.3,
-                        'median': 85.0,
-                        'status': 'yellow',
-                        'trend': 'down',
-                        'change': -2.7,
-                        'unit': '%'
-                    }
-            except Exception as e:
-                # Fallback for any errors
-                metrics['Distributor Lead Churn'] = {
-                    'value': 82.3,
-                    'median': 85.0,
-                    'status': 'yellow',
-                    'trend': 'down',
-                    'change': -2.7,
-                    'unit': '%'
-                }
-    except Exception:
-        # Ignore errors in supplementary metrics to keep dashboard running
-        pass
-    
-    # Now enhance specific metrics with real data
-    try:
-        # New User Onboarding - get real data
-        if client:
-# Calculating New User metrics from BigQuery...
-            overall_df, md_wise_df, activation_df = get_new_user_analytics()
-            if overall_df is not None and not overall_df.empty:
-                current_month_adds = overall_df.iloc[0]['current_gross_add'] if len(overall_df) > 0 else 0
-                prev_month_adds = overall_df.iloc[0]['last_month_gross_add'] if len(overall_df) > 0 else current_month_adds
-                growth_rate = overall_df.iloc[0]['growth_rate'] if len(overall_df) > 0 else 0
-                
-                # Fix the onboarding logic - negative growth should be red/yellow
-                if growth_rate > 5:
-                    status_onboarding = 'green'
-                elif growth_rate > -5:
-                    status_onboarding = 'yellow'
-                else:
-                    status_onboarding = 'red'
-                
-                # Override the dummy data with real calculation
-                metrics['New AEPS Users'] = {
-                    'value': current_month_adds,
-                    'status': status_onboarding,
-                    'trend': 'up' if growth_rate > 0 else 'down',
-                    'change': round(growth_rate, 1),
-                    'unit': ''
-                }
-                # st.success(f"✅ New Users: {current_month_adds} (Growth: {growth_rate:.1f}%) - Status: {status_onboarding}")
-    except Exception as e:
-        st.warning(f"⚠️ Could not calculate New User metrics: {str(e)}")
-    
-    try:
-        # Churn Rate - get real data
-# Calculating Churn metrics from BigQuery...
-        churn_df = process_churn_data()
-        if not churn_df.empty:
-            # Calculate churn rate based on the correct data structure
-            total_agents = len(churn_df)
-            
-            if total_agents > 0:
-                # Calculate churn rate based on decline percentage
-                churned_agents = len(churn_df[churn_df['decline_pct'] > 80])  # 80% decline threshold
-                churn_rate = (churned_agents / total_agents * 100)
-            else:
-                churn_rate = 0
-                st.warning("⚠️ No valid agents found for churn calculation")
-        else:
-            churn_rate = 0
-            st.warning("⚠️ No churn data available")
-        
-        # Determine status based on churn rate (FIXED: moved outside else block)
-        if churn_rate < 3:
-            status_churn = 'green'
-        elif churn_rate < 8:
-            status_churn = 'yellow'
-        else:
-            status_churn = 'red'
-            
-        # Override the dummy data with real calculation
-        metrics['Churn Rate'] = {
-            'value': round(churn_rate, 1),
-            'status': status_churn,
-            'trend': 'down' if churn_rate < 5 else 'up',
-            'change': round(churn_rate - 3.2, 1)
+    return {
+        'M2B Pendency': {
+            'value': round(efficiency_pct, 1),
+            'median': round(median_efficiency, 1),
+            'status': tile_status(efficiency_pct, tile['thresholds']),
+            'trend': 'up' if efficiency_pct >= median_efficiency else 'down',
+            'change': round(efficiency_pct - median_efficiency, 1),
+            'unit': '%',
+            'std_dev': round(std_efficiency, 2)  # Std deviation over the 30-day period
         }
-        # st.success(f"✅ Churn Rate: {churn_rate:.1f}% - Status: {status_churn}")
-    except Exception as e:
-        st.warning(f"⚠️ Could not calculate Churn metrics: {str(e)}")
-    
-    try:
-        # Stable Users - get real data
-
-# Calculating Stable Users metrics from BigQuery...
-        stable_sp_df, stable_tail_df = get_stable_users_analytics()
-        if stable_sp_df is not None and not stable_sp_df.empty and 'stable_agent_count' in stable_sp_df.columns:
-            current_stable = stable_sp_df.iloc[0]['stable_agent_count'] if len(stable_sp_df) > 0 else 0
-            prev_stable = stable_sp_df.iloc[1]['stable_agent_count'] if len(stable_sp_df) > 1 else current_stable
-            stable_growth = ((current_stable - prev_stable) / prev_stable * 100) if prev_stable > 0 else 0
-            
-            # Stable users - higher is better
-            if stable_growth > 0:
-                status_stable = 'green'
-            elif stable_growth > -5:
-                status_stable = 'yellow'
-            else:
-                status_stable = 'red'
-                
-            # Override the dummy data with real calculation
-            metrics['Stable Users'] = {
-                'value': round(current_stable / 1000, 1),  # In thousands
-                'status': status_stable,
-                'trend': 'up' if stable_growth > 0 else 'down',
-                'change': round(stable_growth, 1),
-                'unit': 'K'
-            }
-            # st.success(f"✅ Stable Users: {current_stable/1000:.1f}K (Growth: {stable_growth:.1f}%) - Status: {status_stable}")
-    except Exception as e:
-        st.warning(f"⚠️ Could not calculate Stable Users metrics: {str(e)}")
-    
-    # Bot Analytics (lower CC escalation is better) - Auto-load Google Sheets
-    try:
-        # Silently load Google Sheets data in background
-        bot_data = get_google_sheets_data('chatbot', None)
-        if bot_data is not None and not bot_data.empty:
-            if 'date' in bot_data.columns:
-                latest_data = bot_data.iloc[-1]
-            else:
-                latest_data = bot_data.iloc[0]  # Single row data
-            
-            # Use CC escalation rate directly (lower is better)
-            current_escalation = float(latest_data.get('reached_cc_per', 6.6))
-            
-            # Debug: Show what we're getting from the data
-            # st.info(f"🔍 Bot Debug: reached_cc_per = {current_escalation}")
-            
-            # Smart thresholds based on your actual data patterns
-            # Green: <= 6.5%, Yellow: 6.5-7.5%, Red: > 7.5%
-            if current_escalation <= 6.5:
-                status = 'green'
-            elif current_escalation <= 7.5:
-                status = 'yellow'
-            else:
-                status = 'red'
-            
-            # Calculate change from baseline (6.8% is good baseline)
-            baseline = 6.8
-            change = current_escalation - baseline
-            
-            metrics['Bot Analytics'] = {
-                'value': round(current_escalation, 1),
-                'median': baseline,
-                'status': status,
-                'trend': 'down' if change <= 0 else 'up',
-                'change': round(change, 1),
-                'unit': '% escalation'
-            }
-            # st.success(f"✅ Bot Analytics: {current_escalation:.1f}% escalation - Status: {status}")
-        else:
-            # Fallback when Google Sheets not available - use sample realistic data
-            metrics['Bot Analytics'] = {
-                'value': 6.6,
-                'median': 6.8,
-                'status': 'green',
-                'trend': 'down',
-                'change': -0.2,
-                'unit': '% escalation'
-            }
-            st.warning("⚠️ Bot Analytics using fallback data")
-    except Exception as e:
-        # Fallback for any errors
-        metrics['Bot Analytics'] = {
-            'value': 6.6,
-            'median': 6.8,
-            'status': 'green',
-            'trend': 'down',
-            'change': -0.2,
-            'unit': '% escalation'
+    }
+
+def compute_distributor_churn(context, tile):
+    """Distributor health as 100 minus the share of high-risk distributors"""
+    client = context['client']
+    if not client:
+        return {}
+
+    dist_df = get_real_bigquery_data("distributor_churn", date.today(), client)
+    if dist_df is None or dist_df.empty:
+        return None
+
+    if 'total_distributors' in dist_df.columns:
+        # Aggregated query format
+        total_dist = int(dist_df.iloc[0]['total_distributors'])
+        high_risk = int(dist_df.iloc[0]['high_risk_distributors'])
+        risk_share = (high_risk / total_dist) * 100.0 if total_dist > 0 else 0.0
+    elif 'SUM_ALL' in dist_df.columns:
+        # Detailed query format
+        total_dist = len(dist_df)
+        high_risk = int((dist_df['SUM_ALL'] >= 3).sum())
+        risk_share = (high_risk / total_dist) * 100.0 if total_dist > 0 else 0.0
+    else:
+        risk_share = 15.0  # Default fallback
+
+    health_value = max(0.0, 100.0 - risk_share)
+    # The green limit doubles as the median health
+    median_health = tile['thresholds']['green']
+
+    return {
+        'Distributor Lead Churn': {
+            'value': round(health_value, 1),
+            'median': median_health,
+            'status': tile_status(health_value, tile['thresholds']),
+            'trend': 'up' if health_value >= median_health else 'down',
+            'change': round(health_value - median_health, 1),
+            'unit': '%'
         }
-        st.warning(f"⚠️ Bot Analytics calculation error: {str(e)[:50]}...")
-    
-    # Bank Error Analysis (higher is better - lower error rate)
-    try:
-        if client:
-            # Load bank error data
-            bank_error_df = load_bank_error_data(client)
-            if bank_error_df is not None and not bank_error_df.empty:
-                # Calculate error rate
-                total_errors = bank_error_df['error_txn'].sum()
-                total_transactions = bank_error_df['total_txn'].sum()
-                error_rate = (total_errors / total_transactions * 100) if total_transactions > 0 else 0
-                
-                # Calculate success rate (inverse of error rate)
-                success_rate = 100 - error_rate
-                
-                # Determine status based on error rate
-                if error_rate <= 2.0:  # Less than 2% error rate
-                    status = 'green'
-                elif error_rate <= 5.0:  # 2-5% error rate
-                    status = 'yellow'
-                else:  # More than 5% error rate
-                    status = 'red'
-                
-                metrics['Bank Error Analysis'] = {
-                    'value': round(success_rate, 1),
-                    'status': status,
-                    'trend': 'up' if error_rate < 3.0 else 'down',
-                    'change': -error_rate,  # Negative change indicates improvement
-                    'unit': '% success rate'
-                }
-                # st.success(f"✅ Bank Error Analysis: {success_rate:.1f}% success rate - Status: {status}")
-            else:
-                # Fallback when no bank error data available
-                metrics['Bank Error Analysis'] = {
-                    'value': 97.5,
-                    'status': 'green',
-                    'trend': 'up',
-                    'change': -0.5,
-                    'unit': '% success rate'
-                }
-                st.warning("⚠️ Bank Error Analysis using fallback data")
-        else:
-            # Fallback when no BigQuery client
-            metrics['Bank Error Analysis'] = {
-                'value': 97.5,
-                'status': 'green',
-                'trend': 'up',
-                'change': -0.5,
-                'unit': '% success rate'
-            }
-            st.warning("⚠️ Bank Error Analysis using fallback data")
-    except Exception as e:
-        # Fallback for any errors
-        metrics['Bank Error Analysis'] = {
-            'value': 97.5,
-            'status': 'green',
-            'trend': 'up',
-            'change': -0.5,
-            'unit': '% success rate'
+    }
+
+def compute_bot_analytics(context, tile):
+    """Chatbot CC escalation rate from Google Sheets against a 6.8% baseline"""
+    bot_data = get_google_sheets_data('chatbot', None)
+    if bot_data is None or bot_data.empty:
+        return None
+
+    latest_data = bot_data.iloc[-1] if 'date' in bot_data.columns else bot_data.iloc[0]
+    current_escalation = float(latest_data.get('reached_cc_per', 6.6))
+    baseline = 6.8
+    change = current_escalation - baseline
+
+    return {
+        'Bot Analytics': {
+            'value': round(current_escalation, 1),
+            'median': baseline,
+            'status': tile_status(current_escalation, tile['thresholds']),
+            'trend': 'down' if change <= 0 else 'up',
+            'change': round(change, 1),
+            'unit': '% escalation'
         }
-        st.warning(f"⚠️ Bank Error Analysis calculation error: {str(e)[:50]}...")
-    
-    # Add existing dummy metrics for other categories (but preserve real RFM calculation)
-    dummy_metrics = get_dummy_metrics_for_remaining()
-    # Remove RFM Score from dummy metrics to preserve real calculation
-    if 'RFM Score' in dummy_metrics:
-        del dummy_metrics['RFM Score']
-    metrics.update(dummy_metrics)
-    
-    st.success(f"✅ Enhanced {len(metrics)} metrics with real data calculations!")
-    return metrics
+    }
 
-def get_dummy_metrics_for_remaining():
-    """Get metrics for categories - now using real data where available"""
-    
-    # Supporting Rails - Login Success Rate from Google Sheets
-    supporting_rails = {}
-    
-    # Try to get Login Success Rate from Google Sheets
-    try:
-        login_data = get_google_sheets_data('login Success Rate', None)
-        if login_data is not None and not login_data.empty:
-            if 'succ_login' in login_data.columns:
-                current_login = float(login_data.iloc[-1].get('succ_login', 0.991)) * 100.0
-                # Get historical average if available
-                median_login = login_data['succ_login'].mean() * 100.0 if len(login_data) > 1 else current_login
-                
-                # Determine status
-                if current_login >= 99.0:
-                    login_status = 'green'
-                elif current_login >= 97.0:
-                    login_status = 'yellow'
-                else:
-                    login_status = 'red'
-                
-                supporting_rails['Login Success Rate'] = {
-                    'value': round(current_login, 1),
-                    'status': login_status,
-                    'trend': 'up' if current_login > median_login else 'down' if current_login < median_login else 'stable',
-                    'change': round(current_login - median_login, 1)
-                }
-            else:
-                # Fallback to dummy
-                supporting_rails['Login Success Rate'] = {'value': 97.8, 'status': 'green', 'trend': 'up', 'change': 0.5}
-        else:
-            # Fallback to dummy
-            supporting_rails['Login Success Rate'] = {'value': 97.8, 'status': 'green', 'trend': 'up', 'change': 0.5}
-    except Exception as e:
-        # Fallback to dummy on error
-        supporting_rails['Login Success Rate'] = {'value': 97.8, 'status': 'green', 'trend': 'up', 'change': 0.5}
-    
-    # Cash Product - Real data from BigQuery
-    try:
-        cash_product_data = get_cash_product_analytics()
-        if cash_product_data is not None and not cash_product_data.empty:
-            # Get current month (most recent)
-            current_month = cash_product_data.iloc[0]
-            current_penetration = float(current_month['penetration_rate'])
-            current_users = int(current_month['active_cash_users'])
-            
-            # Get last month for comparison
-            if len(cash_product_data) > 1:
-                last_month = cash_product_data.iloc[1]
-                last_penetration = float(last_month['penetration_rate'])
-                change = round(current_penetration - last_penetration, 1)
-            else:
-                change = 0
-            
-            # Determine status based on penetration rate
-            if current_penetration >= 90:
-                cash_status = 'green'
-            elif current_penetration >= 75:
-                cash_status = 'yellow'
-            else:
-                cash_status = 'red'
-            
-            supporting_rails['Cash Product'] = {
-                'value': current_penetration,
-                'status': cash_status,
-                'trend': 'up' if change > 0 else 'down' if change < 0 else 'stable',
-                'change': change,
-                'unit': '%',
-                'active_users': current_users,
-                'tooltip': f'{current_users:,} active cash product users'
-            }
-        else:
-            # Fallback to dummy
-            supporting_rails['Cash Product'] = {'value': 95.1, 'status': 'green', 'trend': 'stable', 'change': 0.1}
-    except Exception as e:
-        supporting_rails['Cash Product'] = {'value': 95.1, 'status': 'green', 'trend': 'stable', 'change': 0.1}
-    
-    # Other supporting rails (keeping as fallback until data sources added)
-    supporting_rails.update({
-        'CC Calls Metric': {'value': 89.4, 'status': 'green', 'trend': 'stable', 'change': -0.3},
-        'Bot Detection': {'value': 15.7, 'status': 'red', 'trend': 'up', 'change': 4.1}
-    })
-    
-    # Distribution metrics - now using real BigQuery data
-    distribution = {}
-    
-    # 1. New AEPS Users - Real data from BigQuery
-    try:
-        overall_data, md_wise_data, pincode_data = get_new_user_analytics()
-        if overall_data is not None and not overall_data.empty:
-            current_gross_add = int(overall_data.iloc[0]['current_gross_add'])
-            last_month_gross_add = int(overall_data.iloc[0]['last_month_gross_add'])
-            growth_rate = float(overall_data.iloc[0]['growth_rate'])
-            
-            # Determine status based on growth rate
-            if growth_rate > 10:
-                new_user_status = 'green'
-            elif growth_rate > 0:
-                new_user_status = 'yellow'
-            else:
-                new_user_status = 'red'
-            
-            distribution['New AEPS Users'] = {
-                'value': current_gross_add,
-                'status': new_user_status,
-                'trend': 'up' if growth_rate > 0 else 'down',
-                'change': round(growth_rate, 1),
-                'unit': ''
-            }
-        else:
-            # Fallback to dummy
-            distribution['New AEPS Users'] = {'value': 1247, 'status': 'green', 'trend': 'up', 'change': 8.3, 'unit': ''}
-    except Exception as e:
-        distribution['New AEPS Users'] = {'value': 1247, 'status': 'green', 'trend': 'up', 'change': 8.3, 'unit': ''}
-    
-    # 2. Stable Users - Real data from BigQuery
-    try:
-        stable_sp_data, tail_user_data = get_stable_users_analytics()
-        if stable_sp_data is not None and not stable_sp_data.empty:
-            # Get current month (most recent)
-            current_month = stable_sp_data.iloc[0]
-            current_stable = int(current_month['stable_agent_count'])
-            
-            # Get last month for comparison
-            if len(stable_sp_data) > 1:
-                last_month = stable_sp_data.iloc[1]
-                last_stable = int(last_month['stable_agent_count'])
-                change_pct = round(((current_stable - last_stable) / last_stable) * 100, 1) if last_stable > 0 else 0
-            else:
-                change_pct = 0
-            
-            # Determine status
-            if change_pct > 5:
-                stable_status = 'green'
-            elif change_pct > -5:
-                stable_status = 'yellow'
-            else:
-                stable_status = 'red'
-            
-            distribution['Stable Users'] = {
-                'value': round(current_stable / 1000, 1),  # Show in thousands
-                'status': stable_status,
-                'trend': 'up' if change_pct > 0 else 'down' if change_pct < 0 else 'stable',
-                'change': change_pct,
-                'unit': 'K'
-            }
-        else:
-            # Fallback to dummy
-            distribution['Stable Users'] = {'value': 89.1, 'status': 'green', 'trend': 'stable', 'change': 0.2}
-    except Exception as e:
-        distribution['Stable Users'] = {'value': 89.1, 'status': 'green', 'trend': 'stable', 'change': 0.2}
-    
-    # 3. Churn Rate - Real data from BigQuery
-    try:
-        churn_data = get_distributor_churn_data()
-        if churn_data is not None and not churn_data.empty:
-            # Count distributors with high churn score (SUM_ALL >= 3)
-            high_churn_count = len(churn_data[churn_data['SUM_ALL'] >= 3])
-            total_distributors = len(churn_data)
-            churn_rate = round((high_churn_count / total_distributors) * 100, 1) if total_distributors > 0 else 0
-            
-            # Determine status (lower churn is better)
-            if churn_rate < 5:
-                churn_status = 'green'
-            elif churn_rate < 10:
-                churn_status = 'yellow'
-            else:
-                churn_status = 'red'
-            
-            distribution['Churn Rate'] = {
-                'value': churn_rate,
-                'status': churn_status,
-                'trend': 'stable',  # Would need historical data for trend
-                'change': 0,  # Would need historical data for change
-                'unit': '%'
-            }
-        else:
-            # Fallback to dummy
-            distribution['Churn Rate'] = {'value': 3.2, 'status': 'yellow', 'trend': 'up', 'change': 0.8}
-    except Exception as e:
-        distribution['Churn Rate'] = {'value': 3.2, 'status': 'yellow', 'trend': 'up', 'change': 0.8}
-    
-    # Other distribution metrics (keeping as fallback until data sources added)
-    distribution.update({
-        'Winback Rate': {'value': 23.4, 'status': 'red', 'trend': 'down', 'change': -5.2},
-        'Winback Conversion': {'value': 18.7, 'status': 'red', 'trend': 'down', 'change': -3.1},
-        'Onboarding Conversion': {'value': 76.3, 'status': 'green', 'trend': 'up', 'change': 2.4}
-    })
-    
-    # Operations metrics - integrate anomaly data from Google Sheets
-    try:
-        # Fetch anomaly data from Google Sheets
-        anomaly_data = get_anomaly_data_from_sheets()
-        
-        # Calculate anomaly metrics based on the data
-        total_anomalies = 0
-        anomalies_above_range = 0
-        anomalies_below_range = 0
-        
-        # Calculate anomaly metrics (debug output removed for production)
-        for metric, data in anomaly_data.items():
-            is_inverse = data.get('is_inverse', False)
-            anomaly_status = data.get('anomaly_status', '')
-            current_value = data.get('current', 0)
-            
-            # For inverse metrics, "Above Range" is good (lower values), so don't count as anomaly
-            # For normal metrics, "Above Range" is good (higher values), so don't count as anomaly
-            # Only count "Below Range" as anomalies for both types
-            if anomaly_status == 'Below Range':
-                anomalies_below_range += 1
-                total_anomalies += 1
-            elif anomaly_status == 'Above Range':
-                # For inverse metrics, Above Range means good performance (lower than expected)
-                # For normal metrics, Above Range means good performance (higher than expected)
-                # So we don't count these as anomalies, but we track them for display
-                anomalies_above_range += 1
-                # Don't increment total_anomalies for Above Range as it's good performance
-        
-        # Determine status based on anomaly count
-        if total_anomalies == 0:
-            anomaly_status = 'green'
-            anomaly_trend = 'stable'
-            anomaly_change = 0
-        elif total_anomalies <= 2:
-            anomaly_status = 'yellow'
-            anomaly_trend = 'up' if total_anomalies > 0 else 'stable'
-            anomaly_change = total_anomalies
-        else:
-            anomaly_status = 'red'
-            anomaly_trend = 'up'
-            anomaly_change = total_anomalies
-        
-        operations = {
-            'System Anomalies': {
-                'value': total_anomalies, 
-                'status': anomaly_status, 
-                'trend': anomaly_trend, 
-                'change': anomaly_change, 
-                'unit': '',
-                'details': {
-                    'above_range': anomalies_above_range,
-                    'below_range': anomalies_below_range,
-                    'total_metrics': len(anomaly_data)
-                }
-            }
+def compute_bank_error(context, tile):
+    """Bank-side success rate (100 - error rate); status is graded on the error rate"""
+    client = context['client']
+    bank_error_df = load_bank_error_data(client) if client else None
+    if bank_error_df is None or bank_error_df.empty:
+        return None
+
+    total_errors = bank_error_df['error_txn'].sum()
+    total_transactions = bank_error_df['total_txn'].sum()
+    error_rate = (total_errors / total_transactions * 100) if total_transactions > 0 else 0
+
+    return {
+        'Bank Error Analysis': {
+            'value': round(100 - error_rate, 1),
+            'status': tile_status(error_rate, tile['thresholds']),
+            'trend': 'up' if error_rate < 3.0 else 'down',
+            'change': -error_rate,  # Negative change indicates improvement
+            'unit': '% success rate'
         }
-        
-        # Add Active Bugs - Real data from Google Sheets (with CSV fallback)
-        try:
-            # Try Google Sheets first for real-time updates
-            bugs_df = get_bugs_dataframe_from_sheets()
-            
-            # Fallback to CSV if Google Sheets not available
-            if bugs_df is None or (hasattr(bugs_df, 'empty') and bugs_df.empty):
-                csv_path = "bugs_data.csv"
-                if os.path.exists(csv_path):
-                    bugs_df = pd.read_csv(csv_path)
-            
-            if bugs_df is not None and hasattr(bugs_df, 'empty') and not bugs_df.empty:
-                # Normalize column names (handle both lowercase and uppercase)
-                bugs_df.columns = bugs_df.columns.str.strip().str.lower()
-                
-                # Count active bugs (status is 'open', 'pending', or 'wip')
-                active_statuses = ['open', 'pending', 'wip']
-                if 'status' in bugs_df.columns:
-                    active_bugs = len(bugs_df[bugs_df['status'].str.strip().str.lower().isin(active_statuses)])
-                else:
-                    active_bugs = 0
-                
-                # Determine status based on count
-                if active_bugs <= 2:
-                    bugs_status = 'green'
-                elif active_bugs <= 5:
-                    bugs_status = 'yellow'
-                else:
-                    bugs_status = 'red'
-                
-                operations['Active Bugs'] = {
-                    'value': active_bugs,
-                    'status': bugs_status,
-                    'trend': 'stable',
-                    'change': 0,
-                    'unit': ''
-                }
-            else:
-                operations['Active Bugs'] = {'value': 2, 'status': 'green', 'trend': 'down', 'change': -1, 'unit': ''}
-        except Exception as e:
-            operations['Active Bugs'] = {'value': 2, 'status': 'green', 'trend': 'down', 'change': -1, 'unit': ''}
-        
-        # Other operations metrics (keeping as fallback)
-        operations.update({
-            'Active RCAs': {'value': 1, 'status': 'green', 'trend': 'stable', 'change': 0, 'unit': ''},
-            'Platform Uptime': {'value': 99.7, 'status': 'green', 'trend': 'stable', 'change': 0.1, 'unit': '%'},
-            'Product Metrics & Trends': {'value': '📊', 'status': 'blue', 'trend': 'stable', 'change': 0, 'unit': '', 'description': 'Long-term product performance & winback trends'}
-        })
-        
-    except Exception as e:
-        # Fallback to dummy data if Google Sheets integration fails
-        operations = {
-            'System Anomalies': {'value': 0, 'status': 'green', 'trend': 'stable', 'change': 0},
-            'Active Bugs': {'value': 2, 'status': 'green', 'trend': 'down', 'change': -1, 'unit': ''},
-            'Active RCAs': {'value': 1, 'status': 'green', 'trend': 'stable', 'change': 0, 'unit': ''},
-            'Platform Uptime': {'value': 99.7, 'status': 'green', 'trend': 'stable', 'change': 0.1, 'unit': '%'},
-            'Product Metrics & Trends': {'value': '📊', 'status': 'blue', 'trend': 'stable', 'change': 0, 'unit': '', 'description': 'Long-term product performance & winback trends'}
+    }
+
+def compute_rfm_score(context, tile):
+    """Latest RFM fraud catch rate and its change from the previous period"""
+    rfm_data = get_rfm_fraud_data()
+    if rfm_data is None or rfm_data.empty or 'total_caught_per' not in rfm_data.columns:
+        return {}
+
+    catch_rates = rfm_data['total_caught_per']
+    current_catch_rate = catch_rates.iloc[-1]
+    trend_change = current_catch_rate - catch_rates.iloc[-2] if len(catch_rates) > 1 else 0
+    rfm_status = tile_status(current_catch_rate, tile['thresholds'])
+
+    return {
+        'RFM Score': {
+            'value': round(current_catch_rate, 1),
+            'status': rfm_status,
+            'trend': 'down' if rfm_status == 'red' or trend_change < 0 else 'up',
+            'change': round(trend_change, 1),
+            'unit': '%'
         }
-    
-    # Combine all metrics (now includes real data!)
-    all_metrics = {}
-    all_metrics.update(supporting_rails)
-    all_metrics.update(distribution)
-    all_metrics.update(operations)
-    
-    return all_metrics
+    }
+
+# Home-page tiles, named by their refresh key (see init_cache_data), in display order.
+# BigQuery sources name the run_tile_query queries each tile reads (they drive the stale badge).
+# Status thresholds are fixed limits; hourly rate tiles grade against their own median instead.
+register_tile('transaction_success', ['Transaction Success Rate', 'YBL Success Rate', 'NSDL Success Rate', 'YBLN Success Rate'],
+              compute_transaction_success, source='bigquery:transaction_success', tier='hourly')
+register_tile('gtv_performance', ['GTV Performance'],
+              compute_gtv_performance, source='bigquery:transaction_success', tier='hourly')
+register_tile('2fa_success', ['2FA Success Rate', 'Per-User Auth Rate'],
+              compute_2fa_success, source='bigquery:bio_authentication', tier='hourly')
+register_tile('login_success', ['Login Success Rate'],
+              compute_login_success, source='sheets:login Success Rate', tier='daily',
+              thresholds={'direction': 'higher', 'green': 99.0, 'yellow': 97.0},
+              fallback={'Login Success Rate': {'value': 97.8, 'status': 'green', 'trend': 'up', 'change': 0.5}})
+register_tile('cash_product', ['Cash Product'],
+              compute_cash_product, source='bigquery:cash_product', tier='daily',
+              thresholds={'direction': 'higher', 'green': 90, 'yellow': 75},
+              fallback={'Cash Product': {'value': 95.1, 'status': 'green', 'trend': 'stable', 'change': 0.1}})
+# Fixed values until data sources are added
+register_tile('cc_calls', ['CC Calls Metric'],
+              static_metrics({'CC Calls Metric': {'value': 89.4, 'status': 'green', 'trend': 'stable', 'change': -0.3}}),
+              source='static', tier='daily', parallel=False)
+register_tile('bot_detection', ['Bot Detection'],
+              static_metrics({'Bot Detection': {'value': 15.7, 'status': 'red', 'trend': 'up', 'change': 4.1}}),
+              source='static', tier='daily', parallel=False)
+register_tile('new_users', ['New AEPS Users'],
+              compute_new_users, source='bigquery:new_users_overall,new_users_md_wise,new_users_activation', tier='daily',
+              thresholds={'direction': 'higher', 'green': 10, 'yellow': 0, 'strict': True},
+              fallback={'New AEPS Users': {'value': 1247, 'status': 'green', 'trend': 'up', 'change': 8.3, 'unit': ''}})
+register_tile('stable_users', ['Stable Users'],
+              compute_stable_users, source='bigquery:stable_users_sp,stable_users_tail', tier='daily',
+              thresholds={'direction': 'higher', 'green': 5, 'yellow': -5, 'strict': True},
+              fallback={'Stable Users': {'value': 89.1, 'status': 'green', 'trend': 'stable', 'change': 0.2}})
+register_tile('churn_rate', ['Churn Rate'],
+              compute_churn_rate, source='bigquery:distributor_churn', tier='daily',
+              thresholds={'direction': 'lower', 'green': 5, 'yellow': 10, 'strict': True},
+              fallback={'Churn Rate': {'value': 3.2, 'status': 'yellow', 'trend': 'up', 'change': 0.8, 'unit': '%'}})
+register_tile('winback_conversion', ['Winback Rate', 'Winback Conversion'],
+              static_metrics({
+                  'Winback Rate': {'value': 23.4, 'status': 'red', 'trend': 'down', 'change': -5.2},
+                  'Winback Conversion': {'value': 18.7, 'status': 'red', 'trend': 'down', 'change': -3.1}
+              }),
+              source='static', tier='daily', parallel=False)
+register_tile('onboarding_conversion', ['Onboarding Conversion'],
+              static_metrics({'Onboarding Conversion': {'value': 76.3, 'status': 'green', 'trend': 'up', 'change': 2.4}}),
+              source='static', tier='daily', parallel=False)
+register_tile('system_anomalies', ['System Anomalies'],
+              compute_system_anomalies, source='sheets:anomaly detection', tier='daily',
+              thresholds={'direction': 'lower', 'green': 0, 'yellow': 2},
+              fallback={'System Anomalies': {'value': 0, 'status': 'green', 'trend': 'stable', 'change': 0}})
+register_tile('active_bugs', ['Active Bugs'],
+              compute_active_bugs, source='sheets:bugs', tier='daily',
+              thresholds={'direction': 'lower', 'green': 2, 'yellow': 5},
+              fallback={'Active Bugs': {'value': 2, 'status': 'green', 'trend': 'down', 'change': -1, 'unit': ''}})
+register_tile('active_rcas', ['Active RCAs'],
+              static_metrics({'Active RCAs': {'value': 1, 'status': 'green', 'trend': 'stable', 'change': 0, 'unit': ''}}),
+              source='static', tier='daily', parallel=False)
+register_tile('platform_uptime', ['Platform Uptime'],
+              static_metrics({'Platform Uptime': {'value': 99.7, 'status': 'green', 'trend': 'stable', 'change': 0.1, 'unit': '%'}}),
+              source='static', tier='hourly', parallel=False)
+register_tile('product_metrics', ['Product Metrics & Trends'],
+              static_metrics({'Product Metrics & Trends': {'value': '📊', 'status': 'blue', 'trend': 'stable', 'change': 0, 'unit': '',
+                                                           'description': 'Long-term product performance & winback trends'}}),
+              source='static', tier='daily', parallel=False)
+register_tile('m2b_pendency', ['M2B Pendency'],
+              compute_m2b_pendency, source='bigquery:m2b_pendency', tier='daily',
+              thresholds={'direction': 'higher', 'green': 80, 'yellow': 60},
+              fallback={'M2B Pendency': {'value': 75.0, 'median': 75.0, 'status': 'yellow', 'trend': 'stable', 'change': 0.0, 'unit': '%'}})
+register_tile('distributor_churn', ['Distributor Lead Churn'],
+              compute_distributor_churn, source='bigquery:distributor_churn', tier='daily',
+              thresholds={'direction': 'higher', 'green': 85.0, 'yellow': 75.0},
+              fallback={'Distributor Lead Churn': {'value': 82.3, 'median': 85.0, 'status': 'yellow', 'trend': 'down', 'change': -2.7, 'unit': '%'}})
+register_tile('bot_analytics', ['Bot Analytics'],
+              compute_bot_analytics, source='sheets:chatbot', tier='daily',
+              thresholds={'direction': 'lower', 'green': 6.5, 'yellow': 7.5},
+              fallback={'Bot Analytics': {'value': 6.6, 'median': 6.8, 'status': 'green', 'trend': 'down', 'change': -0.2, 'unit': '% escalation'}})
+register_tile('bank_error', ['Bank Error Analysis'],
+              compute_bank_error, source='bigquery:bank_error', tier='hourly',
+              thresholds={'direction': 'lower', 'green': 2.0, 'yellow': 5.0},
+              fallback={'Bank Error Analysis': {'value': 97.5, 'status': 'green', 'trend': 'up', 'change': -0.5, 'unit': '% success rate'}})
+register_tile('rfm_score', ['RFM Score'],
+              compute_rfm_score, source='bigquery:rfm_score', tier='daily',
+              thresholds={'direction': 'higher', 'green': 75, 'yellow': 60},
+              fallback={'RFM Score': {'value': 92.6, 'status': 'green', 'trend': 'up', 'change': 1.2, 'unit': '%'}})
+
+def calculate_health_metrics(transaction_df, bio_auth_df, client):
+    """All home-page tile metrics, evaluated from the tile registry"""
+    metrics = evaluate_tiles(build_health_context(transaction_df, bio_auth_df, client))
+    # Drawn here on the script thread (not in the tile workers) so cached reruns replay them
+    for tile in fallback_tiles():
+        st.warning(f"⚠️ {', '.join(tile['metrics'])} using fallback data")
+    st.success(f"✅ Enhanced {len(metrics)} metrics with real data calculations!")
+    return metrics
 
 # Enhanced visualization functions
 def create_enhanced_trend_chart(metric_data, title):
     """Create enhanced trend chart with baseline and anomaly indicators"""
     
-    if 'hourly_data' not in metric_data:
-        return None
-        
-    hourly_data = pd.DataFrame(metric_data['hourly_data'])
+    hourly_data = metric_data.get('hourly_data')
     
     # Check if hourly_data is empty or doesn't have 'hour' column
-    if hourly_data.empty or 'hour' not in hourly_data.columns:
+    if not hourly_row_count(hourly_data) or 'hour' not in hourly_data:
         return None
     
-    # Reorder hours to start from 6 AM
-    def hour_sort_key(hour_str):
-        """Custom sort key to start from 06:00"""
-        if pd.isna(hour_str):
-            return 999  # Put NaN at the end
-        try:
-            hour_num = int(hour_str.split(':')[0])
-            # Shift so 06:00 becomes 0, 07:00 becomes 1, etc.
-            # 06:00-23:00 become 0-17, 00:00-05:00 become 18-23
-            return hour_num - 6 if hour_num >= 6 else hour_num + 18
-        except (ValueError, AttributeError):
-            return 999
-    
-    # Sort hourly data starting from 6 AM
-    try:
-        hourly_data = hourly_data.sort_values('hour', key=lambda x: x.map(hour_sort_key))
-    except (KeyError, ValueError):
-        # If sorting fails, continue with unsorted data
-        pass
+    # Hours starting from 6 AM; columns are indexed in that order and handed to Plotly as arrays
+    order = hourly_display_order(hourly_data)
+    hours = hourly_data['hour'][order]
     
     fig = go.Figure()
     
     # Current performance line
+    value_col = 'overall_success_rate' if 'overall_success_rate' in hourly_data else 'fa2_rate_yesterday'
     fig.add_trace(go.Scatter(
-        x=hourly_data['hour'],
-        y=hourly_data.get('overall_success_rate', hourly_data.get('fa2_rate_yesterday', [])),
+        x=hours,
+        y=hourly_data[value_col][order] if value_col in hourly_data else [],
         mode='lines+markers',
         name='Current Performance',
         line=dict(color='#2ed573', width=3),
@@ -5653,16 +4227,13 @@ def create_enhanced_trend_chart(metric_data, title):
     ))
     
     # Median baseline - check for available columns
-    median_col = None
-    for col in ['median_success_rate', 'median_fa2_succ_rate', 'avg_success_rate', 'overall_success_rate']:
-        if col in hourly_data.columns:
-            median_col = col
-            break
+    median_col = next((col for col in ['median_success_rate', 'median_fa2_succ_rate', 'avg_success_rate', 'overall_success_rate']
+                       if col in hourly_data), None)
     
     if median_col:
         fig.add_trace(go.Scatter(
-            x=hourly_data['hour'],
-            y=hourly_data[median_col],
+            x=hours,
+            y=hourly_data[median_col][order],
             mode='lines',
             name='7-Day Median',
             line=dict(color='gray', width=2, dash='dash'),
@@ -5670,23 +4241,22 @@ def create_enhanced_trend_chart(metric_data, title):
         ))
     
     # Add anomaly indicators
-    anomaly_col = 'success_rate_anomaly' if 'success_rate_anomaly' in hourly_data.columns else 'fa2_succ_flag'
-    if anomaly_col in hourly_data.columns:
-        anomaly_data = hourly_data[hourly_data[anomaly_col] != 'normal']
-        if not anomaly_data.empty:
-            colors = {'lower_anomaly': 'red', 'upper_anomaly': 'orange', 'no_data': 'gray'}
-            for anomaly_type, color in colors.items():
-                subset = anomaly_data[anomaly_data[anomaly_col] == anomaly_type]
-                if not subset.empty:
-                    y_col = 'overall_success_rate' if 'overall_success_rate' in subset.columns else 'fa2_rate_yesterday'
-                    fig.add_trace(go.Scatter(
-                        x=subset['hour'],
-                        y=subset[y_col],
-                        mode='markers',
-                        name=f'{anomaly_type.replace("_", " ").title()}',
-                        marker=dict(color=color, size=12, symbol='diamond'),
-                        showlegend=True
-                    ))
+    anomaly_col = 'success_rate_anomaly' if 'success_rate_anomaly' in hourly_data else 'fa2_succ_flag'
+    if anomaly_col in hourly_data and value_col in hourly_data:
+        anomaly_labels = hourly_data[anomaly_col][order]
+        values = hourly_data[value_col][order]
+        colors = {'lower_anomaly': 'red', 'upper_anomaly': 'orange', 'no_data': 'gray'}
+        for anomaly_type, color in colors.items():
+            mask = anomaly_labels == anomaly_type
+            if mask.any():
+                fig.add_trace(go.Scatter(
+                    x=hours[mask],
+                    y=values[mask],
+                    mode='markers',
+                    name=f'{anomaly_type.replace("_", " ").title()}',
+                    marker=dict(color=color, size=12, symbol='diamond'),
+                    showlegend=True
+                ))
     
     fig.update_layout(
         title=title,
@@ -5827,7 +4397,7 @@ def show_cash_product_dashboard():
                         AND SETTLED_AMT > 0
                     """
                     
-                    df_cash = client.query(query).to_dataframe()
+                    df_cash = run_tile_query(client, 'cash_product_detail', query).to_dataframe()
                     
                     if not df_cash.empty and len(df_cash) > 0:
                         row = df_cash.iloc[0]
@@ -5860,7 +4430,7 @@ def show_cash_product_dashboard():
                         ORDER BY DATE(REQUEST_DATE)
                         """
                         
-                        df_daily = client.query(daily_query).to_dataframe()
+                        df_daily = run_tile_query(client, 'cash_product_daily', daily_query).to_dataframe()
                         
                         if not df_daily.empty:
                             fig = px.line(df_daily, x='date', y=['settled_amount', 'daily_requests'],
@@ -5905,7 +4475,7 @@ def show_cash_product_dashboard():
                     WHERE DATE(log_date_time) BETWEEN '{start_date}' AND '{end_date}'
                     """
                     
-                    df_m2d = client.query(m2d_query).to_dataframe()
+                    df_m2d = run_tile_query(client, 'cash_product_m2d', m2d_query).to_dataframe()
                     
                     if not df_m2d.empty and len(df_m2d) > 0:
                         row = df_m2d.iloc[0]
@@ -5993,7 +4563,7 @@ def show_cash_product_dashboard():
                     AND SETTLED_AMT > 0
                     """
                     
-                    df_mcc = client.query(mcc_query).to_dataframe()
+                    df_mcc = run_tile_query(client, 'cash_product_mcc', mcc_query).to_dataframe()
                     
                     # Debug: Show the raw data
                     # st.write("**Debug - Raw Query Results:**")
@@ -6087,7 +4657,7 @@ def show_cash_product_dashboard():
                     WHERE mu.client_id IS NULL  -- Only users who never used M2D
                     """
                     
-                    df_new_users = client.query(new_users_query).to_dataframe()
+                    df_new_users = run_tile_query(client, 'cash_product_new_users', new_users_query).to_dataframe()
                     
                     if not df_new_users.empty and len(df_new_users) > 0:
                         row = df_new_users.iloc[0]
@@ -6247,9 +4817,8 @@ def get_google_sheets_data(sheet_name, fallback_function=None):
             else:
                 return pd.DataFrame()
         
-        sh = gc.open_by_url('https://docs.google.com/spreadsheets/d/1XyTNR14JlkM_7uHEeoQa68mLgeiAZTaCq9vR-VCff4o/edit?gid=1128769976#gid=1128769976')
-        worksheet = sh.worksheet_by_title(sheet_name)
-        data = worksheet.get_as_df()
+        # Typed per the worksheet schema (date column already parsed)
+        data = load_typed_worksheet(gc, METRICS_SHEET_URL, sheet_name)
         
         if data.empty:
             if fallback_function:
@@ -6257,10 +4826,6 @@ def get_google_sheets_data(sheet_name, fallback_function=None):
             else:
                 return pd.DataFrame()
         
-        # Convert date column to datetime if it exists
-        if 'date' in data.columns:
-            data['date'] = pd.to_datetime(data['date'])
-        
         return data
         
     except Exception as e:
@@ -6270,160 +4835,21 @@ def get_google_sheets_data(sheet_name, fallback_function=None):
         else:
             return pd.DataFrame()
 
-def get_bugs_dataframe_from_sheets():
-    """
-    Fetch bugs data from dedicated bugs Google Sheet as DataFrame
-    
-    Returns:
-        pandas.DataFrame: Bugs data or None if unavailable
-    """
-    try:
-        import pygsheets
-        
-        # Get Google Sheets client (works with both Streamlit Cloud secrets and local file)
-        gc = get_google_sheets_client()
-        if gc is None:
-            return None
-        
-        # Use the dedicated bugs sheet URL
-        sh = gc.open_by_url('https://docs.google.com/spreadsheets/d/1DLU87T3DW9ruoR_U_jVCTV8hvuVCRSw8VMWLaN1PUBU/edit?gid=0#gid=0')
-        worksheet = sh.worksheet_by_title('Sheet1')
-        data = worksheet.get_as_df()
-        
-        if data.empty:
-            return None
-        
-        return data
-        
-    except Exception as e:
-        # Silent failure - will fallback to CSV
-        return None
-
-@st.cache_data(ttl=3600)  # Cache for 1 hour - cost optimization
-def get_bugs_data_from_csv():
+def get_bugs_data(use_sample=True):
     """
-    Fetch bugs data from CSV file
-    Returns bugs metrics for the dashboard
+    Bugs metrics from the shared bugs source (Google Sheets first, then bugs_data.csv)
+    Parsed once per sheet revision / CSV mtime and shared by the tiles and the bugs dashboard
     """
     try:
-        # Check if CSV file exists
-        csv_path = "bugs_data.csv"
-        if not os.path.exists(csv_path):
-            st.warning("⚠️ bugs_data.csv file not found. Using sample bugs data.")
-            return get_sample_bugs_data()
-        
-        # Load data from CSV
-        df = pd.read_csv(csv_path)
-        
-        if df.empty:
-            st.warning("⚠️ No bugs data found in CSV file. Using sample data.")
-            return get_sample_bugs_data()
-        
-        # Normalize column names and clean data
-        df.columns = df.columns.str.strip()
-        
-        # Clean status column - remove whitespace and handle case sensitivity
-        if 'status' in df.columns:
-            df['status'] = df['status'].str.strip()
-        
-        # Process the bugs data
-        total_bugs = len(df)
-        
-        # Count bugs by status (case-sensitive matching as per CSV)
-        status_counts = df['status'].value_counts()
-        open_bugs = status_counts.get('open', 0)
-        fixed_bugs = status_counts.get('Fixed', 0)
-        pending_bugs = status_counts.get('Pending', 0)
-        wip_bugs = status_counts.get('wip', 0)
-        
-        # Count bugs by product
-        product_counts = df['Product'].value_counts()
-        
-        # Calculate trend (simplified)
-        trend_change = -1  # Simulating improvement
-        
-        bugs_metrics = {
-            'total_bugs': total_bugs,
-            'open_bugs': open_bugs,
-            'fixed_bugs': fixed_bugs,
-            'pending_bugs': pending_bugs,
-            'wip_bugs': wip_bugs,
-            'trend_change': trend_change,
-            'product_breakdown': product_counts.to_dict(),
-            'status_breakdown': status_counts.to_dict(),
-            'raw_data': df
-        }
-        
-        return bugs_metrics
-        
+        bugs_data = load_bugs_snapshot(get_google_sheets_client(), BUGS_SHEET_URL)
     except Exception as e:
-        st.error(f"❌ Error loading bugs data from CSV: {str(e)}")
+        st.error(f"❌ Error loading bugs data: {str(e)}")
+        bugs_data = None
+    
+    if bugs_data is None and use_sample:
+        st.warning("⚠️ Bugs data not available from Google Sheets or bugs_data.csv. Using sample bugs data.")
         return get_sample_bugs_data()
-
-@st.cache_data(ttl=3600)  # Cache for 1 hour - cost optimization
-def get_bugs_data_from_sheets():
-    """
-    Fetch bugs data from Google Sheets using pygsheets
-    Returns bugs metrics for the dashboard
-    """
-    try:
-        # Get Google Sheets client (works with both Streamlit Cloud secrets and local file)
-        gc = get_google_sheets_client()
-        if gc is None:
-            # Silent fallback - will try CSV next
-            return None
-        
-        # Use pygsheets to access the bugs spreadsheet
-        sh = gc.open_by_url('https://docs.google.com/spreadsheets/d/1DLU87T3DW9ruoR_U_jVCTV8hvuVCRSw8VMWLaN1PUBU/edit?gid=0#gid=0')
-        worksheet = sh.worksheet_by_title('Sheet1')
-        df = worksheet.get_as_df()
-        
-        if df.empty:
-            # Silent return - will fallback to CSV
-            return None
-        
-        # Normalize column names and clean data
-        df.columns = df.columns.str.strip()
-        
-        # Clean status column - remove whitespace
-        if 'status' in df.columns:
-            df['status'] = df['status'].str.strip()
-        
-        # Process the bugs data
-        total_bugs = len(df)
-        
-        # Count bugs by status (case-sensitive matching as per CSV)
-        status_counts = df['status'].value_counts()
-        open_bugs = status_counts.get('open', 0)
-        fixed_bugs = status_counts.get('Fixed', 0)
-        pending_bugs = status_counts.get('Pending', 0)
-        wip_bugs = status_counts.get('wip', 0)
-        
-        # Count bugs by product
-        product_counts = df['Product'].value_counts()
-        
-        # Calculate trend (comparing with previous period - simplified)
-        # For now, we'll use a simple calculation
-        previous_open = max(0, open_bugs - 1)  # Simplified trend calculation
-        trend_change = open_bugs - previous_open
-        
-        bugs_metrics = {
-            'total_bugs': total_bugs,
-            'open_bugs': open_bugs,
-            'fixed_bugs': fixed_bugs,
-            'pending_bugs': pending_bugs,
-            'wip_bugs': wip_bugs,
-            'trend_change': trend_change,
-            'product_breakdown': product_counts.to_dict(),
-            'status_breakdown': status_counts.to_dict(),
-            'raw_data': df
-        }
-        
-        return bugs_metrics
-        
-    except Exception as e:
-        # Silent failure - will fallback to CSV
-        return None
+    return bugs_data
 
 def get_sample_bugs_data():
     """Generate sample bugs data when Google Sheets is not available"""
@@ -6433,6 +4859,7 @@ def get_sample_bugs_data():
         'fixed_bugs': 20,
         'pending_bugs': 5,
         'wip_bugs': 2,
+        'active_bugs': 15,
         'trend_change': -1,
         'product_breakdown': {
             'Aeps': 15,
@@ -6447,7 +4874,8 @@ def get_sample_bugs_data():
             'Pending': 5,
             'wip': 2
         },
-        'raw_data': pd.DataFrame()
+        'raw_data': pd.DataFrame(),
+        'source': 'sample'
     }
 
 # ==================== PRODUCT METRICS & TRENDS ====================
@@ -6466,9 +4894,7 @@ def get_product_metrics_data():
             return None
         
         # Open the product metrics sheet (updated to new sheet)
-        sh = gc.open_by_url('https://docs.google.com/spreadsheets/d/1DLU87T3DW9ruoR_U_jVCTV8hvuVCRSw8VMWLaN1PUBU/edit?gid=272453504#gid=272453504')
-        worksheet = sh.worksheet_by_title('Sheet2')  # Updated to new sheet and correct worksheet name
-        df = worksheet.get_as_df()
+        df = get_worksheet_df(gc, BUGS_SHEET_URL, 'Sheet2')  # Updated to new sheet and correct worksheet name
         
         if df.empty:
             st.warning("⚠️ No data found in Google Sheets")
@@ -6488,6 +4914,20 @@ def get_product_metrics_data():
         st.error(f"❌ Error loading Google Sheets: {str(e)}")
         return None
 
+def get_product_metric_values(metrics_df):
+    """Numeric product metrics aligned with metrics_df - typed Sheets snapshot when available"""
+    gc = get_google_sheets_client()
+    if gc is not None:
+        try:
+            values_df = load_typed_worksheet(gc, BUGS_SHEET_URL, 'Sheet2')
+            if list(values_df.columns) == list(metrics_df.columns) and len(values_df) == len(metrics_df):
+                values_df.index = metrics_df.index
+                return values_df
+        except Exception:
+            pass
+    # Sample data (or a sheet that changed under us) - parse once for the whole view
+    return parse_numeric_frame(metrics_df)
+
 def create_sample_product_metrics():
     """Generate sample product metrics data"""
     months = ['Jul 2023', 'Aug 2023', 'Sep 2023', 'Oct 2023', 'Nov 2023', 'Dec 2023']
@@ -6520,13 +4960,9 @@ def show_bugs_dashboard():
         st.session_state.navigation_only = True
         st.rerun()
     
-    # Load bugs data - Try Google Sheets first, then CSV
+    # Load bugs data - shared source (Google Sheets first, then CSV)
     with st.spinner("🔄 Loading bugs data..."):
-        bugs_data = get_bugs_data_from_sheets()
-        
-        # Fallback to CSV if Google Sheets not available
-        if bugs_data is None:
-            bugs_data = get_bugs_data_from_csv()
+        bugs_data = get_bugs_data()
     
     if not bugs_data or bugs_data.get('raw_data').empty:
         st.error("❌ No bugs data available. Please ensure bugs_data.csv exists or configure Google Sheets.")
@@ -6714,6 +5150,7 @@ def show_winback_dashboard():
     
     # Get list of month columns (exclude non-date columns)
     month_columns = [col for col in metrics_df.columns if any(year in str(col) for year in ['2023', '2024', '2025'])]
+    metric_values = get_product_metric_values(metrics_df)
     
     # Key metrics summary for latest month
     if month_columns:
@@ -6739,8 +5176,8 @@ def show_winback_dashboard():
         
         with col4:
             if 'SP winback' in metrics_df.index and len(month_columns) > 1:
-                current_winback = float(str(metrics_df.loc['SP winback', latest_month]).replace(',', ''))
-                previous_winback = float(str(metrics_df.loc['SP winback', month_columns[-2]]).replace(',', ''))
+                current_winback = metric_values.loc['SP winback', latest_month]
+                previous_winback = metric_values.loc['SP winback', month_columns[-2]]
                 change = ((current_winback - previous_winback) / previous_winback * 100) if previous_winback > 0 else 0
                 st.metric("Month-over-Month", f"{change:+.1f}%", help="Winback Change from Previous Month")
     
@@ -6749,16 +5186,7 @@ def show_winback_dashboard():
     
     if 'SP winback' in metrics_df.index and month_columns:
         # Prepare winback data
-        winback_data = metrics_df.loc['SP winback', month_columns]
-        
-        # Convert to numeric (handle commas)
-        winback_values = []
-        for val in winback_data:
-            try:
-                clean_val = str(val).replace(',', '')
-                winback_values.append(float(clean_val))
-            except:
-                winback_values.append(0)
+        winback_values = metric_values.loc['SP winback', month_columns].fillna(0).tolist()
         
         # Create DataFrame for plotting
         trend_df = pd.DataFrame({
@@ -6810,14 +5238,9 @@ def show_winback_dashboard():
         if 'SP winback' in metrics_df.index and 'SP Status Retained' in metrics_df.index:
             st.markdown("**Winback vs Retention**")
             
-            winback_vals = []
-            retention_vals = []
-            for month in month_columns[-6:]:  # Last 6 months
-                try:
-                    winback_vals.append(float(str(metrics_df.loc['SP winback', month]).replace(',', '')))
-                    retention_vals.append(float(str(metrics_df.loc['SP Status Retained', month]).replace(',', '')))
-                except:
-                    pass
+            # Last 6 months
+            winback_vals = metric_values.loc['SP winback', month_columns[-6:]].tolist()
+            retention_vals = metric_values.loc['SP Status Retained', month_columns[-6:]].tolist()
             
             if winback_vals and retention_vals:
                 comparison_df = pd.DataFrame({
@@ -6835,13 +5258,7 @@ def show_winback_dashboard():
     with col2:
         if 'SP status retention ratio' in metrics_df.index:
             st.markdown("**Retention Ratio Trend**")
-            retention_ratio_vals = []
-            for month in month_columns:
-                try:
-                    ratio_val = str(metrics_df.loc['SP status retention ratio', month]).replace('%', '')
-                    retention_ratio_vals.append(float(ratio_val))
-                except:
-                    retention_ratio_vals.append(0)
+            retention_ratio_vals = metric_values.loc['SP status retention ratio', month_columns].fillna(0).tolist()
             
             if retention_ratio_vals:
                 ratio_df = pd.DataFrame({
@@ -6900,6 +5317,7 @@ def show_product_metrics_dashboard():
     
     # Get list of month columns (exclude non-date columns)
     month_columns = [col for col in metrics_df.columns if any(year in str(col) for year in ['2023', '2024', '2025'])]
+    metric_values = get_product_metric_values(metrics_df)
     
     # Key metrics summary for latest month
     if month_columns:
@@ -6945,16 +5363,7 @@ def show_product_metrics_dashboard():
         
         if 'SP winback' in metrics_df.index and month_columns:
             # Prepare winback data
-            winback_data = metrics_df.loc['SP winback', month_columns]
-            
-            # Convert to numeric (handle commas)
-            winback_values = []
-            for val in winback_data:
-                try:
-                    clean_val = str(val).replace(',', '')
-                    winback_values.append(float(clean_val))
-                except:
-                    winback_values.append(0)
+            winback_values = metric_values.loc['SP winback', month_columns].fillna(0).tolist()
             
             # Create DataFrame for plotting
             trend_df = pd.DataFrame({
@@ -7006,14 +5415,9 @@ def show_product_metrics_dashboard():
             if 'SP winback' in metrics_df.index and 'SP Status Retained' in metrics_df.index:
                 st.markdown("**Winback vs Retention**")
                 
-                winback_vals = []
-                retention_vals = []
-                for month in month_columns[-6:]:  # Last 6 months
-                    try:
-                        winback_vals.append(float(str(metrics_df.loc['SP winback', month]).replace(',', '')))
-                        retention_vals.append(float(str(metrics_df.loc['SP Status Retained', month]).replace(',', '')))
-                    except:
-                        pass
+                # Last 6 months
+                winback_vals = metric_values.loc['SP winback', month_columns[-6:]].tolist()
+                retention_vals = metric_values.loc['SP Status Retained', month_columns[-6:]].tolist()
                 
                 if winback_vals and retention_vals:
                     comparison_df = pd.DataFrame({
@@ -7031,13 +5435,7 @@ def show_product_metrics_dashboard():
         with col2:
             if 'SP status retention ratio' in metrics_df.index:
                 st.markdown("**Retention Ratio Trend**")
-                retention_ratio_vals = []
-                for month in month_columns[-6:]:
-                    try:
-                        val_str = str(metrics_df.loc['SP status retention ratio', month]).replace('%', '')
-                        retention_ratio_vals.append(float(val_str))
-                    except:
-                        pass
+                retention_ratio_vals = metric_values.loc['SP status retention ratio', month_columns[-6:]].dropna().tolist()
                 
                 if retention_ratio_vals:
                     ratio_df = pd.DataFrame({
@@ -7062,13 +5460,7 @@ def show_product_metrics_dashboard():
         # Market share trend
         if 'AePS market share' in metrics_df.index:
             st.markdown("#### Market Share Evolution")
-            market_share_vals = []
-            for month in month_columns:
-                try:
-                    val_str = str(metrics_df.loc['AePS market share', month]).replace('%', '')
-                    market_share_vals.append(float(val_str))
-                except:
-                    pass
+            market_share_vals = metric_values.loc['AePS market share', month_columns].dropna().tolist()
             
             if market_share_vals:
                 fig = go.Figure()
@@ -7094,13 +5486,7 @@ def show_product_metrics_dashboard():
         with col1:
             if 'CW transaction success rate' in metrics_df.index:
                 st.markdown("#### Transaction Success Rate")
-                success_vals = []
-                for month in month_columns[-12:]:
-                    try:
-                        val_str = str(metrics_df.loc['CW transaction success rate', month]).replace('%', '')
-                        success_vals.append(float(val_str))
-                    except:
-                        pass
+                success_vals = metric_values.loc['CW transaction success rate', month_columns[-12:]].dropna().tolist()
                 
                 if success_vals:
                     fig = go.Figure()
@@ -7118,13 +5504,7 @@ def show_product_metrics_dashboard():
         with col2:
             if 'CW customer success rate' in metrics_df.index:
                 st.markdown("#### Customer Success Rate")
-                cust_success_vals = []
-                for month in month_columns[-12:]:
-                    try:
-                        val_str = str(metrics_df.loc['CW customer success rate', month]).replace('%', '')
-                        cust_success_vals.append(float(val_str))
-                    except:
-                        pass
+                cust_success_vals = metric_values.loc['CW customer success rate', month_columns[-12:]].dropna().tolist()
                 
                 if cust_success_vals:
                     fig = go.Figure()
@@ -7145,13 +5525,7 @@ def show_product_metrics_dashboard():
         # GTV trend
         if 'AePS CW gtv (Cr)' in metrics_df.index:
             st.markdown("#### Cash Withdrawal GTV (Crores)")
-            gtv_vals = []
-            for month in month_columns:
-                try:
-                    val_str = str(metrics_df.loc['AePS CW gtv (Cr)', month]).replace(',', '')
-                    gtv_vals.append(float(val_str))
-                except:
-                    pass
+            gtv_vals = metric_values.loc['AePS CW gtv (Cr)', month_columns].dropna().tolist()
             
             if gtv_vals:
                 fig = go.Figure()
@@ -7181,13 +5555,7 @@ def show_product_metrics_dashboard():
         # Transaction volume
         if 'AePS CW transactions' in metrics_df.index:
             st.markdown("#### Transaction Volume Trend")
-            txn_vals = []
-            for month in month_columns:
-                try:
-                    val_str = str(metrics_df.loc['AePS CW transactions', month]).replace(',', '')
-                    txn_vals.append(float(val_str))
-                except:
-                    pass
+            txn_vals = metric_values.loc['AePS CW transactions', month_columns].dropna().tolist()
             
             if txn_vals:
                 fig = go.Figure()
@@ -7274,25 +5642,20 @@ def get_rfm_data():
         pandas.DataFrame: RFM fraud detection data
     """
     try:
-        import pygsheets
-        
-        # Authorize using credentials.json
-        gc = pygsheets.authorize(service_file='credentials.json')
-        
-        # Open the spreadsheet by URL
-        sh = gc.open_by_url('https://docs.google.com/spreadsheets/d/1XyTNR14JlkM_7uHEeoQa68mLgeiAZTaCq9vR-VCff4o/edit?gid=1128769976#gid=1128769976')
+        # Shared Sheets client (works with both Streamlit Cloud secrets and local file)
+        gc = get_google_sheets_client()
+        if gc is None:
+            st.warning("⚠️ Google Sheets credentials not available for RFM data")
+            return None
         
-        # Get the RFM worksheet
-        worksheet = sh.worksheet_by_title('rfm')
-        df = worksheet.get_as_df()
+        # RFM worksheet (fetched in the same batch as the other metrics tabs)
+        df = load_typed_worksheet(gc, METRICS_SHEET_URL, 'rfm')
         
         if df.empty:
             st.warning("⚠️ No RFM data available in Google Sheets")
             return None
         
-        # Convert data types
-        if 'total_caught_per' in df.columns:
-            df['total_caught_per'] = pd.to_numeric(df['total_caught_per'], errors='coerce')
+        # Numeric columns are typed by the 'rfm' schema; year_month is a view-specific conversion
         if 'year_month' in df.columns:
             df['year_month'] = pd.to_datetime(df['year_month'], errors='coerce')
         
@@ -7952,210 +6315,78 @@ def display_rfm_analysis(rfm_data):
         # Channel-specific insights
         if all(col in rfm_data.columns for col in ['app_caught_per', 'web_caught_per']):
             app_avg = rfm_data['app_caught_per'].mean()
-            web_avg = rfm_data['web_caught_per'].mean()
-            
-            if app_avg > web_avg:
-                insights.append(f"📱 App channel performs better by {app_avg - web_avg:.1f}% vs Web")
-                recommendations.append("🌐 Focus on improving Web channel fraud detection")
-            else:
-                insights.append(f"🌐 Web channel performs better by {web_avg - app_avg:.1f}% vs App")
-                recommendations.append("📱 Focus on improving App channel fraud detection")
-        
-        # Financial impact insights
-        if all(col in rfm_data.columns for col in ['total_fr_amt', 'APP_WEB_caught_amt']):
-            total_fraud = rfm_data['total_fr_amt'].sum()
-            total_caught = rfm_data['APP_WEB_caught_amt'].sum()
-            savings_rate = (total_caught / total_fraud * 100) if total_fraud > 0 else 0
-            
-            insights.append(f"💰 Total fraud amount: ₹{total_fraud:.2f}Cr, Amount protected: ₹{total_caught:.2f}Cr")
-            insights.append(f"💎 Overall savings rate: {savings_rate:.1f}%")
-            
-            if savings_rate >= 80:
-                insights.append("🏆 Excellent financial protection - strong fraud prevention")
-            elif savings_rate >= 60:
-                insights.append("📈 Good financial protection - room for improvement")
-                recommendations.append("💰 Enhance fraud detection to protect more funds")
-            else:
-                insights.append("🚨 Low financial protection - significant improvement needed")
-                recommendations.append("💰 Urgent: Strengthen fraud detection to protect more funds")
-        
-        # Enhance recommendations with AI
-        ai_context = {
-            "current_performance": rfm_data['total_caught_per'].iloc[-1] if 'total_caught_per' in rfm_data.columns and len(rfm_data) > 0 else 0,
-            "avg_performance": rfm_data['total_caught_per'].mean() if 'total_caught_per' in rfm_data.columns else 0,
-            "app_catch_rate": rfm_data['app_caught_per'].mean() if 'app_caught_per' in rfm_data.columns else 0,
-            "web_catch_rate": rfm_data['web_caught_per'].mean() if 'web_caught_per' in rfm_data.columns else 0,
-            "total_fraud_amount": rfm_data['total_fr_amt'].sum() if 'total_fr_amt' in rfm_data.columns else 0,
-            "total_caught_amount": rfm_data['APP_WEB_caught_amt'].sum() if 'APP_WEB_caught_amt' in rfm_data.columns else 0,
-            "insights": insights
-        }
-        
-        recommendations = enhance_recommendations_with_ai(
-            rule_based_recommendations=recommendations,
-            context_data=ai_context,
-            recommendation_type="fraud"
-        )
-        
-        # Display insights
-        st.markdown("##### 🔍 Key Insights")
-        for insight in insights:
-            st.markdown(f"- {insight}")
-        
-        if recommendations:
-            st.markdown("##### 🎯 Recommendations")
-            for rec in recommendations:
-                st.markdown(f"- {rec}")
-        
-        # Performance optimization suggestions
-        st.markdown("##### 🚀 Optimization Opportunities")
-        
-        opt_col1, opt_col2 = st.columns(2)
-        
-        with opt_col1:
-            st.markdown("**System Optimization:**")
-            st.markdown("- 🔧 Enhance real-time fraud detection algorithms")
-            st.markdown("- 📊 Implement advanced pattern recognition")
-            st.markdown("- 🔄 Set up automated fraud alerts")
-            st.markdown("- 🎯 Improve machine learning models")
-        
-        with opt_col2:
-            st.markdown("**Process Improvements:**")
-            st.markdown("- 📈 Set detection rate targets (80%+)")
-            st.markdown("- ⏰ Monitor fraud detection SLAs")
-            st.markdown("- 🎯 Implement performance dashboards")
-            st.markdown("- 📋 Create fraud response procedures")
-
-def create_sample_distributor_churn_data():
-    """Create sample distributor churn data"""
-    import pandas as pd
-    import numpy as np
-    
-    # Sample distributor data
-    distributors = [
-        'DIST001', 'DIST002', 'DIST003', 'DIST004', 'DIST005',
-        'DIST006', 'DIST007', 'DIST008', 'DIST009', 'DIST010'
-    ]
-    
-    states = ['Maharashtra', 'Gujarat', 'Karnataka', 'Tamil Nadu', 'Uttar Pradesh']
-    
-    sample_data = []
-    for dist_id in distributors:
-        dist_name = f"Distributor {dist_id[-3:]}"
-        state = np.random.choice(states)
-        
-        # Generate realistic churn data
-        total_agents = np.random.randint(50, 200)
-        churn_rate = np.random.uniform(0.05, 0.25)  # 5-25% churn rate
-        churned_agents = int(total_agents * churn_rate)
-        
-        # High GTV agents (top 15% by GTV)
-        high_gtv_agents = int(total_agents * 0.15)  # ~15% high GTV
-        avg_gtv = 2.5 + np.random.normal(0, 0.5)  # ~2.5 Cr average
-        
-        sample_data.append({
-            'month': '2024-09',
-            'distributor_id': dist_id,
-            'distributor_name': dist_name,
-            'state': state,
-            'total_agents': total_agents,
-            'churned_agents': churned_agents,
-            'churn_rate': round(churn_rate, 3),
-            'high_gtv_agents': high_gtv_agents,
-            'avg_gtv_per_agent': round(avg_gtv, 1)
-        })
-    
-    return pd.DataFrame(sample_data)
-
-def show_bot_analytics_dashboard():
-    """Display comprehensive Bot Analytics dashboard"""
-    st.markdown("# 🤖 Bot Analytics Dashboard")
-    
-    # Back button
-    if st.button("← Back to Main Dashboard", key="back_to_main_bot"):
-        st.session_state.current_view = "main"
-        st.session_state.navigation_only = True
-        st.rerun()
-    
-    # Auto-load Google Sheets data (no UI options)
-    bot_data = get_google_sheets_data('chatbot', create_sample_bot_data)
-    if bot_data is not None and not bot_data.empty:
-        st.success("✅ Bot Analytics Data Loaded from Google Sheets")
-        display_bot_analytics(bot_data)
-    else:
-        st.error("❌ No Bot Analytics data available")
-
-def display_bot_analytics(bot_data):
-    """Display comprehensive bot analytics with performance metrics"""
-    st.markdown("## 🤖 Bot Performance Analytics")
-    
-    # Key metrics
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        total_interactions = bot_data['total_interactions'].sum() if 'total_interactions' in bot_data.columns else 0
-        st.metric("Total Interactions", f"{total_interactions:,}")
-    
-    with col2:
-        success_rate = bot_data['success_rate'].mean() if 'success_rate' in bot_data.columns else 0
-        st.metric("Success Rate", f"{success_rate:.1f}%")
-    
-    with col3:
-        avg_response_time = bot_data['avg_response_time'].mean() if 'avg_response_time' in bot_data.columns else 0
-        st.metric("Avg Response Time", f"{avg_response_time:.1f}s")
-    
-    with col4:
-        user_satisfaction = bot_data['user_satisfaction'].mean() if 'user_satisfaction' in bot_data.columns else 0
-        st.metric("User Satisfaction", f"{user_satisfaction:.1f}/5")
-    
-    # Performance trends
-    if 'date' in bot_data.columns:
-        fig_trend = px.line(
-            bot_data,
-            x='date',
-            y='success_rate',
-            title="Bot Success Rate Trend",
-            markers=True
+            web_avg = rfm_data['web_caught_per'].mean()
+            
+            if app_avg > web_avg:
+                insights.append(f"📱 App channel performs better by {app_avg - web_avg:.1f}% vs Web")
+                recommendations.append("🌐 Focus on improving Web channel fraud detection")
+            else:
+                insights.append(f"🌐 Web channel performs better by {web_avg - app_avg:.1f}% vs App")
+                recommendations.append("📱 Focus on improving App channel fraud detection")
+        
+        # Financial impact insights
+        if all(col in rfm_data.columns for col in ['total_fr_amt', 'APP_WEB_caught_amt']):
+            total_fraud = rfm_data['total_fr_amt'].sum()
+            total_caught = rfm_data['APP_WEB_caught_amt'].sum()
+            savings_rate = (total_caught / total_fraud * 100) if total_fraud > 0 else 0
+            
+            insights.append(f"💰 Total fraud amount: ₹{total_fraud:.2f}Cr, Amount protected: ₹{total_caught:.2f}Cr")
+            insights.append(f"💎 Overall savings rate: {savings_rate:.1f}%")
+            
+            if savings_rate >= 80:
+                insights.append("🏆 Excellent financial protection - strong fraud prevention")
+            elif savings_rate >= 60:
+                insights.append("📈 Good financial protection - room for improvement")
+                recommendations.append("💰 Enhance fraud detection to protect more funds")
+            else:
+                insights.append("🚨 Low financial protection - significant improvement needed")
+                recommendations.append("💰 Urgent: Strengthen fraud detection to protect more funds")
+        
+        # Enhance recommendations with AI
+        ai_context = {
+            "current_performance": rfm_data['total_caught_per'].iloc[-1] if 'total_caught_per' in rfm_data.columns and len(rfm_data) > 0 else 0,
+            "avg_performance": rfm_data['total_caught_per'].mean() if 'total_caught_per' in rfm_data.columns else 0,
+            "app_catch_rate": rfm_data['app_caught_per'].mean() if 'app_caught_per' in rfm_data.columns else 0,
+            "web_catch_rate": rfm_data['web_caught_per'].mean() if 'web_caught_per' in rfm_data.columns else 0,
+            "total_fraud_amount": rfm_data['total_fr_amt'].sum() if 'total_fr_amt' in rfm_data.columns else 0,
+            "total_caught_amount": rfm_data['APP_WEB_caught_amt'].sum() if 'APP_WEB_caught_amt' in rfm_data.columns else 0,
+            "insights": insights
+        }
+        
+        recommendations = enhance_recommendations_with_ai(
+            rule_based_recommendations=recommendations,
+            context_data=ai_context,
+            recommendation_type="fraud"
         )
-        st.plotly_chart(fig_trend, use_container_width=True)
-    
-    # Bot analytics table
-    st.markdown("### 📊 Bot Performance Data")
-    st.dataframe(bot_data, use_container_width=True)
-
-def show_sample_login_data():
-    """Show sample login data when real data is not available"""
-    st.markdown("## 📊 Sample Login Success Analysis")
-    
-    # Create sample data
-    sample_data = create_sample_login_data()
-    
-    if not sample_data.empty:
-        st.success("✅ Sample Login Data Generated")
         
-        # Display key metrics
-        col1, col2, col3, col4 = st.columns(4)
+        # Display insights
+        st.markdown("##### 🔍 Key Insights")
+        for insight in insights:
+            st.markdown(f"- {insight}")
         
-        with col1:
-            total_logins = sample_data['total_logins'].sum()
-            st.metric("Total Logins", f"{total_logins:,}")
+        if recommendations:
+            st.markdown("##### 🎯 Recommendations")
+            for rec in recommendations:
+                st.markdown(f"- {rec}")
         
-        with col2:
-            success_rate = sample_data['success_rate'].mean()
-            st.metric("Success Rate", f"{success_rate:.1f}%")
+        # Performance optimization suggestions
+        st.markdown("##### 🚀 Optimization Opportunities")
         
-        with col3:
-            avg_response_time = sample_data['avg_response_time'].mean()
-            st.metric("Avg Response Time", f"{avg_response_time:.1f}ms")
+        opt_col1, opt_col2 = st.columns(2)
         
-        with col4:
-            error_rate = sample_data['error_rate'].mean()
-            st.metric("Error Rate", f"{error_rate:.1f}%")
+        with opt_col1:
+            st.markdown("**System Optimization:**")
+            st.markdown("- 🔧 Enhance real-time fraud detection algorithms")
+            st.markdown("- 📊 Implement advanced pattern recognition")
+            st.markdown("- 🔄 Set up automated fraud alerts")
+            st.markdown("- 🎯 Improve machine learning models")
         
-        # Display sample data
-        st.markdown("### 📈 Sample Login Data")
-        st.dataframe(sample_data, use_container_width=True)
-    else:
-        st.error("❌ Unable to generate sample login data")
+        with opt_col2:
+            st.markdown("**Process Improvements:**")
+            st.markdown("- 📈 Set detection rate targets (80%+)")
+            st.markdown("- ⏰ Monitor fraud detection SLAs")
+            st.markdown("- 🎯 Implement performance dashboards")
+            st.markdown("- 📋 Create fraud response procedures")
 
 def create_sample_login_data():
     """Create sample login success data"""
@@ -9614,9 +7845,9 @@ def show_detailed_view(metric_name, metric_data):
             st.markdown("### 📊 Overall Transaction Success Rate")
             
             # Get hourly data to calculate overall success rate
-            hourly_data = metric_data.get('hourly_data', [])
-            if hourly_data:
-                hourly_df = pd.DataFrame(hourly_data)
+            hourly_data = metric_data.get('hourly_data', {})
+            if hourly_row_count(hourly_data):
+                hourly_df = hourly_frame(hourly_data)
                 
                 # Calculate overall success rate (average of all completed hours)
                 if 'overall_success_rate' in hourly_df.columns:
@@ -9825,32 +8056,30 @@ def show_detailed_view(metric_name, metric_data):
             st.metric("Total Transactions", f"{total_txns:,}")
         
         # Use actual hourly GTV data from query results (not fake data!)
-        hourly_data = metric_data.get('hourly_data', [])
+        hourly_data = metric_data.get('hourly_data', {})
+        hourly_rows = hourly_row_count(hourly_data)
         
-        if hourly_data:
-            # Convert to DataFrame for easier manipulation
-            hourly_df = pd.DataFrame(hourly_data)
+        if hourly_rows:
+            # Columns straight from the query payload (keep NaN for hours without data)
+            def hourly_column(col):
+                return hourly_data[col] if col in hourly_data else np.full(hourly_rows, np.nan)
             
-            # Extract actual values from the query (keep NaN for hours without data)
-            hours = hourly_df['hour'].tolist() if 'hour' in hourly_df.columns else []
+            hours = hourly_column('hour')
             # Don't fill NaN with 0 - let Plotly handle missing data points
-            current_gtv_hourly = hourly_df['total_amount_cr'].tolist() if 'total_amount_cr' in hourly_df.columns else []
-            median_gtv_hourly = hourly_df['median_amount_cr'].tolist() if 'median_amount_cr' in hourly_df.columns else []
-            upper_bound = hourly_df['amount_cr_upper_bound'].tolist() if 'amount_cr_upper_bound' in hourly_df.columns else []
-            lower_bound = hourly_df['amount_cr_lower_bound'].tolist() if 'amount_cr_lower_bound' in hourly_df.columns else []
-            
             gtv_df = pd.DataFrame({
                 'Hour': hours,
-                'Current GTV': current_gtv_hourly,
-                'Median GTV': median_gtv_hourly
-            })
+                'Current GTV': hourly_column('total_amount_cr'),
+                'Median GTV': hourly_column('median_amount_cr')
+            }, copy=False)
             
             # GTV trend chart with ACTUAL data
             fig_gtv = px.line(gtv_df, x='Hour', y=['Current GTV', 'Median GTV'],
                              title='Hourly GTV Performance vs Median (Today vs Last 7 Days)')
             
             # Add actual threshold bands from query
-            if upper_bound and lower_bound:
+            upper_bound = hourly_data.get('amount_cr_upper_bound')
+            lower_bound = hourly_data.get('amount_cr_lower_bound')
+            if upper_bound is not None and lower_bound is not None:
                 fig_gtv.add_scatter(x=hours, y=upper_bound, mode='lines', name='Upper Threshold',
                                    line=dict(dash='dash', color='orange'), opacity=0.7)
                 fig_gtv.add_scatter(x=hours, y=lower_bound, mode='lines', name='Lower Threshold',
@@ -9874,8 +8103,8 @@ def show_detailed_view(metric_name, metric_data):
         st.markdown("### 📊 GTV Distribution by Performance Band")
         
         # Calculate performance bands using actual hourly data
-        if hourly_data and 'amount_cr_anomaly' in hourly_df.columns:
-            anomaly_counts = hourly_df['amount_cr_anomaly'].value_counts()
+        if hourly_rows and 'amount_cr_anomaly' in hourly_data:
+            anomaly_counts = pd.Series(hourly_data['amount_cr_anomaly'], copy=False).value_counts()
             high_perf = anomaly_counts.get('upper anomaly ↑', 0)
             normal_perf = anomaly_counts.get('normal', 0)
             low_perf = anomaly_counts.get('lower anomaly ↓', 0)
@@ -10528,28 +8757,6 @@ def show_new_user_onboarding_dashboard():
                     use_container_width=True
                 )
 
-# Churn dashboard function
-def process_churn_data():
-    """Process churn data using the correct implementation from churn_analysis_app.py"""
-    try:
-        # Get churn data from the correct table
-        churn_df = get_churn_data()
-        if churn_df.empty:
-            st.warning("⚠️ No churn data available")
-            return pd.DataFrame()
-        
-        # Process the data using the correct metrics computation
-        processed_df = compute_churn_metrics(churn_df)
-        
-        # Add categorization
-        processed_df["category6"] = processed_df.apply(categorize_churn, axis=1)
-        
-        return processed_df
-        
-    except Exception as e:
-        st.error(f"Error processing churn data: {str(e)}")
-        return pd.DataFrame()
-
 def process_comprehensive_churn_data():
     """Process and combine all data sources for comprehensive churn analysis - integrated from churn intelligence"""
     try:
@@ -10562,12 +8769,16 @@ def process_comprehensive_churn_data():
         
         # Try to load data from BigQuery
         with st.spinner("🔄 Loading comprehensive churn data from BigQuery..."):
-            churn_df = get_churn_data()
-            m2d_df = get_m2d_cash_support_data()
-            mcc_df = get_mcc_cash_support_data()
+            cohorts = get_churn_cohorts()
+            if CASH_SUPPORT_STREAMING:
+                total_cash_support = get_agent_cash_support_streamed()
+                m2d_df = mcc_df = pd.DataFrame()
+            else:
+                m2d_df = get_m2d_cash_support_data()
+                mcc_df = get_mcc_cash_support_data()
         
-        if churn_df.empty:
-            st.warning("⚠️ No churn data found from BigQuery. Using fallback mode with sample data.")
+        if cohorts.empty:
+            st.warning("⚠️ No agent GTV history found in BigQuery. Using fallback mode with sample data.")
             return generate_comprehensive_churn_fallback_data()
         
         # STEP 1: Combine M2D and MCC as single cash support metric
@@ -10586,105 +8797,27 @@ def process_comprehensive_churn_data():
             mcc_df['client_id'] = mcc_df['agent_id']  # Rename for consistency
             cash_support_df = pd.concat([cash_support_df, mcc_df[['distr_state', 'distr_city', 'distributor_id', 'client_id', 'cash_support_amount', 'cash_support_type']]], ignore_index=True)
         
-        # Aggregate total cash support per agent
-        if not cash_support_df.empty:
-            total_cash_support = cash_support_df.groupby(['client_id', 'distributor_id']).agg({
-                'cash_support_amount': 'sum',
-                'distr_state': 'first',
-                'distr_city': 'first'
-            }).reset_index()
+        # Aggregate total cash support per agent (streaming mode already folded it page by page)
+        if not CASH_SUPPORT_STREAMING:
+            total_cash_support = combine_cash_support([cash_support_df], sort=True) if not cash_support_df.empty else pd.DataFrame()
+        
+        if not total_cash_support.empty:
             st.success(f"✅ Cash support data processed: {len(total_cash_support)} agent-distributor records")
         else:
-            total_cash_support = pd.DataFrame()
             st.warning("⚠️ No cash support data available")
         
-        # STEP 2: Process AEPS/CMS data for month-over-month churn analysis
-        
-        # Convert year_month to proper format
-        if 'year_month' in aeps_cms_df.columns:
-            aeps_cms_df['year_month'] = pd.to_numeric(aeps_cms_df['year_month'], errors='coerce')
-        
-        # Sort by agent and month for proper comparison
-        aeps_cms_df = aeps_cms_df.sort_values(['agent_id', 'year_month'])
-        
-        # Calculate previous month business for each agent
-        aeps_cms_df['prev_month_aeps'] = aeps_cms_df.groupby('agent_id')['aeps_gtv_success'].shift(1)
-        aeps_cms_df['prev_month_cms'] = aeps_cms_df.groupby('agent_id')['cms_gtv_success'].shift(1)
-        aeps_cms_df['prev_month'] = aeps_cms_df.groupby('agent_id')['year_month'].shift(1)
-        
-        # STEP 3: Define proper churn categories
-        def calculate_churn_type(row):
-            """Calculate churn type based on month-over-month comparison"""
-            current_aeps = row['aeps_gtv_success'] if pd.notna(row['aeps_gtv_success']) else 0
-            prev_aeps = row['prev_month_aeps'] if pd.notna(row['prev_month_aeps']) else 0
-            
-            # Skip if no previous month data
-            if pd.isna(row['prev_month']) or prev_aeps == 0:
-                return 'NO_PREVIOUS_DATA'
-            
-            # SP Agent Churn: Previous month ≥250K, current month = 0
-            if prev_aeps >= 250000 and current_aeps == 0:
-                return 'SP_AGENT_CHURN'
-            
-            # SP Agent Usage Churn: Previous month ≥250K, current month >80% decline
-            if prev_aeps >= 250000:
-                decline_pct = ((prev_aeps - current_aeps) / prev_aeps) * 100
-                if decline_pct > 80:
-                    return 'SP_USAGE_CHURN'  # New category for SP agents with usage churn
-            
-            # Absolute Churn: Had business, now completely zero (non-SP)
-            if prev_aeps > 0 and current_aeps == 0:
-                return 'ABSOLUTE_CHURN'
-            
-            # Usage Churn: More than 80% decline (non-SP)
-            if prev_aeps > 0:
-                decline_pct = ((prev_aeps - current_aeps) / prev_aeps) * 100
-                if decline_pct > 80:
-                    return 'USAGE_CHURN'
-            
-            return 'NO_CHURN'
-        
-        aeps_cms_df['churn_type'] = aeps_cms_df.apply(calculate_churn_type, axis=1)
+        # STEP 2-4: Month-over-month churn on the agent x month matrices - the previous
+        # month is a column shift and cash support an index lookup (see churn_cohorts)
+        # The cohorts object is shared across sessions, so cash support stays a local vector
+        cash_support = cohorts.cash_support_vector(total_cash_support if not total_cash_support.empty else None)
+        aeps_cms_df = cohorts.to_frame(cash_support=cash_support)
         
-        # STEP 4: Merge with cash support data
+        # STEP 5: Add month labels (one per month on the cohort axis, not per row)
+        month_labels = {year_month: pd.to_datetime(str(year_month), format='%Y%m').strftime('%b %Y') for year_month in cohorts.months}
+        aeps_cms_df['month_label'] = aeps_cms_df['year_month'].map(month_labels).fillna("Unknown")
         
-        if not total_cash_support.empty:
-            # Merge cash support at agent level
-            aeps_cms_df = aeps_cms_df.merge(
-                total_cash_support[['client_id', 'cash_support_amount']],
-                left_on='agent_id',
-                right_on='client_id',
-                how='left'
-            )
-            aeps_cms_df['cash_support_amount'] = aeps_cms_df['cash_support_amount'].fillna(0)
-            
-            # Calculate cash support correlation with churn
-            aeps_cms_df['has_cash_support'] = aeps_cms_df['cash_support_amount'] > 0
-            aeps_cms_df['cash_support_level'] = pd.cut(
-                aeps_cms_df['cash_support_amount'],
-                bins=[-1, 0, 50000, 200000, float('inf')],
-                labels=['NO_SUPPORT', 'LOW_SUPPORT', 'MEDIUM_SUPPORT', 'HIGH_SUPPORT']
-            )
-        else:
-            aeps_cms_df['cash_support_amount'] = 0
-            aeps_cms_df['has_cash_support'] = False
-            aeps_cms_df['cash_support_level'] = 'NO_SUPPORT'
-        
-        # STEP 5: Add month labels and calculate metrics
-        def convert_month_label(year_month):
-            """Convert YYYYMM format to readable month labels"""
-            if pd.isna(year_month):
-                return "Unknown"
-            month_labels = {
-                202501: 'Jan 2025', 202502: 'Feb 2025', 202503: 'Mar 2025',
-                202504: 'Apr 2025', 202505: 'May 2025', 202506: 'Jun 2025',
-                202507: 'Jul 2025', 202508: 'Aug 2025', 202509: 'Sep 2025'
-            }
-            return month_labels.get(year_month, str(year_month))
-        
-        aeps_cms_df['month_label'] = aeps_cms_df['year_month'].apply(convert_month_label)
-        
-        st.success(f"✅ Successfully processed **{len(aeps_cms_df):,}** agent records with comprehensive churn analysis!")
+        st.success(f"✅ Successfully processed **{len(aeps_cms_df):,}** agent records with comprehensive churn analysis! "
+                   f"({len(cohorts.agent_ids):,} agents × {len(cohorts.months)} months, {cohorts.nbytes / 1024 ** 2:.0f} MB)")
         return aeps_cms_df
         
     except Exception as e:
@@ -10855,24 +8988,21 @@ def generate_comprehensive_churn_fallback_data():
 def show_churn_dashboard():
     """AEPS Churn Analysis Dashboard - Exact replica of churn_analysis_app.py"""
     
-    # Load data using the correct implementation
+    # Filter bounds and headline metrics are aggregated in BigQuery over the
+    # full population; agent rows are only fetched for the Top Declines page
     with st.spinner("Loading data from BigQuery..."):
-        df = get_churn_data()
+        filter_options = get_churn_filter_options()
     
-    if df.empty:
+    if not filter_options or filter_options['total_agents'] == 0:
         st.error("❌ No churn data available")
         return
-        
-    df = compute_churn_metrics(df)
 
     # Get churn month label
     churn_month_label = ""
-    if "churn_date" in df.columns and df["churn_date"].notna().any():
-        latest_dt = df["churn_date"].max()
-        if pd.notna(latest_dt):
-            # Convert date to datetime for strftime
-            latest_dt_dt = pd.to_datetime(latest_dt)
-            churn_month_label = latest_dt_dt.strftime("%b %Y")
+    if pd.notna(filter_options['date_max']):
+        # Convert date to datetime for strftime
+        latest_dt_dt = pd.to_datetime(filter_options['date_max'])
+        churn_month_label = latest_dt_dt.strftime("%b %Y")
 
     title_text = "AEPS Churn Analysis Dashboard"
     if churn_month_label:
@@ -10896,14 +9026,13 @@ def show_churn_dashboard():
     
     # Filters (exactly like the standalone app)
     with st.expander("Filters", expanded=False):
-        priorities = sorted(df.get("priority", pd.Series(["Unknown"])).fillna("Unknown").unique().tolist())
+        priorities = filter_options['priorities']
         sel_priorities = st.multiselect("Priority", options=priorities, default=priorities)
-        date_min = df.get("churn_date").min()
-        date_max = df.get("churn_date").max()
+        date_min = filter_options['date_min']
+        date_max = filter_options['date_max']
         date_range = st.date_input("Churn date range", value=(date_min, date_max))
-        thr_series = pd.to_numeric(df.get("churn_threshold"), errors="coerce")
-        thr_min = float(thr_series.dropna().min()) if thr_series.dropna().size else 0.0
-        thr_max = float(thr_series.dropna().max()) if thr_series.dropna().size else 0.0
+        thr_min = filter_options['threshold_min']
+        thr_max = filter_options['threshold_max']
         churn_threshold_range = st.slider(
             "Churn threshold range",
             min_value=float(thr_min),
@@ -10912,48 +9041,38 @@ def show_churn_dashboard():
             step=0.01,
         )
 
-    # Apply filters (exactly like the standalone app)
-    df_filtered = df.copy()
-    if "priority" in df_filtered.columns:
-        df_filtered["priority"] = df_filtered["priority"].fillna("Unknown")
-        df_filtered = df_filtered[df_filtered["priority"].isin(sel_priorities)]
-    if "churn_date" in df_filtered.columns and isinstance(date_range, tuple) and len(date_range) == 2:
-        d1 = date_range[0]
-        d2 = date_range[1]
-        df_filtered = df_filtered[(df_filtered["churn_date"] >= d1) & (df_filtered["churn_date"] <= d2)]
-    if "churn_threshold" in df_filtered.columns:
-        df_filtered = df_filtered[
-            (pd.to_numeric(df_filtered["churn_threshold"], errors="coerce") >= churn_threshold_range[0]) &
-            (pd.to_numeric(df_filtered["churn_threshold"], errors="coerce") <= churn_threshold_range[1])
-        ]
+    # Apply filters server-side (same semantics as the standalone app)
+    churn_filters = {
+        "priorities": tuple(sel_priorities),
+        "date_range": tuple(date_range) if isinstance(date_range, tuple) and len(date_range) == 2 else None,
+        "threshold_range": tuple(churn_threshold_range),
+    }
+    summary_df = get_churn_summary(**churn_filters)
+    totals = get_churn_summary_rows(summary_df, "total").fillna(0)
+    by_priority_rows = get_churn_summary_rows(summary_df, "priority").fillna(0)
+    by_winback_rows = get_churn_summary_rows(summary_df, "winback_status").fillna(0)
+    by_category_rows = get_churn_summary_rows(summary_df, "category6").fillna(0)
 
     # KPIs (exactly like the standalone app)
     col1, col2, col3, col4 = st.columns(4)
-    total_agents = int(df_filtered.shape[0])
-    total_decline = float(pd.to_numeric(df_filtered["decline_amount"], errors="coerce").sum())
+    total_agents = int(totals["agents"].sum())
+    total_decline = float(totals["decline_amount_sum"].sum())
     total_decline_cr = total_decline / 1e7
-    winback_count = int(pd.to_numeric(df_filtered["winback_status"], errors="coerce").fillna(0).sum())
-    churn_agents = int(df_filtered["agent_id"].nunique()) if "agent_id" in df_filtered.columns else total_agents
+    winback_count = int(totals["winback_count"].sum())
+    churn_agents = int(totals["distinct_agents"].sum())
 
     col1.metric("Total Agents", f"{total_agents:,}")
     col2.metric("Churn Agents", f"{churn_agents:,}")
     col3.metric("Total Decline (Cr)", f"{total_decline_cr:,.2f}")
     col4.metric("Winback Agents (1)", f"{winback_count:,}")
 
-    # 6-category mapping without Others (fallback -> P2)
-    df_filtered["category6"] = df_filtered.apply(categorize_churn, axis=1)
-
     left, right = st.columns(2)
     with left:
         section_badge("By Priority", "#673ab7", "#9c27b0")
         by_priority = (
-            df_filtered.assign(priority=df_filtered.get("priority", pd.Series(["Unknown"] * len(df_filtered))).fillna("Unknown"))
-                       .groupby("priority", dropna=False)
-                       .agg(count=("agent_id", "count"),
-                            decline_amount_sum=("decline_amount", "sum"),
-                            decline_amount_avg=("decline_amount", "mean"))
-                       .reset_index()
-                       .sort_values(["decline_amount_sum"], ascending=False)
+            by_priority_rows.rename_axis("priority").reset_index()
+                            .rename(columns={"agents": "count"})
+                            .sort_values(["decline_amount_sum"], ascending=False)
         )
         by_priority["decline_amount_sum_cr"] = (by_priority["decline_amount_sum"] / 1e7).round(2)
         by_priority_view = by_priority.loc[:, ["priority", "count", "decline_amount_sum_cr"]].rename(columns={
@@ -10967,12 +9086,10 @@ def show_churn_dashboard():
     with right:
         section_badge("By Winback Status (0 = No Winback, 1 = Winback)", "#03a9f4", "#00bcd4")
         
-        by_winback = (
-            df_filtered.groupby("winback_status", dropna=False)
-                  .agg(count=("agent_id", "count"), decline_amount_sum=("decline_amount", "sum"))
-        )
+        by_winback = by_winback_rows.rename(columns={"agents": "count"})[["count", "decline_amount_sum"]]
+        by_winback.index = by_winback.index.astype(int)
         # Ensure both 0 and 1 appear even if missing
-        by_winback = by_winback.reindex([0, 1], fill_value=0).reset_index()
+        by_winback = by_winback.reindex([0, 1], fill_value=0).rename_axis("winback_status").reset_index()
         by_winback["decline_amount_sum_cr"] = (by_winback["decline_amount_sum"] / 1e7).round(2)
         by_winback_view = by_winback.loc[:, ["winback_status", "count", "decline_amount_sum_cr"]].rename(columns={
             "winback_status": "Winback Status",
@@ -10984,15 +9101,36 @@ def show_churn_dashboard():
         by_winback_view.insert(0, "Sr No", range(1, len(by_winback_view) + 1))
         st.dataframe(style_table(by_winback_view), use_container_width=True)
 
+    left, right = st.columns(2)
+    with left:
+        section_badge("By State", "#3f51b5", "#5c6bc0")
+        by_state = (
+            get_churn_summary_rows(summary_df, "state").fillna(0)
+                .rename_axis("State").reset_index()
+                .sort_values("agents", ascending=False)
+        )
+        by_state["Amount Declined (Cr)"] = (by_state["decline_amount_sum"] / 1e7).apply(lambda x: f"{x:,.2f}")
+        by_state_view = by_state.rename(columns={"agents": "No. of Agents"})[["State", "No. of Agents", "Amount Declined (Cr)"]]
+        st.dataframe(style_table(by_state_view.reset_index(drop=True)), use_container_width=True)
+    with right:
+        section_badge("By Decline Bucket", "#795548", "#a1887f")
+        decline_order = ["No previous GTV", "No decline", "0-50%", "50-80%", ">80%"]
+        by_decline = get_churn_summary_rows(summary_df, "decline_bucket").reindex(decline_order).fillna(0)
+        by_decline_view = by_decline.rename_axis("Decline").reset_index()
+        by_decline_view["Amount Declined (Cr)"] = (by_decline_view["decline_amount_sum"] / 1e7).apply(lambda x: f"{x:,.2f}")
+        by_decline_view = by_decline_view.rename(columns={"agents": "No. of Agents"})[["Decline", "No. of Agents", "Amount Declined (Cr)"]]
+        by_decline_view["No. of Agents"] = by_decline_view["No. of Agents"].astype(int)
+        st.dataframe(style_table(by_decline_view), use_container_width=True)
+
     section_badge("Churn Distribution by Category (P0, P1, P2, subsidy_churn, tech_churn, distributor_churn)", "#009688", "#4caf50")
+    # Ensure all desired categories appear in the chart even if count is zero
+    cat_order = CHURN_CATEGORIES
     pie_df = (
-        df_filtered.groupby("category6", dropna=False)
-                   .agg(count=("agent_id", "count"))
-                   .reset_index()
+        by_category_rows.rename(columns={"agents": "count"})[["count"]]
+                        .reindex(cat_order, fill_value=0)
+                        .rename_axis("category6")
+                        .reset_index()
     )
-    # Ensure all desired categories appear in the chart even if count is zero
-    cat_order = ["P0", "P1", "P2", "subsidy_churn", "tech_churn", "distributor_churn"]
-    pie_df = pie_df.set_index("category6").reindex(cat_order, fill_value=0).reset_index()
 
     fig = px.pie(pie_df, names="category6", values="count", hole=0.3)
     fig.update_traces(textposition='inside', textinfo='percent+label')
@@ -11008,12 +9146,14 @@ def show_churn_dashboard():
 
     section_badge("Top Declines", "#e91e63", "#ff4081")
     show_n = st.slider("Show top N", min_value=10, max_value=500, value=100, step=10)
+    # Agent rows are fetched on demand, one page for the current filters
+    top_source_df = get_churn_agent_detail(**churn_filters, limit=show_n)
     cols = [c for c in [
         "churn_id", "agent_id", "churn_date", "priority",
         "gtv_churn_month_prev", "gtv_churn_month",
         "per_growth", "winback_status", "next_churn_cycle_start",
-    ] if c in df_filtered.columns]
-    top_df = df_filtered.sort_values("decline_amount", ascending=False).loc[:, cols].head(show_n).reset_index(drop=True)
+    ] if c in top_source_df.columns]
+    top_df = top_source_df.loc[:, cols].reset_index(drop=True)
     
     # Format monetary and percentage columns to display with 2 decimal places
     if "per_growth" in top_df.columns:
@@ -11031,21 +9171,19 @@ def show_churn_dashboard():
     section_badge("🤖 AI-Powered Churn Recommendations", "#e91e63", "#ff4081")
     
     # Calculate key metrics for recommendations
-    total_agents = len(df_filtered)
-    total_decline_cr = df_filtered['decline_amount'].sum() / 1e7
-    winback_count = df_filtered['winback_status'].sum()
     winback_rate = (winback_count / total_agents * 100) if total_agents > 0 else 0
     
     # Priority-based recommendations
-    p0_count = len(df_filtered[df_filtered.get("priority", "") == "P0"])
-    p1_count = len(df_filtered[df_filtered.get("priority", "") == "P1"])
-    p2_count = len(df_filtered[df_filtered.get("priority", "") == "P2"])
+    priority_counts = by_priority_rows["agents"] if not by_priority_rows.empty else pd.Series(dtype=int)
+    p0_count = int(priority_counts.get("P0", 0))
+    p1_count = int(priority_counts.get("P1", 0))
+    p2_count = int(priority_counts.get("P2", 0))
     
     # Category-based analysis
-    category_counts = df_filtered["category6"].value_counts()
-    subsidy_churn = category_counts.get("subsidy_churn", 0)
-    tech_churn = category_counts.get("tech_churn", 0)
-    distributor_churn = category_counts.get("distributor_churn", 0)
+    category_counts = by_category_rows["agents"] if not by_category_rows.empty else pd.Series(dtype=int)
+    subsidy_churn = int(category_counts.get("subsidy_churn", 0))
+    tech_churn = int(category_counts.get("tech_churn", 0))
+    distributor_churn = int(category_counts.get("distributor_churn", 0))
     
     # Generate recommendations based on data
     recommendations = []
@@ -11508,511 +9646,70 @@ def show_distributor_churn_dashboard():
         # Drop amount by priority
         fig_amount = px.bar(
             priority_data,
-            x='priority_tag',
-            y='drop_amt',
-            title="Drop Amount by Priority Level",
-            color='drop_amt',
-            color_continuous_scale="Reds"
-        )
-        fig_amount.update_layout(height=400)
-        st.plotly_chart(fig_amount, use_container_width=True)
-    
-    with col2:
-        # Impact vs yesterday analysis
-        if 'impact_vs_yesterday' in priority_data.columns:
-            fig_impact = px.scatter(
-                priority_data,
-                x='drop_amt',
-                y='impact_vs_yesterday',
-                color='priority_tag',
-                size='smas_affected',
-                title="Drop Amount vs Impact vs Yesterday",
-                hover_data=['distributor_name']
-            )
-            fig_impact.update_layout(height=400)
-            st.plotly_chart(fig_impact, use_container_width=True)
-    
-    # Action items by priority
-    st.markdown("### 🎯 Action Items by Priority")
-    
-    for priority in ['P0', 'P1', 'P2', 'P3', 'P4', 'P5']:
-        if priority in priority_data['priority_tag'].values:
-            priority_distributors = priority_data[priority_data['priority_tag'] == priority]
-            
-            with st.expander(f"🔍 {priority} Priority ({len(priority_distributors)} distributors)", expanded=(priority in ['P0', 'P1'])):
-                if priority == 'P0':
-                    st.error("🚨 **CRITICAL**: Immediate intervention required")
-                    st.markdown("- Contact distributors within 24 hours")
-                    st.markdown("- Escalate to senior management")
-                    st.markdown("- Implement emergency retention measures")
-                elif priority == 'P1':
-                    st.warning("⚠️ **HIGH**: Urgent action needed")
-                    st.markdown("- Schedule calls within 48 hours")
-                    st.markdown("- Review and adjust support levels")
-                    st.markdown("- Monitor closely for further deterioration")
-                elif priority == 'P2':
-                    st.info("📋 **MEDIUM-HIGH**: Proactive engagement")
-                    st.markdown("- Regular check-ins scheduled")
-                    st.markdown("- Identify improvement opportunities")
-                    st.markdown("- Provide additional support resources")
-                else:
-                    st.success(f"📊 **{priority}**: Standard monitoring")
-                    st.markdown("- Regular health checks")
-                    st.markdown("- Standard support protocols")
-                
-                # Show specific distributors for this priority
-                if len(priority_distributors) > 0:
-                    st.dataframe(
-                        priority_distributors[['distributor_name', 'smas_affected', 'drop_pct', 'drop_amt']],
-                        use_container_width=True
-                    )
-    
-    # Back button
-    if st.button("← Back to Main Dashboard", key="back_to_main_distributor_churn"):
-        st.session_state.current_view = "main"
-        st.session_state.navigation_only = True
-        st.rerun()
-
-def show_stable_users_dashboard():
-    """Show comprehensive stable SP and Tail user analytics with long-term trends"""
-    st.markdown("# 👥 Stable Users Analytics - SP & Tail")
-    
-    if st.button("← Back to Main Dashboard", key="back_to_main_stable"):
-        st.session_state.current_view = "main"
-        st.session_state.navigation_only = True
-        st.rerun()
-        if 'churn_type' in filtered_df.columns:
-            absolute_churn = len(filtered_df[filtered_df['churn_type'] == 'ABSOLUTE_CHURN'])
-            st.metric("🔴 Absolute Churn", f"{absolute_churn:,}", delta="Complete Loss")
-        else:
-            total_churn = (filtered_df['absolute_churn_count'].sum() + filtered_df['usage_churn_count'].sum()) if 'absolute_churn_count' in filtered_df.columns else 0
-            st.metric("📉 Total Churn", f"{total_churn:,}")
-    
-    with col4:
-        if 'churn_type' in filtered_df.columns:
-            usage_churn = len(filtered_df[filtered_df['churn_type'] == 'USAGE_CHURN'])
-            st.metric("🟠 Usage Churn", f"{usage_churn:,}", delta=">80% Decline")
-        else:
-            high_risk_districts = len(filtered_df[filtered_df['district_risk_level'] == 'HIGH_RISK']) if 'district_risk_level' in filtered_df.columns else 0
-            st.metric("🔴 High Risk Districts", f"{high_risk_districts}")
-    
-    # SP Agent Detailed Analysis - NEW SECTION
-    st.markdown("---")
-    st.header("⭐ SP Agent Churn Deep Dive")
-    
-    if 'churn_type' in filtered_df.columns and 'agent_category' in filtered_df.columns:
-        # Detailed SP agent analysis
-        
-        # Filter for SP agents (both current and previous month SP agents)
-        sp_agents_current = filtered_df[filtered_df['agent_category'] == 'SP_AGENT']
-        sp_agents_prev = filtered_df[filtered_df['prev_month_aeps'] >= 250000]  # Previous month SP agents
-        
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            st.subheader("📊 Current SP Agents")
-            current_sp_count = len(sp_agents_current)
-            current_sp_churn = len(sp_agents_current[sp_agents_current['churn_type'].isin(['SP_AGENT_CHURN', 'SP_USAGE_CHURN'])])
-            current_sp_churn_rate = (current_sp_churn / current_sp_count * 100) if current_sp_count > 0 else 0
-            
-            st.metric("Current SP Agents", f"{current_sp_count:,}")
-            st.metric("Current SP Churn", f"{current_sp_churn:,}", delta=f"{current_sp_churn_rate:.1f}%")
-        
-        with col2:
-            st.subheader("📈 Previous Month SP Agents")
-            prev_sp_count = len(sp_agents_prev)
-            prev_sp_churn = len(sp_agents_prev[sp_agents_prev['churn_type'].isin(['SP_AGENT_CHURN', 'SP_USAGE_CHURN'])])
-            prev_sp_churn_rate = (prev_sp_churn / prev_sp_count * 100) if prev_sp_count > 0 else 0
-            
-            st.metric("Previous Month SP Agents", f"{prev_sp_count:,}")
-            st.metric("Previous SP Agent Churn", f"{prev_sp_churn:,}", delta=f"{prev_sp_churn_rate:.1f}%")
-        
-        with col3:
-            st.subheader("🎯 SP Agent Churn Breakdown")
-            if prev_sp_count > 0:
-                sp_absolute_churn = len(sp_agents_prev[sp_agents_prev['churn_type'] == 'SP_AGENT_CHURN'])
-                sp_usage_churn = len(sp_agents_prev[sp_agents_prev['churn_type'] == 'SP_USAGE_CHURN'])
-                sp_no_churn = len(sp_agents_prev[sp_agents_prev['churn_type'] == 'NO_CHURN'])
-                
-                st.metric("SP → Complete Loss", f"{sp_absolute_churn:,}", delta="₹2.5L+ → 0")
-                st.metric("SP → Usage Decline", f"{sp_usage_churn:,}", delta="₹2.5L+ → >80% Drop")
-                st.metric("SP → No Churn", f"{sp_no_churn:,}", delta="Retained")
-            else:
-                st.warning("No previous month SP agents found")
-        
-        # SP Agent Churn Analysis Table
-        st.subheader("📋 SP Agent Churn Detailed Breakdown")
-        
-        if not sp_agents_prev.empty:
-            sp_churn_analysis = sp_agents_prev.groupby(['churn_type', 'distr_state']).agg({
-                'agent_id': 'count',
-                'prev_month_aeps': 'mean',
-                'aeps_gtv_success': 'mean',
-                'cash_support_amount': 'mean'
-            }).round(0).reset_index()
-            
-            sp_churn_analysis.columns = ['Churn Type', 'State', 'Agent Count', 'Prev Month Avg AEPS', 'Current Month Avg AEPS', 'Avg Cash Support']
-            
-            # Show the breakdown
-            st.dataframe(sp_churn_analysis, use_container_width=True)
-            
-            # Visual breakdown
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                # SP Churn by type
-                sp_churn_dist = sp_agents_prev['churn_type'].value_counts()
-                fig_sp_churn = px.pie(
-                    values=sp_churn_dist.values,
-                    names=sp_churn_dist.index,
-                    title="SP Agent Churn Type Distribution",
-                    color_discrete_map={
-                        'SP_AGENT_CHURN': '#d62728',
-                        'ABSOLUTE_CHURN': '#ff7f0e',
-                        'USAGE_CHURN': '#ffbb78',
-                        'NO_CHURN': '#2ca02c',
-                        'NO_PREVIOUS_DATA': '#c7c7c7'
-                    }
-                )
-                st.plotly_chart(fig_sp_churn, use_container_width=True)
-            
-            with col2:
-                # SP Churn by state
-                sp_state_churn = sp_agents_prev[sp_agents_prev['churn_type'].isin(['SP_AGENT_CHURN', 'ABSOLUTE_CHURN', 'USAGE_CHURN'])].groupby('distr_state').size().reset_index()
-                sp_state_churn.columns = ['State', 'SP Churn Count']
-                
-                if not sp_state_churn.empty:
-                    fig_sp_state = px.bar(
-                        sp_state_churn,
-                        x='State',
-                        y='SP Churn Count',
-                        title="SP Agent Churn by State",
-                        color='SP Churn Count',
-                        color_continuous_scale='Reds'
-                    )
-                    fig_sp_state.update_layout(xaxis_tickangle=-45)
-                    st.plotly_chart(fig_sp_state, use_container_width=True)
-        
-        else:
-            st.warning("⚠️ No previous month SP agents found. This could mean:")
-    
-    else:
-        st.warning("SP Agent analysis requires BigQuery connection with proper churn detection")
-    
-    # Geographic Intelligence Section
-    st.markdown("---")
-    st.header("🗺️ Geographic Intelligence - Churn Epicenters")
-    
-    # Create tabs for different geographic views
-    tab1, tab2 = st.tabs(["🏛️ State Level", "🏙️ District Level"])
-    
-    with tab1:
-        st.subheader("State Level Churn Analysis")
-        
-        if 'churn_type' in filtered_df.columns:
-            # New analysis with proper churn data
-            state_summary = filtered_df.groupby('distr_state').agg({
-                'agent_id': 'count',  # Total agents
-                'churn_type': [
-                    lambda x: sum(x == 'SP_AGENT_CHURN'),  # SP agent churn
-                    lambda x: sum(x == 'ABSOLUTE_CHURN'),  # Absolute churn
-                    lambda x: sum(x == 'USAGE_CHURN'),     # Usage churn
-                    lambda x: sum(x.isin(['SP_AGENT_CHURN', 'ABSOLUTE_CHURN', 'USAGE_CHURN']))  # Total churn
-                ]
-            }).reset_index()
-            
-            # Flatten column names
-            state_summary.columns = ['distr_state', 'total_agents', 'sp_churn_count', 'absolute_churn_count', 'usage_churn_count', 'total_churn_count']
-            
-            # Calculate rates
-            state_summary['sp_churn_rate'] = (state_summary['sp_churn_count'] / state_summary['total_agents'] * 100).round(2)
-            state_summary['overall_churn_rate'] = (state_summary['total_churn_count'] / state_summary['total_agents'] * 100).round(2)
-            
-        else:
-            # Create empty summary for states
-            state_summary = pd.DataFrame({
-                'distr_state': [],
-                'total_agents': [],
-                'sp_churn_count': [],
-                'absolute_churn_count': [],
-                'usage_churn_count': [],
-                'total_churn_count': [],
-                'sp_churn_rate': [],
-                'overall_churn_rate': []
-            })
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            # State Churn Rate Comparison
-            fig_state_churn = px.bar(
-                state_summary,
-                x='distr_state',
-                y=['overall_churn_rate', 'sp_churn_rate'],
-                title="Churn Rates by State",
-                barmode='group',
-                labels={'value': 'Churn Rate %', 'variable': 'Churn Type'}
-            )
-            fig_state_churn.update_layout(xaxis_tickangle=-45)
-            st.plotly_chart(fig_state_churn, use_container_width=True)
-        
-        with col2:
-            # State SP Churn Count
-            fig_sp_churn = px.bar(
-                state_summary,
-                x='distr_state',
-                y='sp_churn_count',
-                title="SP Agent Churn Count by State",
-                color='sp_churn_count',
-                color_continuous_scale='Reds'
-            )
-            fig_sp_churn.update_layout(xaxis_tickangle=-45)
-            st.plotly_chart(fig_sp_churn, use_container_width=True)
-        
-        # State Summary Table
-        st.subheader("State Level Summary")
-        st.dataframe(
-            state_summary.round(2).style.background_gradient(subset=['sp_churn_rate'], cmap='Reds'),
-            use_container_width=True
+            x='priority_tag',
+            y='drop_amt',
+            title="Drop Amount by Priority Level",
+            color='drop_amt',
+            color_continuous_scale="Reds"
         )
+        fig_amount.update_layout(height=400)
+        st.plotly_chart(fig_amount, use_container_width=True)
     
-    with tab2:
-        st.subheader("District Level Churn Analysis")
-        
-        if 'churn_type' in filtered_df.columns:
-            # New analysis with proper churn data
-            district_summary = filtered_df.groupby(['distr_city', 'distr_state']).agg({
-                'agent_id': 'count',  # Total agents
-                'churn_type': [
-                    lambda x: sum(x == 'SP_AGENT_CHURN'),  # SP agent churn
-                    lambda x: sum(x == 'ABSOLUTE_CHURN'),  # Absolute churn
-                    lambda x: sum(x == 'USAGE_CHURN'),     # Usage churn
-                    lambda x: sum(x.isin(['SP_AGENT_CHURN', 'ABSOLUTE_CHURN', 'USAGE_CHURN']))  # Total churn
-                ]
-            }).reset_index()
-            
-            # Flatten column names
-            district_summary.columns = ['distr_city', 'distr_state', 'total_agents', 'sp_churn_count', 'absolute_churn_count', 'usage_churn_count', 'total_churn_count']
-            
-            # Calculate rates
-            district_summary['sp_churn_rate'] = np.where(
-                district_summary['total_agents'] > 0,
-                (district_summary['sp_churn_count'] / district_summary['total_agents'] * 100).round(2),
-                0
-            )
-            district_summary['overall_churn_rate'] = np.where(
-                district_summary['total_agents'] > 0,
-                (district_summary['total_churn_count'] / district_summary['total_agents'] * 100).round(2),
-                0
+    with col2:
+        # Impact vs yesterday analysis
+        if 'impact_vs_yesterday' in priority_data.columns:
+            fig_impact = px.scatter(
+                priority_data,
+                x='drop_amt',
+                y='impact_vs_yesterday',
+                color='priority_tag',
+                size='smas_affected',
+                title="Drop Amount vs Impact vs Yesterday",
+                hover_data=['distributor_name']
             )
-            
-            # District Performance Ranking
-            district_ranking = district_summary.sort_values('sp_churn_rate', ascending=False)
-            
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                st.subheader("🏆 Top 10 Districts by SP Churn Rate")
-                top_districts = district_ranking.head(10)[['distr_city', 'distr_state', 'sp_churn_rate', 'sp_churn_count', 'total_agents']]
-                st.dataframe(top_districts.round(2), use_container_width=True)
-            
-            with col2:
-                st.subheader("📊 Churn Type Distribution")
-                churn_type_dist = filtered_df['churn_type'].value_counts()
-                fig_risk = px.pie(
-                    values=churn_type_dist.values,
-                    names=churn_type_dist.index,
-                    title="Churn Type Distribution",
-                    color_discrete_map={
-                        'SP_AGENT_CHURN': '#d62728',
-                        'ABSOLUTE_CHURN': '#ff7f0e', 
-                        'USAGE_CHURN': '#ffbb78',
-                        'NO_CHURN': '#2ca02c',
-                        'NO_PREVIOUS_DATA': '#c7c7c7'
-                    }
-                )
-                st.plotly_chart(fig_risk, use_container_width=True)
-            
-            # District Heatmap
-            if len(district_summary) > 1:
-                district_heatmap = district_summary.pivot_table(
-                    values='sp_churn_rate',
-                    index='distr_state',
-                    columns='distr_city',
-                    aggfunc='mean'
-                ).fillna(0)
-                
-                if not district_heatmap.empty:
-                    fig_heatmap = px.imshow(
-                        district_heatmap,
-                        title="District Level SP Churn Rate Heatmap",
-                        color_continuous_scale='Reds',
-                        aspect='auto'
-                    )
-                    st.plotly_chart(fig_heatmap, use_container_width=True)
-            
-        else:
-            # Fallback analysis
-            st.info("District analysis will be available with proper BigQuery connection")
+            fig_impact.update_layout(height=400)
+            st.plotly_chart(fig_impact, use_container_width=True)
     
-    # Distributor Lead Churn Analysis
-    st.markdown("---")
-    st.header("🏢 Distributor Lead Churn Detection")
-    
-    if 'churn_type' in filtered_df.columns and 'distributor_id' in filtered_df.columns:
-        # Enhanced analysis with both absolute and usage SP churn
-        st.info("🔄 Analyzing distributor-level churn patterns with SP absolute vs usage breakdown...")
-        
-        # Group by city and distributor to detect distributor-lead churn patterns
-        city_distributor_analysis = filtered_df.groupby(['distr_city', 'distr_state', 'distributor_id']).agg({
-            'agent_id': 'count',  # Total agents
-            'churn_type': [
-                lambda x: sum(x == 'SP_AGENT_CHURN'),   # SP absolute churn (₹2.5L+ → 0)
-                lambda x: sum(x == 'SP_USAGE_CHURN'),   # SP usage churn (₹2.5L+ → >80% decline)
-                lambda x: sum(x == 'ABSOLUTE_CHURN'),   # Non-SP absolute churn
-                lambda x: sum(x == 'USAGE_CHURN'),      # Non-SP usage churn
-                lambda x: sum(x.isin(['SP_AGENT_CHURN', 'SP_USAGE_CHURN']))  # Total SP churn
-            ]
-        }).reset_index()
-        
-        # Flatten column names
-        city_distributor_analysis.columns = ['distr_city', 'distr_state', 'distributor_id', 'total_agents', 'sp_absolute_churn', 'sp_usage_churn', 'other_absolute_churn', 'other_usage_churn', 'total_sp_churn']
-        
-        # Calculate churn rates
-        city_distributor_analysis['sp_churn_rate'] = np.where(
-            city_distributor_analysis['total_agents'] > 0,
-            (city_distributor_analysis['total_sp_churn'] / city_distributor_analysis['total_agents'] * 100).round(2),
-            0
-        )
-        
-        # Now analyze city-level patterns to detect distributor-lead churn
-        city_analysis = []
-        
-        for city in city_distributor_analysis['distr_city'].unique():
-            city_data = city_distributor_analysis[city_distributor_analysis['distr_city'] == city]
-            
-            if len(city_data) >= 2:  # Need at least 2 distributors to compare
-                total_sp_churn = city_data['total_sp_churn'].sum()
-                total_sp_absolute = city_data['sp_absolute_churn'].sum()
-                total_sp_usage = city_data['sp_usage_churn'].sum()
-                
-                if total_sp_churn > 0:
-                    # Check if 70% or more SP churn comes from top 2-3 distributors
-                    top_distributors = city_data.nlargest(3, 'total_sp_churn')
-                    top_2_churn = top_distributors.head(2)['total_sp_churn'].sum()
-                    top_3_churn = top_distributors['total_sp_churn'].sum()
-                    
-                    distributor_lead_pct = max(top_2_churn, top_3_churn) / total_sp_churn * 100
-                    
-                    pattern = 'DISTRIBUTOR_LEAD_CHURN' if distributor_lead_pct >= 70 else 'DISTRIBUTED_CHURN'
-                    
-                    city_analysis.append({
-                        'distr_city': city,
-                        'distr_state': city_data['distr_state'].iloc[0],
-                        'total_distributors': len(city_data),
-                        'total_sp_churn': total_sp_churn,
-                        'sp_absolute_churn': total_sp_absolute,
-                        'sp_usage_churn': total_sp_usage,
-                        'distributor_concentration_pct': distributor_lead_pct,
-                        'churn_pattern': pattern
-                    })
-        
-        if city_analysis:
-            city_churn_df = pd.DataFrame(city_analysis)
-            
-            col1, col2 = st.columns(2)
+    # Action items by priority
+    st.markdown("### 🎯 Action Items by Priority")
+    
+    for priority in ['P0', 'P1', 'P2', 'P3', 'P4', 'P5']:
+        if priority in priority_data['priority_tag'].values:
+            priority_distributors = priority_data[priority_data['priority_tag'] == priority]
             
-            with col1:
-                st.subheader("🚨 Cities with Distributor-Lead Churn (≥70%)")
-                
-                distributor_lead_cities = city_churn_df[city_churn_df['churn_pattern'] == 'DISTRIBUTOR_LEAD_CHURN']
+            with st.expander(f"🔍 {priority} Priority ({len(priority_distributors)} distributors)", expanded=(priority in ['P0', 'P1'])):
+                if priority == 'P0':
+                    st.error("🚨 **CRITICAL**: Immediate intervention required")
+                    st.markdown("- Contact distributors within 24 hours")
+                    st.markdown("- Escalate to senior management")
+                    st.markdown("- Implement emergency retention measures")
+                elif priority == 'P1':
+                    st.warning("⚠️ **HIGH**: Urgent action needed")
+                    st.markdown("- Schedule calls within 48 hours")
+                    st.markdown("- Review and adjust support levels")
+                    st.markdown("- Monitor closely for further deterioration")
+                elif priority == 'P2':
+                    st.info("📋 **MEDIUM-HIGH**: Proactive engagement")
+                    st.markdown("- Regular check-ins scheduled")
+                    st.markdown("- Identify improvement opportunities")
+                    st.markdown("- Provide additional support resources")
+                else:
+                    st.success(f"📊 **{priority}**: Standard monitoring")
+                    st.markdown("- Regular health checks")
+                    st.markdown("- Standard support protocols")
                 
-                if not distributor_lead_cities.empty:
-                    # Enhanced display with absolute vs usage breakdown
-                    display_cols = ['distr_city', 'distr_state', 'total_sp_churn', 'sp_absolute_churn', 'sp_usage_churn', 'distributor_concentration_pct']
+                # Show specific distributors for this priority
+                if len(priority_distributors) > 0:
                     st.dataframe(
-                        distributor_lead_cities[display_cols].round(2),
+                        priority_distributors[['distributor_name', 'smas_affected', 'drop_pct', 'drop_amt']],
                         use_container_width=True
                     )
-                    
-                    st.warning(f"⚠️ **Alert**: {len(distributor_lead_cities)} cities show distributor-lead churn patterns!")
-                else:
-                    st.success("✅ No cities show distributor-lead churn patterns")
-            
-            with col2:
-                st.subheader("📊 Churn Pattern Distribution")
-                
-                if not city_churn_df.empty:
-                    pattern_dist = city_churn_df['churn_pattern'].value_counts()
-                    
-                    fig_pattern = px.pie(
-                        values=pattern_dist.values,
-                        names=pattern_dist.index,
-                        title="City-Level Churn Pattern Analysis",
-                        color_discrete_map={
-                            'DISTRIBUTOR_LEAD_CHURN': '#d62728',
-                            'DISTRIBUTED_CHURN': '#2ca02c'
-                        }
-                    )
-                    st.plotly_chart(fig_pattern, use_container_width=True)
     
-    # Intervention Priority Matrix
-    st.markdown("---")
-    st.header("🚨 Intervention Priority Matrix")
-    
-    if 'churn_type' in filtered_df.columns:
-        # Create intervention priority based on churn analysis
-        city_priority_analysis = filtered_df.groupby(['distr_city', 'distr_state']).agg({
-            'agent_id': 'count',  # Total agents
-            'churn_type': [
-                lambda x: sum(x == 'SP_AGENT_CHURN'),  # SP absolute churn
-                lambda x: sum(x == 'SP_USAGE_CHURN'),  # SP usage churn
-                lambda x: sum(x.isin(['SP_AGENT_CHURN', 'SP_USAGE_CHURN']))  # Total SP churn
-            ]
-        }).reset_index()
-        
-        # Flatten column names
-        city_priority_analysis.columns = ['distr_city', 'distr_state', 'total_agents', 'sp_absolute_churn', 'sp_usage_churn', 'total_sp_churn']
-        
-        # Calculate SP churn rate and assign priority
-        city_priority_analysis['sp_churn_rate'] = np.where(
-            city_priority_analysis['total_agents'] > 0,
-            (city_priority_analysis['total_sp_churn'] / city_priority_analysis['total_agents'] * 100).round(2),
-            0
-        )
-        
-        # Assign intervention priority
-        city_priority_analysis['intervention_priority'] = np.where(
-            city_priority_analysis['sp_churn_rate'] >= 50, 'IMMEDIATE_INTERVENTION',
-            np.where(city_priority_analysis['sp_churn_rate'] >= 25, 'HIGH_PRIORITY',
-                    np.where(city_priority_analysis['sp_churn_rate'] >= 10, 'MEDIUM_PRIORITY', 'MONITOR'))
-        )
-        
-        # Create priority matrix
-        priority_matrix = city_priority_analysis.groupby('intervention_priority').agg({
-            'distr_city': 'count',
-            'total_sp_churn': 'sum',
-            'sp_churn_rate': 'mean'
-        }).reset_index()
-        priority_matrix.columns = ['intervention_priority', 'city_count', 'total_sp_churn', 'avg_sp_churn_rate']
-        
-        # Priority Distribution
-        fig_priority = px.bar(
-            priority_matrix,
-            x='intervention_priority',
-            y='city_count',
-            title="Cities by Intervention Priority",
-            color='avg_sp_churn_rate',
-            color_continuous_scale='Reds'
-        )
-        st.plotly_chart(fig_priority, use_container_width=True)
-        
-        # Priority Summary Table
-        st.subheader("Intervention Priority Summary")
-        st.dataframe(
-            priority_matrix.round(2).style.background_gradient(subset=['avg_sp_churn_rate'], cmap='Reds'),
-            use_container_width=True
-        )
+    # Back button
+    if st.button("← Back to Main Dashboard", key="back_to_main_distributor_churn"):
+        st.session_state.current_view = "main"
+        st.session_state.navigation_only = True
+        st.rerun()
 
 def show_stable_users_dashboard():
     """Show comprehensive stable SP and Tail user analytics with long-term trends"""
@@ -13066,6 +10763,93 @@ def show_sample_bot_analytics():
     
     st.dataframe(pd.DataFrame(metrics_data), use_container_width=True)
 
+def fetch_intraday_buckets(client, stream, day, since_minute):
+    """5-minute buckets of one CDC stream for today from since_minute on"""
+    dataset = os.getenv('BIGQUERY_DATASET_DS', 'ds_striim')
+    if stream == 'transaction_success':
+        query = transaction_buckets_sql(
+            get_table_ref(dataset, os.getenv('AEPSR_TRANSACTION_REQ_TABLE', 'T_AEPSR_TRANSACTION_REQ')),
+            get_table_ref(dataset, os.getenv('AEPSR_TRANSACTION_RES_TABLE', 'T_AEPSR_TRANSACTION_RES'))
+        )
+    else:
+        query = bio_auth_buckets_sql(
+            get_table_ref(dataset, os.getenv('AEPSR_BIO_AUTH_LOGGING_TABLE', 'T_AEPSR_BIO_AUTH_LOGGING_P'))
+        )
+    
+    job_config = bigquery.QueryJobConfig(query_parameters=[
+        bigquery.ScalarQueryParameter("day", "DATE", day),
+        bigquery.ScalarQueryParameter("since_minute", "INT64", int(since_minute))
+    ])
+    if INTRADAY_MAX_BYTES_BILLED > 0:
+        job_config.maximum_bytes_billed = INTRADAY_MAX_BYTES_BILLED
+    query_name = f'intraday_{stream}'
+    job = run_tile_query(client, query_name, query, job_config)
+    # An overrun pull would replay an earlier pull's rows as if they covered since_minute on;
+    # None keeps the current buckets and the next poll retries from the same watermark
+    if is_query_stale(query_name):
+        return None
+    return job.result().to_dataframe()
+
+# Core AEPS tiles fed by intra-hour buckets: metric -> (stream, rate column, hourly median column, hourly upper bound column)
+INTRADAY_TILES = {
+    'Transaction Success Rate': ('transaction_success', 'overall_success_rate', 'median_success_rate', 'success_rate_upper_bound'),
+    '2FA Success Rate': ('bio_authentication', 'fa2_rate_yesterday', 'median_fa2_succ_rate', None),
+}
+
+def current_hour_baseline(hourly_data, hour, median_col, upper_col):
+    """(median, one-std band) of an hour from a tile's columnar hourly payload - None where missing"""
+    if not hourly_row_count(hourly_data) or median_col not in hourly_data or 'hour_num' not in hourly_data:
+        return None, None
+    rows = np.flatnonzero(hourly_data['hour_num'] == hour)
+    if len(rows) == 0 or pd.isna(hourly_data[median_col][rows[-1]]):
+        return None, None
+    
+    median = float(hourly_data[median_col][rows[-1]])
+    band = None
+    if upper_col and upper_col in hourly_data and not pd.isna(hourly_data[upper_col][rows[-1]]):
+        band = float(hourly_data[upper_col][rows[-1]]) - median
+    return median, band
+
+def apply_intraday_metrics(health_metrics, client):
+    """Overlay the current hour's completed 5-minute buckets on the Transaction and 2FA tiles"""
+    now = datetime.now()
+    for metric_name, (stream, rate_col, median_col, upper_col) in INTRADAY_TILES.items():
+        metric = health_metrics.get(metric_name)
+        if not metric:
+            continue
+        
+        try:
+            buckets = pull_intraday(
+                stream, lambda day, since_minute: fetch_intraday_buckets(client, stream, day, since_minute), now
+            )
+        except Exception as e:
+            print(f"⚠️ Intra-hour pull failed for {stream}: {e}")
+            continue
+        
+        summary = hour_summary(buckets, stream, now.hour, now)
+        if summary is None or summary[rate_col] is None:
+            continue
+        
+        # Same hour's 7-day median and band as the hourly tile, so the status rule is unchanged
+        # hourly_data only has completed hours; hour_baselines keeps the in-progress hour's baseline
+        median, band = current_hour_baseline(metric.get('hour_baselines') or metric.get('hourly_data'),
+                                             now.hour, median_col, upper_col)
+        if median is None:
+            median = metric.get('median', summary[rate_col])
+        std_dev = band if band is not None else metric.get('std_dev', 0)
+        current = summary[rate_col]
+        
+        health_metrics[metric_name] = {
+            **metric,
+            'value': round(current, 1),
+            'median': round(median, 1),
+            'status': median_band_status(current, median, std_dev),
+            'trend': trend_direction(current, median),
+            'change': round(current - median, 1),
+            'intraday': summary
+        }
+    return health_metrics
+
 @st.cache_data(ttl=3600, show_spinner=False)  # Shared cache across ALL users! 1 hour TTL
 def get_shared_health_metrics(selected_date_str, current_hour, data_mode="Real Data"):
     """
@@ -13105,77 +10889,91 @@ def get_shared_health_metrics(selected_date_str, current_hour, data_mode="Real D
         transaction_df, bio_auth_df = generate_enhanced_dummy_data()
         data_mode = "Enhanced Dummy"
     
-    # Calculate enhanced health metrics
-    try:
-        health_metrics = calculate_comprehensive_health_metrics_simple(transaction_df, bio_auth_df, client)
-    except Exception as e:
-        health_metrics = calculate_enhanced_health_metrics(transaction_df, bio_auth_df)
-    
-    # Force fresh RFM Score
-    try:
-        rfm_data = get_rfm_fraud_data()
-        if rfm_data is not None and not rfm_data.empty and 'total_caught_per' in rfm_data.columns:
-            latest_rfm = rfm_data.iloc[-1]
-            current_catch_rate = latest_rfm['total_caught_per']
-            
-            if len(rfm_data) > 1:
-                prev_catch_rate = rfm_data.iloc[-2]['total_caught_per']
-                trend_change = current_catch_rate - prev_catch_rate
-            else:
-                trend_change = 0
-            
-            if current_catch_rate >= 75:
-                rfm_status = 'green'
-                trend = 'up' if trend_change >= 0 else 'down'
-            elif current_catch_rate >= 60:
-                rfm_status = 'yellow'
-                trend = 'up' if trend_change >= 0 else 'down'
-            else:
-                rfm_status = 'red'
-                trend = 'down'
-            
-            health_metrics['RFM Score'] = {
-                'value': round(current_catch_rate, 1),
-                'status': rfm_status,
-                'trend': trend,
-                'change': round(trend_change, 1),
-                'unit': '%'
-            }
-    except Exception:
-        if 'RFM Score' not in health_metrics:
-            health_metrics['RFM Score'] = {'value': 92.6, 'status': 'green', 'trend': 'up', 'change': 1.2, 'unit': '%'}
-    
-    # Force fresh Churn Rate
-    try:
-        churn_data = get_distributor_churn_data()
-        if churn_data is not None and not churn_data.empty:
-            high_churn_count = len(churn_data[churn_data['SUM_ALL'] >= 3])
-            total_distributors = len(churn_data)
-            churn_rate = round((high_churn_count / total_distributors) * 100, 1) if total_distributors > 0 else 0
-            
-            if churn_rate < 5:
-                churn_status = 'green'
-            elif churn_rate < 10:
-                churn_status = 'yellow'
-            else:
-                churn_status = 'red'
-            
-            health_metrics['Churn Rate'] = {
-                'value': churn_rate,
-                'status': churn_status,
-                'trend': 'stable',
-                'change': 0,
-                'unit': '%'
-            }
-        else:
-            if 'Churn Rate' not in health_metrics:
-                health_metrics['Churn Rate'] = {'value': 3.2, 'status': 'yellow', 'trend': 'up', 'change': 0.8, 'unit': '%'}
-    except Exception:
-        if 'Churn Rate' not in health_metrics:
-            health_metrics['Churn Rate'] = {'value': 3.2, 'status': 'yellow', 'trend': 'up', 'change': 0.8, 'unit': '%'}
+    # Every home-page tile (RFM Score and Churn Rate included) from the tile registry
+    health_metrics = calculate_health_metrics(transaction_df, bio_auth_df, client)
     
     return health_metrics, data_mode
 
+# Seconds between home-page tile checks (the tiles grid fragment's timer)
+HOME_REFRESH_SECONDS = float(os.getenv('HOME_REFRESH_SECONDS', '60'))
+
+def home_snapshot_version(selected_date_str, data_mode):
+    """Cheap token for what the home-page tiles would show now - no queries"""
+    now = datetime.now()
+    intraday = None
+    if INTRADAY_MONITORING and data_mode == "Real Data":
+        # Poll slot makes a pull due; the state version picks up pulls made by other sessions
+        intraday = (int(now.timestamp() // INTRADAY_POLL_SECONDS), intraday_version())
+    return (selected_date_str, data_mode, now.hour, intraday)
+
+def load_home_metrics(selected_date_str, data_mode):
+    """Home-page metrics and effective data mode - recomputed only when the snapshot version changed"""
+    version = home_snapshot_version(selected_date_str, data_mode)
+    snapshot = st.session_state.get('home_snapshot')
+    if snapshot and snapshot['version'] == version:
+        return snapshot['health_metrics'], snapshot['data_mode']
+    
+    # Call the SHARED cached function - First user fetches, others get instant cache!
+    health_metrics, effective_mode = get_shared_health_metrics(selected_date_str, version[2], data_mode)
+    
+    # Opt-in intra-hour mode: current hour's 5-minute CDC aggregates, polled past the hourly cache
+    if INTRADAY_MONITORING and effective_mode == "Real Data":
+        intraday_client = get_bigquery_client()
+        if intraday_client is not None:
+            health_metrics = apply_intraday_metrics(health_metrics, intraday_client)
+    
+    st.session_state['home_snapshot'] = {
+        'version': version,
+        'health_metrics': health_metrics,
+        'data_mode': effective_mode
+    }
+    return health_metrics, effective_mode
+
+# Home-page sections: (header, [(tile label, metric name), ...]) in display order
+HOME_TILE_SECTIONS = [
+    ("📊 Core AEPS", [("2FA", "2FA Success Rate"), ("Txn Success", "Transaction Success Rate"), ("GTV", "GTV Performance"),
+                     ("Bank Errors", "Bank Error Analysis"), ("Platform Uptime", "Platform Uptime")]),
+    ("🛠️ Supporting Rails", [("Cash Product", "Cash Product"), ("Login Success", "Login Success Rate"), ("M2B Pendency", "M2B Pendency"),
+                             ("CC Calls", "CC Calls Metric"), ("Bot", "Bot Analytics"), ("RFM", "RFM Score")]),
+    ("🤝 Partner", [("New Users", "New AEPS Users"), ("Churn", "Churn Rate"), ("Stable Users", "Stable Users"),
+                   ("Winback", "Winback Conversion"), ("Sales Iteration", "Sales Iteration"), ("Dist Lead Churn", "Distributor Lead Churn")]),
+    ("⚙️ Operations", [("Anomalies", "System Anomalies"), ("Bugs", "Active Bugs"), ("RCAs", "Active RCAs"),
+                      ("Product Trends", "Product Metrics & Trends")]),
+]
+
+# View opened by each home-page tile - direct navigation, no intermediate pages
+TILE_VIEWS = {
+    'Transaction Success Rate': "detail_Transaction Success Rate",
+    '2FA Success Rate': "detail_2FA Success Rate",
+    'GTV Performance': "detail_GTV Performance",
+    'CC Calls Metric': "dashboard_CC_Calls_Metric",
+    'New AEPS Users': "dashboard_New_User_Onboarding_AEPS_Activation",
+    'Churn Rate': "dashboard_Churn",
+    'Stable Users': "dashboard_Stable_Users",
+    'Bot Analytics': "bot_analytics_dashboard",
+    'Distributor Lead Churn': "dashboard_Distributor_Churn",
+    'M2B Pendency': "detail_M2B Pendency",
+    'RFM Score': "detail_RFM Score",
+    'Platform Uptime': "detail_Platform Uptime",
+    'Cash Product': "dashboard_Cash_Product",
+    'Login Success Rate': "dashboard_Login_Success_Rate",
+    'System Anomalies': "detail_System Anomalies",
+    'Active Bugs': "bugs_dashboard",
+    'Product Metrics & Trends': "product_metrics_dashboard",
+    'Bank Error Analysis': "dashboard_Bank_Error_Analysis",
+    'Winback Conversion': "winback_dashboard",
+    'Sales Iteration': "geographic_churn_dashboard",
+}
+
+def open_tile_view(metric_name):
+    """Navigate to the view behind a clicked home-page tile"""
+    view = TILE_VIEWS.get(metric_name)
+    if view is None:
+        st.info(f"📊 {metric_name} detailed analytics will be available in the next update.")
+        return
+    st.session_state.current_view = view
+    st.rerun()
+
 def main():
     # Initialize cache data for persistent refresh tracking across browser refreshes
     init_cache_data()
@@ -13268,7 +11066,7 @@ def main():
                 keys_to_clear.append(key)
         
         # Explicitly clear the most important cache keys
-        critical_keys = ['cached_health_metrics', 'cached_data_mode']
+        critical_keys = ['cached_health_metrics', 'cached_data_mode', 'home_snapshot']
         for key in critical_keys:
             if key in st.session_state:
                 keys_to_clear.append(key)
@@ -13307,21 +11105,8 @@ def main():
     # Automatic refresh info
     # st.sidebar.info("🔄 Auto-refresh active: Daily tiles at 8:59AM, Core AEPS at 9:59AM-5:59PM")
     
-    # Add auto-refresh mechanism - page reloads every 60 seconds to check for new hour
-    # st.sidebar.markdown("---")
-    # st.sidebar.markdown("### ⏰ Auto-Refresh Status")
-    # st.sidebar.success(f"✅ Page auto-refreshes every 60 seconds to check for new hours")
-    
-    # Add JavaScript to auto-reload page every 60 seconds
-    auto_refresh_html = """
-    <script>
-        // Auto-refresh page every 60 seconds
-        setTimeout(function(){
-            window.location.reload();
-        }, 60000); // 60000 milliseconds = 60 seconds
-    </script>
-    """
-    st.components.v1.html(auto_refresh_html, height=0)
+    # Auto-refresh: the home tiles grid is a fragment that re-checks its snapshot version
+    # every HOME_REFRESH_SECONDS - no page reload, detail views are never re-run by the timer
     
     st.sidebar.markdown("---")
     
@@ -13351,7 +11136,31 @@ def main():
         pass
     
     st.sidebar.markdown("---")
-    
+
+    # Partition-pruning analyzer (QUERY_ANALYZER_MODE=true)
+    if QUERY_ANALYZER_MODE:
+        with st.sidebar.expander("🔍 Query Scan Analyzer", expanded=False):
+            st.caption(f"{len(QUERY_CATALOG)} registered queries")
+            if st.button("Dry-run registered queries", key="run_query_scan_analysis"):
+                client = get_bigquery_client()
+                if client is None:
+                    st.warning("⚠️ BigQuery client not available")
+                else:
+                    records = run_query_scan_analysis(client)
+                    st.dataframe(pd.DataFrame([{
+                        'Query': r['tile'],
+                        'Est. GB': round((r['estimated_bytes'] or 0) / 1024 ** 3, 2),
+                        'Tables': ', '.join(t['table'] for t in r['tables']),
+                        'Pruned': all(t['filter'] in ('direct', 'unpartitioned') for t in r['tables'])
+                    } for r in records]), use_container_width=True)
+
+    # Tile query deadlines - recent timeouts (tiles show last-known-good data)
+    if TILE_QUERY_TIMEOUTS:
+        with st.sidebar.expander(f"⏱️ Query Timeouts ({len(TILE_QUERY_TIMEOUTS)})", expanded=False):
+            for timeout in reversed(TILE_QUERY_TIMEOUTS[-10:]):
+                fallback = "last-known-good shown" if timeout['has_fallback'] else "no fallback data"
+                st.caption(f"{timeout['timed_out_at'].strftime('%H:%M:%S')} · {timeout['query_name']} > {timeout['deadline']:.0f}s · {fallback}")
+
     # Show cache statistics
     # if st.session_state.get('refresh_count', 0) > 0:
     #     st.sidebar.success(f"💰 Queries saved: {st.session_state.refresh_count} refreshes tracked")
@@ -13418,20 +11227,21 @@ def main():
         st.sidebar.markdown(f"... and {len(daily_tiles) - 5} more tiles")
     
     # Data source selection
-    data_mode = st.sidebar.selectbox("Data Source", ["Real Data", "Enhanced Dummy"], key="data_mode")
+    requested_data_mode = st.sidebar.selectbox("Data Source", ["Real Data", "Enhanced Dummy"], key="data_mode")
     
     # Initialize BigQuery client
     # Automatic refresh only - no manual intervention
     # Data refreshes automatically based on tiered strategy
     
     # Use SHARED cache across all users (Production-ready!)
-    current_hour = datetime.now().hour
     selected_date_str = selected_date.strftime('%Y-%m-%d')
     
     # Show loading indicator
     with st.spinner("🔄 Loading dashboard data..."):
-        # Call the SHARED cached function - First user fetches, others get instant cache!
-        health_metrics, data_mode = get_shared_health_metrics(selected_date_str, current_hour, data_mode)
+        health_metrics, data_mode = load_home_metrics(selected_date_str, requested_data_mode)
+    
+    if INTRADAY_MONITORING and data_mode == "Real Data":
+        st.sidebar.caption(f"⚡ Intra-hour monitoring: Core AEPS updated every {INTRADAY_POLL_SECONDS / 60:.0f} min")
     
     # Show cache status - shared across all users
     # st.sidebar.success(f"💾 Shared Cache Active - Data shared across all users!")
@@ -13501,270 +11311,19 @@ def main():
         
         # Display individual metrics directly - no section score calculation needed
         
-        # 4-column compact layout per request
-        col_core, col_support, col_partner, col_ops = st.columns(4)
-
-        # Global CSS for perfectly uniform tiles - matching main CSS
-        st.markdown(
-            """
-            <style>
-            /* Force equal column widths - exact 4-column grid */
-            .block-container .element-container:has(.st-emotion-cache-1r6dm1c) {
-                display: grid !important;
-                grid-template-columns: 1fr 1fr 1fr 1fr !important;
-                gap: 16px !important;
-                width: 100% !important;
-            }
-            
-            .st-emotion-cache-1r6dm1c {
-                width: 100% !important;
-                max-width: none !important;
-                flex: none !important;
-            }
-            
-            /* Normalize spacing between tiles - EXACT same spacing */
-            .stButton {
-                margin: 0 !important; 
-                padding: 0 !important;
-                width: 100% !important; 
-                display: block !important;
-            }
-            
-            /* PERFECTLY uniform tiles - identical dimensions */
-            .stButton > button {
-                height: 150px !important;        /* exact fixed height */
-                width: 100% !important;          /* exact full width */
-                min-height: 150px !important;    /* prevent shrinking */
-                max-height: 150px !important;    /* prevent growing */
-                box-sizing: border-box !important;
-                border: 2px solid #A7D9FF !important;
-                border-radius: 12px !important;
-                background-color: #EAF3FF !important;
-                box-shadow: 0 2px 4px rgba(16, 24, 40, 0.08) !important;
-                padding: 16px 12px !important;
-                display: flex !important;
-                flex-direction: column !important;
-                justify-content: center !important;
-                align-items: center !important;
-                gap: 6px !important;
-                line-height: 1.2 !important;
-                font-weight: 600 !important;
-                text-align: center !important;
-                white-space: normal !important;
-                overflow-wrap: break-word !important;
-                word-break: break-word !important;
-                transition: all 0.15s ease-in-out !important;
-                font-size: 11px !important;
-                overflow: hidden !important;     /* prevent content overflow */
-            }
-            
-            .stButton > button:hover {
-                background-color: #D0E8FF !important;
-                border-color: #7FC0FF !important;
-                box-shadow: 0 4px 8px rgba(0, 0, 0, 0.12) !important;
-                transform: translateY(-1px) !important;
-            }
-            
-            /* Fixed-height section headers for perfect row alignment */
-    .section-header {
-        height: 50px !important; 
-        display: flex !important; 
-        align-items: center !important; 
-        justify-content: center !important;
-        gap: 8px !important; 
-        font-weight: 800 !important; 
-        font-size: 16px !important;
-        margin-bottom: 20px !important;
-        text-align: center !important;
-        padding: 10px 0 !important;
-    }
-    
-    /* Recommendations styling */
-    .recommendation-card {
-        background: white;
-        border-radius: 10px;
-        box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-        margin: 1rem 0;
-        padding: 1.5rem;
-        border-left: 5px solid;
-        transition: transform 0.2s;
-    }
-    
-    .recommendation-card:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 4px 15px rgba(0,0,0,0.15);
-    }
-    
-    .recommendation-critical {
-        border-left-color: #ff4757;
-        background: linear-gradient(135deg, #ffffff, #fff5f5);
-    }
-    
-    .recommendation-high {
-        border-left-color: #ffa502;
-        background: linear-gradient(135deg, #ffffff, #fffbf0);
-    }
-    
-    .recommendation-medium {
-        border-left-color: #ffa502;
-        background: linear-gradient(135deg, #ffffff, #fffbf0);
-    }
-    
-    .recommendation-low {
-        border-left-color: #2ed573;
-        background: linear-gradient(135deg, #ffffff, #f8fff9);
-    }
-    
-    .recommendation-title {
-        font-size: 1.1rem;
-        font-weight: bold;
-        margin-bottom: 0.5rem;
-        color: #2c3e50;
-    }
-    
-    .recommendation-category {
-        font-size: 0.9rem;
-        color: #7f8c8d;
-        margin-bottom: 0.5rem;
-    }
-    
-    .recommendation-description {
-        font-size: 1rem;
-        margin-bottom: 1rem;
-        color: #34495e;
-    }
-    
-    .recommendation-action {
-        font-size: 1rem;
-        font-weight: 600;
-        color: #2c3e50;
-        background: #ecf0f1;
-        padding: 0.75rem;
-        border-radius: 5px;
-        border-left: 3px solid #3498db;
-    }
-            </style>
-            """,
-            unsafe_allow_html=True,
-        )
-
-        def render_light_tile(display_name, actual_name, metric_data):
-            # Enhanced traffic light colors with better visibility
-            status_emojis = {'green': '🟢', 'yellow': '🟡', 'red': '🔴'}
-            trend_emojis = {'up': '📈', 'down': '📉', 'stable': '➡️'}
+        @st.fragment(run_every=HOME_REFRESH_SECONDS)
+        def home_tiles_grid():
+            # Timer reruns only this fragment; metrics are recomputed when the snapshot version changed
+            if datetime.now().hour != st.session_state.last_checked_hour:
+                st.rerun()  # New hour: full run clears the shared caches
+            tile_metrics, _ = load_home_metrics(selected_date_str, requested_data_mode)
             
-            status = metric_data.get('status', 'red')
-            status_emoji = status_emojis.get(status, '🔴')
-            trend_emoji = trend_emojis.get(metric_data.get('trend', 'stable'), '➡️')
-            value = metric_data.get('value', 0)
-            unit = metric_data.get('unit', '%' if isinstance(value, float) and value < 100 else '')
-            change = metric_data.get('change', 0)
-            key_suffix = actual_name.replace(' ','_').replace('/','_')
-
-            # Get colors based on status
-            if status == 'green':
-                bg_color = "#d4edda"
-                border_color = "#28a745"
-            elif status == 'yellow':
-                bg_color = "#fff3cd"
-                border_color = "#ffc107"
-            else:  # red
-                bg_color = "#f8d7da"
-                border_color = "#dc3545"
-            
-            # Apply custom CSS for this specific button
-            st.markdown(f"""
-            <style>
-            div[data-testid="stButton"] button[kind="secondary"]:has-text("{key_suffix}") {{
-                background: {bg_color} !important;
-                border: 3px solid {border_color} !important;
-                border-radius: 12px !important;
-                height: 150px !important;
-                width: 100% !important;
-                box-shadow: 0 4px 8px rgba(0,0,0,0.15) !important;
-            }}
-            div[data-testid="stButton"]:has(button[key*="{key_suffix}"]) button {{
-                background: {bg_color} !important;
-                border: 3px solid {border_color} !important;
-                border-radius: 12px !important;
-                height: 150px !important;
-                width: 100% !important;
-                box-shadow: 0 4px 8px rgba(0,0,0,0.15) !important;
-            }}
-            </style>
-            """, unsafe_allow_html=True)
-            
-            # Create button with formatted label
-            label = f"{status_emoji}\n{display_name}\n{value}{unit}\n{trend_emoji} {change:+.1f}"
-            clicked = st.button(label, key=f"btn_{key_suffix}")
+            # All tiles in one component element; returns the tile clicked in this run
+            clicked = tile_grid(tile_metrics, HOME_TILE_SECTIONS, is_stale=is_metric_stale)
             if clicked:
-                # Direct navigation to relevant dashboards - no intermediate pages
-                if actual_name in ['Transaction Success Rate', '2FA Success Rate', 'GTV Performance']:
-                    st.session_state.current_view = f"detail_{actual_name}"
-                elif actual_name == 'CC Calls Metric':
-                    st.session_state.current_view = "dashboard_CC_Calls_Metric"
-                elif actual_name == 'New AEPS Users':
-                    st.session_state.current_view = "dashboard_New_User_Onboarding_AEPS_Activation"
-                elif actual_name == 'Churn Rate':
-                    st.session_state.current_view = "dashboard_Churn"
-                elif actual_name == 'Stable Users':
-                    st.session_state.current_view = "dashboard_Stable_Users"
-                elif actual_name == 'Bot Analytics':
-                    st.session_state.current_view = "bot_analytics_dashboard"
-                elif actual_name == 'Distributor Lead Churn':
-                    st.session_state.current_view = "dashboard_Distributor_Churn"
-                elif actual_name == 'M2B Pendency':
-                    st.session_state.current_view = "detail_M2B Pendency"
-                elif actual_name == 'RFM Score':
-                    st.session_state.current_view = "detail_RFM Score"
-                elif actual_name == 'Platform Uptime':
-                    st.session_state.current_view = "detail_Platform Uptime"
-                elif actual_name == 'Cash Product':
-                    st.session_state.current_view = "dashboard_Cash_Product"
-                elif actual_name == 'Login Success Rate':
-                    st.session_state.current_view = "dashboard_Login_Success_Rate"
-                elif actual_name == 'System Anomalies':
-                    st.session_state.current_view = "detail_System Anomalies"
-                elif actual_name == 'Active Bugs':
-                    st.session_state.current_view = "bugs_dashboard"
-                elif actual_name == 'Product Metrics & Trends':
-                    st.session_state.current_view = "product_metrics_dashboard"
-                elif actual_name == 'Bank Error Analysis':
-                    st.session_state.current_view = "dashboard_Bank_Error_Analysis"
-                elif actual_name == 'Winback Conversion':
-                    st.session_state.current_view = "winback_dashboard"
-                    st.rerun()
-                    return
-                elif actual_name == 'Sales Iteration':
-                    st.session_state.current_view = "geographic_churn_dashboard"
-                    st.rerun()
-                    return
-                else:
-                    st.info(f"📊 {actual_name} detailed analytics will be available in the next update.")
-                    st.rerun()
-                    return
-                st.rerun()
-
-        with col_core:
-            st.markdown('<div class="section-header">📊 Core AEPS</div>', unsafe_allow_html=True)
-            for disp, key in [("2FA", "2FA Success Rate"), ("Txn Success", "Transaction Success Rate"), ("GTV", "GTV Performance"), ("Bank Errors", "Bank Error Analysis"), ("Platform Uptime", "Platform Uptime")]:
-                render_light_tile(disp, key, health_metrics.get(key, {'value': 0, 'status': 'red', 'trend': 'stable', 'change': 0, 'unit': '%'}))
-
-        with col_support:
-            st.markdown('<div class="section-header">🛠️ Supporting Rails</div>', unsafe_allow_html=True)
-            for disp, key in [("Cash Product", "Cash Product"), ("Login Success", "Login Success Rate"), ("M2B Pendency", "M2B Pendency"), ("CC Calls", "CC Calls Metric"), ("Bot", "Bot Analytics"), ("RFM", "RFM Score")]:
-                render_light_tile(disp, key, health_metrics.get(key, {'value': 0, 'status': 'red', 'trend': 'stable', 'change': 0, 'unit': '%'}))
-
-        with col_partner:
-            st.markdown('<div class="section-header">🤝 Partner</div>', unsafe_allow_html=True)
-            for disp, key in [("New Users", "New AEPS Users"), ("Churn", "Churn Rate"), ("Stable Users", "Stable Users"), ("Winback", "Winback Conversion"), ("Sales Iteration", "Sales Iteration"), ("Dist Lead Churn", "Distributor Lead Churn")]:
-                render_light_tile(disp, key, health_metrics.get(key, {'value': 0, 'status': 'red', 'trend': 'stable', 'change': 0, 'unit': '%'}))
-
-        with col_ops:
-            st.markdown('<div class="section-header">⚙️ Operations</div>', unsafe_allow_html=True)
-            for disp, key in [("Anomalies", "System Anomalies"), ("Bugs", "Active Bugs"), ("RCAs", "Active RCAs"), ("Product Trends", "Product Metrics & Trends")]:
-                render_light_tile(disp, key, health_metrics.get(key, {'value': 0, 'status': 'red', 'trend': 'stable', 'change': 0, 'unit': '%'}))
+                open_tile_view(clicked)
 
+        home_tiles_grid()
         return
 
         # Display all metrics organized by sections
@@ -14000,95 +11559,35 @@ def main():
 def process_uploaded_uptime_data(raw_df):
     """Process uploaded uptime data into visualization format"""
     try:
-        processed_data = []
-        
         st.info(f"📊 Processing uploaded data with {len(raw_df)} rows and columns: {list(raw_df.columns)}")
         
-        # Get date columns (looking for day-month patterns like "01-Sep", "02-Sep", etc.)
-        date_columns = []
-        for col in raw_df.columns:
-            col_str = str(col)
-            # Look for patterns like "01-Sep", "1-Sep", or just numbers like "01-Sep"
-            if any(month in col_str for month in ['Sep', 'Aug', 'Oct', 'Nov', 'Dec', 'Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul']) or \
-               (len(col_str.split('-')) == 2 and col_str.split('-')[0].isdigit()):
-                date_columns.append(col)
+        # Day columns like "01-Sep", "01-Sep-2024", "2024-09-01" or bare day numbers - month/year come from the headers
+        date_columns = find_date_columns(raw_df.columns)
+        date_labels = list(date_columns)
         
-        # If no month-based columns found, look for numeric day columns
-        if not date_columns:
-            for col in raw_df.columns:
-                if str(col).isdigit() or (str(col).startswith('0') and str(col)[1:].isdigit()):
-                    date_columns.append(col)
-        
-        st.success(f"✅ Found {len(date_columns)} date columns: {date_columns[:5]}..." if len(date_columns) > 5 else f"✅ Found date columns: {date_columns}")
+        st.success(f"✅ Found {len(date_labels)} date columns: {date_labels[:5]}..." if len(date_labels) > 5 else f"✅ Found date columns: {date_labels}")
         
         if not date_columns:
             st.error("❌ No date columns found. Please ensure your data has daily columns like '01-Sep', '02-Sep', etc.")
             return pd.DataFrame()
         
-        for _, row in raw_df.iterrows():
-            # Try different column names for service identification
-            service = None
-            for col_name in ['Sub- Component', 'Sub-Component', 'Service', 'Component', 'System']:
-                if col_name in row and pd.notna(row[col_name]) and str(row[col_name]).strip():
-                    service = str(row[col_name]).strip()
-                    break
-            
-            if not service:
-                # Use first non-empty column as service name
-                for val in row.values:
-                    if pd.notna(val) and str(val).strip() and str(val) not in ['99.99%', '100', '0']:
-                        service = str(val).strip()
-                        break
-            
-            if not service or service in ['nan', '']:
-                continue
-                
-            # Extract target percentage
-            target = 99.99  # Default target
-            for col_name in ['Target', 'target']:
-                if col_name in row and pd.notna(row[col_name]):
-                    target_str = str(row[col_name])
-                    try:
-                        target = float(target_str.replace('%', ''))
-                        break
-                    except:
-                        continue
-            
-            # Process each date column
-            for date_col in date_columns:
-                try:
-                    uptime_value = row[date_col]
-                    if pd.isna(uptime_value):
-                        continue
-                        
-                    # Convert to float
-                    uptime_value = float(uptime_value)
-                    
-                    # Convert to proper date
-                    try:
-                        if '-' in str(date_col):
-                            # Format like "01-Sep"
-                            day_part = str(date_col).split('-')[0]
-                            day = int(day_part)
-                            date_obj = pd.to_datetime(f"2024-09-{day:02d}")
-                        else:
-                            # Numeric format
-                            day = int(str(date_col))
-                            date_obj = pd.to_datetime(f"2024-09-{day:02d}")
-                    except:
-                        continue
-                        
-                    processed_data.append({
-                        'date': date_obj,
-                        'service': service,
-                        'uptime': uptime_value,
-                        'target': target,
-                        'status': 'green' if uptime_value >= target else 'yellow' if uptime_value >= target-1 else 'red'
-                    })
-                except (ValueError, TypeError, IndexError) as e:
-                    continue
+        chunk_rows = uptime_chunk_rows(raw_df, date_columns)
+        if chunk_rows is None:
+            result_df = process_uptime_frame(raw_df, date_columns)
+        else:
+            # Large uploads: a block of services at a time, with progress
+            progress = st.progress(0.0, text=f"Processing {len(raw_df):,} services in chunks of {chunk_rows:,}...")
+            chunks = []
+            for processed_rows, chunk_df in iter_uptime_chunks(raw_df, date_columns, chunk_rows):
+                chunks.append(chunk_df)
+                progress.progress(processed_rows / len(raw_df), text=f"Processed {processed_rows:,} of {len(raw_df):,} services")
+            progress.empty()
+            result_df = pd.concat(chunks, ignore_index=True)
+        
+        if result_df.empty:
+            st.error("❌ No valid uptime values found in the date columns.")
+            return pd.DataFrame()
         
-        result_df = pd.DataFrame(processed_data)
         st.success(f"✅ Successfully processed {len(result_df)} data points from {result_df['service'].nunique()} services")
         return result_df
         
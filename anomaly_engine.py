@@ -0,0 +1,167 @@
+"""
+AEPS Health Dashboard - Anomaly engine
+Bounds and status for many metric time series at once. Series are rows of a
+metrics x periods matrix; the last period is the value being judged and the
+earlier ones are its history. Every detector works on the whole matrix with
+NumPy, so one call covers all tiles' cached series without extra queries. The
+hourly Core AEPS tiles take their spread from it (gap_spread: median / MAD of
+the hourly gaps to the median), and the anomaly sheet its statuses (range_status).
+
+Detectors:
+    mad     median +/- k * MAD (scaled to a standard deviation), robust to outliers
+    zscore  mean +/- k * standard deviation, the -2STD / 2STD rule of the anomaly sheet
+    ewma    exponentially weighted mean +/- k * EW standard deviation, tracks level shifts
+
+Statuses follow the anomaly sheet: 'Above Range' / 'Below Range' describe
+performance, so for inverse (lower-is-better) metrics a value under the lower
+bound is 'Above Range'. Series without a current value or with too little
+history get 'No Data'.
+"""
+
+import numpy as np
+import pandas as pd
+
+DETECTORS = ('mad', 'zscore', 'ewma')
+
+# Bound width in spreads per detector
+DEFAULT_K = {'mad': 3.0, 'zscore': 2.0, 'ewma': 2.0}
+
+# MAD -> standard deviation for normally distributed data
+MAD_SCALE = 1.4826
+
+# Default spread floor as a share of |center|, so a flat history does not flag every small wobble
+MIN_SPREAD_RATIO = 0.01
+
+NO_DATA = 'No Data'
+
+
+def range_status(current, lower, upper, inverse=False):
+    """'Above Range' / 'Below Range' / 'Within Range' per metric, inverse metrics flipped"""
+    current = np.asarray(current, dtype=float)
+    lower = np.asarray(lower, dtype=float)
+    upper = np.asarray(upper, dtype=float)
+    inverse = np.broadcast_to(np.asarray(inverse, dtype=bool), current.shape)
+
+    # Normal metrics (higher is better): above upper bound is good, below lower bound is bad.
+    # Inverse metrics (lower is better): below lower bound is good, above upper bound is bad.
+    return np.select(
+        [
+            inverse & (current < lower),
+            inverse & (current > upper),
+            ~inverse & (current > upper),
+            ~inverse & (current < lower),
+        ],
+        ['Above Range', 'Below Range', 'Above Range', 'Below Range'],
+        default='Within Range',
+    )
+
+
+def as_matrix(values):
+    """metrics x periods float matrix from a 1-D series, 2-D array or DataFrame (columns = periods)"""
+    matrix = np.asarray(values.to_numpy() if isinstance(values, (pd.DataFrame, pd.Series)) else values, dtype=float)
+    if matrix.ndim == 1:
+        matrix = matrix[np.newaxis, :]
+    if matrix.ndim != 2:
+        raise ValueError(f"Expected a metrics x periods matrix, got {matrix.ndim} dimensions")
+    return matrix
+
+
+def mad_baseline(history):
+    """Median and scaled MAD per row"""
+    center = np.nanmedian(history, axis=1)
+    spread = np.nanmedian(np.abs(history - center[:, np.newaxis]), axis=1) * MAD_SCALE
+    return center, spread
+
+
+def zscore_baseline(history):
+    """Mean and sample standard deviation per row"""
+    center = np.nanmean(history, axis=1)
+    spread = np.nanstd(history, axis=1, ddof=1)
+    return center, spread
+
+
+def ewma_baseline(history, span=7):
+    """Exponentially weighted mean and standard deviation per row (missing periods skipped)"""
+    alpha = 2.0 / (span + 1.0)
+    mean = np.full(history.shape[0], np.nan)
+    var = np.zeros(history.shape[0])
+    for x in history.T:
+        valid = ~np.isnan(x)
+        first = valid & np.isnan(mean)
+        update = valid & ~first
+        mean = np.where(first, x, mean)
+        diff = np.where(update, x - mean, 0.0)
+        increment = alpha * diff
+        mean = np.where(update, mean + increment, mean)
+        var = np.where(update, (1.0 - alpha) * (var + diff * increment), var)
+    return mean, np.sqrt(var)
+
+
+def detect_anomalies(values, method='mad', k=None, inverse=False, window=None, min_periods=3,
+                     min_spread=None, span=7):
+    """Bounds and status of the last period of every series
+
+    values: metrics x periods (1-D for a single series); NaN marks missing periods.
+    inverse: bool or one bool per metric (lower is better).
+    window: only the last `window` history periods form the baseline.
+    min_spread: floor on the spread in metric units, MIN_SPREAD_RATIO * |center| by default.
+    score is the deviation in spreads: +/-inf (NaN when equal to the center) where the spread is 0.
+    Returns {'current', 'center', 'spread', 'lower', 'upper', 'score', 'status', 'is_anomaly'}
+    with one entry per metric; is_anomaly is True where performance is below range.
+    """
+    if method not in DETECTORS:
+        raise ValueError(f"Unknown anomaly detector: {method}")
+    k = DEFAULT_K[method] if k is None else k
+
+    matrix = as_matrix(values)
+    rows = matrix.shape[0]
+    if matrix.shape[1] == 0:
+        matrix = np.full((rows, 1), np.nan)
+    current = matrix[:, -1]
+    history = matrix[:, :-1]
+    if window is not None:
+        history = history[:, -window:]
+
+    enough = np.count_nonzero(~np.isnan(history), axis=1) >= max(min_periods, 2 if method == 'zscore' else 1)
+    center = np.full(rows, np.nan)
+    spread = np.full(rows, np.nan)
+    if enough.any():
+        if method == 'mad':
+            center[enough], spread[enough] = mad_baseline(history[enough])
+        elif method == 'zscore':
+            center[enough], spread[enough] = zscore_baseline(history[enough])
+        else:
+            center[enough], spread[enough] = ewma_baseline(history[enough], span)
+    floor = MIN_SPREAD_RATIO * np.abs(center) if min_spread is None else min_spread
+    spread = np.maximum(spread, floor)
+
+    lower = center - k * spread
+    upper = center + k * spread
+    with np.errstate(divide='ignore', invalid='ignore'):
+        score = (current - center) / spread
+
+    status = range_status(current, lower, upper, inverse).astype(object)
+    no_data = ~enough | np.isnan(current)
+    status[no_data] = NO_DATA
+    score[no_data] = np.nan
+
+    return {
+        'current': current,
+        'center': center,
+        'spread': spread,
+        'lower': lower,
+        'upper': upper,
+        'score': score,
+        'status': status,
+        'is_anomaly': status == 'Below Range',
+    }
+
+
+def gap_spread(values, baseline, min_spread=None):
+    """Scaled MAD (mad detector) of the gaps values - baseline, all periods but the last as history
+
+    NaN when fewer than three history periods have both values.
+    """
+    gaps = np.asarray(values, dtype=float) - np.asarray(baseline, dtype=float)
+    gaps = gaps[~np.isnan(gaps)]
+    return float(detect_anomalies(gaps, method='mad', min_spread=min_spread)['spread'][0])
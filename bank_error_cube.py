@@ -0,0 +1,178 @@
+"""
+AEPS Health Dashboard - Bank error cube
+In-memory bank x RC x response message x month cube of AEPS error counts for the
+Bank Error Analysis view. The matrix is fetched from BigQuery once. After that,
+threshold changes, bank and month filters, LAG / 3-month-average alerts and a
+bank's RC mix are all recomputed locally with NumPy, with no new scan.
+
+Every (bank, rc, response_message) combination seen is a cell. Its bank, rc and
+message are categorical codes into the banks / rcs / messages indexes. errors is
+a cells x months int64 matrix and totals a banks x months matrix, so the error %
+of every cell and month is one division. A month with no error rows for a cell
+is marked absent (like a row missing from the SQL), and the previous-month and
+3-month-average baselines skip it, as LAG / AVG over rows do.
+"""
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_THRESHOLD_PP = 0.5
+BASELINE_MONTHS = 3
+
+ALERT_LAST_MONTH = 'ALERT: Last Month Threshold Crossed'
+ALERT_3MONTH_AVG = 'ALERT: 3-Month Avg Threshold Crossed'
+
+# Same columns as the alert rows the SQL used to return
+ALERT_COLUMNS = ['month', 'cust_bank_name', 'rc', 'response_message', 'error_txn', 'total_txn', 'error_pct',
+                 'prev_month_error_pct', 'last_3month_avg_error_pct', 'alert_last_month', 'alert_last_3month_avg']
+
+
+class BankErrorCube:
+    """Error counts per (bank, rc, response_message) cell and month, transaction totals per bank and month"""
+
+    def __init__(self, banks, rcs, messages, months, cell_bank, cell_rc, cell_message, errors, present, totals):
+        self.banks = banks
+        self.rcs = rcs
+        self.messages = messages
+        self.months = months
+        self.cell_bank = cell_bank
+        self.cell_rc = cell_rc
+        self.cell_message = cell_message
+        self.errors = errors
+        self.present = present
+        self.totals = totals
+        self._baselines = None
+
+    @classmethod
+    def from_frame(cls, df):
+        """Cube from rows of month, cust_bank_name, rc, response_message, error_txn, total_txn"""
+        df = df.dropna(subset=['month', 'cust_bank_name']) if df is not None else None
+        if df is None or df.empty:
+            empty_codes = np.zeros(0, dtype=np.int32)
+            return cls(np.array([], dtype=object), np.array([], dtype=object), np.array([], dtype=object),
+                       np.array([], dtype=object), empty_codes, empty_codes, empty_codes,
+                       np.zeros((0, 0), dtype=np.int64), np.zeros((0, 0), dtype=bool),
+                       np.zeros((0, 0), dtype=np.int64))
+
+        month_codes, months = pd.factorize(df['month'], sort=True)
+        bank_codes, banks = pd.factorize(df['cust_bank_name'].astype(str), sort=True)
+        rc_codes, rcs = pd.factorize(df['rc'].fillna('').astype(str), sort=True)
+        message_codes, messages = pd.factorize(df['response_message'].fillna('').astype(str), sort=True)
+
+        keys = np.column_stack([bank_codes, rc_codes, message_codes])
+        cell_keys, cell_codes = np.unique(keys, axis=0, return_inverse=True)
+        cell_codes = cell_codes.reshape(-1)
+
+        errors = np.zeros((len(cell_keys), len(months)), dtype=np.int64)
+        np.add.at(errors, (cell_codes, month_codes),
+                  pd.to_numeric(df['error_txn'], errors='coerce').fillna(0).to_numpy(dtype=np.int64))
+        present = np.zeros(errors.shape, dtype=bool)
+        present[cell_codes, month_codes] = True
+
+        totals = np.zeros((len(banks), len(months)), dtype=np.int64)
+        np.maximum.at(totals, (bank_codes, month_codes),
+                      pd.to_numeric(df['total_txn'], errors='coerce').fillna(0).to_numpy(dtype=np.int64))
+
+        return cls(np.asarray(banks, dtype=object), np.asarray(rcs, dtype=object),
+                   np.asarray(messages, dtype=object), np.asarray(months, dtype=object),
+                   cell_keys[:, 0].astype(np.int32), cell_keys[:, 1].astype(np.int32),
+                   cell_keys[:, 2].astype(np.int32), errors, present, totals)
+
+    @property
+    def empty(self):
+        return self.errors.size == 0
+
+    @property
+    def nbytes(self):
+        """Memory held by the count and code arrays"""
+        return sum(a.nbytes for a in (self.cell_bank, self.cell_rc, self.cell_message,
+                                      self.errors, self.present, self.totals))
+
+    def month_index(self, month=None):
+        """Position of a month on the month axis - the latest month by default"""
+        if month is None:
+            return len(self.months) - 1
+        matches = np.flatnonzero(self.months == month)
+        if not len(matches):
+            raise KeyError(f"Month not in bank error cube: {month}")
+        return int(matches[0])
+
+    def error_pct(self):
+        """cells x months error % of the bank's transactions, NaN where the cell has no row"""
+        cell_totals = self.totals[self.cell_bank]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            pct = self.errors / cell_totals * 100
+        return np.where(self.present & (cell_totals > 0), pct, np.nan)
+
+    def baselines(self):
+        """(error %, previous-month %, average of up to 3 prior months' %) as cells x months matrices"""
+        if self._baselines is None:
+            pct = self.error_pct()
+            prev = np.full(pct.shape, np.nan)
+            avg = np.full(pct.shape, np.nan)
+            # Last BASELINE_MONTHS error % per cell over months with a row, newest last
+            recent = np.full((pct.shape[0], BASELINE_MONTHS), np.nan)
+            for m in range(pct.shape[1]):
+                prev[:, m] = recent[:, -1]
+                counts = np.count_nonzero(~np.isnan(recent), axis=1)
+                sums = np.nansum(recent, axis=1)
+                avg[:, m] = np.divide(sums, counts, out=np.full(len(sums), np.nan), where=counts > 0)
+                has_row = self.present[:, m]
+                recent[has_row] = np.column_stack([recent[has_row, 1:], pct[has_row, m]])
+            self._baselines = (pct, prev, avg)
+        return self._baselines
+
+    def bank_mask(self, banks=None):
+        """Cells belonging to the given bank names (all cells when None)"""
+        if banks is None:
+            return np.ones(len(self.cell_bank), dtype=bool)
+        return np.isin(self.banks[self.cell_bank], list(banks))
+
+    def alerts(self, month=None, threshold=DEFAULT_THRESHOLD_PP, banks=None):
+        """Alert rows of a month (latest by default) - error % up by >= threshold pp on either baseline"""
+        if self.empty:
+            return pd.DataFrame(columns=ALERT_COLUMNS)
+
+        m = self.month_index(month)
+        pct, prev, avg = self.baselines()
+        current = pct[:, m]
+        cells = self.present[:, m] & self.bank_mask(banks)
+        last_month_hit = cells & ~np.isnan(prev[:, m]) & (current - prev[:, m] >= threshold)
+        avg_hit = cells & ~np.isnan(avg[:, m]) & (current - avg[:, m] >= threshold)
+        rows = np.flatnonzero(last_month_hit | avg_hit)
+
+        alerts = pd.DataFrame({
+            'month': self.months[m],
+            'cust_bank_name': self.banks[self.cell_bank[rows]],
+            'rc': self.rcs[self.cell_rc[rows]],
+            'response_message': self.messages[self.cell_message[rows]],
+            'error_txn': self.errors[rows, m],
+            'total_txn': self.totals[self.cell_bank[rows], m],
+            'error_pct': current[rows],
+            'prev_month_error_pct': prev[rows, m],
+            'last_3month_avg_error_pct': avg[rows, m],
+            'alert_last_month': np.where(last_month_hit[rows], ALERT_LAST_MONTH, None),
+            'alert_last_3month_avg': np.where(avg_hit[rows], ALERT_3MONTH_AVG, None),
+        }, columns=ALERT_COLUMNS)
+        return alerts.sort_values(['cust_bank_name', 'rc'], kind='stable').reset_index(drop=True)
+
+    def bank_rc_mix(self, bank, month=None):
+        """A bank's errors by RC in a month - error_txn, error_pct of its transactions, share_pct of its errors"""
+        columns = ['rc', 'error_txn', 'error_pct', 'share_pct']
+        if self.empty or bank not in set(self.banks):
+            return pd.DataFrame(columns=columns)
+
+        m = self.month_index(month)
+        cells = self.bank_mask([bank])
+        rc_errors = np.bincount(self.cell_rc[cells], weights=self.errors[cells, m], minlength=len(self.rcs))
+        total = self.totals[np.flatnonzero(self.banks == bank)[0], m]
+        error_sum = rc_errors.sum()
+        used = np.flatnonzero(rc_errors > 0)
+
+        mix = pd.DataFrame({
+            'rc': self.rcs[used],
+            'error_txn': rc_errors[used].astype(np.int64),
+            'error_pct': rc_errors[used] / total * 100 if total > 0 else np.nan,
+            'share_pct': rc_errors[used] / error_sum * 100 if error_sum > 0 else np.nan,
+        }, columns=columns)
+        return mix.sort_values('error_txn', ascending=False, kind='stable').reset_index(drop=True)
@@ -0,0 +1,95 @@
+"""
+AEPS Health Dashboard - Bugs data source
+One loader for the bugs tracker, shared by the Active Bugs tiles and
+show_bugs_dashboard. The bugs sheet is preferred and bugs_data.csv is the
+fallback. The parsed frame and its status/product breakdowns are rebuilt only
+when the sheet's values or the CSV's mtime change, so every consumer reads the
+same precomputed object.
+"""
+
+import os
+import threading
+
+import pandas as pd
+
+from sheets_session import get_worksheet_df, get_worksheet_digest
+
+BUGS_CSV_PATH = os.getenv('BUGS_CSV_PATH', 'bugs_data.csv')
+
+# Statuses counted as active work (matched case-insensitively)
+ACTIVE_BUG_STATUSES = ('open', 'pending', 'wip')
+
+_bugs_lock = threading.Lock()
+_bugs_snapshot = {'version': None, 'data': None}
+
+
+def summarize_bugs(df, source):
+    """Bugs metrics with status/product breakdowns precomputed"""
+    df = df.copy()
+    df.columns = df.columns.str.strip()
+    df['status'] = df['status'].astype(str).str.strip()
+
+    # Status counts are case-sensitive, matching the tracker's values
+    status_counts = df['status'].value_counts()
+    product_counts = df['Product'].value_counts() if 'Product' in df.columns else pd.Series(dtype=int)
+    open_bugs = int(status_counts.get('open', 0))
+
+    if source == 'sheets':
+        # Simplified trend: one more open bug than the previous period
+        trend_change = open_bugs - max(0, open_bugs - 1)
+    else:
+        trend_change = -1  # Simulating improvement
+
+    return {
+        'total_bugs': len(df),
+        'open_bugs': open_bugs,
+        'fixed_bugs': int(status_counts.get('Fixed', 0)),
+        'pending_bugs': int(status_counts.get('Pending', 0)),
+        'wip_bugs': int(status_counts.get('wip', 0)),
+        'active_bugs': int(df['status'].str.lower().isin(ACTIVE_BUG_STATUSES).sum()),
+        'trend_change': trend_change,
+        'product_breakdown': product_counts.to_dict(),
+        'status_breakdown': status_counts.to_dict(),
+        'raw_data': df,
+        'source': source,
+    }
+
+
+def has_status_column(df):
+    return df is not None and not df.empty and 'status' in [str(col).strip() for col in df.columns]
+
+
+def load_bugs_snapshot(gc=None, sheet_url=None, worksheet='Sheet1', csv_path=BUGS_CSV_PATH):
+    """Shared bugs metrics - None when neither the sheet nor the CSV has usable data"""
+    frame, version = None, None
+
+    if gc is not None and sheet_url:
+        try:
+            sheet_df = get_worksheet_df(gc, sheet_url, worksheet, copy=False)
+            if has_status_column(sheet_df):
+                frame = sheet_df
+                version = ('sheets', get_worksheet_digest(sheet_url, worksheet))
+        except Exception as e:
+            print(f"⚠️ Bugs sheet unavailable, using {csv_path}: {e}")
+
+    if frame is None and os.path.exists(csv_path):
+        stat = os.stat(csv_path)
+        version = ('csv', os.path.abspath(csv_path), stat.st_mtime_ns, stat.st_size)
+
+    if version is None:
+        return None
+
+    with _bugs_lock:
+        # A sheet without a values digest (single-sheet fallback fetch) is always re-summarized
+        if _bugs_snapshot['version'] == version and None not in version:
+            return _bugs_snapshot['data']
+
+        if frame is None:
+            frame = pd.read_csv(csv_path)
+            if not has_status_column(frame):
+                return None
+
+        data = summarize_bugs(frame, version[0])
+        _bugs_snapshot['version'] = version
+        _bugs_snapshot['data'] = data
+        return data
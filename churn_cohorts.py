@@ -0,0 +1,290 @@
+"""
+AEPS Health Dashboard - Churn cohort engine
+Month-over-month churn for the whole agent population, kept as dense agent x month
+matrices instead of a long pandas frame. Agent IDs are dictionary-encoded, so a
+row is the position of an agent in agent_ids. Columns are consecutive calendar
+months (YYYYMM in months). Each GTV measure is an int64 matrix in whole rupees,
+and a bool matrix marks the agent-months that had a row.
+
+The previous month is the column to the left, so prev-month comparisons are
+array shifts with no sort or groupby. An agent with no row last month has no
+previous data. Cash support is summed per agent into a vector aligned with the
+agent index by an index lookup, so no merge copies the agent rows. The vector is
+handed back to the caller and passed into to_frame / cohort_summary, never stored
+on the cohorts: one cohorts object is shared by every session (st.cache_resource).
+
+Memory per million agents, per month on the axis:
+    GTV measure (int64)         8 MB each
+    presence mask (bool)        1 MB
+    churn type codes (int8)     1 MB, only when churn_types() is computed
+Plus, once per million agents: numeric agent IDs 8 MB (string IDs about 60 MB),
+and 8 MB for each caller's cash support vector.
+Twelve months of AEPS + CMS GTV come to about 230 MB per million agents, which
+estimate_nbytes() reproduces. A long frame with object columns is several times
+that. Classification works one month column at a time, so its float
+temporaries stay at one column per agent.
+"""
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_MEASURES = ('aeps_gtv_success', 'cms_gtv_success')
+
+# Month-over-month churn thresholds (AEPS GTV)
+SP_AGENT_MIN_PREV_GTV = 250000
+USAGE_CHURN_DECLINE_PCT = 80
+
+# Churn type per int8 code
+CHURN_TYPES = np.array(['NO_CHURN', 'NO_PREVIOUS_DATA', 'SP_AGENT_CHURN', 'SP_USAGE_CHURN',
+                        'ABSOLUTE_CHURN', 'USAGE_CHURN'], dtype=object)
+
+# Cash support level per code: amount 0, up to 50k, up to 2L, above
+CASH_SUPPORT_LEVELS = np.array(['NO_SUPPORT', 'LOW_SUPPORT', 'MEDIUM_SUPPORT', 'HIGH_SUPPORT'], dtype=object)
+CASH_SUPPORT_BOUNDS = np.array([0, 50000, 200000])
+
+
+def classify_churn_codes(current, prev, has_previous):
+    """Churn type codes (into CHURN_TYPES) from current and previous-month AEPS GTV"""
+    current = np.asarray(current, dtype=float)
+    prev = np.asarray(prev, dtype=float)
+    no_previous = ~np.asarray(has_previous, dtype=bool) | (prev == 0)
+
+    decline_pct = np.zeros(np.broadcast(current, prev).shape)
+    np.divide(prev - current, prev, out=decline_pct, where=prev != 0)
+    decline_pct *= 100
+
+    sp_agent = prev >= SP_AGENT_MIN_PREV_GTV
+    had_business = prev > 0
+    zero_now = current == 0
+    steep_decline = decline_pct > USAGE_CHURN_DECLINE_PCT
+
+    return np.select(
+        [
+            no_previous,
+            sp_agent & zero_now,
+            sp_agent & steep_decline,
+            had_business & zero_now,
+            had_business & steep_decline,
+        ],
+        [1, 2, 3, 4, 5],
+        default=0
+    ).astype(np.int8)
+
+
+def cash_support_level_codes(amounts):
+    """Cash support level codes (into CASH_SUPPORT_LEVELS) per amount"""
+    return np.searchsorted(CASH_SUPPORT_BOUNDS, np.asarray(amounts), side='left').astype(np.int8)
+
+
+def month_ordinal(year_month):
+    """YYYYMM -> consecutive month number, so adjacent months differ by one"""
+    year_month = np.asarray(year_month, dtype=np.int64)
+    return (year_month // 100) * 12 + year_month % 100 - 1
+
+
+def ordinal_year_month(ordinal):
+    """Consecutive month number -> YYYYMM"""
+    ordinal = np.asarray(ordinal, dtype=np.int64)
+    return (ordinal // 12) * 100 + ordinal % 12 + 1
+
+
+def normalize_ids(values):
+    """Agent IDs as int64 when they are all integral numbers, strings otherwise"""
+    ids = pd.Series(values)
+    numeric = pd.to_numeric(ids, errors='coerce')
+    if len(ids) and numeric.notna().all() and (numeric % 1 == 0).all():
+        return numeric.to_numpy(dtype=np.int64)
+    return ids.astype(str).to_numpy(dtype=object)
+
+
+def estimate_nbytes(agents, months, measures=len(DEFAULT_MEASURES), string_ids=False):
+    """Approximate memory of a cube with churn types computed, plus one cash support vector"""
+    per_agent = months * (8 * measures + 1 + 1) + (60 if string_ids else 8) + 8
+    return agents * per_agent
+
+
+class ChurnCohorts:
+    """Agent x month GTV matrices with dictionary-encoded agent IDs"""
+
+    def __init__(self, agent_ids, months, present, measures):
+        self.agent_ids = agent_ids
+        self.months = months
+        self.present = present
+        self.measures = measures
+        self._index = None
+        self._churn_types = None
+
+    @classmethod
+    def from_frames(cls, frames, agent_col='agent_id', month_col='year_month', measures=DEFAULT_MEASURES):
+        """Cohorts from an iterable of agent-month frames (e.g. BigQuery result pages)
+
+        Only the ID, month and measure columns of each page are kept, as arrays, until
+        the matrices are built. Several rows for one agent-month are summed.
+        """
+        ids, year_months = [], []
+        values = {measure: [] for measure in measures}
+        for frame in frames:
+            year_month = pd.to_numeric(frame[month_col], errors='coerce')
+            keep = (year_month.notna() & frame[agent_col].notna()).to_numpy()
+            ids.append(frame[agent_col].to_numpy()[keep])
+            year_months.append(year_month.to_numpy()[keep].astype(np.int64))
+            for measure in measures:
+                column = frame[measure] if measure in frame.columns else pd.Series(0, index=frame.index)
+                values[measure].append(pd.to_numeric(column, errors='coerce').fillna(0).to_numpy()[keep])
+
+        if not ids or not sum(len(chunk) for chunk in ids):
+            return cls(np.array([], dtype=np.int64), np.array([], dtype=np.int64), np.zeros((0, 0), dtype=bool),
+                       {measure: np.zeros((0, 0), dtype=np.int64) for measure in measures})
+
+        agent_codes, agent_ids = pd.factorize(normalize_ids(np.concatenate(ids)), sort=True)
+        ordinals = month_ordinal(np.concatenate(year_months))
+        first, last = ordinals.min(), ordinals.max()
+        shape = (len(agent_ids), int(last - first + 1))
+        flat = agent_codes.astype(np.int64) * shape[1] + (ordinals - first)
+        del agent_codes, ordinals
+
+        present = (np.bincount(flat, minlength=shape[0] * shape[1]) > 0).reshape(shape)
+        matrices = {}
+        for measure in measures:
+            sums = np.bincount(flat, weights=np.concatenate(values.pop(measure)), minlength=shape[0] * shape[1])
+            matrices[measure] = np.rint(sums).astype(np.int64).reshape(shape)
+
+        months = ordinal_year_month(np.arange(first, last + 1))
+        return cls(np.asarray(agent_ids), months, present, matrices)
+
+    @classmethod
+    def from_frame(cls, df, **kwargs):
+        return cls.from_frames([df], **kwargs)
+
+    @property
+    def empty(self):
+        return self.present.size == 0
+
+    @property
+    def nbytes(self):
+        """Memory held by the matrices, the ID dictionary and the churn type codes"""
+        ids = self.agent_ids.nbytes
+        if self.agent_ids.dtype == object:
+            ids += sum(len(agent_id) + 49 for agent_id in self.agent_ids)
+        churn = self._churn_types.nbytes if self._churn_types is not None else 0
+        return sum(matrix.nbytes for matrix in self.measures.values()) + self.present.nbytes + ids + churn
+
+    def agent_positions(self, agent_ids):
+        """Row of each agent ID in the matrices, -1 when unknown"""
+        if self._index is None:
+            self._index = pd.Index(self.agent_ids)
+        keys = pd.Series(agent_ids)
+        if self.agent_ids.dtype != object:
+            numeric = pd.to_numeric(keys, errors='coerce')
+            valid = (numeric.notna() & (numeric % 1 == 0)).to_numpy()
+            positions = np.full(len(keys), -1, dtype=np.int64)
+            positions[valid] = self._index.get_indexer(numeric[valid].to_numpy(dtype=np.int64))
+            return positions
+        return self._index.get_indexer(keys.astype(str).to_numpy(dtype=object))
+
+    def month_position(self, year_month=None):
+        """Column of a YYYYMM month - the latest month by default"""
+        if year_month is None:
+            return len(self.months) - 1
+        matches = np.flatnonzero(self.months == int(year_month))
+        if not len(matches):
+            raise KeyError(f"Month not in churn cohorts: {year_month}")
+        return int(matches[0])
+
+    def previous(self, measure):
+        """Matrix shifted one month right: each cell holds the agent's previous-month value"""
+        matrix = self.measures[measure]
+        shifted = np.zeros_like(matrix)
+        shifted[:, 1:] = matrix[:, :-1]
+        return shifted
+
+    def previous_present(self):
+        """Whether each agent had a row in the previous month"""
+        shifted = np.zeros_like(self.present)
+        shifted[:, 1:] = self.present[:, :-1]
+        return shifted
+
+    def cash_support_vector(self, cash_df, id_col='client_id', amount_col='cash_support_amount'):
+        """Cash support rows summed per agent into an agent-aligned vector; rows of unknown agents are dropped"""
+        if cash_df is None or cash_df.empty:
+            return np.zeros(len(self.agent_ids), dtype=np.int64)
+        positions = self.agent_positions(cash_df[id_col].to_numpy())
+        amounts = pd.to_numeric(cash_df[amount_col], errors='coerce').fillna(0).to_numpy()
+        known = positions >= 0
+        totals = np.bincount(positions[known], weights=amounts[known], minlength=len(self.agent_ids))
+        return np.rint(totals).astype(np.int64)
+
+    def support_or_zeros(self, cash_support):
+        """The given cash support vector, or no support for every agent"""
+        return np.zeros(len(self.agent_ids), dtype=np.int64) if cash_support is None else cash_support
+
+    def churn_types(self, measure='aeps_gtv_success'):
+        """agents x months churn type codes (into CHURN_TYPES), one month column at a time"""
+        if self._churn_types is None:
+            matrix = self.measures[measure]
+            codes = np.zeros(matrix.shape, dtype=np.int8)
+            if matrix.shape[1]:
+                codes[:, 0] = 1  # the first month has nothing to compare with
+            for m in range(1, matrix.shape[1]):
+                codes[:, m] = classify_churn_codes(matrix[:, m], matrix[:, m - 1], self.present[:, m - 1])
+            self._churn_types = codes
+        return self._churn_types
+
+    def churn_type_counts(self):
+        """months x churn types agent counts over agents with a row that month"""
+        codes = self.churn_types()
+        counts = np.zeros((len(self.months), len(CHURN_TYPES)), dtype=np.int64)
+        for m in range(len(self.months)):
+            counts[m] = np.bincount(codes[self.present[:, m], m], minlength=len(CHURN_TYPES))
+        return pd.DataFrame(counts, index=pd.Index(self.months, name='year_month'), columns=CHURN_TYPES)
+
+    def cohort_summary(self, year_month=None, cash_support=None):
+        """Agents, GTV and cash-supported agents (cash_support from cash_support_vector) per churn type in one month"""
+        columns = ['churn_type', 'agents', 'aeps_gtv', 'prev_month_aeps', 'with_cash_support']
+        if self.empty:
+            return pd.DataFrame(columns=columns)
+
+        m = self.month_position(year_month)
+        rows = self.present[:, m]
+        codes = self.churn_types()[rows, m]
+        aeps = self.measures['aeps_gtv_success']
+        prev = aeps[rows, m - 1] if m > 0 else np.zeros(int(rows.sum()), dtype=np.int64)
+        size = len(CHURN_TYPES)
+        supported = self.support_or_zeros(cash_support)[rows] > 0
+        return pd.DataFrame({
+            'churn_type': CHURN_TYPES,
+            'agents': np.bincount(codes, minlength=size),
+            'aeps_gtv': np.bincount(codes, weights=aeps[rows, m], minlength=size),
+            'prev_month_aeps': np.bincount(codes, weights=prev, minlength=size),
+            'with_cash_support': np.bincount(codes, weights=supported, minlength=size).astype(np.int64),
+        }, columns=columns)
+
+    def to_frame(self, year_months=None, cash_support=None):
+        """Long agent-month frame (one row per agent-month with a row) for the given or all months
+
+        cash_support is an agent-aligned vector from cash_support_vector (none when omitted).
+        """
+        columns = (['year_month', 'agent_id'] + list(self.measures)
+                   + [f"prev_month_{measure.split('_')[0]}" for measure in self.measures]
+                   + ['prev_month', 'churn_type', 'cash_support_amount', 'has_cash_support', 'cash_support_level'])
+        if self.empty:
+            return pd.DataFrame(columns=columns)
+
+        cols = (np.arange(len(self.months)) if year_months is None
+                else np.array([self.month_position(year_month) for year_month in year_months], dtype=np.int64))
+        rows, positions = np.nonzero(self.present[:, cols])
+        months = cols[positions]
+        prev_months = np.maximum(months - 1, 0)
+        had_previous = (months > 0) & self.previous_present()[rows, months]
+
+        frame = {'year_month': self.months[months], 'agent_id': self.agent_ids[rows]}
+        for measure, matrix in self.measures.items():
+            frame[measure] = matrix[rows, months]
+        for measure, matrix in self.measures.items():
+            frame[f"prev_month_{measure.split('_')[0]}"] = np.where(had_previous, matrix[rows, prev_months], 0)
+        frame['prev_month'] = np.where(had_previous, self.months[prev_months], np.nan)
+        frame['churn_type'] = CHURN_TYPES[self.churn_types()[rows, months]]
+        frame['cash_support_amount'] = self.support_or_zeros(cash_support)[rows]
+        frame['has_cash_support'] = frame['cash_support_amount'] > 0
+        frame['cash_support_level'] = CASH_SUPPORT_LEVELS[cash_support_level_codes(frame['cash_support_amount'])]
+        return pd.DataFrame(frame, columns=columns)
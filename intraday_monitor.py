@@ -0,0 +1,232 @@
+"""
+AEPS Health Dashboard - Intra-hour monitoring
+Opt-in near-real-time mode (INTRADAY_MONITORING=true) for the Core AEPS
+transaction and 2FA tiles. Today's striim CDC rows are aggregated into
+5-minute buckets and kept here per stream. Each pull scans only the minutes after
+the stream's op_time watermark, plus a short overlap (INTRADAY_LATE_MINUTES) so that
+CDC UPDATEs arriving late for a recent request are still counted. Overlapping
+buckets are replaced, older ones kept, and the state resets at midnight.
+
+Pulls happen at most once per INTRADAY_POLL_SECONDS (default 300) per stream,
+and concurrent sessions wait for the one pull in flight. Every query is confined to
+today's partition and the minutes after the watermark by a range on the raw op_time
+column, so partitions and clusters are pruned. INTRADAY_MAX_BYTES_BILLED
+caps a single pull.
+
+Lives outside the Streamlit script because module globals there are reset on
+every rerun; this module is imported once per process.
+"""
+
+import os
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+
+INTRADAY_MONITORING = os.getenv('INTRADAY_MONITORING', 'false').lower() == 'true'
+INTRADAY_POLL_SECONDS = float(os.getenv('INTRADAY_POLL_SECONDS', '300'))
+INTRADAY_LATE_MINUTES = int(os.getenv('INTRADAY_LATE_MINUTES', '10'))
+INTRADAY_MAX_BYTES_BILLED = int(os.getenv('INTRADAY_MAX_BYTES_BILLED', '0'))
+
+BUCKET_MINUTES = 5
+
+# Additive counts per 5-minute bucket, so any window is a plain sum of buckets
+STREAM_COUNT_COLUMNS = {
+    'transaction_success': ['total_txns', 'success_txns', 'success_amount_cr', 'ybl_total', 'ybl_success',
+                            'nsdl_total', 'nsdl_success', 'ybln_total', 'ybln_success'],
+    'bio_authentication': ['total_att', 'succ_att', 'ybl_total', 'ybl_success', 'nsdl_total', 'nsdl_success'],
+}
+
+# Success rate columns derived from the counts: rate -> (successes, attempts)
+STREAM_RATE_COLUMNS = {
+    'transaction_success': {
+        'overall_success_rate': ('success_txns', 'total_txns'),
+        'ybl_success_rate': ('ybl_success', 'ybl_total'),
+        'nsdl_success_rate': ('nsdl_success', 'nsdl_total'),
+        'ybln_success_rate': ('ybln_success', 'ybln_total'),
+    },
+    'bio_authentication': {
+        'fa2_rate_yesterday': ('succ_att', 'total_att'),
+        'ybl_rate_yesterday': ('ybl_success', 'ybl_total'),
+        'nsdl_rate_yesterday': ('nsdl_success', 'nsdl_total'),
+    },
+}
+
+# Minute of the day (0-1439) of a DATETIME or TIMESTAMP op_time
+MINUTE_OF_DAY_SQL = "(EXTRACT(HOUR FROM op_time) * 60 + EXTRACT(MINUTE FROM op_time))"
+
+# Today, from the pull's starting minute on, as a range on the raw op_time column so
+# BigQuery prunes partitions and clusters (a computed minute-of-day expression cannot).
+# The transaction CDC tables store op_time as DATETIME, the bio auth table as TIMESTAMP.
+WINDOW_FILTER_SQL = {
+    'DATETIME': ("op_time >= DATETIME_ADD(DATETIME(@day), INTERVAL @since_minute MINUTE)"
+                 " AND op_time < DATETIME(DATE_ADD(@day, INTERVAL 1 DAY))"),
+    'TIMESTAMP': ("op_time >= TIMESTAMP_ADD(TIMESTAMP(@day), INTERVAL @since_minute MINUTE)"
+                  " AND op_time < TIMESTAMP(DATE_ADD(@day, INTERVAL 1 DAY))"),
+}
+
+
+def transaction_buckets_sql(req_table, res_table):
+    """5-minute cash withdrawal counts from the transaction REQ / RES CDC tables"""
+    window_filter = WINDOW_FILTER_SQL['DATETIME']
+    return f"""
+    WITH req AS (
+      SELECT request_id, CAST(trans_amt AS INT64) AS amount, LOWER(aggregator) AS aggregator,
+             {MINUTE_OF_DAY_SQL} AS minute_of_day
+      FROM {req_table}
+      WHERE {window_filter}
+        AND master_trans_type = 'CW'
+    ),
+    res_insert AS (
+      SELECT DISTINCT request_id
+      FROM {res_table}
+      WHERE {window_filter}
+        AND op_name = 'INSERT'
+    ),
+    res_update AS (
+      SELECT request_id, LOWER(spice_message) AS spice_message
+      FROM {res_table}
+      WHERE {window_filter}
+        AND op_name = 'UPDATE'
+      QUALIFY ROW_NUMBER() OVER (PARTITION BY request_id ORDER BY op_time DESC) = 1
+    )
+    SELECT
+      DIV(r.minute_of_day, {BUCKET_MINUTES}) * {BUCKET_MINUTES} AS bucket_minute,
+      COUNT(*) AS total_txns,
+      COUNTIF(u.spice_message = 'success') AS success_txns,
+      COALESCE(SUM(CASE WHEN u.spice_message = 'success' THEN r.amount END), 0) / 10000000 AS success_amount_cr,
+      COUNTIF(r.aggregator = 'ybl') AS ybl_total,
+      COUNTIF(r.aggregator = 'ybl' AND u.spice_message = 'success') AS ybl_success,
+      COUNTIF(r.aggregator = 'nsdl') AS nsdl_total,
+      COUNTIF(r.aggregator = 'nsdl' AND u.spice_message = 'success') AS nsdl_success,
+      COUNTIF(r.aggregator = 'ybln') AS ybln_total,
+      COUNTIF(r.aggregator = 'ybln' AND u.spice_message = 'success') AS ybln_success,
+      MAX(r.minute_of_day) AS max_minute
+    FROM req r
+    JOIN res_insert i ON r.request_id = i.request_id
+    JOIN res_update u ON r.request_id = u.request_id
+    GROUP BY bucket_minute
+    """
+
+
+def bio_auth_buckets_sql(bio_table):
+    """5-minute 2FA attempt counts from the bio auth logging CDC table"""
+    window_filter = WINDOW_FILTER_SQL['TIMESTAMP']
+    return f"""
+    WITH auth_insert AS (
+      SELECT request_id, client_id, AGGREGATOR AS aggregator
+      FROM {bio_table}
+      WHERE {window_filter}
+        AND OP_NAME = 'INSERT'
+    ),
+    auth_update AS (
+      SELECT request_id, RC AS rc, {MINUTE_OF_DAY_SQL} AS minute_of_day
+      FROM {bio_table}
+      WHERE {window_filter}
+        AND OP_NAME = 'UPDATE'
+    )
+    SELECT
+      DIV(u.minute_of_day, {BUCKET_MINUTES}) * {BUCKET_MINUTES} AS bucket_minute,
+      COUNT(a.client_id) AS total_att,
+      COUNTIF(u.rc = '00' AND a.client_id IS NOT NULL) AS succ_att,
+      COUNTIF(a.aggregator IN ('YBL', 'YBLN')) AS ybl_total,
+      COUNTIF(a.aggregator IN ('YBL', 'YBLN') AND u.rc = '00') AS ybl_success,
+      COUNTIF(a.aggregator = 'NSDL') AS nsdl_total,
+      COUNTIF(a.aggregator = 'NSDL' AND u.rc = '00') AS nsdl_success,
+      MAX(u.minute_of_day) AS max_minute
+    FROM auth_insert a
+    JOIN auth_update u ON a.request_id = u.request_id
+    GROUP BY bucket_minute
+    """
+
+
+def empty_buckets(stream):
+    return pd.DataFrame(columns=['bucket_minute'] + STREAM_COUNT_COLUMNS[stream])
+
+
+def new_stream_state(stream, day=None):
+    return {'day': day, 'watermark': None, 'buckets': empty_buckets(stream), 'pulled_at': 0.0,
+            'since_minute': None, 'pulls': 0}
+
+
+# Today's buckets and op_time watermark (minute of day) per stream
+INTRADAY_STATE = {stream: new_stream_state(stream) for stream in STREAM_COUNT_COLUMNS}
+_stream_locks = {stream: threading.Lock() for stream in STREAM_COUNT_COLUMNS}
+
+
+def intraday_version():
+    """(day, watermark, pulls) per stream - changes whenever any session pulls new buckets"""
+    return tuple((state['day'], state['watermark'], state['pulls']) for state in INTRADAY_STATE.values())
+
+
+def pull_start_minute(watermark):
+    """First minute to scan: the watermark minus the late-update overlap, on a bucket boundary"""
+    if watermark is None:
+        return 0
+    start = max(0, int(watermark) - INTRADAY_LATE_MINUTES)
+    return start - start % BUCKET_MINUTES
+
+
+def merge_buckets(existing, fresh, since_minute):
+    """Buckets before since_minute from existing, everything from since_minute on from fresh"""
+    kept = existing[existing['bucket_minute'] < since_minute]
+    merged = pd.concat([kept, fresh], ignore_index=True) if not kept.empty else fresh.reset_index(drop=True)
+    return merged.sort_values('bucket_minute', kind='stable').reset_index(drop=True)
+
+
+def pull_intraday(stream, fetch, now=None):
+    """Today's 5-minute buckets for a stream, pulling minutes past the watermark when a poll is due
+
+    fetch(day, since_minute) runs the stream's bucket query and returns its rows, or None when it
+    has no fresh rows (e.g. the pull overran its deadline) - the buckets are then kept as they are.
+    """
+    now = now or datetime.now()
+    with _stream_locks[stream]:
+        state = INTRADAY_STATE[stream]
+        if state['day'] != now.date():
+            state = INTRADAY_STATE[stream] = new_stream_state(stream, now.date())
+
+        if state['pulls'] and time.time() - state['pulled_at'] < INTRADAY_POLL_SECONDS:
+            return state['buckets']
+
+        since_minute = pull_start_minute(state['watermark'])
+        fresh = fetch(now.date(), since_minute)
+        if fresh is None:
+            return state['buckets']
+
+        columns = ['bucket_minute'] + STREAM_COUNT_COLUMNS[stream]
+        fresh = fresh.reindex(columns=columns + ['max_minute'])
+        for col in columns + ['max_minute']:
+            fresh[col] = pd.to_numeric(fresh[col], errors='coerce')
+        fresh = fresh.dropna(subset=['bucket_minute'])
+
+        if not fresh.empty and fresh['max_minute'].notna().any():
+            latest = int(fresh['max_minute'].max())
+            state['watermark'] = latest if state['watermark'] is None else max(state['watermark'], latest)
+        state['buckets'] = merge_buckets(state['buckets'], fresh[columns], since_minute)
+        state['since_minute'] = since_minute
+        state['pulled_at'] = time.time()
+        state['pulls'] += 1
+        return state['buckets']
+
+
+def hour_summary(buckets, stream, hour, now=None):
+    """Counts and success rates of the completed 5-minute buckets of an hour - None when there are none"""
+    now = now or datetime.now()
+    current_minute = now.hour * 60 + now.minute
+    start = hour * 60
+    in_hour = buckets[(buckets['bucket_minute'] >= start) & (buckets['bucket_minute'] < start + 60)
+                      & (buckets['bucket_minute'] + BUCKET_MINUTES <= current_minute)]
+    if in_hour.empty:
+        return None
+
+    totals = in_hour[STREAM_COUNT_COLUMNS[stream]].sum()
+    summary = {col: float(totals[col]) for col in STREAM_COUNT_COLUMNS[stream]}
+    for rate_col, (success_col, total_col) in STREAM_RATE_COLUMNS[stream].items():
+        summary[rate_col] = summary[success_col] / summary[total_col] * 100 if summary[total_col] > 0 else None
+
+    through = int(in_hour['bucket_minute'].max()) + BUCKET_MINUTES
+    summary['window'] = f"{hour:02d}:00-{through // 60:02d}:{through % 60:02d}"
+    summary['buckets'] = len(in_hour)
+    return summary
@@ -0,0 +1,591 @@
+#!/usr/bin/env python3
+"""
+AEPS Health Dashboard - Local BigQuery stand-in
+Runs the dashboard's BigQuery SQL against local Parquet fixtures in DuckDB,
+behind the small slice of the bigquery.Client interface the loaders use
+(query / result / to_dataframe / to_dataframe_iterable / get_table), so the
+real query -> DataFrame -> metrics path can be exercised without credentials.
+
+Fixtures live under one directory, one folder per dataset:
+    fixtures/ds_striim/T_AEPSR_TRANSACTION_RES.parquet
+    fixtures/prod_dwh/aeps_trans_res/part-000.parquet   # multi-file table
+    fixtures/_partitioning.json                         # {"prod_dwh.aeps_trans_res": "log_date_time"}
+
+A small dialect shim rewrites the BigQuery constructs the dashboard uses
+(DECLARE, SAFE_DIVIDE, APPROX_QUANTILES(..)[OFFSET(n)], DATE_TRUNC, DATE_SUB,
+COUNTIF, PARSE_DATE, UNNEST(@param), ...). It is deliberately not a full
+translator - anything it does not know is passed through to DuckDB as-is.
+
+Usage:
+    python local_bigquery.py --fixtures fixtures "SELECT COUNT(*) FROM prod_dwh.aeps_trans_res"
+    python local_bigquery.py --file query.sql --translate-only
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+import uuid
+from types import SimpleNamespace
+
+import duckdb
+import pandas as pd
+
+from query_scan_analyzer import extract_tables, short_table_name
+
+DEFAULT_FIXTURES_DIR = os.getenv("LOCAL_BIGQUERY_FIXTURES", "fixtures")
+PARTITIONING_FILE = "_partitioning.json"
+
+TYPE_RENAMES = (
+    (r"\bFLOAT64\b", "DOUBLE"),
+    (r"\bINT64\b", "BIGINT"),
+    (r"\bSTRING\b", "VARCHAR"),
+    (r"\bBOOL\b", "BOOLEAN"),
+    (r"\bBYTES\b", "BLOB"),
+)
+
+# ---------------------------------------------------------------------------
+# SQL scanning helpers
+# ---------------------------------------------------------------------------
+
+def strip_comments(sql):
+    """Drop -- and /* */ comments and the r prefix of raw strings, keeping string literals intact"""
+    out = []
+    i, n = 0, len(sql)
+    while i < n:
+        ch = sql[i]
+        if ch in ("'", '"'):
+            end = i + 1
+            while end < n and sql[end] != ch:
+                end += 2 if sql[end] == '\\' else 1
+            literal = sql[i:end + 1]
+            # BigQuery double-quoted strings are identifiers in DuckDB
+            out.append("'" + literal[1:-1].replace("'", "''") + "'" if ch == '"' else literal)
+            i = end + 1
+        elif sql.startswith('--', i):
+            end = sql.find('\n', i)
+            i = n if end == -1 else end
+        elif sql.startswith('/*', i):
+            end = sql.find('*/', i + 2)
+            i = n if end == -1 else end + 2
+        elif ch in 'rR' and i + 1 < n and sql[i + 1] in ("'", '"') and (i == 0 or not (sql[i - 1].isalnum() or sql[i - 1] == '_')):
+            i += 1
+        else:
+            out.append(ch)
+            i += 1
+    return ''.join(out)
+
+
+def string_spans(sql):
+    """(start, end) of every single-quoted literal"""
+    spans = []
+    i, n = 0, len(sql)
+    while i < n:
+        if sql[i] == "'":
+            end = i + 1
+            while end < n:
+                if sql[end] == "'" and end + 1 < n and sql[end + 1] == "'":
+                    end += 2
+                elif sql[end] == "'":
+                    break
+                else:
+                    end += 1
+            spans.append((i, end + 1))
+            i = end + 1
+        else:
+            i += 1
+    return spans
+
+
+def sub_outside_strings(pattern, repl, sql, flags=re.IGNORECASE):
+    """re.sub that leaves string literals untouched"""
+    out, last = [], 0
+    for start, end in string_spans(sql):
+        out.append(re.sub(pattern, repl, sql[last:start], flags=flags))
+        out.append(sql[start:end])
+        last = end
+    out.append(re.sub(pattern, repl, sql[last:], flags=flags))
+    return ''.join(out)
+
+
+def in_string(pos, spans):
+    return any(start <= pos < end for start, end in spans)
+
+
+def split_top_level(text, sep=','):
+    """Split on a separator that is not nested in parentheses, brackets or strings"""
+    parts, depth, quoted, start = [], 0, False, 0
+    for i, ch in enumerate(text):
+        if ch == "'":
+            quoted = not quoted
+        elif quoted:
+            continue
+        elif ch in '([':
+            depth += 1
+        elif ch in ')]':
+            depth -= 1
+        elif ch == sep and depth == 0:
+            parts.append(text[start:i].strip())
+            start = i + 1
+    tail = text[start:].strip()
+    if tail or parts:
+        parts.append(tail)
+    return parts
+
+
+def find_closing_paren(sql, open_idx):
+    """Index of the parenthesis closing the one at open_idx"""
+    depth, quoted = 0, False
+    for i in range(open_idx, len(sql)):
+        ch = sql[i]
+        if ch == "'":
+            quoted = not quoted
+        elif quoted:
+            continue
+        elif ch == '(':
+            depth += 1
+        elif ch == ')':
+            depth -= 1
+            if depth == 0:
+                return i
+    raise ValueError(f"Unbalanced parentheses near: {sql[open_idx:open_idx + 60]!r}")
+
+
+# ---------------------------------------------------------------------------
+# Function rewrites - each takes (args, sql, start, end) and returns (replacement, new_end)
+# ---------------------------------------------------------------------------
+
+def _part(arg):
+    """'month' for MONTH, 'week' for WEEK(MONDAY)"""
+    return re.match(r"\s*(\w+)", arg).group(1).lower()
+
+
+def _safe_divide(args, sql, start, end):
+    return f"(CAST({args[0]} AS DOUBLE) / NULLIF({args[1]}, 0))", end
+
+
+def _div(args, sql, start, end):
+    return f"(({args[0]}) // ({args[1]}))", end
+
+
+def _countif(args, sql, start, end):
+    return f"COUNT(CASE WHEN {args[0]} THEN 1 END)", end
+
+
+def _approx_quantiles(args, sql, start, end):
+    buckets = int(args[1])
+    offset = re.match(r"\s*\[\s*(?:SAFE_)?(?:OFFSET|ORDINAL)\s*\(\s*(\d+)\s*\)\s*\]", sql[end:], re.IGNORECASE)
+    if offset:
+        return f"quantile_cont({args[0]}, {int(offset.group(1)) / buckets})", end + offset.end()
+    fractions = ', '.join(str(i / buckets) for i in range(buckets + 1))
+    return f"quantile_cont({args[0]}, [{fractions}])", end
+
+
+def _trunc(cast_to=None):
+    def rewrite(args, sql, start, end):
+        expr = f"date_trunc('{_part(args[1])}', {args[0]})"
+        return (f"CAST({expr} AS {cast_to})" if cast_to else expr), end
+    return rewrite
+
+
+def _interval(arg):
+    """INTERVAL n PART as is; a non-literal amount (INTERVAL @n MINUTE) as n * INTERVAL 1 PART"""
+    match = re.match(r"\s*INTERVAL\s+(.+?)\s+(\w+)\s*$", arg, re.IGNORECASE | re.DOTALL)
+    if not match or re.fullmatch(r"[-+]?\d+", match.group(1).strip()):
+        return arg
+    return f"(({match.group(1)}) * INTERVAL 1 {match.group(2)})"
+
+
+def _shift(operator, cast_to=None):
+    def rewrite(args, sql, start, end):
+        expr = f"(({args[0]}) {operator} {_interval(args[1])})"
+        return (f"CAST({expr} AS {cast_to})" if cast_to else expr), end
+    return rewrite
+
+
+def _date_diff(args, sql, start, end):
+    # date_sub counts complete parts like BigQuery's *_DIFF functions
+    return f"date_sub('{_part(args[2])}', {args[1]}, {args[0]})", end
+
+
+def _parse_date(args, sql, start, end):
+    return f"CAST(strptime(CAST({args[1]} AS VARCHAR), {args[0]}) AS DATE)", end
+
+
+def _parse_timestamp(args, sql, start, end):
+    return f"strptime(CAST({args[1]} AS VARCHAR), {args[0]})", end
+
+
+def _format(args, sql, start, end):
+    return f"strftime({args[1]}, {args[0]})", end
+
+
+def _date(args, sql, start, end):
+    if len(args) == 3:
+        return f"make_date({', '.join(args)})", end
+    return f"CAST({args[0]} AS DATE)", end
+
+
+def _cast_to(type_name):
+    def rewrite(args, sql, start, end):
+        return f"CAST({args[0]} AS {type_name})", end
+    return rewrite
+
+
+def _no_args(name):
+    def rewrite(args, sql, start, end):
+        return name, end
+    return rewrite
+
+
+def _rename(name):
+    def rewrite(args, sql, start, end):
+        return f"{name}({', '.join(args)})", end
+    return rewrite
+
+
+def _regexp_extract(args, sql, start, end):
+    group = 1 if '(' in args[1] else 0
+    return f"regexp_extract({args[0]}, {args[1]}, {group})", end
+
+
+def _unnest(args, sql, start, end):
+    if re.search(r"\bIN\s*$", sql[:start], re.IGNORECASE):
+        return f"(SELECT UNNEST({args[0]}))", end
+    alias = re.match(r"\s+AS\s+(\w+)", sql[end:], re.IGNORECASE)
+    if alias:
+        name = alias.group(1)
+        return f"(SELECT UNNEST({args[0]}) AS {name}) AS _unnest_{name}", end + alias.end()
+    return f"UNNEST({args[0]})", end
+
+
+def _safe_cast(args, sql, start, end):
+    return f"TRY_CAST({', '.join(args)})", end
+
+
+FUNCTION_REWRITES = {
+    'SAFE_DIVIDE': _safe_divide,
+    'COUNTIF': _countif,
+    'DIV': _div,
+    'APPROX_QUANTILES': _approx_quantiles,
+    'DATE_TRUNC': _trunc('DATE'),
+    'DATETIME_TRUNC': _trunc(),
+    'TIMESTAMP_TRUNC': _trunc(),
+    'DATE_SUB': _shift('-', 'DATE'),
+    'DATE_ADD': _shift('+', 'DATE'),
+    'DATETIME_SUB': _shift('-'),
+    'DATETIME_ADD': _shift('+'),
+    'TIMESTAMP_SUB': _shift('-'),
+    'TIMESTAMP_ADD': _shift('+'),
+    'DATE_DIFF': _date_diff,
+    'DATETIME_DIFF': _date_diff,
+    'TIMESTAMP_DIFF': _date_diff,
+    'PARSE_DATE': _parse_date,
+    'PARSE_TIMESTAMP': _parse_timestamp,
+    'PARSE_DATETIME': _parse_timestamp,
+    'FORMAT_DATE': _format,
+    'FORMAT_DATETIME': _format,
+    'FORMAT_TIMESTAMP': _format,
+    'DATE': _date,
+    'DATETIME': _cast_to('TIMESTAMP'),
+    'TIMESTAMP': _cast_to('TIMESTAMP'),
+    'CURRENT_DATE': _no_args('CURRENT_DATE'),
+    'CURRENT_DATETIME': _no_args('CAST(CURRENT_TIMESTAMP AS TIMESTAMP)'),
+    'CURRENT_TIMESTAMP': _no_args('CURRENT_TIMESTAMP'),
+    'REGEXP_CONTAINS': _rename('regexp_matches'),
+    'REGEXP_EXTRACT': _regexp_extract,
+    'JSON_VALUE': _rename('json_extract_string'),
+    'JSON_EXTRACT_SCALAR': _rename('json_extract_string'),
+    'GENERATE_ARRAY': _rename('generate_series'),
+    'UNNEST': _unnest,
+    'SAFE_CAST': _safe_cast,
+}
+
+FUNCTION_PATTERN = re.compile(
+    rf"(?<![\w.$])({'|'.join(sorted(FUNCTION_REWRITES, key=len, reverse=True))})(?=\s*\()",
+    re.IGNORECASE
+)
+
+
+def rewrite_functions(sql):
+    """Apply FUNCTION_REWRITES once, right to left so nested calls are rewritten first"""
+    spans = string_spans(sql)
+    matches = [m for m in FUNCTION_PATTERN.finditer(sql) if not in_string(m.start(), spans)]
+    for match in reversed(matches):
+        open_idx = sql.index('(', match.end())
+        close_idx = find_closing_paren(sql, open_idx)
+        args = split_top_level(sql[open_idx + 1:close_idx])
+        rewrite = FUNCTION_REWRITES[match.group(1).upper()]
+        replacement, end = rewrite(args, sql, match.start(), close_idx + 1)
+        sql = sql[:match.start()] + replacement + sql[end:]
+    return sql
+
+
+# ---------------------------------------------------------------------------
+# Statement-level translation
+# ---------------------------------------------------------------------------
+
+def split_statements(sql):
+    """Top-level statements of a script"""
+    return [stmt for stmt in split_top_level(sql, ';') if stmt.strip()]
+
+
+def inline_declares(statements):
+    """Replace DECLARE'd script variables with their DEFAULT expressions"""
+    variables, body = [], []
+    for stmt in statements:
+        declare = re.match(r"\s*DECLARE\s+([\w\s,]+?)\s+\w+\s+DEFAULT\s+(.+)$", stmt, re.IGNORECASE | re.DOTALL)
+        if declare is None:
+            body.append(stmt)
+            continue
+        expr = declare.group(2).strip()
+        for name, value in variables:
+            expr = sub_outside_strings(rf"(?<![\w.$@]){name}\b(?!\s*\()", lambda m, v=value: v, expr)
+        for name in declare.group(1).split(','):
+            variables.append((name.strip(), f"({expr})"))
+
+    for name, value in variables:
+        body = [sub_outside_strings(rf"(?<![\w.$@]){name}\b(?!\s*\()", lambda m, v=value: v, stmt)
+                for stmt in body]
+    return body
+
+
+def table_identifier(ref):
+    """"dataset"."table" for a backticked BigQuery table reference"""
+    parts = ref.strip('`').split('.')
+    return '.'.join(f'"{part}"' for part in parts[-2:])
+
+
+def translate_statement(stmt):
+    """Rewrite one BigQuery statement for DuckDB"""
+    stmt = re.sub(r"`([^`]+)`", lambda m: table_identifier(m.group(1)), stmt)
+    stmt = rewrite_functions(stmt)
+    for pattern, repl in TYPE_RENAMES:
+        stmt = sub_outside_strings(pattern, repl, stmt)
+    stmt = sub_outside_strings(r"\*\s*EXCEPT\s*\(", "* EXCLUDE (", stmt)
+    stmt = sub_outside_strings(r"@(\w+)", r"$\1", stmt)
+    return stmt
+
+
+def translate_sql(sql):
+    """Translate a BigQuery script into DuckDB statements"""
+    statements = inline_declares(split_statements(strip_comments(sql)))
+    return [translate_statement(stmt) for stmt in statements]
+
+
+def query_parameter_values(job_config):
+    """{name: value} from a QueryJobConfig's scalar and array parameters"""
+    values = {}
+    for param in getattr(job_config, 'query_parameters', None) or []:
+        values[param.name] = list(param.values) if hasattr(param, 'values') else param.value
+    return values
+
+
+# ---------------------------------------------------------------------------
+# Client interface
+# ---------------------------------------------------------------------------
+
+class LocalRowIterator:
+    """Query result with the RowIterator methods the loaders use"""
+
+    def __init__(self, df, page_size=None):
+        self._df = df
+        self._page_size = page_size
+        self.total_rows = len(df)
+
+    def to_dataframe(self, *args, **kwargs):
+        return self._df.copy()
+
+    def to_dataframe_iterable(self, *args, **kwargs):
+        page_size = self._page_size or max(len(self._df), 1)
+        for start in range(0, len(self._df), page_size):
+            yield self._df.iloc[start:start + page_size].reset_index(drop=True)
+
+    def __iter__(self):
+        return iter(self._df.itertuples(index=False))
+
+
+class LocalQueryJob:
+    """QueryJob stand-in - the script runs on the first result() call"""
+
+    def __init__(self, client, sql, job_config=None):
+        self.job_id = f"local_{uuid.uuid4().hex[:12]}"
+        self.query = sql
+        self._client = client
+        self._job_config = job_config
+        self._df = None
+        self.state = 'PENDING'
+        self.error_result = None
+
+        self.dry_run = bool(getattr(job_config, 'dry_run', False))
+        self.referenced_tables = []
+        self.total_bytes_processed = 0
+        for name in extract_tables(sql):
+            dataset, _, table = name.partition('.')
+            if client.has_table(dataset, table):
+                self.referenced_tables.append(SimpleNamespace(project=client.project, dataset_id=dataset, table_id=table))
+                self.total_bytes_processed += client.table_bytes(dataset, table)
+
+        if self.dry_run:
+            self.state = 'DONE'
+
+    def result(self, timeout=None, page_size=None, **kwargs):
+        if self._df is None and not self.dry_run:
+            try:
+                self._df = self._client.execute(self.query, self._job_config)
+            except Exception as e:
+                self.error_result = {'reason': 'invalidQuery', 'message': str(e)}
+                raise
+            finally:
+                self.state = 'DONE'
+        if self._df is None:
+            return LocalRowIterator(pd.DataFrame(), page_size)
+        return LocalRowIterator(self._df, page_size)
+
+    def to_dataframe(self, *args, **kwargs):
+        return self.result().to_dataframe()
+
+    def done(self, *args, **kwargs):
+        return self.state == 'DONE'
+
+    def cancel(self, *args, **kwargs):
+        return False
+
+
+class LocalBigQueryClient:
+    """bigquery.Client stand-in backed by DuckDB views over Parquet fixtures"""
+
+    def __init__(self, fixtures_dir=DEFAULT_FIXTURES_DIR, project=None):
+        self.project = project or os.getenv("BIGQUERY_PROJECT_ID", "spicemoney-dwh")
+        self.fixtures_dir = fixtures_dir
+        self._conn = duckdb.connect(database=':memory:')
+        self._tables = {}
+        self._partitioning = {}
+        self.refresh_fixtures()
+
+    def refresh_fixtures(self):
+        """(Re)register one view per fixture table"""
+        self._tables = {}
+        if not os.path.isdir(self.fixtures_dir):
+            print(f"⚠️ Local BigQuery fixtures directory not found: {self.fixtures_dir}")
+            return
+
+        partitioning_file = os.path.join(self.fixtures_dir, PARTITIONING_FILE)
+        if os.path.exists(partitioning_file):
+            with open(partitioning_file, encoding='utf-8') as f:
+                self._partitioning = {k.lower(): v for k, v in json.load(f).items()}
+
+        for dataset in sorted(os.listdir(self.fixtures_dir)):
+            dataset_dir = os.path.join(self.fixtures_dir, dataset)
+            if not os.path.isdir(dataset_dir):
+                continue
+            self._conn.execute(f'CREATE SCHEMA IF NOT EXISTS "{dataset}"')
+            for entry in sorted(os.listdir(dataset_dir)):
+                path = os.path.join(dataset_dir, entry)
+                if os.path.isdir(path):
+                    files = sorted(glob.glob(os.path.join(path, '*.parquet')))
+                    table = entry
+                elif entry.endswith('.parquet'):
+                    files = [path]
+                    table = entry[:-len('.parquet')]
+                else:
+                    continue
+                if not files:
+                    continue
+                file_list = ', '.join("'" + f.replace("'", "''") + "'" for f in files)
+                self._conn.execute(
+                    f'CREATE OR REPLACE VIEW "{dataset}"."{table}" AS SELECT * FROM read_parquet([{file_list}])'
+                )
+                self._tables[f"{dataset}.{table}".lower()] = files
+
+    def has_table(self, dataset, table):
+        return f"{dataset}.{table}".lower() in self._tables
+
+    def table_bytes(self, dataset, table):
+        return sum(os.path.getsize(f) for f in self._tables.get(f"{dataset}.{table}".lower(), []))
+
+    def execute(self, sql, job_config=None):
+        """Run a BigQuery script and return the last statement's result as a DataFrame"""
+        params = query_parameter_values(job_config)
+        cursor = self._conn.cursor()
+        try:
+            result = None
+            for stmt in translate_sql(sql):
+                used = {name: value for name, value in params.items() if re.search(rf"\${name}\b", stmt)}
+                result = cursor.execute(stmt, used) if used else cursor.execute(stmt)
+            return result.df()
+        finally:
+            cursor.close()
+
+    def query(self, sql, job_config=None, **kwargs):
+        return LocalQueryJob(self, sql, job_config)
+
+    def get_table(self, table_ref):
+        """Table metadata (schema and partitioning) - LookupError when there is no fixture"""
+        name = short_table_name(str(table_ref))
+        if name.lower() not in self._tables:
+            raise LookupError(f"Not found: Table {table_ref} (no local fixture)")
+        dataset, _, table = name.partition('.')
+        columns = self._conn.execute(f'DESCRIBE "{dataset}"."{table}"').fetchall()
+        partition_column = self._partitioning.get(name.lower())
+        return SimpleNamespace(
+            project=self.project,
+            dataset_id=dataset,
+            table_id=table,
+            schema=[SimpleNamespace(name=col[0], field_type=col[1]) for col in columns],
+            num_rows=self._conn.execute(f'SELECT COUNT(*) FROM "{dataset}"."{table}"').fetchone()[0],
+            num_bytes=self.table_bytes(dataset, table),
+            time_partitioning=SimpleNamespace(field=partition_column) if partition_column else None,
+            range_partitioning=None,
+        )
+
+
+def write_fixture(df, dataset, table, fixtures_dir=DEFAULT_FIXTURES_DIR):
+    """Save a DataFrame as the Parquet fixture for dataset.table"""
+    dataset_dir = os.path.join(fixtures_dir, dataset)
+    os.makedirs(dataset_dir, exist_ok=True)
+    path = os.path.join(dataset_dir, f"{table}.parquet")
+    conn = duckdb.connect(database=':memory:')
+    try:
+        conn.register('fixture_df', df)
+        conn.execute(f"COPY fixture_df TO '{path.replace(chr(39), chr(39) * 2)}' (FORMAT PARQUET)")
+    finally:
+        conn.close()
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run dashboard SQL against local Parquet fixtures")
+    parser.add_argument('sql', nargs='?', help="SQL to run (or use --file)")
+    parser.add_argument('--file', help="Read the SQL from a file")
+    parser.add_argument('--fixtures', default=DEFAULT_FIXTURES_DIR, help="Fixtures directory")
+    parser.add_argument('--translate-only', action='store_true', help="Print the DuckDB SQL without running it")
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file, encoding='utf-8') as f:
+            sql = f.read()
+    elif args.sql:
+        sql = args.sql
+    else:
+        parser.error("pass the SQL or --file")
+
+    if args.translate_only:
+        print(';\n\n'.join(translate_sql(sql)))
+        return 0
+
+    client = LocalBigQueryClient(args.fixtures)
+    try:
+        df = client.query(sql).result().to_dataframe()
+    except Exception as e:
+        print(f"❌ Query failed: {str(e)}")
+        return 1
+    print(df.to_string(max_rows=50))
+    print(f"\n✅ {len(df)} rows")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
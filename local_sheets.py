@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+AEPS Health Dashboard - Local Google Sheets stand-in
+Serves recorded worksheets from CSV fixtures behind the subset of the
+pygsheets client the dashboard uses (values:batchGet, Drive files.get for
+revision checks, open_by_key / worksheet_by_title / get_as_df), with a
+configurable per-call latency so the Sheets pipeline can be regression-tested
+and benchmarked offline.
+
+Fixtures are one folder per spreadsheet ID, one CSV of formatted cell values
+per worksheet (first row = header):
+    sheets_fixtures/1HaW-pC5niZNm0_ii4zoXG-xR781dmDmbPjQf6W_b7Y8/Dashboard.csv
+    sheets_fixtures/1XyTNR14JlkM_7uHEeoQa68mLgeiAZTaCq9vR-VCff4o/login Success Rate.csv
+
+Usage:
+    python local_sheets.py record --spreadsheet <url-or-id> --worksheet Dashboard
+    python local_sheets.py bench --latency-ms 150
+"""
+
+import argparse
+import csv
+import hashlib
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+from sheets_session import (SHEETS_STATS, WorksheetNotFound, a1_sheet_range, get_worksheet_df,
+                            reset_sheets_session, spreadsheet_id_from_url, values_to_dataframe)
+
+DEFAULT_FIXTURES_DIR = os.getenv('SHEETS_LOCAL_FIXTURES', 'sheets_fixtures')
+DEFAULT_LATENCY_MS = float(os.getenv('SHEETS_LOCAL_LATENCY_MS', '0'))
+
+_local_client_lock = threading.Lock()
+_local_clients = {}
+
+
+def title_from_range(value_range):
+    """Worksheet title from an A1 range such as 'login Success Rate'!A1:Z"""
+    title = value_range.split('!')[0]
+    if title.startswith("'") and title.endswith("'"):
+        title = title[1:-1].replace("''", "'")
+    return title
+
+
+def read_values(path):
+    """Cell values of a fixture CSV, with trailing empty cells dropped like the Sheets API"""
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = [list(row) for row in csv.reader(f)]
+    for row in rows:
+        while row and row[-1] == '':
+            row.pop()
+    while rows and not rows[-1]:
+        rows.pop()
+    return rows
+
+
+class LocalWorksheet:
+    """Worksheet stand-in"""
+
+    def __init__(self, client, spreadsheet_id, title):
+        self._client = client
+        self.spreadsheet_id = spreadsheet_id
+        self.title = title
+
+    def get_all_values(self, *args, **kwargs):
+        self._client.simulate_call('get_all_values')
+        return self._client.worksheet_values(self.spreadsheet_id, self.title)
+
+    def get_as_df(self, *args, **kwargs):
+        return values_to_dataframe(self.get_all_values())
+
+
+class LocalSpreadsheet:
+    """Spreadsheet handle stand-in"""
+
+    def __init__(self, client, spreadsheet_id):
+        self._client = client
+        self.id = spreadsheet_id
+        self.title = spreadsheet_id
+
+    def worksheets(self):
+        return [LocalWorksheet(self._client, self.id, title) for title in self._client.worksheet_titles(self.id)]
+
+    def worksheet_by_title(self, title):
+        if title not in self._client.worksheet_titles(self.id):
+            raise WorksheetNotFound(f"Worksheet '{title}' not found in local fixture {self.id}")
+        return LocalWorksheet(self._client, self.id, title)
+
+
+class LocalRequest:
+    """googleapiclient request stand-in"""
+
+    def __init__(self, client, call_name, payload_fn):
+        self._client = client
+        self._call_name = call_name
+        self._payload_fn = payload_fn
+
+    def execute(self, *args, **kwargs):
+        self._client.simulate_call(self._call_name)
+        return self._payload_fn()
+
+
+class LocalDriveFiles:
+    def __init__(self, client):
+        self._client = client
+
+    def get(self, fileId, fields=None, **kwargs):
+        return LocalRequest(self._client, 'drive_files_get', lambda: self._client.file_metadata(fileId))
+
+
+class LocalDriveService:
+    def __init__(self, client):
+        self._client = client
+
+    def files(self):
+        return LocalDriveFiles(self._client)
+
+
+class LocalSheetAPI:
+    """pygsheets SheetAPIWrapper stand-in"""
+
+    def __init__(self, client):
+        self._client = client
+
+    def values_batch_get(self, spreadsheet_id, value_ranges, *args, **kwargs):
+        self._client.simulate_call('values_batch_get')
+        return {
+            'spreadsheetId': spreadsheet_id,
+            'valueRanges': [
+                {
+                    'range': value_range,
+                    'majorDimension': 'ROWS',
+                    'values': self._client.worksheet_values(spreadsheet_id, title_from_range(value_range)),
+                }
+                for value_range in value_ranges
+            ],
+        }
+
+
+class LocalSheetsClient:
+    """pygsheets client stand-in over CSV fixtures"""
+
+    def __init__(self, fixtures_dir=DEFAULT_FIXTURES_DIR, latency_ms=DEFAULT_LATENCY_MS):
+        self.fixtures_dir = fixtures_dir
+        self.latency_ms = latency_ms
+        self.sheet = LocalSheetAPI(self)
+        self.drive = type('LocalDriveAPI', (), {})()
+        self.drive.service = LocalDriveService(self)
+        self.calls = {}
+
+    def simulate_call(self, name):
+        """Count an API call and sleep for the configured latency"""
+        self.calls[name] = self.calls.get(name, 0) + 1
+        if self.latency_ms > 0:
+            time.sleep(self.latency_ms / 1000)
+
+    def spreadsheet_dir(self, spreadsheet_id):
+        return os.path.join(self.fixtures_dir, spreadsheet_id)
+
+    def worksheet_path(self, spreadsheet_id, title):
+        return os.path.join(self.spreadsheet_dir(spreadsheet_id), f"{title}.csv")
+
+    def worksheet_titles(self, spreadsheet_id):
+        directory = self.spreadsheet_dir(spreadsheet_id)
+        if not os.path.isdir(directory):
+            raise LookupError(f"No local Sheets fixture for spreadsheet {spreadsheet_id}")
+        return sorted(name[:-len('.csv')] for name in os.listdir(directory) if name.endswith('.csv'))
+
+    def worksheet_values(self, spreadsheet_id, title):
+        path = self.worksheet_path(spreadsheet_id, title)
+        if not os.path.exists(path):
+            # Same failure as the API: one bad range fails the whole batch
+            raise WorksheetNotFound(f"Unable to parse range: {a1_sheet_range(title)}")
+        return read_values(path)
+
+    def file_metadata(self, spreadsheet_id):
+        """Drive metadata derived from the fixture files' modification times"""
+        titles = self.worksheet_titles(spreadsheet_id)
+        mtimes = [os.stat(self.worksheet_path(spreadsheet_id, title)).st_mtime_ns for title in titles]
+        modified = datetime.fromtimestamp(max(mtimes, default=0) / 1e9, tz=timezone.utc)
+        version = hashlib.sha1(repr(list(zip(titles, mtimes))).encode('utf-8')).hexdigest()[:12]
+        return {'id': spreadsheet_id, 'modifiedTime': modified.isoformat(), 'version': version}
+
+    def open_by_key(self, key):
+        self.simulate_call('open_by_key')
+        self.worksheet_titles(key)
+        return LocalSpreadsheet(self, key)
+
+    def open_by_url(self, url):
+        return self.open_by_key(spreadsheet_id_from_url(url))
+
+
+def get_local_sheets_client(fixtures_dir=DEFAULT_FIXTURES_DIR, latency_ms=DEFAULT_LATENCY_MS):
+    """Process-wide stand-in client per fixtures directory and latency"""
+    with _local_client_lock:
+        key = (os.path.abspath(fixtures_dir), latency_ms)
+        if key not in _local_clients:
+            _local_clients[key] = LocalSheetsClient(fixtures_dir, latency_ms)
+        return _local_clients[key]
+
+
+def record_worksheets(gc, url_or_key, titles, fixtures_dir=DEFAULT_FIXTURES_DIR):
+    """Save live worksheets (formatted values) as CSV fixtures"""
+    spreadsheet_id = spreadsheet_id_from_url(url_or_key)
+    response = gc.sheet.values_batch_get(spreadsheet_id, [a1_sheet_range(title) for title in titles])
+    value_ranges = response.get('valueRanges', []) if isinstance(response, dict) else response
+
+    directory = os.path.join(fixtures_dir, spreadsheet_id)
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for title, value_range in zip(titles, value_ranges):
+        path = os.path.join(directory, f"{title}.csv")
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            csv.writer(f).writerows(value_range.get('values', []))
+        paths.append(path)
+    return paths
+
+
+def run_benchmark(client, rounds=3):
+    """Cold and warm load of every fixture worksheet through the Sheets session"""
+    spreadsheets = sorted(name for name in os.listdir(client.fixtures_dir)
+                          if os.path.isdir(os.path.join(client.fixtures_dir, name)))
+    if not spreadsheets:
+        print(f"⚠️ No spreadsheets under {client.fixtures_dir}")
+        return 1
+
+    from sheets_session import register_worksheets
+    for spreadsheet_id in spreadsheets:
+        register_worksheets(spreadsheet_id, client.worksheet_titles(spreadsheet_id))
+
+    print(f"{'Round':10} {'Seconds':>9} {'Rows':>8}  API calls")
+    print("-" * 70)
+    for round_no in range(rounds):
+        if round_no == 0:
+            reset_sheets_session()
+        client.calls.clear()
+        started = time.perf_counter()
+        rows = 0
+        for spreadsheet_id in spreadsheets:
+            for title in client.worksheet_titles(spreadsheet_id):
+                rows += len(get_worksheet_df(client, spreadsheet_id, title, copy=False))
+        elapsed = time.perf_counter() - started
+        label = 'cold' if round_no == 0 else f'warm {round_no}'
+        print(f"{label:10} {elapsed:9.3f} {rows:8}  {dict(client.calls)}")
+
+    print(f"\nSession stats: {SHEETS_STATS}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Google Sheets stand-in")
+    parser.add_argument('--fixtures', default=DEFAULT_FIXTURES_DIR, help="Fixtures directory")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    record = subparsers.add_parser('record', help="Record live worksheets as fixtures")
+    record.add_argument('--spreadsheet', required=True, help="Spreadsheet URL or ID")
+    record.add_argument('--worksheet', action='append', required=True, help="Worksheet title (repeatable)")
+    record.add_argument('--credentials', default='credentials.json', help="Service account file")
+
+    bench = subparsers.add_parser('bench', help="Benchmark the Sheets pipeline against the fixtures")
+    bench.add_argument('--latency-ms', type=float, default=DEFAULT_LATENCY_MS, help="Simulated latency per API call")
+    bench.add_argument('--rounds', type=int, default=3, help="Load rounds (first one is cold)")
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        from sheets_session import authorize_sheets
+        gc = authorize_sheets(service_file=args.credentials)
+        if gc is None:
+            print("❌ pygsheets is not installed")
+            return 1
+        for path in record_worksheets(gc, args.spreadsheet, args.worksheet, args.fixtures):
+            print(f"✅ Recorded {path}")
+        return 0
+
+    return run_benchmark(LocalSheetsClient(args.fixtures, args.latency_ms), args.rounds)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+AEPS Health Dashboard - Summary Table Provisioning
+Creates and incrementally maintains the agent-month summary table that the
+cash product, stable users and distributor churn tiles read instead of
+re-grouping csp_monthly_timeline on every refresh.
+
+Usage:
+    python provision_summary_tables.py                 # refresh the last 2 months
+    python provision_summary_tables.py --months 6      # refresh a wider window
+    python provision_summary_tables.py --full-refresh  # rebuild the whole table
+    python provision_summary_tables.py --print-sql     # print SQL without running it
+"""
+
+import argparse
+import os
+import sys
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Columns produced per (agent_id, month_start) - shared by the provisioning
+# job and the dashboard's raw-table fallback so both paths stay identical
+SUMMARY_COLUMNS = [
+    'cash_gtv', 'cash_txn_cnt', 'cash_out_gtv', 'm2b', 'total_gtv_amt',
+    'aeps_gtv', 'aeps_txn_cnt', 'cashin_txn_sma', 'cashout_txn_sma',
+    'm2b_txn_sma', 'txn_sma'
+]
+
+MONTH_START_SQL = "DATE_TRUNC(PARSE_DATE('%Y%m', CAST(year_month AS STRING)), MONTH)"
+
+
+def table_ref(dataset, table):
+    """Get full table reference using environment variables"""
+    project_id = os.getenv("BIGQUERY_PROJECT_ID", "spicemoney-dwh")
+    return f"`{project_id}.{dataset}.{table}`"
+
+
+def source_table_ref():
+    """Raw csp_monthly_timeline table the summary is built from"""
+    return table_ref(os.getenv('BIGQUERY_DATASET_ANALYTICS', 'analytics_dwh'),
+                     os.getenv('CSP_MONTHLY_TIMELINE_TABLE', 'csp_monthly_timeline'))
+
+
+def summary_table_ref():
+    """Agent-month summary table maintained by this script"""
+    return table_ref(os.getenv('BIGQUERY_DATASET_ANALYTICS', 'analytics_dwh'),
+                     os.getenv('CSP_AGENT_MONTH_SUMMARY_TABLE', 'csp_agent_month_summary'))
+
+
+def build_agent_month_rollup_sql(source_table, start_date_sql, end_date_sql=None):
+    """Per agent-month GTV buckets aggregated straight from csp_monthly_timeline"""
+    month_filter = f"PARSE_DATE('%Y%m', CAST(year_month AS STRING)) >= {start_date_sql}"
+    if end_date_sql:
+        month_filter = (f"PARSE_DATE('%Y%m', CAST(year_month AS STRING)) "
+                        f"BETWEEN {start_date_sql} AND {end_date_sql}")
+
+    return f"""
+        SELECT
+          agent_id,
+          {MONTH_START_SQL} AS month_start,
+          -- Cash in: DMT, CMS, BBPS, Recharge
+          COALESCE(SUM(dmt_gtv_success + cms_gtv_success + bbps_gtv_success + recharge_gtv_success), 0) AS cash_gtv,
+          COALESCE(SUM(dmt_txn_cnt_success + cms_txn_cnt_success + bbps_txn_cnt_success + recharge_txn_cnt_success), 0) AS cash_txn_cnt,
+          -- Cash out: AEPS, Aadhaar Pay, mATM
+          COALESCE(SUM(aeps_gtv_success + ap_gtv_success + matm_gtv_success), 0) AS cash_out_gtv,
+          COALESCE(SUM(m2b_gtv_success), 0) AS m2b,
+          COALESCE(SUM(total_gtv_amt), 0) AS total_gtv_amt,
+          COALESCE(SUM(aeps_gtv_success), 0) AS aeps_gtv,
+          COALESCE(SUM(aeps_txn_cnt_success), 0) AS aeps_txn_cnt,
+          -- txn flags (monthly level)
+          CASE WHEN SUM(dmt_gtv_success + cms_gtv_success + bbps_gtv_success + recharge_gtv_success) > 0 THEN 1 ELSE 0 END AS cashin_txn_sma,
+          CASE WHEN SUM(aeps_gtv_success + ap_gtv_success + matm_gtv_success) > 0 THEN 1 ELSE 0 END AS cashout_txn_sma,
+          CASE WHEN SUM(m2b_gtv_success) > 0 THEN 1 ELSE 0 END AS m2b_txn_sma,
+          CASE WHEN SUM(total_gtv_amt) > 0 THEN 1 ELSE 0 END AS txn_sma
+        FROM {source_table}
+        WHERE {month_filter}
+        GROUP BY agent_id, {MONTH_START_SQL}
+        """
+
+
+def build_summary_select_sql(summary_table, start_date_sql, end_date_sql=None):
+    """Same columns as build_agent_month_rollup_sql, read from the summary table"""
+    month_filter = f"month_start >= {start_date_sql}"
+    if end_date_sql:
+        month_filter = f"month_start BETWEEN {start_date_sql} AND {end_date_sql}"
+
+    return f"""
+        SELECT
+          agent_id,
+          month_start,
+          {', '.join(SUMMARY_COLUMNS)}
+        FROM {summary_table}
+        WHERE {month_filter}
+        """
+
+
+def build_full_refresh_sql(source_table, summary_table):
+    """Rebuild the whole summary table, partitioned by month and clustered by agent"""
+    rollup = build_agent_month_rollup_sql(source_table, "DATE '2000-01-01'")
+    return f"""
+        CREATE OR REPLACE TABLE {summary_table}
+        PARTITION BY DATE_TRUNC(month_start, MONTH)
+        CLUSTER BY agent_id
+        AS
+        SELECT *, CURRENT_TIMESTAMP() AS updated_at
+        FROM ({rollup})
+        """
+
+
+def build_incremental_sql(source_table, summary_table, months=2):
+    """Re-aggregate the trailing months and MERGE them into the summary table"""
+    cutoff = f"DATE_SUB(DATE_TRUNC(CURRENT_DATE(), MONTH), INTERVAL {int(months)} MONTH)"
+    rollup = build_agent_month_rollup_sql(source_table, cutoff)
+    update_set = ',\n          '.join(f"{col} = S.{col}" for col in SUMMARY_COLUMNS)
+    insert_cols = ', '.join(['agent_id', 'month_start'] + SUMMARY_COLUMNS + ['updated_at'])
+    insert_vals = ', '.join(['S.agent_id', 'S.month_start'] + [f"S.{col}" for col in SUMMARY_COLUMNS] + ['CURRENT_TIMESTAMP()'])
+    return f"""
+        -- First run: create the empty table with the rollup's column types
+        CREATE TABLE IF NOT EXISTS {summary_table}
+        PARTITION BY DATE_TRUNC(month_start, MONTH)
+        CLUSTER BY agent_id
+        AS
+        SELECT *, CURRENT_TIMESTAMP() AS updated_at
+        FROM ({rollup})
+        WHERE FALSE;
+
+        MERGE {summary_table} T
+        USING ({rollup}) S
+        ON T.agent_id = S.agent_id AND T.month_start = S.month_start
+        WHEN MATCHED THEN UPDATE SET
+          {update_set},
+          updated_at = CURRENT_TIMESTAMP()
+        WHEN NOT MATCHED BY TARGET THEN
+          INSERT ({insert_cols})
+          VALUES ({insert_vals})
+        WHEN NOT MATCHED BY SOURCE AND T.month_start >= {cutoff} THEN
+          DELETE;
+        """
+
+
+def get_client():
+    """BigQuery client from the same service account file the dashboard uses"""
+    from google.cloud import bigquery
+    from google.oauth2 import service_account
+
+    credentials_file = os.getenv("BIGQUERY_CREDENTIALS_FILE", "spicemoney-dwh.json")
+    project_id = os.getenv("BIGQUERY_PROJECT_ID", "spicemoney-dwh")
+
+    if not os.path.isabs(credentials_file) and not os.path.exists(credentials_file):
+        credentials_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), credentials_file)
+
+    if os.path.exists(credentials_file):
+        credentials = service_account.Credentials.from_service_account_file(
+            credentials_file,
+            scopes=["https://www.googleapis.com/auth/bigquery",
+                    "https://www.googleapis.com/auth/cloud-platform"]
+        )
+        return bigquery.Client(credentials=credentials, project=project_id)
+
+    # Fall back to application default credentials (e.g. scheduled job on GCP)
+    return bigquery.Client(project=project_id)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Provision the agent-month summary table")
+    parser.add_argument('--months', type=int, default=2,
+                        help="Trailing months to re-aggregate on an incremental run (default: 2)")
+    parser.add_argument('--full-refresh', action='store_true',
+                        help="Rebuild the summary table from the full timeline")
+    parser.add_argument('--print-sql', action='store_true',
+                        help="Print the SQL instead of running it")
+    args = parser.parse_args()
+
+    source_table = source_table_ref()
+    summary_table = summary_table_ref()
+
+    if args.full_refresh:
+        sql = build_full_refresh_sql(source_table, summary_table)
+    else:
+        sql = build_incremental_sql(source_table, summary_table, args.months)
+
+    if args.print_sql:
+        print(sql)
+        return 0
+
+    mode = "full refresh" if args.full_refresh else f"incremental ({args.months} months)"
+    print(f"🔄 Provisioning {summary_table} from {source_table} - {mode}")
+
+    try:
+        client = get_client()
+        job = client.query(sql)
+        job.result()
+    except Exception as e:
+        print(f"❌ Provisioning failed: {str(e)}")
+        return 1
+
+    processed_gb = (job.total_bytes_processed or 0) / 1024 ** 3
+    print(f"✅ {summary_table} is up to date ({processed_gb:.2f} GB processed)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
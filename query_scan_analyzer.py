@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+AEPS Health Dashboard - Query Scan Analyzer
+Dry-runs the dashboard's registered BigQuery queries and reports, per tile,
+the tables touched, the estimated bytes scanned and whether each table is
+filtered on its partition column (or only through a wrapping function such
+as DATE(col) / PARSE_DATE(CAST(col AS STRING)), which defeats pruning).
+
+Results are appended to a JSON-lines report so scan efficiency can be
+tracked over time.
+
+Usage:
+    python query_scan_analyzer.py                      # summarise the report
+    python query_scan_analyzer.py --offline            # re-analyze captured SQL without BigQuery
+    python query_scan_analyzer.py --offline --partition prod_dwh.aeps_trans_res=log_date_time
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+from datetime import datetime
+from types import SimpleNamespace
+
+DEFAULT_REPORT_FILE = os.getenv("QUERY_SCAN_REPORT_FILE", "query_scan_report.jsonl")
+
+# Functions that hide the partition column from the pruning planner
+WRAPPING_FUNCTIONS = (
+    'DATE', 'DATETIME', 'TIMESTAMP', 'CAST', 'SAFE_CAST', 'PARSE_DATE',
+    'DATE_TRUNC', 'TIMESTAMP_TRUNC', 'FORMAT_DATE', 'EXTRACT', 'STRING'
+)
+
+COMPARISON_SQL = r"(?:=|<>|!=|<=|>=|<|>|\bBETWEEN\b|\bIN\b)"
+
+TABLE_REF_PATTERN = re.compile(
+    r"\b(?:FROM|JOIN)\s+`?([A-Za-z0-9_\-]+(?:\.[A-Za-z0-9_\-]+){1,2})`?",
+    re.IGNORECASE
+)
+
+
+def short_table_name(table):
+    """dataset.table part of a (possibly project-qualified) table reference"""
+    parts = table.strip('`').split('.')
+    return '.'.join(parts[-2:])
+
+
+def extract_tables(sql):
+    """Tables referenced in FROM / JOIN clauses (CTE names are skipped)"""
+    tables = []
+    for match in TABLE_REF_PATTERN.finditer(sql):
+        name = short_table_name(match.group(1))
+        if name not in tables:
+            tables.append(name)
+    return tables
+
+
+def classify_partition_filter(sql, column):
+    """How a query filters on a partition column: direct, wrapped or absent"""
+    if not column:
+        return 'unpartitioned'
+
+    column_sql = rf"(?:\b\w+\.)?{re.escape(column)}\b"
+    wrapping_prefix = re.compile(rf"\b(?:{'|'.join(WRAPPING_FUNCTIONS)})\s*\(\s*(?:'[^']*'\s*,\s*)?(?:\w+\s*\(\s*)?$", re.IGNORECASE)
+
+    # Any comparison on the bare column (not inside a wrapping function) lets BigQuery prune
+    for pattern in (rf"{column_sql}\s*{COMPARISON_SQL}", rf"{COMPARISON_SQL}\s*{column_sql}(?!\s*\()"):
+        for match in re.finditer(pattern, sql, re.IGNORECASE):
+            column_match = re.search(column_sql, match.group(0), re.IGNORECASE)
+            start = match.start() + column_match.start()
+            if not wrapping_prefix.search(sql[max(0, start - 60):start]):
+                return 'direct'
+
+    wrapped = re.search(
+        rf"\b(?:{'|'.join(WRAPPING_FUNCTIONS)})\s*\(\s*(?:'[^']*'\s*,\s*)?(?:\w+\s*\(\s*)?{column_sql}",
+        sql, re.IGNORECASE
+    )
+    if wrapped:
+        return 'wrapped'
+    return 'absent'
+
+
+def get_partition_column(client, table):
+    """Partition column of a live table (None when it is not partitioned)"""
+    try:
+        table_obj = client.get_table(table)
+    except Exception:
+        return None
+
+    if table_obj.time_partitioning is not None:
+        return table_obj.time_partitioning.field or '_PARTITIONTIME'
+    if table_obj.range_partitioning is not None:
+        return table_obj.range_partitioning.field
+    return None
+
+
+def dry_run(client, sql, job_config=None):
+    """Estimated bytes and referenced tables from a BigQuery dry run"""
+    # Keep the query parameters of parameterized tile queries
+    query_parameters = list(job_config.query_parameters) if job_config is not None else []
+    try:
+        from google.cloud import bigquery
+        job_config = bigquery.QueryJobConfig(dry_run=True, use_query_cache=False, query_parameters=query_parameters)
+    except ImportError:
+        # Local stand-in client (local_bigquery.py) only reads these attributes
+        job_config = SimpleNamespace(dry_run=True, use_query_cache=False, query_parameters=query_parameters)
+    job = client.query(sql, job_config=job_config)
+    referenced = [f"{t.project}.{t.dataset_id}.{t.table_id}" for t in (job.referenced_tables or [])]
+    return job.total_bytes_processed, referenced
+
+
+# Registered tile queries: latest SQL and job config per query name. Kept here rather
+# than in the Streamlit script because module globals there are reset on every rerun;
+# this module is imported once per process, so queries registered by cached loaders
+# stay listed after the loaders stop running.
+QUERY_CATALOG = {}
+QUERY_JOB_CONFIGS = {}
+
+
+def register_query(query_name, sql, job_config=None):
+    """Record the latest SQL and job config of a tile query"""
+    QUERY_CATALOG[query_name] = sql
+    QUERY_JOB_CONFIGS[query_name] = job_config
+
+
+def analyze_registered(client=None, partition_columns=None):
+    """analyze_query over every registered query"""
+    return [analyze_query(query_name, sql, client, partition_columns, job_config=QUERY_JOB_CONFIGS.get(query_name))
+            for query_name, sql in list(QUERY_CATALOG.items())]
+
+
+def analyze_query(tile, sql, client=None, partition_columns=None, job_config=None):
+    """Analyze one registered query - live dry run when a client is given, static otherwise"""
+    partition_columns = dict(partition_columns or {})
+    record = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'tile': tile,
+        'mode': 'live' if client is not None else 'offline',
+        'sql_hash': hashlib.sha1(sql.encode('utf-8')).hexdigest()[:12],
+        'estimated_bytes': None,
+        'tables': [],
+        'error': None,
+        'sql': sql,
+    }
+
+    tables = extract_tables(sql)
+    if client is not None:
+        try:
+            estimated_bytes, referenced = dry_run(client, sql, job_config)
+            record['estimated_bytes'] = estimated_bytes
+            for full_name in referenced:
+                name = short_table_name(full_name)
+                if name not in tables:
+                    tables.append(name)
+                if name not in partition_columns:
+                    partition_columns[name] = get_partition_column(client, full_name)
+        except Exception as e:
+            record['error'] = str(e)
+
+    for name in tables:
+        column = partition_columns.get(name)
+        record['tables'].append({
+            'table': name,
+            'partition_column': column,
+            'filter': classify_partition_filter(sql, column) if name in partition_columns else 'unknown'
+        })
+    return record
+
+
+def append_report(records, report_file=DEFAULT_REPORT_FILE):
+    """Append analysis records to the JSON-lines report"""
+    with open(report_file, 'a', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, default=str) + '\n')
+
+
+def load_report(report_file=DEFAULT_REPORT_FILE):
+    """Read all records from the JSON-lines report"""
+    if not os.path.exists(report_file):
+        return []
+    with open(report_file, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def known_partition_columns(records):
+    """Partition columns learned from earlier live dry runs"""
+    columns = {}
+    for record in records:
+        for table in record.get('tables', []):
+            if table.get('filter') != 'unknown':
+                columns[table['table']] = table.get('partition_column')
+    return columns
+
+
+def format_bytes(num_bytes):
+    """Human readable byte count"""
+    if num_bytes is None:
+        return "n/a"
+    for unit in ('B', 'KB', 'MB', 'GB', 'TB'):
+        if num_bytes < 1024 or unit == 'TB':
+            return f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+
+
+def print_summary(records):
+    """Latest result per tile, with the change since the previous live run"""
+    by_tile = {}
+    for record in records:
+        by_tile.setdefault(record['tile'], []).append(record)
+
+    print(f"{'Tile':32} {'Estimated scan':>15} {'Change':>10}  Partition filters")
+    print("-" * 100)
+    for tile in sorted(by_tile):
+        history = by_tile[tile]
+        latest = history[-1]
+        live = [r for r in history if r.get('estimated_bytes') is not None]
+        change = ""
+        if len(live) >= 2 and live[-2]['estimated_bytes']:
+            pct = (live[-1]['estimated_bytes'] - live[-2]['estimated_bytes']) / live[-2]['estimated_bytes'] * 100
+            change = f"{pct:+.0f}%"
+        estimated = live[-1]['estimated_bytes'] if live else None
+        filters = ", ".join(
+            f"{'✅' if t['filter'] in ('direct', 'unpartitioned') else '⚠️ '}{t['table']}({t['filter']})"
+            for t in latest.get('tables', [])
+        )
+        print(f"{tile:32} {format_bytes(estimated):>15} {change:>10}  {filters}")
+        if latest.get('error'):
+            print(f"{'':32} ❌ {latest['error'][:120]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report scan efficiency of the dashboard's BigQuery queries")
+    parser.add_argument('--report', default=DEFAULT_REPORT_FILE, help="JSON-lines report file")
+    parser.add_argument('--offline', action='store_true',
+                        help="Re-analyze the captured SQL of each tile without BigQuery")
+    parser.add_argument('--partition', action='append', default=[], metavar='TABLE=COLUMN',
+                        help="Partition column override for offline analysis (dataset.table=column)")
+    args = parser.parse_args()
+
+    records = load_report(args.report)
+    if not records:
+        print(f"⚠️ No records in {args.report}. Run the dashboard with QUERY_ANALYZER_MODE=true first.")
+        return 1
+
+    if args.offline:
+        partition_columns = known_partition_columns(records)
+        for override in args.partition:
+            table, _, column = override.partition('=')
+            partition_columns[short_table_name(table)] = column or None
+
+        latest_sql = {}
+        for record in records:
+            latest_sql[record['tile']] = record['sql']
+
+        new_records = [analyze_query(tile, sql, partition_columns=partition_columns)
+                       for tile, sql in latest_sql.items()]
+        append_report(new_records, args.report)
+        records.extend(new_records)
+
+    print_summary(records)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+"""
+AEPS Health Dashboard - Typed Sheets ingestion
+Each worksheet the dashboard reads has a declarative schema (column types,
+index column, wide numeric columns). A worksheet is converted to a typed
+DataFrame once per change in its values - percent signs and thousands
+separators are stripped, dates parsed - and views read numeric columns
+directly instead of re-cleaning strings on every rerun.
+
+Typed frames are kept in memory per worksheet and, when SHEETS_SNAPSHOT_DIR
+is set, also written as Parquet snapshots (requires pyarrow).
+
+Column types:
+    number - float64 (whole-number columns too); '%' and ',' are stripped, percentages stay in percent units
+    date   - datetime64 (optional 'formats' entry per column), unparsable -> NaT
+    string - stripped text, missing -> ''
+"""
+
+import os
+import re
+import threading
+
+import pandas as pd
+
+from sheets_session import SHEETS_STATS, get_worksheet_df, get_worksheet_digest, spreadsheet_id_from_url
+
+SNAPSHOT_DIR = os.getenv('SHEETS_SNAPSHOT_DIR', '')
+
+# Schema for worksheets without an entry - the old generic loader's date handling
+DEFAULT_SCHEMA = {'columns': {'date': 'date'}}
+
+WORKSHEET_SCHEMAS = {
+    # Anomaly detection tab (anomaly spreadsheet)
+    'Dashboard': {
+        'columns': {
+            'Metric': 'string',
+            'FTD Data': 'number',
+            'Median 90 Day': 'number',
+            '-2STD': 'number',
+            '2STD': 'number',
+            'Date': 'string',
+            'Anamoly Detection': 'string',
+        },
+    },
+    # Metrics spreadsheet tabs
+    'login Success Rate': {'columns': {'date': 'date'}},
+    'chatbot': {'columns': {'date': 'date'}},
+    'sales_iteration': {'columns': {'date': 'date'}},
+    'rfm': {
+        'columns': {
+            'date': 'date',
+            'total_caught_per': 'number',
+            'app_caught_per': 'number',
+            'web_caught_per': 'number',
+            'fraud_total': 'number',
+            'total_fr_amt': 'number',
+            'APP_WEB_caught_amt': 'number',
+        },
+    },
+    # Product metrics (bugs spreadsheet): one row per metric, one column per month
+    'Sheet2': {
+        'index': 'Metric',
+        'wide': 'number',
+    },
+}
+
+# Typed frames by (spreadsheet ID, title): {'digest', 'data'}
+TYPED_WORKSHEETS = {}
+_typed_lock = threading.Lock()
+
+
+def parse_numbers(series):
+    """'17.33%' -> 17.33, '5,015.67' -> 5015.67, blanks/text -> NaN - always float64, whole numbers included"""
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype(float)
+    cleaned = series.astype(str).str.replace('%', '', regex=False).str.replace(',', '', regex=False).str.strip()
+    return pd.to_numeric(cleaned, errors='coerce').astype(float)
+
+
+def convert_column(series, column_type, date_format=None):
+    """Convert one column to its schema type"""
+    if column_type == 'number':
+        return parse_numbers(series)
+    if column_type == 'date':
+        return pd.to_datetime(series, format=date_format, errors='coerce')
+    if column_type == 'string':
+        return series.fillna('').astype(str).str.strip()
+    raise ValueError(f"Unknown column type: {column_type}")
+
+
+def parse_numeric_frame(df):
+    """Every column as numbers (wide month tables)"""
+    return df.apply(parse_numbers)
+
+
+def ingest_worksheet(df, schema):
+    """Raw worksheet DataFrame -> typed DataFrame according to a schema"""
+    typed = df.copy()
+    typed.columns = [str(col).strip() for col in typed.columns]
+
+    formats = schema.get('formats', {})
+    for column, column_type in schema.get('columns', {}).items():
+        if column in typed.columns:
+            typed[column] = convert_column(typed[column], column_type, formats.get(column))
+
+    index = schema.get('index')
+    if index and index in typed.columns:
+        typed[index] = typed[index].astype(str).str.strip()
+        typed = typed.set_index(index)
+
+    if schema.get('wide'):
+        typed = typed.apply(lambda col: convert_column(col, schema['wide']))
+
+    return typed
+
+
+def snapshot_path(spreadsheet_id, title):
+    """Parquet snapshot location for a worksheet"""
+    safe_title = re.sub(r'[^A-Za-z0-9_-]+', '_', title)
+    return os.path.join(SNAPSHOT_DIR, spreadsheet_id, f"{safe_title}.parquet")
+
+
+def write_snapshot(spreadsheet_id, title, typed):
+    """Persist a typed worksheet as Parquet (skipped without SHEETS_SNAPSHOT_DIR or pyarrow)"""
+    if not SNAPSHOT_DIR:
+        return None
+    path = snapshot_path(spreadsheet_id, title)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        typed.to_parquet(path)
+        return path
+    except Exception as e:
+        print(f"⚠️ Could not write Sheets snapshot {path}: {e}")
+        return None
+
+
+def load_typed_worksheet(gc, url_or_key, title, schema=None):
+    """Typed worksheet - ingested again only when the sheet's values change"""
+    spreadsheet_id = spreadsheet_id_from_url(url_or_key)
+    raw = get_worksheet_df(gc, spreadsheet_id, title, copy=False)
+    digest = get_worksheet_digest(spreadsheet_id, title)
+
+    with _typed_lock:
+        cached = TYPED_WORKSHEETS.get((spreadsheet_id, title))
+        if cached is not None and digest is not None and cached['digest'] == digest:
+            return cached['data'].copy()
+
+        SHEETS_STATS['ingests'] += 1
+        typed = ingest_worksheet(raw, schema or WORKSHEET_SCHEMAS.get(title, DEFAULT_SCHEMA))
+        TYPED_WORKSHEETS[(spreadsheet_id, title)] = {'digest': digest, 'data': typed}
+        write_snapshot(spreadsheet_id, title, typed)
+        return typed.copy()
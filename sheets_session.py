@@ -0,0 +1,274 @@
+"""
+AEPS Health Dashboard - Google Sheets session
+Keeps one authorized pygsheets client per process and one Spreadsheet handle
+per spreadsheet ID. The client's credentials cache the OAuth token (refreshed
+only when it expires) and its HTTP session keeps connections open, so a
+Sheets-backed tile load no longer pays an OAuth exchange plus a spreadsheet
+metadata fetch every time.
+
+Worksheets registered for the same spreadsheet are fetched together in one
+values:batchGet call and parked in a per-worksheet DataFrame cache, so the
+first consumer of a spreadsheet warms the cache for all the others.
+
+When a cached worksheet expires, the spreadsheet's Drive modifiedTime /
+revision is checked first (one cheap files.get). Unchanged spreadsheets keep
+their cached DataFrames with a fresh TTL; changed ones are re-downloaded and
+only worksheets whose values differ are re-parsed.
+
+Lives outside the Streamlit script because module globals there are reset on
+every rerun; this module is imported once per process.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+import pandas as pd
+
+try:
+    import pygsheets
+    WorksheetNotFound = pygsheets.WorksheetNotFound
+except ImportError:
+    pygsheets = None
+
+    class WorksheetNotFound(Exception):
+        """Stand-in for pygsheets.WorksheetNotFound when pygsheets is not installed"""
+
+SHEETS_SCOPES = (
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive",
+)
+
+SPREADSHEET_ID_PATTERN = re.compile(r"/spreadsheets/d/([A-Za-z0-9_-]+)")
+
+_session_lock = threading.RLock()
+_sheets_client = None
+_sheets_client_source = None
+
+# Spreadsheet handles by spreadsheet ID
+SPREADSHEET_HANDLES = {}
+
+SHEETS_CACHE_TTL = float(os.getenv('SHEETS_CACHE_TTL_SECONDS', '3600'))
+
+# Worksheet titles fetched together per spreadsheet ID
+SPREADSHEET_BATCHES = {}
+
+# Parsed worksheets by (spreadsheet ID, title): {'data', 'fetched_at', 'expires_at', 'revision', 'digest'}
+WORKSHEET_FRAMES = {}
+
+# Drive revision checks are reused for this long so one page load makes one call per spreadsheet
+SHEETS_REVISION_CHECK_SECONDS = float(os.getenv('SHEETS_REVISION_CHECK_SECONDS', '60'))
+SPREADSHEET_REVISIONS = {}
+
+# Sheets API usage counters (batch fetches, Drive revision checks, DataFrame parses, typed ingests)
+SHEETS_STATS = {'batch_gets': 0, 'revision_checks': 0, 'parses': 0, 'ingests': 0}
+
+
+def spreadsheet_id_from_url(url_or_key):
+    """Spreadsheet ID from an edit URL (any gid) or a bare key"""
+    match = SPREADSHEET_ID_PATTERN.search(url_or_key)
+    return match.group(1) if match else url_or_key
+
+
+def authorize_sheets(credentials_info=None, service_file=None):
+    """Process-wide pygsheets client - authorized once per credentials source"""
+    global _sheets_client, _sheets_client_source
+
+    if pygsheets is None:
+        return None
+
+    source = f"info:{credentials_info.get('client_email')}" if credentials_info else f"file:{service_file}"
+    with _session_lock:
+        if _sheets_client is not None and _sheets_client_source == source:
+            return _sheets_client
+
+        if credentials_info:
+            # Build credentials in memory instead of writing the key to a temp file
+            from google.oauth2 import service_account
+            credentials = service_account.Credentials.from_service_account_info(
+                credentials_info, scopes=list(SHEETS_SCOPES)
+            )
+            client = pygsheets.authorize(custom_credentials=credentials)
+        elif service_file:
+            client = pygsheets.authorize(service_file=service_file)
+        else:
+            return None
+
+        _sheets_client = client
+        _sheets_client_source = source
+        SPREADSHEET_HANDLES.clear()
+        return client
+
+
+def open_spreadsheet(gc, url_or_key, refresh=False):
+    """Spreadsheet handle cached per spreadsheet ID"""
+    spreadsheet_id = spreadsheet_id_from_url(url_or_key)
+    with _session_lock:
+        handle = SPREADSHEET_HANDLES.get(spreadsheet_id)
+        if handle is None or refresh:
+            handle = gc.open_by_key(spreadsheet_id)
+            SPREADSHEET_HANDLES[spreadsheet_id] = handle
+        return handle
+
+
+def get_worksheet(gc, url_or_key, title):
+    """Worksheet from the cached handle, re-opening once if the tab list is out of date"""
+    try:
+        return open_spreadsheet(gc, url_or_key).worksheet_by_title(title)
+    except WorksheetNotFound:
+        return open_spreadsheet(gc, url_or_key, refresh=True).worksheet_by_title(title)
+
+
+def register_worksheets(url_or_key, titles):
+    """Declare the worksheets read from a spreadsheet so they are fetched in one batch"""
+    batch = SPREADSHEET_BATCHES.setdefault(spreadsheet_id_from_url(url_or_key), [])
+    for title in titles:
+        if title not in batch:
+            batch.append(title)
+
+
+def a1_sheet_range(title):
+    """A1 range covering a whole worksheet"""
+    return "'" + title.replace("'", "''") + "'"
+
+
+def numericise(value):
+    """Same number conversion as pygsheets get_as_df(numerize=True)"""
+    if value == '':
+        return value
+    try:
+        return int(value)
+    except ValueError:
+        try:
+            return float(value)
+        except ValueError:
+            return value
+
+
+def values_to_dataframe(values):
+    """DataFrame from a values range - first row is the header, like get_as_df()"""
+    if not values:
+        return pd.DataFrame()
+    header = [str(col) for col in values[0]]
+    width = len(header)
+    rows = [[numericise(cell) for cell in (row + [''] * (width - len(row)))[:width]] for row in values[1:]]
+    return pd.DataFrame(rows, columns=header)
+
+
+def batch_get_values(gc, url_or_key, titles):
+    """Raw cell values of several worksheets from a single values:batchGet"""
+    spreadsheet_id = spreadsheet_id_from_url(url_or_key)
+    SHEETS_STATS['batch_gets'] += 1
+    response = gc.sheet.values_batch_get(spreadsheet_id, [a1_sheet_range(title) for title in titles])
+    value_ranges = response.get('valueRanges', []) if isinstance(response, dict) else response
+    # Ranges come back in request order
+    return {title: value_range.get('values', []) for title, value_range in zip(titles, value_ranges)}
+
+
+def get_spreadsheet_revision(gc, spreadsheet_id):
+    """Drive (modifiedTime, headRevisionId or version) - one files.get per check window"""
+    cached = SPREADSHEET_REVISIONS.get(spreadsheet_id)
+    if cached is not None and time.time() - cached['checked_at'] < SHEETS_REVISION_CHECK_SECONDS:
+        return cached['revision']
+
+    SHEETS_STATS['revision_checks'] += 1
+    try:
+        meta = gc.drive.service.files().get(
+            fileId=spreadsheet_id,
+            fields='modifiedTime,headRevisionId,version',
+            supportsAllDrives=True
+        ).execute()
+        # Native Sheets have no headRevisionId; version increases on every edit
+        revision = (meta.get('modifiedTime'), meta.get('headRevisionId') or meta.get('version'))
+    except Exception as e:
+        print(f"⚠️ Revision check failed for spreadsheet {spreadsheet_id}: {e}")
+        revision = None
+
+    SPREADSHEET_REVISIONS[spreadsheet_id] = {'revision': revision, 'checked_at': time.time()}
+    return revision
+
+
+def values_digest(values):
+    """Fingerprint of a worksheet's raw values"""
+    return hashlib.sha1(json.dumps(values, separators=(',', ':')).encode('utf-8')).hexdigest()
+
+
+def store_worksheet_frame(spreadsheet_id, title, df, revision=None, digest=None):
+    """Cache a parsed worksheet for SHEETS_CACHE_TTL seconds"""
+    now = time.time()
+    WORKSHEET_FRAMES[(spreadsheet_id, title)] = {
+        'data': df,
+        'fetched_at': now,
+        'expires_at': now + SHEETS_CACHE_TTL,
+        'revision': revision,
+        'digest': digest,
+    }
+
+
+def extend_unchanged_frames(spreadsheet_id, revision):
+    """Push back the expiry of every cached worksheet still at this revision"""
+    expires_at = time.time() + SHEETS_CACHE_TTL
+    for (cached_id, _), entry in WORKSHEET_FRAMES.items():
+        if cached_id == spreadsheet_id and entry['revision'] == revision:
+            entry['expires_at'] = expires_at
+
+
+def refresh_spreadsheet(gc, spreadsheet_id, titles, revision):
+    """Re-download a changed spreadsheet, re-parsing only worksheets whose values changed"""
+    for title, values in batch_get_values(gc, spreadsheet_id, titles).items():
+        digest = values_digest(values)
+        entry = WORKSHEET_FRAMES.get((spreadsheet_id, title))
+        if entry is not None and entry['digest'] == digest:
+            df = entry['data']
+        else:
+            SHEETS_STATS['parses'] += 1
+            df = values_to_dataframe(values)
+        store_worksheet_frame(spreadsheet_id, title, df, revision, digest)
+
+
+def get_worksheet_df(gc, url_or_key, title, copy=True):
+    """Worksheet as a DataFrame - unchanged sheets are served from cache, changed ones re-fetched in one batch"""
+    spreadsheet_id = spreadsheet_id_from_url(url_or_key)
+    with _session_lock:
+        entry = WORKSHEET_FRAMES.get((spreadsheet_id, title))
+        if entry is not None and entry['expires_at'] > time.time():
+            return entry['data'].copy() if copy else entry['data']
+
+        revision = get_spreadsheet_revision(gc, spreadsheet_id)
+        if entry is not None and revision is not None and entry['revision'] == revision:
+            extend_unchanged_frames(spreadsheet_id, revision)
+            return entry['data'].copy() if copy else entry['data']
+
+        titles = list(SPREADSHEET_BATCHES.get(spreadsheet_id, []))
+        if title not in titles:
+            titles.append(title)
+
+        try:
+            refresh_spreadsheet(gc, spreadsheet_id, titles, revision)
+        except Exception as e:
+            # One bad range fails the whole batch - fall back to this worksheet alone
+            print(f"⚠️ Batch fetch failed for spreadsheet {spreadsheet_id}: {e}")
+            SHEETS_STATS['parses'] += 1
+            store_worksheet_frame(spreadsheet_id, title, get_worksheet(gc, spreadsheet_id, title).get_as_df())
+        df = WORKSHEET_FRAMES[(spreadsheet_id, title)]['data']
+        return df.copy() if copy else df
+
+
+def get_worksheet_digest(url_or_key, title):
+    """Fingerprint of a cached worksheet's values (None when unknown)"""
+    entry = WORKSHEET_FRAMES.get((spreadsheet_id_from_url(url_or_key), title))
+    return entry['digest'] if entry is not None else None
+
+
+def reset_sheets_session():
+    """Drop the cached client and handles (e.g. after rotating credentials)"""
+    global _sheets_client, _sheets_client_source
+    with _session_lock:
+        _sheets_client = None
+        _sheets_client_source = None
+        SPREADSHEET_HANDLES.clear()
+        WORKSHEET_FRAMES.clear()
+        SPREADSHEET_REVISIONS.clear()
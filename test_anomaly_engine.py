@@ -0,0 +1,109 @@
+"""
+Tests for anomaly_engine - the detectors, inverse metrics and the hourly tile spread.
+Run with: python -m pytest test_anomaly_engine.py
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from anomaly_engine import detect_anomalies, ewma_baseline, gap_spread
+from tile_registry import median_band_status
+
+# Transaction success hours 06:00-17:00 of a recorded day with a 10:00 outage dip
+RECORDED_HOURLY_FRAME = pd.DataFrame({
+    'hour_num': list(range(6, 18)),
+    'overall_success_rate': [92.4, 93.1, 93.6, 93.2, 88.9, 93.5, 93.9, 93.4, 92.9, 93.0, 92.1, 91.8],
+    'median_success_rate': [92.8, 93.0, 93.3, 93.4, 93.2, 93.3, 93.6, 93.5, 93.1, 93.2, 93.0, 92.6],
+})
+
+# HOURLY_MIN_SPREAD_PP in the dashboard
+HOURLY_MIN_SPREAD_PP = 0.5
+
+
+def test_hourly_spread_status_against_the_old_std_of_absolute_gaps():
+    frame = RECORDED_HOURLY_FRAME
+    current = frame['overall_success_rate'].iloc[-1]
+    median = frame['median_success_rate'].iloc[-1]
+
+    old_spread = (frame['overall_success_rate'] - frame['median_success_rate']).abs().std()
+    new_spread = gap_spread(frame['overall_success_rate'], frame['median_success_rate'], min_spread=HOURLY_MIN_SPREAD_PP)
+
+    # The outage hour inflated the old std; the MAD ignores it and the floor applies
+    assert old_spread == pytest.approx(1.1727, abs=1e-4)
+    assert new_spread == pytest.approx(HOURLY_MIN_SPREAD_PP)
+
+    # 0.8pp under the median: yellow under the old band, red under the new one
+    assert median_band_status(current, median, old_spread) == 'yellow'
+    assert median_band_status(current, median, new_spread) == 'red'
+
+    # Unchanged at the median and deep below it
+    for value in (median, median - 3.0):
+        assert median_band_status(value, median, old_spread) == median_band_status(value, median, new_spread)
+
+
+def test_gap_spread_needs_three_history_periods():
+    assert np.isnan(gap_spread([90.0, 91.0, 92.0], [90.0, 90.0, 90.0]))
+
+
+def test_mad_flat_history_uses_relative_spread_floor():
+    result = detect_anomalies([[10, 10, 10, 10, 10, 3], [10, 10, 10, 10, 10, 10.05]])
+    assert list(result['status']) == ['Below Range', 'Within Range']
+    assert result['spread'] == pytest.approx([0.1, 0.1])
+    assert result['score'][0] == pytest.approx(-70.0)
+
+
+def test_zero_spread_scores_are_infinite_or_nan():
+    result = detect_anomalies([[0, 0, 0, 0, 1], [0, 0, 0, 0, 0]])
+    assert result['score'][0] == np.inf
+    assert np.isnan(result['score'][1])
+
+
+def test_zscore_bounds_are_mean_plus_minus_k_sample_std():
+    result = detect_anomalies([10, 12, 14, 16, 20], method='zscore')
+    std = np.std([10, 12, 14, 16], ddof=1)
+    assert result['center'][0] == pytest.approx(13.0)
+    assert result['spread'][0] == pytest.approx(std)
+    assert result['lower'][0] == pytest.approx(13.0 - 2 * std)
+    assert result['upper'][0] == pytest.approx(13.0 + 2 * std)
+    assert result['status'][0] == 'Above Range'
+    assert not result['is_anomaly'][0]
+
+
+def test_zscore_needs_two_history_periods():
+    result = detect_anomalies([[1, 2], [1, 1]], method='zscore', min_periods=1)
+    assert list(result['status']) == ['No Data', 'No Data']
+
+
+def test_ewma_baseline_skips_missing_periods():
+    mean, std = ewma_baseline(np.array([[1.0, np.nan, 3.0]]))
+    expected_mean, expected_std = ewma_baseline(np.array([[1.0, 3.0]]))
+    assert mean == pytest.approx(expected_mean)
+    assert std == pytest.approx(expected_std)
+
+
+def test_ewma_tracks_a_level_shift_the_median_does_not():
+    series = [10] * 8 + [20] * 3 + [20]
+    ewma = detect_anomalies(series, method='ewma')
+    mad = detect_anomalies(series, method='mad')
+    assert ewma['center'][0] > mad['center'][0] == 10
+    assert ewma['status'][0] == 'Within Range'
+    assert mad['status'][0] == 'Above Range'
+
+
+def test_inverse_metrics_flip_the_range_status():
+    result = detect_anomalies([[10, 10, 10, 10, 30], [10, 10, 10, 10, 2], [10, 10, 10, 10, 2]],
+                              inverse=[True, True, False])
+    assert list(result['status']) == ['Below Range', 'Above Range', 'Below Range']
+    assert list(result['is_anomaly']) == [True, False, True]
+
+
+def test_missing_current_or_history_is_no_data():
+    result = detect_anomalies([[1, 2, 3, np.nan], [np.nan, np.nan, 4, 5]])
+    assert list(result['status']) == ['No Data', 'No Data']
+    assert np.isnan(result['score']).all()
+
+
+def test_unknown_detector_is_rejected():
+    with pytest.raises(ValueError):
+        detect_anomalies([1, 2, 3, 4], method='iqr')
@@ -0,0 +1,117 @@
+"""
+Smoke tests for local_bigquery - dashboard SQL run against a minimal Parquet fixture set.
+Run with: python -m pytest test_local_bigquery.py (needs the dev requirements, i.e. duckdb)
+"""
+
+import json
+from datetime import date
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+pytest.importorskip('duckdb')
+
+from intraday_monitor import bio_auth_buckets_sql, transaction_buckets_sql
+from local_bigquery import PARTITIONING_FILE, LocalBigQueryClient, write_fixture
+
+DAY = date(2026, 10, 19)
+
+
+def timestamps(*values):
+    return pd.to_datetime(list(values))
+
+
+def params(**values):
+    """QueryJobConfig stand-in with scalar / array parameters"""
+    return SimpleNamespace(query_parameters=[
+        SimpleNamespace(name=name, values=value) if isinstance(value, list) else SimpleNamespace(name=name, value=value)
+        for name, value in values.items()
+    ])
+
+
+@pytest.fixture
+def client(tmp_path):
+    """Client over a minimal fixture set: CDC tables for the intraday queries and a partitioned fact table"""
+    write_fixture(pd.DataFrame({
+        'request_id': ['a', 'b', 'c'],
+        'trans_amt': [1000, 2000, 3000],
+        'aggregator': ['YBL', 'NSDL', 'YBL'],
+        'master_trans_type': ['CW', 'CW', 'CW'],
+        'op_time': timestamps('2026-10-19 10:01', '2026-10-19 10:06', '2026-10-19 09:50'),
+    }), 'ds_striim', 'T_AEPSR_TRANSACTION_REQ', tmp_path)
+    write_fixture(pd.DataFrame({
+        'request_id': ['a', 'a', 'a', 'b', 'b', 'c', 'c'],
+        'op_name': ['INSERT', 'UPDATE', 'UPDATE', 'INSERT', 'UPDATE', 'INSERT', 'UPDATE'],
+        'spice_message': [None, 'pending', 'SUCCESS', None, 'failed', None, 'success'],
+        'op_time': timestamps('2026-10-19 10:01', '2026-10-19 10:02', '2026-10-19 10:03', '2026-10-19 10:06',
+                              '2026-10-19 10:07', '2026-10-19 09:50', '2026-10-19 09:51'),
+    }), 'ds_striim', 'T_AEPSR_TRANSACTION_RES', tmp_path)
+    write_fixture(pd.DataFrame({
+        'request_id': ['a', 'a', 'b', 'b', 'z', 'z'],
+        'client_id': ['1', None, '2', None, '9', None],
+        'AGGREGATOR': ['YBL', None, 'NSDL', None, 'YBL', None],
+        'OP_NAME': ['INSERT', 'UPDATE'] * 3,
+        'RC': [None, '00', None, '91', None, '00'],
+        'op_time': timestamps('2026-10-19 10:01', '2026-10-19 10:02', '2026-10-19 10:06', '2026-10-19 10:07',
+                              '2026-10-18 10:01', '2026-10-18 10:02'),
+    }), 'ds_striim', 'T_AEPSR_BIO_AUTH_LOGGING_P', tmp_path)
+    write_fixture(pd.DataFrame({
+        'log_date_time': timestamps('2026-10-17 09:00', '2026-10-18 09:00', '2026-10-18 10:00', '2026-10-18 11:00'),
+        'aggregator': ['YBL', 'YBL', 'NSDL', 'NSDL'],
+        'status': ['SUCCESS', 'FAILED', 'SUCCESS', 'SUCCESS'],
+        'amount': [100.0, 200.0, 300.0, 400.0],
+    }), 'prod_dwh', 'aeps_trans_res', tmp_path)
+    (tmp_path / PARTITIONING_FILE).write_text(json.dumps({'prod_dwh.aeps_trans_res': 'log_date_time'}))
+    return LocalBigQueryClient(str(tmp_path))
+
+
+def test_transaction_buckets_window_on_raw_op_time(client):
+    sql = transaction_buckets_sql('`ds_striim.T_AEPSR_TRANSACTION_REQ`', '`ds_striim.T_AEPSR_TRANSACTION_RES`')
+    df = client.query(sql, params(day=DAY, since_minute=600)).result().to_dataframe()
+
+    # 09:50 is before the window; the latest UPDATE of each request decides success
+    assert df.sort_values('bucket_minute')['bucket_minute'].tolist() == [600, 605]
+    assert df['total_txns'].sum() == 2
+    assert df['success_txns'].sum() == 1
+    assert df['max_minute'].max() == 606
+
+
+def test_bio_auth_buckets_skip_other_days(client):
+    df = client.query(bio_auth_buckets_sql('`ds_striim.T_AEPSR_BIO_AUTH_LOGGING_P`'),
+                      params(day=DAY, since_minute=600)).result().to_dataframe()
+    assert df.sort_values('bucket_minute')['bucket_minute'].tolist() == [600, 605]
+    assert df['total_att'].sum() == 2
+    assert df['succ_att'].sum() == 1
+
+
+def test_bigquery_dialect_shim(client):
+    sql = """
+    DECLARE start_day DATE DEFAULT DATE '2026-10-18';
+    SELECT
+      aggregator,
+      COUNTIF(status = 'SUCCESS') AS success,
+      ROUND(SAFE_DIVIDE(COUNTIF(status = 'SUCCESS'), COUNT(*)) * 100, 1) AS success_rate,
+      APPROX_QUANTILES(amount, 2)[OFFSET(1)] AS median_amount
+    FROM `prod_dwh.aeps_trans_res`
+    WHERE DATE(log_date_time) >= start_day
+      AND aggregator IN UNNEST(@aggregators)
+    GROUP BY aggregator
+    ORDER BY aggregator
+    """
+    df = client.query(sql, params(aggregators=['YBL', 'NSDL'])).result().to_dataframe()
+    assert df['aggregator'].tolist() == ['NSDL', 'YBL']
+    assert df['success'].tolist() == [2, 0]
+    assert df['success_rate'].tolist() == [100.0, 0.0]
+    assert df['median_amount'].tolist() == [350.0, 200.0]
+
+
+def test_paged_results_and_table_metadata(client):
+    rows = client.query("SELECT * FROM `prod_dwh.aeps_trans_res`").result(page_size=3)
+    assert [len(page) for page in rows.to_dataframe_iterable()] == [3, 1]
+
+    table = client.get_table('spicemoney-dwh.prod_dwh.aeps_trans_res')
+    assert table.num_rows == 4
+    assert table.time_partitioning.field == 'log_date_time'
+    with pytest.raises(LookupError):
+        client.get_table('prod_dwh.missing_table')
@@ -0,0 +1,72 @@
+"""
+Smoke tests for local_sheets - the Sheets session and typed ingestion over a minimal CSV fixture set.
+Run with: python -m pytest test_local_sheets.py
+"""
+
+import pandas as pd
+import pytest
+
+from anomaly_processing import process_anomaly_data
+from local_sheets import LocalSheetsClient
+from sheets_ingest import TYPED_WORKSHEETS, load_typed_worksheet
+from sheets_session import WorksheetNotFound, get_worksheet_df, register_worksheets, reset_sheets_session
+
+SPREADSHEET_ID = 'anomaly-fixture'
+
+DASHBOARD_CSV = """Metric,FTD Data,Median 90 Day,-2STD,2STD,Date,Anamoly Detection
+Transaction Success Rate,91.20%,93,92,94,2026-10-18,
+2FA per user,1.6,1.2,1,1.4,2026-10-18,
+Login Success Rate,97.50%,97,96,98,2026-10-18,Within Range
+"""
+
+RFM_CSV = """date,total_caught_per,app_caught_per,web_caught_per,fraud_total,total_fr_amt,APP_WEB_caught_amt
+2026-09-30,81.5%,40.1%,41.4%,120,"1,250,000","1,018,750"
+2026-10-31,78.0%,38.0%,40.0%,98,"980,000","764,400"
+"""
+
+
+@pytest.fixture
+def client(tmp_path):
+    """Client over one recorded spreadsheet with the anomaly Dashboard and rfm worksheets"""
+    spreadsheet_dir = tmp_path / SPREADSHEET_ID
+    spreadsheet_dir.mkdir()
+    (spreadsheet_dir / 'Dashboard.csv').write_text(DASHBOARD_CSV, encoding='utf-8')
+    (spreadsheet_dir / 'rfm.csv').write_text(RFM_CSV, encoding='utf-8')
+
+    reset_sheets_session()
+    TYPED_WORKSHEETS.clear()
+    register_worksheets(SPREADSHEET_ID, ['Dashboard', 'rfm'])
+    yield LocalSheetsClient(str(tmp_path))
+    reset_sheets_session()
+    TYPED_WORKSHEETS.clear()
+
+
+def test_registered_worksheets_load_in_one_batch_then_from_cache(client):
+    dashboard = get_worksheet_df(client, SPREADSHEET_ID, 'Dashboard')
+    assert dashboard['Metric'].tolist() == ['Transaction Success Rate', '2FA per user', 'Login Success Rate']
+    assert client.calls.get('values_batch_get') == 1
+
+    rfm = get_worksheet_df(client, SPREADSHEET_ID, 'rfm')
+    assert len(rfm) == 2
+    assert client.calls.get('values_batch_get') == 1
+
+
+def test_typed_worksheets_feed_anomaly_processing(client):
+    dashboard = load_typed_worksheet(client, SPREADSHEET_ID, 'Dashboard')
+    assert dashboard['FTD Data'].tolist() == [91.2, 1.6, 97.5]
+    assert dashboard['Median 90 Day'].dtype == 'float64'
+
+    anomalies = process_anomaly_data(dashboard)
+    assert anomalies['Transaction Success Rate']['anomaly_status'] == 'Below Range'
+    # Inverse metric: above the upper bound is worse than expected
+    assert anomalies['2FA per user']['anomaly_status'] == 'Below Range'
+    assert anomalies['Login Success Rate']['anomaly_status'] == 'Within Range'
+
+    rfm = load_typed_worksheet(client, SPREADSHEET_ID, 'rfm')
+    assert pd.api.types.is_datetime64_any_dtype(rfm['date'])
+    assert rfm['total_fr_amt'].tolist() == [1250000.0, 980000.0]
+
+
+def test_missing_worksheet_raises_like_the_api(client):
+    with pytest.raises(WorksheetNotFound):
+        get_worksheet_df(client, SPREADSHEET_ID, 'No Such Tab')
@@ -0,0 +1,72 @@
+"""
+AEPS Health Dashboard - Tile grid component
+The home-page tiles drawn as one element. The whole health_metrics dict goes in.
+Every section and tile is rendered in a single component frame, styled with static
+CSS classes per status (tile_grid_frontend/index.html). The id (metric name) of a
+clicked tile comes back. This replaces one st.button and one injected <style> block
+per tile on every rerun.
+
+The frontend is plain HTML/JS that speaks the Streamlit component protocol, so
+there is no build step. It skips the DOM rebuild when the tiles are unchanged.
+"""
+
+import os
+
+import streamlit as st
+import streamlit.components.v1 as components
+
+FRONTEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tile_grid_frontend')
+
+_tile_grid_component = components.declare_component('tile_grid', path=FRONTEND_DIR)
+
+STATUS_EMOJIS = {'green': '🟢', 'yellow': '🟡', 'red': '🔴'}
+TREND_EMOJIS = {'up': '📈', 'down': '📉', 'stable': '➡️'}
+
+# Shown for a tile whose metric is missing from health_metrics
+MISSING_METRIC = {'value': 0, 'status': 'red', 'trend': 'stable', 'change': 0, 'unit': '%'}
+
+
+def tile_payload(metric_name, label, metric_data, stale=False):
+    """The fields the frontend draws for one tile"""
+    status = metric_data.get('status', 'red')
+    value = metric_data.get('value', 0)
+    unit = metric_data.get('unit', '%' if isinstance(value, float) and value < 100 else '')
+    trend = TREND_EMOJIS.get(metric_data.get('trend', 'stable'), '➡️')
+    return {
+        'id': metric_name,
+        'label': label,
+        'status': status if status in STATUS_EMOJIS else 'red',
+        'emoji': STATUS_EMOJIS.get(status, '🔴'),
+        'value': f"{value}{unit}",
+        'trend': f"{trend} {metric_data.get('change', 0):+.1f}",
+        'stale': bool(stale),
+    }
+
+
+def grid_payload(health_metrics, sections, is_stale=None):
+    """sections = [(title, [(label, metric name), ...]), ...] -> JSON-ready sections of tiles"""
+    return [
+        {
+            'title': title,
+            'tiles': [
+                tile_payload(metric_name, label, health_metrics.get(metric_name, MISSING_METRIC),
+                             is_stale(metric_name) if is_stale else False)
+                for label, metric_name in tiles
+            ],
+        }
+        for title, tiles in sections
+    ]
+
+
+def tile_grid(health_metrics, sections, is_stale=None, key='home_tile_grid'):
+    """Draw the tile grid - returns the metric name of a newly clicked tile, else None"""
+    event = _tile_grid_component(sections=grid_payload(health_metrics, sections, is_stale), key=key, default=None)
+    if not event:
+        return None
+
+    # The component keeps returning its last click on later reruns; act on each click once
+    handled_key = f"{key}_handled_click"
+    if st.session_state.get(handled_key) == event.get('nonce'):
+        return None
+    st.session_state[handled_key] = event.get('nonce')
+    return event.get('tile')
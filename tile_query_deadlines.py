@@ -0,0 +1,178 @@
+"""
+AEPS Health Dashboard - Per-tile query deadlines
+Waits for each tile's BigQuery job with a deadline. A job that overruns is
+cancelled, the timeout is recorded, and the caller gets the tile's
+last-known-good DataFrame back so one slow query cannot freeze the home page.
+Streamed results (result(page_size=...).to_dataframe_iterable()) are remembered
+too, as the concatenated pages once the last page has been read.
+
+Deadlines (seconds) come from TILE_QUERY_DEADLINE_SECONDS (default for every
+query) and TILE_QUERY_DEADLINES, a JSON object of per-query overrides, e.g.
+TILE_QUERY_DEADLINES='{"rfm_score": 30, "distributor_churn": 120}'.
+"""
+
+import concurrent.futures
+import json
+import os
+from datetime import datetime
+
+import pandas as pd
+
+DEFAULT_TILE_QUERY_DEADLINE = float(os.getenv('TILE_QUERY_DEADLINE_SECONDS', '60'))
+
+# Heavier extracts get more headroom than the hourly core tiles
+TILE_QUERY_DEADLINES = {
+    'transaction_success': 45,
+    'bio_authentication': 45,
+    'bank_error': 60,
+    'rfm_score': 90,
+    'distributor_churn': 120,
+    'priority_distributor_churn': 120,
+    'm2d_cash_support': 180,
+    'mcc_cash_support': 180,
+}
+
+try:
+    TILE_QUERY_DEADLINES.update({k: float(v) for k, v in json.loads(os.getenv('TILE_QUERY_DEADLINES', '{}')).items()})
+except (ValueError, AttributeError) as e:
+    print(f"⚠️ Ignoring invalid TILE_QUERY_DEADLINES: {e}")
+
+# Last successful DataFrame per query name, served when a later run times out
+LAST_KNOWN_GOOD = {}
+
+# Every recorded timeout (most recent last) and the queries currently served stale
+TILE_QUERY_TIMEOUTS = []
+STALE_QUERIES = {}
+
+MAX_RECORDED_TIMEOUTS = 200
+
+
+class TileQueryTimeout(Exception):
+    """Raised when a tile query overran its deadline and has no last-known-good data"""
+
+    def __init__(self, query_name, deadline):
+        super().__init__(f"{query_name} exceeded its {deadline:.0f}s deadline and was cancelled")
+        self.query_name = query_name
+        self.deadline = deadline
+
+
+def get_query_deadline(query_name):
+    """Deadline in seconds for a query name (0 or less disables it)"""
+    return float(TILE_QUERY_DEADLINES.get(query_name, DEFAULT_TILE_QUERY_DEADLINE))
+
+
+def remember_last_known_good(query_name, df):
+    """Keep a successful result as the tile's fallback and clear its stale flag"""
+    LAST_KNOWN_GOOD[query_name] = {'data': df, 'fetched_at': datetime.now()}
+    STALE_QUERIES.pop(query_name, None)
+    return df
+
+
+def record_timeout(query_name, deadline, job_id=None):
+    """Record a query that overran its deadline"""
+    record = {
+        'query_name': query_name,
+        'deadline': deadline,
+        'job_id': job_id,
+        'timed_out_at': datetime.now(),
+        'has_fallback': query_name in LAST_KNOWN_GOOD,
+    }
+    TILE_QUERY_TIMEOUTS.append(record)
+    del TILE_QUERY_TIMEOUTS[:-MAX_RECORDED_TIMEOUTS]
+    STALE_QUERIES[query_name] = record
+    print(f"⏱️ {query_name} exceeded its {deadline:.0f}s deadline - job {job_id} cancelled")
+    return record
+
+
+def is_query_stale(query_name):
+    """Whether a query is currently served from last-known-good data"""
+    return query_name in STALE_QUERIES
+
+
+class TileRowIterator:
+    """Row iterator wrapper that remembers the DataFrame (or streamed pages) it produces"""
+
+    def __init__(self, query_name, rows):
+        self._query_name = query_name
+        self._rows = rows
+
+    def to_dataframe(self, *args, **kwargs):
+        return remember_last_known_good(self._query_name, self._rows.to_dataframe(*args, **kwargs))
+
+    def to_dataframe_iterable(self, *args, **kwargs):
+        """Pages as they arrive; their concatenation is remembered after the last one"""
+        pages = []
+        for page in self._rows.to_dataframe_iterable(*args, **kwargs):
+            pages.append(page)
+            yield page
+        # An empty result has no columns to replay, so it leaves the previous fallback in place
+        if pages:
+            remember_last_known_good(self._query_name, pd.concat(pages, ignore_index=True))
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def __getattr__(self, name):
+        return getattr(self._rows, name)
+
+
+class TileQueryJob:
+    """QueryJob wrapper used by the loaders - same result()/to_dataframe() calls"""
+
+    def __init__(self, query_name, job):
+        self._query_name = query_name
+        self._job = job
+
+    def result(self, *args, **kwargs):
+        return TileRowIterator(self._query_name, self._job.result(*args, **kwargs))
+
+    def to_dataframe(self, *args, **kwargs):
+        return remember_last_known_good(self._query_name, self._job.to_dataframe(*args, **kwargs))
+
+    def __getattr__(self, name):
+        return getattr(self._job, name)
+
+
+class StaleTileQueryJob:
+    """Stand-in for a cancelled job that replays the last-known-good DataFrame"""
+
+    def __init__(self, query_name, deadline):
+        self._query_name = query_name
+        self._deadline = deadline
+
+    def _last_known_good(self):
+        entry = LAST_KNOWN_GOOD.get(self._query_name)
+        if entry is None:
+            raise TileQueryTimeout(self._query_name, self._deadline)
+        return entry['data'].copy()
+
+    def result(self, *args, **kwargs):
+        return self
+
+    def to_dataframe(self, *args, **kwargs):
+        return self._last_known_good()
+
+    def to_dataframe_iterable(self, *args, **kwargs):
+        yield self._last_known_good()
+
+    def __iter__(self):
+        return iter(self._last_known_good().itertuples(index=False))
+
+
+def wait_with_deadline(query_name, job):
+    """Wait for a started job within its deadline; cancel and fall back when it overruns"""
+    deadline = get_query_deadline(query_name)
+    if deadline <= 0:
+        return TileQueryJob(query_name, job)
+
+    try:
+        job.result(timeout=deadline)
+    except concurrent.futures.TimeoutError:
+        try:
+            job.cancel()
+        except Exception as e:
+            print(f"⚠️ Could not cancel {query_name} job: {e}")
+        record_timeout(query_name, deadline, getattr(job, 'job_id', None))
+        return StaleTileQueryJob(query_name, deadline)
+
+    return TileQueryJob(query_name, job)
@@ -0,0 +1,183 @@
+"""
+AEPS Health Dashboard - Tile registry
+Every home-page tile is declared once: the metrics it produces, its data
+source, refresh tier, status thresholds, compute function and fallback
+metrics. A BigQuery source lists the run_tile_query names the tile reads
+('bigquery:<query>[,<query>...]'), which is what its stale badge follows.
+evaluate_tiles() runs the compute functions - tiles that fetch data
+in parallel on a thread pool, fixed-value tiles inline - and merges their
+metrics in registry order, so each tile has a single code path.
+
+A compute function takes (context, tile) and returns {metric name: metric dict}.
+Returning None serves the tile's fallback metrics; raising does the same and is
+logged. Worker threads get the Streamlit script context attached, so st.* calls
+and st.session_state keep working inside compute functions - but elements they
+draw are not replayed by st.cache_data, so fallback notices are left to the
+caller (fallback_tiles() after evaluate_tiles(), on the main thread).
+
+Workers per evaluation come from TILE_WORKERS (default 8, 1 = sequential).
+"""
+
+import copy
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+try:
+    from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+except ImportError:
+    add_script_run_ctx = get_script_run_ctx = None
+
+TILE_WORKERS = int(os.getenv('TILE_WORKERS', '8'))
+
+# hourly: Core AEPS tiles refreshed at :59 in business hours; daily: refreshed at 8:59 AM
+REFRESH_TIERS = ('hourly', 'daily')
+
+# Tiles by name (same names as the per-tile refresh keys), in display order
+TILE_REGISTRY = {}
+
+# Last evaluation per tile: {'seconds', 'outcome', 'served_fallback', 'evaluated_at'}
+TILE_EVALUATIONS = {}
+
+
+def register_tile(name, metrics, compute, source, tier, thresholds=None, fallback=None, parallel=True):
+    """Declare a tile - metrics is the list of metric names it produces, parallel=False runs it inline"""
+    if tier not in REFRESH_TIERS:
+        raise ValueError(f"Unknown refresh tier for tile {name}: {tier}")
+    TILE_REGISTRY[name] = {
+        'name': name,
+        'metrics': list(metrics),
+        'compute': compute,
+        'source': source,
+        'tier': tier,
+        'thresholds': thresholds,
+        'fallback': fallback or {},
+        'parallel': parallel,
+    }
+    return TILE_REGISTRY[name]
+
+
+def source_queries(source):
+    """Query names behind a source - 'bigquery:<query>[,<query>...]', none for sheets / static"""
+    kind, _, names = (source or '').partition(':')
+    if kind != 'bigquery':
+        return []
+    return [name.strip() for name in names.split(',') if name.strip()]
+
+
+def metric_query_names():
+    """{metric name: query names of the tile producing it}, from the registered sources"""
+    return {metric: source_queries(tile['source'])
+            for tile in TILE_REGISTRY.values() for metric in tile['metrics']}
+
+
+def static_metrics(metrics):
+    """Compute function serving fixed metric values"""
+    return lambda context, tile: copy.deepcopy(metrics)
+
+
+def tiles_in_tier(tier):
+    """Tile names with the given refresh tier"""
+    return [name for name, tile in TILE_REGISTRY.items() if tile['tier'] == tier]
+
+
+def tile_status(value, thresholds):
+    """green / yellow / red from a thresholds declaration
+
+    thresholds = {'direction': 'higher' | 'lower', 'green': limit, 'yellow': limit, 'strict': bool}
+    'higher' means value >= limit passes (> when strict), 'lower' means value <= limit (< when strict).
+    """
+    higher = thresholds.get('direction', 'higher') == 'higher'
+    strict = thresholds.get('strict', False)
+
+    def passes(limit):
+        if higher:
+            return value > limit if strict else value >= limit
+        return value < limit if strict else value <= limit
+
+    if passes(thresholds['green']):
+        return 'green'
+    if passes(thresholds['yellow']):
+        return 'yellow'
+    return 'red'
+
+
+def median_band_status(current, median, std_dev):
+    """Status against a historical median - at/above is green, within one std dev below is yellow"""
+    if current >= median:
+        return 'green'
+    if current >= median - std_dev:
+        return 'yellow'
+    return 'red'
+
+
+def trend_direction(current, baseline):
+    """'up' / 'down' / 'stable' of current against a baseline"""
+    if current > baseline:
+        return 'up'
+    if current < baseline:
+        return 'down'
+    return 'stable'
+
+
+def run_tile(tile, context):
+    """Metrics of one tile - its fallback when the compute function fails or has no data"""
+    started = time.perf_counter()
+    try:
+        result = tile['compute'](context, tile)
+        outcome = 'ok' if result is not None else 'no data'
+    except Exception as e:
+        print(f"⚠️ Tile {tile['name']} failed, serving fallback: {e}")
+        result = None
+        outcome = 'error'
+    if result is None:
+        result = copy.deepcopy(tile['fallback'])
+
+    TILE_EVALUATIONS[tile['name']] = {
+        'seconds': time.perf_counter() - started,
+        'outcome': outcome,
+        'served_fallback': outcome != 'ok' and bool(tile['fallback']),
+        'evaluated_at': datetime.now(),
+    }
+    return result
+
+
+def fallback_tiles(names=None):
+    """Tiles (all by default) whose last evaluation served their fallback metrics"""
+    return [TILE_REGISTRY[name] for name in (names or TILE_REGISTRY)
+            if TILE_EVALUATIONS.get(name, {}).get('served_fallback')]
+
+
+def evaluate_tiles(context, names=None, max_workers=None):
+    """Evaluate tiles (all by default) and merge their metrics in registry order"""
+    tiles = [TILE_REGISTRY[name] for name in (names or TILE_REGISTRY)]
+    workers = TILE_WORKERS if max_workers is None else max_workers
+    pooled = [tile for tile in tiles if tile['parallel']] if workers > 1 else []
+
+    results = {}
+    if len(pooled) > 1:
+        ctx = get_script_run_ctx() if get_script_run_ctx else None
+
+        def attach_script_context():
+            if ctx is not None:
+                add_script_run_ctx(threading.current_thread(), ctx)
+
+        with ThreadPoolExecutor(max_workers=min(workers, len(pooled)), thread_name_prefix='tile',
+                                initializer=attach_script_context) as pool:
+            futures = {tile['name']: pool.submit(run_tile, tile, context) for tile in pooled}
+            # Inline tiles are computed on this thread while the pool works
+            for tile in tiles:
+                if tile['name'] not in futures:
+                    results[tile['name']] = run_tile(tile, context)
+            for name, future in futures.items():
+                results[name] = future.result()
+    else:
+        for tile in tiles:
+            results[tile['name']] = run_tile(tile, context)
+
+    metrics = {}
+    for tile in tiles:
+        metrics.update(results[tile['name']])
+    return metrics
@@ -0,0 +1,223 @@
+"""
+AEPS Health Dashboard - Uptime upload processing
+Turns an uploaded uptime sheet (one row per service, one column per day such
+as '01-Sep', '01-Sep-2024', '2024-09-01' or just '01') into the long
+date/service/uptime/target/status frame the uptime charts use.
+
+Day headers are parsed once per column, with month and year taken from the
+header itself. Headers without a year get the most recent year that does not
+put them in the future, so a Nov-Dec-Jan upload lands in the right years. Bare
+day numbers follow the same rule for the month: the current month, or the
+previous one when the days run past today.
+Cells are reshaped with a single melt and status is assigned with np.select.
+For very wide uploads (thousands of services x 365 days) iter_uptime_chunks
+processes a block of services at a time to bound memory.
+"""
+
+import re
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+SERVICE_COLUMNS = ['Sub- Component', 'Sub-Component', 'Service', 'Component', 'System']
+TARGET_COLUMNS = ['Target', 'target']
+DEFAULT_UPTIME_TARGET = 99.99
+
+# Values never used as a service name when falling back to the first non-empty cell
+NON_SERVICE_VALUES = ['99.99%', '100', '0']
+
+# Uploads larger than this many day cells are processed in chunks of services
+UPTIME_CHUNK_CELLS = 500000
+
+MONTHS = {name.lower(): number for number, name in enumerate(
+    ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'], start=1)}
+MONTH_NAMES = ['january', 'february', 'march', 'april', 'may', 'june', 'july',
+               'august', 'september', 'october', 'november', 'december']
+
+DAY_MONTH_PATTERN = re.compile(r"^(\d{1,2})[-/ ]([A-Za-z]{3,9})\.?(?:[-/ ,]+(\d{2}|\d{4}))?$")
+MONTH_DAY_PATTERN = re.compile(r"^([A-Za-z]{3,9})\.?[-/ ](\d{1,2})(?:[-/ ,]+(\d{2}|\d{4}))?$")
+ISO_DATE_PATTERN = re.compile(r"^(\d{4})-(\d{1,2})-(\d{1,2})(?:[ T].*)?$")
+DAY_ONLY_PATTERN = re.compile(r"^0?(\d{1,2})$")
+
+
+def month_number(name):
+    """'Sep' / 'Sept' / 'September' -> 9 (None when not a month)"""
+    name = name.lower()
+    number = MONTHS.get(name[:3])
+    if number and (MONTH_NAMES[number - 1].startswith(name) or name == 'sept'):
+        return number
+    return None
+
+
+def build_date(year, month, day):
+    """Timestamp or None for impossible dates such as 31-Sep"""
+    try:
+        return pd.Timestamp(year=year, month=month, day=day)
+    except (ValueError, TypeError):
+        return None
+
+
+def infer_year(month, day, reference):
+    """Most recent year in which month/day is not after the reference date"""
+    year = reference.year
+    if (month, day) > (reference.month, reference.day):
+        year -= 1
+    return year
+
+
+def full_year(year_text):
+    year = int(year_text)
+    return year + 2000 if year < 100 else year
+
+
+def parse_day_header(header, reference=None):
+    """Header with a month (name or full date) -> Timestamp, otherwise None"""
+    reference = reference or date.today()
+
+    if isinstance(header, (datetime, date, pd.Timestamp)):
+        return pd.Timestamp(header).normalize()
+
+    text = str(header).strip()
+
+    match = ISO_DATE_PATTERN.match(text)
+    if match:
+        return build_date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+
+    match = DAY_MONTH_PATTERN.match(text)
+    if match:
+        day_text, month_text, year_text = match.groups()
+    else:
+        match = MONTH_DAY_PATTERN.match(text)
+        if not match:
+            return None
+        month_text, day_text, year_text = match.groups()
+
+    month = month_number(month_text)
+    if month is None:
+        return None
+    day = int(day_text)
+    year = full_year(year_text) if year_text else infer_year(month, day, reference)
+    return build_date(year, month, day)
+
+
+def find_date_columns(columns, reference=None, default_month=None):
+    """{column: Timestamp} for the day columns of an upload
+
+    Headers carrying a month are used when present; otherwise bare day numbers
+    ('01'..'31') are read as days of default_month. Without one they go in the
+    reference month, or the month before when a day would be after the reference date.
+    """
+    reference = reference or date.today()
+    dates = {}
+    for col in columns:
+        parsed = parse_day_header(col, reference)
+        if parsed is not None:
+            dates[col] = parsed
+    if dates:
+        return dates
+
+    days = {}
+    for col in columns:
+        match = DAY_ONLY_PATTERN.match(str(col).strip())
+        if match:
+            days[col] = int(match.group(1))
+    if not days:
+        return dates
+
+    month_start = pd.Timestamp(default_month or reference).replace(day=1)
+    if default_month is None and max(days.values()) > reference.day:
+        # A sheet of one month with days still to come this month is last month's
+        month_start -= pd.DateOffset(months=1)
+    for col, day in days.items():
+        parsed = build_date(month_start.year, month_start.month, day)
+        if parsed is not None:
+            dates[col] = parsed
+    return dates
+
+
+def non_empty_text(series):
+    """Stripped text with missing / blank cells as NaN"""
+    text = series.astype(str).str.strip()
+    return text.where(series.notna() & (text != ''))
+
+
+def service_names(raw_df):
+    """Service per row: first named service column, else the first non-empty cell"""
+    service = pd.Series(np.nan, index=raw_df.index, dtype=object)
+    for col in SERVICE_COLUMNS:
+        if col in raw_df.columns:
+            service = service.fillna(non_empty_text(raw_df[col]))
+
+    missing = service.isna()
+    if missing.any():
+        fallback = pd.Series(np.nan, index=raw_df.index[missing], dtype=object)
+        for col in raw_df.columns:
+            values = raw_df.loc[missing, col]
+            candidates = non_empty_text(values).where(~values.astype(str).isin(NON_SERVICE_VALUES))
+            fallback = fallback.fillna(candidates)
+            if fallback.notna().all():
+                break
+        service[missing] = fallback
+
+    return service.where(~service.isin(['nan', '']))
+
+
+def service_targets(raw_df):
+    """Uptime target per row ('99.9%' -> 99.9), DEFAULT_UPTIME_TARGET when absent"""
+    target = pd.Series(np.nan, index=raw_df.index, dtype=float)
+    for col in TARGET_COLUMNS:
+        if col in raw_df.columns:
+            parsed = pd.to_numeric(raw_df[col].astype(str).str.replace('%', '', regex=False).str.strip(), errors='coerce')
+            target = target.fillna(parsed.where(raw_df[col].notna()))
+    return target.fillna(DEFAULT_UPTIME_TARGET)
+
+
+def uptime_status(uptime, target):
+    """green at/above target, yellow within 1 point below it, red otherwise"""
+    return np.select([uptime >= target, uptime >= target - 1], ['green', 'yellow'], default='red')
+
+
+def process_uptime_frame(raw_df, date_columns):
+    """Wide upload -> long frame (date, service, uptime, target, status), row by row then day by day"""
+    columns = ['date', 'service', 'uptime', 'target', 'status']
+    wide = pd.DataFrame({
+        '_row': np.arange(len(raw_df)),
+        'service': service_names(raw_df).to_numpy(),
+        'target': service_targets(raw_df).to_numpy(),
+    })
+    wide = wide[wide['service'].notna()]
+    if wide.empty:
+        return pd.DataFrame(columns=columns)
+
+    day_values = raw_df[list(date_columns)].iloc[wide['_row'].to_numpy()]
+    day_values = day_values.apply(pd.to_numeric, errors='coerce')
+    # Positional day keys so duplicate or non-string headers melt cleanly
+    day_values.columns = range(len(date_columns))
+    day_values.index = wide.index
+    day_values = pd.concat([wide, day_values], axis=1)
+
+    long_df = day_values.melt(id_vars=['_row', 'service', 'target'], var_name='_day', value_name='uptime')
+    long_df = long_df.dropna(subset=['uptime'])
+    # melt is column-major; restore service order with days in header order
+    long_df = long_df.sort_values(['_row', '_day'], kind='stable')
+
+    day_dates = pd.DatetimeIndex(list(date_columns.values())).to_numpy()
+    long_df['date'] = day_dates[long_df['_day'].to_numpy(dtype=int)]
+    long_df['status'] = uptime_status(long_df['uptime'].to_numpy(), long_df['target'].to_numpy())
+    return long_df[columns].reset_index(drop=True)
+
+
+def iter_uptime_chunks(raw_df, date_columns, chunk_rows=500):
+    """Yield (services processed, long frame) per block of chunk_rows services"""
+    for start in range(0, len(raw_df), chunk_rows):
+        chunk = raw_df.iloc[start:start + chunk_rows]
+        yield start + len(chunk), process_uptime_frame(chunk, date_columns)
+
+
+def uptime_chunk_rows(raw_df, date_columns, max_cells=UPTIME_CHUNK_CELLS):
+    """Services per chunk so one chunk stays under max_cells day cells (None = no chunking)"""
+    cells = len(raw_df) * max(len(date_columns), 1)
+    if cells <= max_cells:
+        return None
+    return max(1, max_cells // max(len(date_columns), 1))